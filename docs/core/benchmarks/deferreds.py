@@ -135,6 +135,75 @@ def pauseUnpause(n):
     d.unpause()
 pauseUnpause = benchmarkNFunc(20, ns)(pauseUnpause)
 
+def chainDeferreds(n):
+    """
+    Create a chain of the given number of deferreds, each waiting on the
+    result of the next one because a callback on it returned that one, and
+    shoot a result up the chain from its far end.
+    """
+    first = last = defer.Deferred()
+    for i in range(n):
+        d = defer.Deferred()
+        last.addCallback(lambda ignored, d=d: d)
+        last = d
+    first.callback(None)
+    last.callback(1)
+chainDeferreds = benchmarkNFunc(20, ns)(chainDeferreds)
+
+def inlineCallbacksLoop(n):
+    """
+    Run an inlineCallbacks generator which waits the given number of times
+    on deferreds which already have a result.
+    """
+    @defer.inlineCallbacks
+    def loop():
+        for i in range(n):
+            yield defer.succeed(i)
+    loop()
+inlineCallbacksLoop = benchmarkNFunc(20, ns)(inlineCallbacksLoop)
+
+def inlineCallbacksWaiting(n):
+    """
+    Run an inlineCallbacks generator which waits on the given number of
+    deferreds which only get a result once it is waiting on them.
+    """
+    ds = [defer.Deferred() for i in range(n)]
+    @defer.inlineCallbacks
+    def loop():
+        for d in ds:
+            yield d
+    loop()
+    for d in ds:
+        d.callback(None)
+inlineCallbacksWaiting = benchmarkNFunc(20, ns)(inlineCallbacksWaiting)
+
+def inlineCallbacksFailures(n):
+    """
+    Run an inlineCallbacks generator which waits the given number of times
+    on deferreds which have already failed, and catches the exceptions.
+    """
+    error = ZeroDivisionError()
+    @defer.inlineCallbacks
+    def loop():
+        for i in range(n):
+            try:
+                yield defer.fail(error)
+            except ZeroDivisionError:
+                pass
+    loop()
+inlineCallbacksFailures = benchmarkNFunc(20, ns)(inlineCallbacksFailures)
+
+def deferredListFanIn(n):
+    """
+    Create a DeferredList waiting on the given number of deferreds and give
+    each of them a result.
+    """
+    ds = [defer.Deferred() for i in range(n)]
+    defer.DeferredList(ds)
+    for d in ds:
+        d.callback(1)
+deferredListFanIn = benchmarkNFunc(20, ns)(deferredListFanIn)
+
 def benchmark():
     """
     Run all of the benchmarks registered in the benchmarkFuncs list
@@ -0,0 +1,83 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Compare the timed call queues available to L{twisted.internet.base.ReactorBase}
+when many L{DelayedCall}s are reset and cancelled, as idle timeouts are.
+"""
+
+from __future__ import division, print_function
+
+import random
+
+from timer import timeit
+
+from twisted.python.compat import range
+from twisted.internet.base import ReactorBase
+from twisted.internet.task import Clock
+
+
+class BenchmarkReactor(ReactorBase):
+    """
+    A reactor which can schedule and run timed calls, but does nothing else.
+    """
+    def __init__(self, indexedTimedCalls):
+        self.indexedTimedCalls = indexedTimedCalls
+        self.clock = Clock()
+        self.seconds = self.clock.seconds
+        ReactorBase.__init__(self)
+
+
+    def installWaker(self):
+        pass
+
+
+
+def makeReactor(indexedTimedCalls, count):
+    """
+    Create a reactor with C{count} pending timed calls.
+    """
+    reactor = BenchmarkReactor(indexedTimedCalls)
+    calls = [reactor.callLater(random.uniform(60, 120), lambda: None)
+             for i in range(count)]
+    reactor.runUntilCurrent()
+    return reactor, calls
+
+
+
+def resetSooner(indexedTimedCalls, count, resets):
+    """
+    Reset randomly chosen calls to an earlier time, then run the reactor.
+    """
+    reactor, calls = makeReactor(indexedTimedCalls, count)
+    for i in range(resets):
+        random.choice(calls).reset(random.uniform(0, 60))
+        reactor.runUntilCurrent()
+
+
+
+def cancelAndReplace(indexedTimedCalls, count, cancels):
+    """
+    Cancel randomly chosen calls, replacing each with a new call.
+    """
+    reactor, calls = makeReactor(indexedTimedCalls, count)
+    for i in range(cancels):
+        index = random.randrange(count)
+        calls[index].cancel()
+        calls[index] = reactor.callLater(random.uniform(60, 120), lambda: None)
+        reactor.runUntilCurrent()
+
+
+
+def main():
+    for count in (1000, 10000, 100000):
+        for indexed in (False, True):
+            for name, benchmark in [("resetSooner", resetSooner),
+                                    ("cancelAndReplace", cancelAndReplace)]:
+                random.seed(count)
+                elapsed = timeit(benchmark, 1, indexed, count, 1000)
+                print("%s with %d calls, indexedTimedCalls=%s: %.4fs" % (
+                    name, count, indexed, elapsed))
+
+if __name__ == '__main__':
+    main()
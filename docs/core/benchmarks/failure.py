@@ -4,6 +4,7 @@
 from __future__ import print_function
 
 import random
+from twisted.internet import defer
 from twisted.python import failure
 
 random.seed(10050)
@@ -14,7 +15,7 @@ def pickVal():
     return random.choice([None, 1, 'Hello', [], {1: 1}, (1, 2, 3)])
 
 def makeLocals(n):
-    return ';'.join(['x%d = %s' % (i, pickVal()) for i in range(n)])
+    return ';'.join(['x%d = %r' % (i, pickVal()) for i in range(n)])
 
 for nLocals in O:
     for i in range(DEPTH):
@@ -23,7 +24,7 @@ def deepFailure%d_%d():
     %s
     deepFailure%d_%d()
 """ % (nLocals, i, makeLocals(nLocals), nLocals, i + 1)
-    exec(s)
+        exec(s)
 
     exec("""
 def deepFailure%d_%d():
@@ -45,8 +46,35 @@ def fail_str(n):
         except:
             str(failure.Failure())
 
+def fail_trap(n):
+    for i in R:
+        try:
+            eval('deepFailure%d_0' % n)()
+        except:
+            failure.Failure().trap(ZeroDivisionError)
+
+def fail_clean(n):
+    for i in R:
+        try:
+            eval('deepFailure%d_0' % n)()
+        except:
+            failure.Failure().cleanFailure()
+
 class PythonException(Exception): pass
 
+def fail_errback_trap(n):
+    for i in R:
+        d = defer.Deferred()
+        d.addErrback(lambda f: f.trap(PythonException))
+        d.errback(PythonException())
+
+def fail_cheap_trap(n):
+    for i in R:
+        try:
+            eval('deepFailure%d_0' % n)()
+        except ZeroDivisionError as e:
+            failure.Failure(e, captureTraceback=False).trap(ZeroDivisionError)
+
 def fail_easy(n):
     for i in R:
         try:
@@ -64,5 +92,12 @@ from timer import timeit
 for i in O:
     print('failing', i, timeit(fail, 1, i))
 
+for i in [0, 90]:
+    print('failing and trapping', i, timeit(fail_trap, 1, i))
+    print('failing and cleaning', i, timeit(fail_clean, 1, i))
+    print('cheaply failing and trapping', i, timeit(fail_cheap_trap, 1, i))
+
+print('errback and trap', timeit(fail_errback_trap, 1, 0))
+
 # for i in O:
 #     print('string failing', i, timeit(fail_str, 1, i))
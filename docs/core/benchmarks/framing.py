@@ -0,0 +1,91 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the time L{twisted.protocols.basic.Int32StringReceiver} and
+L{twisted.protocols.basic.LineReceiver} take to parse many small messages
+delivered in large chunks, and a few huge messages delivered in small
+chunks.
+"""
+
+from __future__ import division, print_function
+
+import time
+from struct import pack
+
+from twisted.python.compat import range
+from twisted.protocols import basic
+from twisted.test import proto_helpers
+
+
+
+class CollectingInt32StringReceiver(basic.Int32StringReceiver):
+    MAX_LENGTH = 2 ** 31
+
+    def connectionMade(self):
+        self.count = 0
+
+
+    def stringReceived(self, string):
+        self.count += 1
+
+
+
+class CollectingLineReceiver(basic.LineReceiver):
+    MAX_LENGTH = 2 ** 31
+
+    def connectionMade(self):
+        self.count = 0
+
+
+    def lineReceived(self, line):
+        self.count += 1
+
+
+
+def int32Messages(size, count):
+    return (pack("!I", size) + b"x" * size) * count
+
+
+
+def lines(size, count):
+    return (b"x" * size + b"\r\n") * count
+
+
+
+def benchmark(protocolClass, encode, size, count, chunkSize):
+    """
+    Deliver C{count} messages of C{size} bytes, in chunks of C{chunkSize}
+    bytes, to a new instance of C{protocolClass} and report the time taken.
+    """
+    data = encode(size, count)
+    chunks = [data[i:i + chunkSize] for i in range(0, len(data), chunkSize)]
+    proto = protocolClass()
+    proto.makeConnection(proto_helpers.StringTransport())
+
+    before = time.time()
+    for chunk in chunks:
+        proto.dataReceived(chunk)
+    after = time.time()
+
+    assert proto.count == count, (proto.count, count)
+    print("%-30s %8d x %8d bytes in %6d byte chunks: %8.4f s" % (
+        protocolClass.__name__, count, size, chunkSize, after - before))
+
+
+
+def main():
+    for protocolClass, encode in [
+            (CollectingInt32StringReceiver, int32Messages),
+            (CollectingLineReceiver, lines)]:
+        # Many small messages.
+        benchmark(protocolClass, encode, 16, 200000, 65536)
+        benchmark(protocolClass, encode, 100, 50000, 4096)
+        # A few huge messages.
+        benchmark(protocolClass, encode, 2 ** 20, 4, 1024)
+        benchmark(protocolClass, encode, 2 ** 24, 1, 65536)
+
+
+
+if __name__ == '__main__':
+    main()
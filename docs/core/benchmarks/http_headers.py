@@ -0,0 +1,111 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+See how fast L{twisted.web.http_headers.Headers} is at what a web server does
+with it for each request.
+
+Run this against different versions of L{twisted.web.http_headers} to compare
+them; the headers of a request are built one at a time when
+C{Headers._fromParsed} is not available.
+"""
+
+from __future__ import print_function
+
+from twisted.python.compat import range
+from twisted.web.http_headers import Headers
+from timer import timeit
+
+PARSED = [
+    (b"host", b"www.example.com"),
+    (b"user-agent", b"Mozilla/5.0 (X11; Linux x86_64; rv:60.0)"),
+    (b"accept", b"text/html,application/xhtml+xml,application/xml;q=0.9"),
+    (b"accept-language", b"en-US,en;q=0.5"),
+    (b"accept-encoding", b"gzip, deflate"),
+    (b"cookie", b"session=0123456789abcdef"),
+    (b"connection", b"keep-alive"),
+]
+
+RESPONSE = [
+    (b"Content-Type", [b"text/html; charset=utf-8"]),
+    (b"Content-Length", [b"1024"]),
+    (b"Server", [b"TwistedWeb"]),
+    (b"Date", [b"Tue, 16 Oct 2018 12:00:00 GMT"]),
+    (b"Set-Cookie", [b"a=b", b"c=d"]),
+]
+
+_fromParsed = getattr(Headers, "_fromParsed", None)
+
+
+
+def requestHeaders(n):
+    """
+    Build the headers of C{n} requests from parsed header lines.
+    """
+    if _fromParsed is not None:
+        for i in range(n):
+            _fromParsed(PARSED)
+        return
+    for i in range(n):
+        headers = Headers()
+        for name, value in PARSED:
+            values = headers.getRawHeaders(name)
+            if values is not None:
+                values.append(value)
+            else:
+                headers.setRawHeaders(name, [value])
+
+
+
+def lookups(n, names):
+    """
+    Look up headers C{n} times by each of the given names.
+    """
+    headers = Headers()
+    for name, value in PARSED:
+        headers.setRawHeaders(name, [value])
+    for i in range(n):
+        for name in names:
+            headers.getRawHeaders(name)
+            headers.hasHeader(name)
+
+
+
+def responseHeaders(n):
+    """
+    Set and serialize the headers of C{n} responses.
+    """
+    for i in range(n):
+        headers = Headers()
+        for name, values in RESPONSE:
+            headers.setRawHeaders(name, values)
+        for name, values in headers.getAllRawHeaders():
+            for value in values:
+                name + b": " + value + b"\r\n"
+
+
+
+def copies(n):
+    """
+    Copy a set of request headers C{n} times.
+    """
+    headers = Headers()
+    for name, value in PARSED:
+        headers.setRawHeaders(name, [value])
+    for i in range(n):
+        headers.copy()
+
+
+
+def main():
+    n = 10000
+    print("requestHeaders", n, timeit(requestHeaders, 1, n))
+    print("lookups bytes", n, timeit(lookups, 1, n,
+                                     [b"Host", b"Cookie", b"x-missing"]))
+    print("lookups unicode", n, timeit(lookups, 1, n,
+                                       [u"Host", u"Cookie", u"x-missing"]))
+    print("responseHeaders", n, timeit(responseHeaders, 1, n))
+    print("copies", n, timeit(copies, 1, n))
+
+if __name__ == '__main__':
+    main()
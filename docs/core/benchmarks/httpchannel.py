@@ -0,0 +1,111 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+See how fast L{twisted.web.http.HTTPChannel} handles small requests, and
+writes response headers.
+
+Each request head parser HTTPChannel can use is measured, along with
+parsing request heads one line at a time.
+"""
+
+from __future__ import print_function
+
+from twisted.python.compat import range
+from twisted.test.proto_helpers import StringTransport
+from twisted.web import http
+from timer import timeit
+
+REQUEST = (
+    b"GET /index.html?page=1 HTTP/1.1\r\n"
+    b"Host: www.example.com\r\n"
+    b"User-Agent: Mozilla/5.0 (X11; Linux x86_64; rv:60.0) Gecko/20100101\r\n"
+    b"Accept: text/html,application/xhtml+xml,application/xml;q=0.9\r\n"
+    b"Accept-Language: en-US,en;q=0.5\r\n"
+    b"Accept-Encoding: gzip, deflate\r\n"
+    b"Cookie: session=0123456789abcdef\r\n"
+    b"Connection: keep-alive\r\n"
+    b"\r\n"
+)
+
+RESPONSE_HEADERS = [
+    (b"Transfer-Encoding", b"chunked"),
+    (b"Server", b"TwistedWeb"),
+    (b"Date", b"Tue, 16 Oct 2018 12:00:00 GMT"),
+    (b"Content-Type", b"text/html; charset=utf-8"),
+    (b"Set-Cookie", b"session=0123456789abcdef; Path=/"),
+]
+
+PARSERS = [
+    ("lines", None),
+    ("python", http._parseRequestHead),
+]
+if http.httptools is not None:
+    PARSERS.append(("httptools", http._parseRequestHeadHTTPTools))
+
+
+
+class FinishingRequest(http.Request):
+    """
+    A request which is answered as soon as it is received.
+    """
+
+    def process(self):
+        self.finish()
+
+
+
+def channelFor(parser):
+    """
+    Make a connected L{http.HTTPChannel} which parses request heads with the
+    given parser.
+    """
+    channel = http.HTTPChannel()
+    channel.requestFactory = FinishingRequest
+    channel.requestHeadParser = parser
+    channel.makeConnection(StringTransport())
+    return channel
+
+
+
+def requests(channel, n):
+    """
+    Deliver C{n} requests to a channel, one at a time.
+    """
+    for i in range(n):
+        channel.dataReceived(REQUEST)
+    channel.transport.clear()
+
+
+
+def parseHeads(parser, n):
+    """
+    Parse C{n} request heads with a parser directly.
+    """
+    head = REQUEST[:-4]
+    for i in range(n):
+        parser(head)
+
+
+
+def writeHeaders(channel, n):
+    """
+    Write the status line and headers of C{n} responses to a channel.
+    """
+    for i in range(n):
+        channel.writeHeaders(b"HTTP/1.1", b"200", b"OK", RESPONSE_HEADERS)
+    channel.transport.clear()
+
+
+
+def main():
+    n = 10000
+    for name, parser in PARSERS:
+        channel = channelFor(parser)
+        print("requests", name, n, timeit(requests, 1, channel, n))
+    for name, parser in PARSERS[1:]:
+        print("parseHeads", name, n, timeit(parseHeads, 1, parser, n))
+    print("writeHeaders", n, timeit(writeHeaders, 1, channelFor(None), n))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+See how fast L{twisted.web.template} renders a page, and how many writes it
+makes doing so, and how fast it loads a template.
+
+The page is rendered from its template as loaded, with one write for each
+string and tag, and from its pre-flattened template with its output
+coalesced, as L{twisted.web.template.renderElement} does.
+"""
+
+from __future__ import print_function
+
+from twisted.python.compat import range
+from twisted.web import template
+from twisted.web.template import Element, XMLString, renderer, flatten
+from timer import timeit
+
+XML = (
+    '<html xmlns:t="http://twistedmatrix.com/ns/twisted.web.template/0.1">'
+    '<head><title>Benchmark</title>'
+    '<link rel="stylesheet" href="/style.css" /></head>'
+    '<body><div class="header"><h1>Heading</h1><ul class="nav">'
+    + '<li><a href="/page">A page</a></li>' * 10 +
+    '</ul></div><div class="content">'
+    '<p class="greeting">Hello, <span t:render="name" />.</p>'
+    '<table><tr t:render="rows"><td><t:slot name="cell" /></td></tr></table>'
+    '</div><div class="footer">'
+    + '<p>Some text which is the same for every request.</p>' * 10 +
+    '</div></body></html>')
+
+TEMPLATE = XMLString(XML, preFlatten=True)
+
+
+
+class LoadedTemplate(object):
+    """
+    A template loader which only offers its template as loaded.
+    """
+
+    def load(self):
+        return TEMPLATE.load()
+
+
+
+class Page(Element):
+    """
+    A page with a couple of renderers amid a lot of static markup.
+    """
+    loader = TEMPLATE
+
+    @renderer
+    def name(self, request, tag):
+        return tag("world")
+
+
+    @renderer
+    def rows(self, request, tag):
+        for i in range(20):
+            yield tag.clone().fillSlots(cell=str(i))
+
+
+
+def render(n, loader, bufferSize, writes):
+    """
+    Render the page C{n} times.
+    """
+    for i in range(n):
+        flatten(None, Page(loader), writes.append, bufferSize)
+
+
+
+def load(n):
+    """
+    Make a loader for the template and load it C{n} times, as an application
+    making a loader for each element it renders does.
+    """
+    for i in range(n):
+        XMLString(XML).load()
+
+
+
+def main():
+    n = 1000
+    print("load cached", n, timeit(load, 1, n))
+    maxParsed = template._MAX_PARSED_TEMPLATES
+    template._MAX_PARSED_TEMPLATES = 0
+    print("load uncached", n, timeit(load, 1, n))
+    template._MAX_PARSED_TEMPLATES = maxParsed
+    for name, loader, bufferSize in [
+            ("loaded", LoadedTemplate(), None),
+            ("preFlattened", TEMPLATE, 2 ** 16)]:
+        writes = []
+        print("render", name, n,
+              timeit(render, 1, n, loader, bufferSize, writes),
+              "writes per page:", len(writes) // n)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measure the throughput of L{twisted.internet.tcp.Connection.writeSequence}
+for large responses made of a small header and many body chunks, with and
+without vectored writes.
+"""
+
+from __future__ import division, print_function
+
+import time
+
+from twisted.python.compat import range
+from twisted.internet import reactor, tcp
+from twisted.internet.defer import Deferred
+from twisted.internet.protocol import Protocol, ServerFactory, ClientCreator
+
+
+class Responder(Protocol):
+    """
+    Write C{count} responses of a header and C{chunks} body chunks of
+    C{chunkSize} bytes each, then disconnect.
+    """
+    def connectionMade(self):
+        factory = self.factory
+        header = b"x" * 200
+        body = [b"y" * factory.chunkSize] * factory.chunks
+        for i in range(factory.count):
+            self.transport.writeSequence([header] + body)
+        self.transport.loseConnection()
+
+
+
+class Sink(Protocol):
+    """
+    Count the bytes received and fire C{done} with the count when the
+    connection is lost.
+    """
+    def __init__(self):
+        self.received = 0
+        self.done = Deferred()
+
+
+    def dataReceived(self, data):
+        self.received += len(data)
+
+
+    def connectionLost(self, reason):
+        self.done.callback(self.received)
+
+
+
+def benchmark(vectored, count, chunks, chunkSize):
+    """
+    Transfer the responses over a loopback connection and report the
+    throughput.
+    """
+    tcp.Connection._vectoredWrites = vectored
+    factory = ServerFactory()
+    factory.protocol = Responder
+    factory.count, factory.chunks, factory.chunkSize = count, chunks, chunkSize
+    port = reactor.listenTCP(0, factory, interface="127.0.0.1")
+    start = time.time()
+
+    def connected(sink):
+        return sink.done
+
+    def finished(received):
+        elapsed = time.time() - start
+        print("vectored=%-5s %5d x (%3d x %6d byte chunks): %7.1f MB/s" % (
+            vectored, count, chunks, chunkSize,
+            received / elapsed / 1024 / 1024))
+        return port.stopListening()
+
+    d = ClientCreator(reactor, Sink).connectTCP(
+        "127.0.0.1", port.getHost().port)
+    d.addCallback(connected)
+    d.addCallback(finished)
+    return d
+
+
+
+def main():
+    cases = [(count, chunks, chunkSize, vectored)
+             for (count, chunks, chunkSize) in [(100, 16, 65536),
+                                                (1000, 64, 1024),
+                                                (10000, 4, 4096)]
+             for vectored in (False, True)]
+
+    def runNext(ignored=None):
+        if not cases:
+            reactor.stop()
+            return
+        count, chunks, chunkSize, vectored = cases.pop(0)
+        benchmark(vectored, count, chunks, chunkSize).addCallback(runNext)
+
+    reactor.callWhenRunning(runNext)
+    reactor.run()
+
+if __name__ == '__main__':
+    main()
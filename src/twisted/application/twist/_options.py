@@ -6,6 +6,7 @@
 Command line options for C{twist}.
 """
 
+import socket
 from sys import stdout, stderr
 from textwrap import dedent
 
@@ -40,6 +41,7 @@ class TwistOptions(Options):
         self["reactorName"] = self.defaultReactorName
         self["logLevel"] = self.defaultLogLevel
         self["logFile"] = stdout
+        self["workers"] = 0
 
 
     def getSynopsis(self):
@@ -146,6 +148,29 @@ class TwistOptions(Options):
     opt_log_format.__doc__ = dedent(opt_log_format.__doc__)
 
 
+    def opt_workers(self, count):
+        """
+        Run the application in this many worker processes, each listening on
+        the same TCP ports with SO_REUSEPORT, and restart them when they exit.
+        (default: 0, run the application in this process)
+        """
+        try:
+            count = int(count)
+            if count < 0:
+                raise ValueError(count)
+        except ValueError:
+            raise UsageError("Invalid number of workers: {}".format(count))
+
+        if count and not hasattr(socket, "SO_REUSEPORT"):
+            raise UsageError(
+                "Workers are not supported on this platform, since it "
+                "does not support SO_REUSEPORT."
+            )
+        self["workers"] = count
+
+    opt_workers.__doc__ = dedent(opt_workers.__doc__)
+
+
     def selectDefaultLogObserver(self):
         """
         Set C{fileLogObserverFactory} to the default appropriate for the
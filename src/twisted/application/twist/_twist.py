@@ -6,6 +6,7 @@
 Run a Twisted application.
 """
 
+import os
 import sys
 
 from twisted.python.usage import UsageError
@@ -66,6 +67,29 @@ class Twist(object):
         return IService(application)
 
 
+    @staticmethod
+    def workerService(reactor, argv, count):
+        """
+        Create a service which runs the application in worker processes.
+
+        @param reactor: The reactor to start the worker processes with.
+        @type reactor: L{twisted.internet.interfaces.IReactorProcess}
+
+        @param argv: Command line arguments.
+        @type argv: L{list}
+
+        @param count: The number of worker processes.
+        @type count: L{int}
+
+        @return: The created service.
+        @rtype: L{IService}
+        """
+        # Imported here since it imports the global reactor, which must not
+        # be installed before the options have installed the chosen one.
+        from ._workers import WorkerMonitor
+        return WorkerMonitor.forArguments(reactor, argv, count)
+
+
     @staticmethod
     def startService(reactor, service):
         """
@@ -113,16 +137,31 @@ class Twist(object):
         Executable entry point for L{Twist}.
         Processes options and run a twisted reactor with a service.
 
+        With C{--workers}, the service instead runs and supervises that many
+        worker processes, each of which runs the application.
+
         @param argv: Command line arguments.
         @type argv: L{list}
         """
         options = cls.options(argv)
 
         reactor = options["reactor"]
-        service = cls.service(
-            plugin=options.plugins[options.subCommand],
-            options=options.subOptions,
-        )
+        service = None
+        if options["workers"]:
+            # See workerService for why this is imported here.
+            from . import _workers
+            if _workers.isWorker(os.environ):
+                _workers.becomeWorker()
+            else:
+                service = cls.workerService(
+                    reactor, argv, options["workers"]
+                )
+
+        if service is None:
+            service = cls.service(
+                plugin=options.plugins[options.subCommand],
+                options=options.subOptions,
+            )
 
         cls.startService(reactor, service)
         cls.run(options)
@@ -0,0 +1,142 @@
+# -*- test-case-name: twisted.application.twist.test.test_workers -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Run a Twisted application in several worker processes.
+
+Each worker process runs C{twist} with the same arguments and its own
+reactor, and listens on the application's TCP ports with I{SO_REUSEPORT}, so
+that the kernel balances incoming connections between the workers.
+
+This module imports L{twisted.runner.procmon}, which imports the global
+reactor, so it must only be imported once the reactor has been installed.
+"""
+
+import os
+import sys
+
+from twisted.internet import tcp
+from twisted.internet.defer import Deferred, succeed
+from twisted.runner.procmon import ProcessMonitor
+
+
+
+workerEnvironmentVariable = "TWIST_WORKER"
+
+_workerScript = (
+    "from twisted.application.twist._twist import Twist; Twist.main()"
+)
+
+
+
+def isWorker(environ):
+    """
+    Determine whether this process is a worker process started by a
+    L{WorkerMonitor}.
+
+    @param environ: The environment of this process.
+    @type environ: L{dict}
+
+    @rtype: L{bool}
+    """
+    return workerEnvironmentVariable in environ
+
+
+
+def becomeWorker():
+    """
+    Make all the TCP ports this process listens on from now on use
+    I{SO_REUSEPORT}, so that they can share their port number with the other
+    worker processes.
+    """
+    tcp.Port.reusePort = True
+
+
+
+class WorkerMonitor(ProcessMonitor):
+    """
+    A L{ProcessMonitor} for the worker processes of an application, which
+    when stopped waits for them to exit.
+
+    @ivar _stopping: L{Deferred}s to fire once all the worker processes have
+        exited.
+    @type _stopping: L{list}
+    """
+
+    def __init__(self, reactor):
+        ProcessMonitor.__init__(self, reactor)
+        self._stopping = []
+
+
+    @classmethod
+    def forArguments(cls, reactor, argv, count, environ=None,
+                     executable=sys.executable):
+        """
+        Create a L{WorkerMonitor} for C{count} worker processes running
+        C{twist} with the given command line arguments.
+
+        @param reactor: The reactor to start the worker processes with.
+
+        @param argv: The command line arguments of C{twist}, including the
+            name of the command.
+        @type argv: L{list}
+
+        @param count: The number of worker processes.
+        @type count: L{int}
+
+        @param environ: The environment to give the worker processes, in
+            addition to L{workerEnvironmentVariable} and a C{PYTHONPATH}
+            giving the C{sys.path} of this process.  If L{None},
+            C{os.environ}.
+        @type environ: L{dict}
+
+        @param executable: The Python interpreter to run the workers with.
+        @type executable: L{str}
+
+        @rtype: L{WorkerMonitor}
+        """
+        if environ is None:
+            environ = os.environ
+        monitor = cls(reactor)
+        for index in range(count):
+            env = dict(environ)
+            env[workerEnvironmentVariable] = str(index)
+            env["PYTHONPATH"] = os.pathsep.join(sys.path)
+            monitor.addProcess(
+                "worker-{}".format(index),
+                [executable, "-c", _workerScript] + list(argv[1:]),
+                env=env,
+            )
+        return monitor
+
+
+    def stopService(self):
+        """
+        Ask all worker processes to exit, and cancel all scheduled restarts.
+
+        @return: A L{Deferred} which fires once all worker processes have
+            exited.
+        """
+        ProcessMonitor.stopService(self)
+        if not self.protocols:
+            return succeed(None)
+        d = Deferred()
+        self._stopping.append(d)
+        return d
+
+
+    def connectionLost(self, name):
+        """
+        A worker process exited: restart it if the service is running, or
+        fire the L{Deferred}s returned by L{stopService} once the last one
+        has exited.
+
+        @param name: The name of the worker process.
+        @type name: L{str}
+        """
+        ProcessMonitor.connectionLost(self, name)
+        if not self.protocols:
+            stopping, self._stopping = self._stopping, []
+            for d in stopping:
+                d.callback(None)
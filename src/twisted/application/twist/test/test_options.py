@@ -163,6 +163,50 @@ class OptionsTests(twisted.trial.unittest.TestCase):
         self.assertRaises(UsageError, options.opt_log_level, "cheese")
 
 
+    def test_workersDefault(self):
+        """
+        By default, L{TwistOptions} runs the application in this process.
+        """
+        options = TwistOptions()
+
+        self.assertEqual(options["workers"], 0)
+
+
+    def test_workersValid(self):
+        """
+        L{TwistOptions.opt_workers} sets the number of worker processes.
+        """
+        options = TwistOptions()
+        options.opt_workers("4")
+
+        self.assertEqual(options["workers"], 4)
+
+
+    def test_workersInvalid(self):
+        """
+        L{TwistOptions.opt_workers} raises L{UsageError} if not given a
+        non-negative integer.
+        """
+        options = TwistOptions()
+
+        self.assertRaises(UsageError, options.opt_workers, "many")
+        self.assertRaises(UsageError, options.opt_workers, "-1")
+
+
+    def test_workersWithoutReusePort(self):
+        """
+        L{TwistOptions.opt_workers} raises L{UsageError} if the platform does
+        not support I{SO_REUSEPORT}.
+        """
+        class FakeSocketModule(object):
+            pass
+
+        self.patch(_options, "socket", FakeSocketModule())
+        options = TwistOptions()
+
+        self.assertRaises(UsageError, options.opt_workers, "2")
+
+
     def _testLogFile(self, name, expectedStream):
         """
         Set log file name and check the selected output stream.
@@ -5,8 +5,10 @@
 Tests for L{twisted.application.twist._twist}.
 """
 
+import os
 from sys import stdout
 
+from twisted.internet import tcp
 from twisted.logger import LogLevel, jsonFileLogObserver
 from twisted.test.proto_helpers import MemoryReactor
 from ...service import IService, MultiService
@@ -194,6 +196,57 @@ class TwistTests(twisted.trial.unittest.TestCase):
         self.assertEqual(runners[0].runs, 1)
 
 
+    def test_mainWorkers(self):
+        """
+        With C{--workers}, L{Twist.main} runs a service which supervises that
+        many worker processes instead of the application service.
+        """
+        self.patchStartService()
+        self.patch(os, "environ", {})
+        workerServices = []
+
+        class WorkersTwist(Twist):
+            @staticmethod
+            def workerService(reactor, argv, count):
+                service = MultiService()
+                workerServices.append((service, argv, count))
+                return service
+
+            @staticmethod
+            def run(twistOptions):
+                pass
+
+        argv = ["twist", "--workers=3", "web"]
+        WorkersTwist.main(argv)
+
+        self.assertEqual(len(workerServices), 1)
+        service, workerArgv, count = workerServices[0]
+        self.assertEqual((workerArgv, count), (argv, 3))
+        self.assertEqual(self.serviceStarts, [service])
+
+
+    def test_mainInWorker(self):
+        """
+        With C{--workers}, L{Twist.main} runs the application service in a
+        worker process, with TCP ports listening with I{SO_REUSEPORT}.
+        """
+        from .._workers import workerEnvironmentVariable
+
+        self.patchStartService()
+        self.patch(os, "environ", {workerEnvironmentVariable: "0"})
+        self.patch(tcp.Port, "reusePort", False)
+
+        class WorkerTwist(Twist):
+            @staticmethod
+            def run(twistOptions):
+                pass
+
+        WorkerTwist.main(["twist", "--workers=3", "web"])
+
+        self.assertEqual(len(self.serviceStarts), 1)
+        self.assertTrue(tcp.Port.reusePort)
+
+
 
 class TwistExitTests(twisted.trial.unittest.TestCase):
     """
@@ -0,0 +1,122 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.application.twist._workers}.
+"""
+
+import os
+import sys
+
+from twisted.internet import tcp
+from twisted.runner.test.test_procmon import DummyProcessReactor
+from .._workers import (
+    WorkerMonitor, becomeWorker, isWorker, workerEnvironmentVariable,
+)
+
+import twisted.trial.unittest
+
+
+
+class WorkerMonitorTests(twisted.trial.unittest.TestCase):
+    """
+    Tests for L{WorkerMonitor}.
+    """
+
+    def setUp(self):
+        self.reactor = DummyProcessReactor()
+        self.monitor = WorkerMonitor.forArguments(
+            self.reactor, ["twist", "--workers=2", "web"], 2,
+            environ={"HOME": "/home/twist"}, executable="/bin/python",
+        )
+
+
+    def test_forArguments(self):
+        """
+        L{WorkerMonitor.forArguments} creates a monitor which runs C{twist}
+        with the given arguments in the given number of worker processes,
+        each of which is told its index in its environment.
+        """
+        self.monitor.startService()
+
+        processes = self.reactor.spawnedProcesses
+        self.assertEqual(len(processes), 2)
+        for process in processes:
+            self.assertEqual(process._executable, "/bin/python")
+            self.assertEqual(process._args[:2], ["/bin/python", "-c"])
+            self.assertEqual(process._args[3:], ["--workers=2", "web"])
+            self.assertEqual(process._environment["HOME"], "/home/twist")
+            self.assertEqual(
+                process._environment["PYTHONPATH"], os.pathsep.join(sys.path)
+            )
+            self.assertTrue(isWorker(process._environment))
+        # The monitor starts its processes in no particular order.
+        self.assertEqual(
+            sorted(process._environment[workerEnvironmentVariable]
+                   for process in processes),
+            ["0", "1"]
+        )
+
+
+    def test_restart(self):
+        """
+        A worker process which exits while the monitor is running is
+        restarted.
+        """
+        self.monitor.threshold = 1
+        self.monitor.startService()
+        self.reactor.advance(2)
+
+        self.reactor.spawnedProcesses[0].processEnded(1)
+        self.reactor.advance(0)
+
+        self.assertEqual(len(self.reactor.spawnedProcesses), 3)
+
+
+    def test_stopServiceWaitsForWorkers(self):
+        """
+        The L{Deferred} returned by L{WorkerMonitor.stopService} fires once
+        all worker processes have exited, and they are not restarted.
+        """
+        self.monitor.startService()
+
+        d = self.monitor.stopService()
+        self.assertNoResult(d)
+
+        self.reactor.advance(self.monitor.killTime + 1)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(len(self.reactor.spawnedProcesses), 2)
+
+
+    def test_stopServiceWithoutWorkers(self):
+        """
+        L{WorkerMonitor.stopService} returns a L{Deferred} which has already
+        fired if no worker processes are running.
+        """
+        monitor = WorkerMonitor(self.reactor)
+        monitor.startService()
+        self.assertIsNone(self.successResultOf(monitor.stopService()))
+
+
+
+class WorkerTests(twisted.trial.unittest.TestCase):
+    """
+    Tests for L{isWorker} and L{becomeWorker}.
+    """
+
+    def test_isWorker(self):
+        """
+        L{isWorker} returns C{True} only if the worker environment variable
+        is set.
+        """
+        self.assertTrue(isWorker({workerEnvironmentVariable: "0"}))
+        self.assertFalse(isWorker({}))
+
+
+    def test_becomeWorker(self):
+        """
+        L{becomeWorker} makes TCP ports listen with I{SO_REUSEPORT}.
+        """
+        self.patch(tcp.Port, "reusePort", False)
+        becomeWorker()
+        self.assertTrue(tcp.Port.reusePort)
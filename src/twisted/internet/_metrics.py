@@ -0,0 +1,355 @@
+# -*- test-case-name: twisted.internet.test.test_metrics -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Measurements of the work a reactor's event loop does.
+
+See L{twisted.internet.interfaces.IReactorMetrics}.
+"""
+
+from __future__ import division, absolute_import
+
+import time
+from bisect import bisect_left
+
+from twisted.logger import Logger
+from twisted.python.reflect import fullyQualifiedName, qual
+
+
+
+# Prefer a clock with a high resolution which never goes backwards for
+# measuring durations.
+_clock = getattr(time, "perf_counter", time.time)
+
+
+
+def _callableName(f):
+    """
+    Get a name for a callable to report it by.
+
+    @param f: The callable.
+
+    @return: The fully qualified name of C{f} if it has one, or its
+        L{repr}.
+    @rtype: L{str}
+    """
+    try:
+        return fullyQualifiedName(f)
+    except AttributeError:
+        return repr(f)
+
+
+
+def _ioHandler(selectable):
+    """
+    Find the object whose code handles the I/O events of a selectable.
+
+    @param selectable: The selectable.
+
+    @return: The class of the innermost protocol of C{selectable}, looking
+        through L{twisted.protocols.policies.ProtocolWrapper}s and other
+        protocols with a C{wrappedProtocol}, or the class of C{selectable}
+        if it has no protocol.
+    @rtype: L{type}
+    """
+    protocol = getattr(selectable, "protocol", None)
+    if protocol is None:
+        return type(selectable)
+    while getattr(protocol, "wrappedProtocol", None) is not None:
+        protocol = protocol.wrappedProtocol
+    return type(protocol)
+
+
+
+class Histogram(object):
+    """
+    A histogram of durations, with buckets whose bounds grow exponentially
+    from a tenth of a millisecond to ten seconds.
+
+    @cvar bounds: The upper bounds, in seconds, of all but the last bucket;
+        the last bucket holds everything larger.
+    @type bounds: L{tuple} of L{float}
+
+    @ivar counts: The number of durations recorded in each bucket.
+    @type counts: L{list} of L{int}
+
+    @ivar count: The number of durations recorded.
+    @type count: L{int}
+
+    @ivar total: The sum of the durations recorded.
+    @type total: L{float}
+
+    @ivar maximum: The longest duration recorded.
+    @type maximum: L{float}
+    """
+
+    bounds = (
+        0.0001, 0.00025, 0.0005,
+        0.001, 0.0025, 0.005,
+        0.01, 0.025, 0.05,
+        0.1, 0.25, 0.5,
+        1.0, 2.5, 5.0,
+        10.0,
+    )
+
+    def __init__(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+
+    def record(self, duration):
+        """
+        Record a duration.
+
+        @param duration: The duration, in seconds.
+        @type duration: L{float}
+        """
+        self.counts[bisect_left(self.bounds, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if duration > self.maximum:
+            self.maximum = duration
+
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile of the recorded durations.
+
+        @param percent: The percentile, between 0 and 100.
+        @type percent: L{float}
+
+        @return: The upper bound of the bucket holding the percentile, or the
+            longest duration recorded if that is smaller; 0 if nothing has
+            been recorded.
+        @rtype: L{float}
+        """
+        if not self.count:
+            return 0.0
+        wanted = self.count * percent / 100
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.maximum)
+        return self.maximum
+
+
+    def summary(self):
+        """
+        Summarize the recorded durations.
+
+        @return: The number of durations recorded, their mean and maximum,
+            and estimates of their 50th, 90th and 99th percentiles.
+        @rtype: L{dict}
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.maximum,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+
+class ReactorMetrics(object):
+    """
+    Measurements of the work a reactor's event loop does, as collected by
+    L{twisted.internet.interfaces.IReactorMetrics.startMetrics}.
+
+    @ivar loopLag: How late, according to the reactor's clock, each timed
+        call ran.
+    @type loopLag: L{Histogram}
+
+    @ivar runUntilCurrentTime: How long each pass through the reactor's
+        timed calls and calls from threads took.
+    @type runUntilCurrentTime: L{Histogram}
+
+    @ivar doIterationTime: How long each iteration of the reactor's I/O
+        loop took, including the time spent waiting for events.
+    @type doIterationTime: L{Histogram}
+
+    @ivar callTime: How long each timed call, call from a thread, and I/O
+        event handler ran for.
+    @type callTime: L{Histogram}
+
+    @ivar slowCallThreshold: The number of seconds a single callback may run
+        for before it is logged as slow.
+    @type slowCallThreshold: L{float}
+
+    @ivar slowCalls: The number of callbacks which were logged as slow.
+    @type slowCalls: L{int}
+
+    @ivar _reactor: The reactor being measured.
+
+    @ivar _clock: A function returning the current time in seconds, used to
+        measure durations.
+    """
+
+    _log = Logger()
+
+    def __init__(self, reactor, slowCallThreshold=0.1, clock=_clock):
+        self._reactor = reactor
+        self._clock = clock
+        self.slowCallThreshold = slowCallThreshold
+        self.slowCalls = 0
+        self.loopLag = Histogram()
+        self.runUntilCurrentTime = Histogram()
+        self.doIterationTime = Histogram()
+        self.callTime = Histogram()
+
+
+    def _callFinished(self, kind, f, duration):
+        """
+        Record how long a callback ran for, and log it if it was slow.
+
+        @param kind: What sort of callback it was: C{"timed"}, C{"thread"} or
+            C{"io"}.
+        @type kind: L{str}
+
+        @param f: A callable whose fully qualified name identifies the
+            callback.
+
+        @param duration: How long the callback ran for, in seconds.
+        @type duration: L{float}
+        """
+        self.callTime.record(duration)
+        if duration >= self.slowCallThreshold:
+            self.slowCalls += 1
+            self._log.warn(
+                "Slow reactor callback: {callable} ran for {duration:.3f} "
+                "seconds",
+                callable=_callableName(f), duration=duration, kind=kind,
+            )
+
+
+    def runCall(self, kind, f, *args, **kw):
+        """
+        Run a callback and record how long it ran for.
+
+        @param kind: What sort of callback it is: C{"timed"} or C{"thread"}.
+        @type kind: L{str}
+
+        @param f: The callback.
+
+        @param args: The positional arguments to call C{f} with.
+
+        @param kw: The keyword arguments to call C{f} with.
+
+        @return: The result of C{f}.
+        """
+        start = self._clock()
+        try:
+            return f(*args, **kw)
+        finally:
+            self._callFinished(kind, f, self._clock() - start)
+
+
+    def runTimedCall(self, call, now):
+        """
+        Run a timed call, recording how late it is and how long it runs for.
+
+        @param call: The timed call.
+        @type call: L{twisted.internet.base.DelayedCall}
+
+        @param now: The current time, according to the reactor's clock.
+        @type now: L{float}
+        """
+        self.loopLag.record(max(0.0, now - call.time))
+        self.runCall("timed", call.func, *call.args, **call.kw)
+
+
+    def _timed(self, histogram, f):
+        """
+        Wrap a function of the reactor's event loop so its duration is
+        recorded.
+
+        @param histogram: The histogram to record durations in.
+        @type histogram: L{Histogram}
+
+        @param f: The function.
+
+        @return: A function with the same signature as C{f}.
+        """
+        def timed(*args):
+            start = self._clock()
+            try:
+                return f(*args)
+            finally:
+                histogram.record(self._clock() - start)
+        return timed
+
+
+    def _timedIO(self, dispatch):
+        """
+        Wrap a function which dispatches I/O events to a selectable, so that
+        the time handling each event takes is recorded.  Slow events are
+        reported by the class of the selectable's protocol (see
+        L{_ioHandler}).
+
+        @param dispatch: The function, which takes the selectable as its
+            first argument.
+
+        @return: A function with the same signature as C{dispatch}.
+        """
+        def timedIO(selectable, *args):
+            start = self._clock()
+            try:
+                return dispatch(selectable, *args)
+            finally:
+                self._callFinished(
+                    "io", _ioHandler(selectable), self._clock() - start)
+        return timedIO
+
+
+    def snapshot(self):
+        """
+        Summarize the collected metrics along with the current state of the
+        reactor.
+
+        @return: Summaries (see L{Histogram.summary}) of C{loopLag},
+            C{runUntilCurrentTime}, C{doIterationTime} and C{callTime}, the
+            number of slow callbacks, and the number of pending timed calls
+            (C{timedCalls}) and, if the reactor provides
+            L{twisted.internet.interfaces.IReactorFDSet}, of its C{readers}
+            and C{writers}.
+        @rtype: L{dict}
+        """
+        reactor = self._reactor
+        result = {
+            "loopLag": self.loopLag.summary(),
+            "runUntilCurrentTime": self.runUntilCurrentTime.summary(),
+            "doIterationTime": self.doIterationTime.summary(),
+            "callTime": self.callTime.summary(),
+            "slowCalls": self.slowCalls,
+            "timedCalls": len(reactor.getDelayedCalls()),
+        }
+        try:
+            result["readers"] = len(reactor.getReaders())
+            result["writers"] = len(reactor.getWriters())
+        except NotImplementedError:
+            pass
+        return result
+
+
+    def report(self):
+        """
+        Emit a L{snapshot} of the collected metrics as a L{twisted.logger}
+        event, with each of its keys as a field of the event and the whole
+        snapshot as its C{metrics} field.
+
+        For periodic reports, call this from a
+        L{twisted.internet.task.LoopingCall}.
+        """
+        snapshot = self.snapshot()
+        self._log.info(
+            "Reactor metrics: {timedCalls} timed calls pending, "
+            "loop lag p99 {loopLag[p99]:.4f}s, "
+            "callback time p99 {callTime[p99]:.4f}s, "
+            "{slowCalls} slow callbacks",
+            metrics=snapshot, reactor=qual(type(self._reactor)), **snapshot
+        )
@@ -165,17 +165,29 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
     This is an abstract superclass of all objects which may be notified when
     they are readable or writable; e.g. they have a file-descriptor that is
     valid to be passed to select(2).
+
+    @ivar _vectoredWrites: If C{True}, L{doWrite} hands the buffered chunks of
+        data to C{writeSomeVectors} as they are, rather than joining them into
+        one string for C{writeSomeData}.  Subclasses which set this must
+        implement C{writeSomeVectors}, which takes a L{list} of bytes-like
+        objects and otherwise behaves like C{writeSomeData}.
+    @type _vectoredWrites: L{bool}
     """
     connected = 0
     disconnected = 0
     disconnecting = 0
     _writeDisconnecting = False
     _writeDisconnected = False
+    _vectoredWrites = False
     dataBuffer = b""
     offset = 0
 
     SEND_LIMIT = 128*1024
 
+    # The largest number of chunks to pass to writeSomeVectors at once.  This
+    # is the smallest IOV_MAX of the platforms where sendmsg is available.
+    _VECTOR_LIMIT = 1024
+
     def __init__(self, reactor=None):
         """
         @param reactor: An L{IReactorFDSet} provider which this descriptor will
@@ -241,28 +253,35 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
 
         @see: L{twisted.internet.interfaces.IWriteDescriptor.doWrite}.
         """
-        if len(self.dataBuffer) - self.offset < self.SEND_LIMIT:
-            # If there is currently less than SEND_LIMIT bytes left to send
-            # in the string, extend it with the array data.
-            self.dataBuffer = _concatenate(
-                self.dataBuffer, self.offset, self._tempDataBuffer)
-            self.offset = 0
-            self._tempDataBuffer = []
-            self._tempDataLen = 0
-
-        # Send as much data as you can.
-        if self.offset:
-            l = self.writeSomeData(lazyByteSlice(self.dataBuffer, self.offset))
+        if self._vectoredWrites:
+            l = self._writeVectors()
+            if isinstance(l, Exception):
+                return l
         else:
-            l = self.writeSomeData(self.dataBuffer)
-
-        # There is no writeSomeData implementation in Twisted which returns
-        # < 0, but the documentation for writeSomeData used to claim negative
-        # integers meant connection lost.  Keep supporting this here,
-        # although it may be worth deprecating and removing at some point.
-        if isinstance(l, Exception) or l < 0:
-            return l
-        self.offset += l
+            if len(self.dataBuffer) - self.offset < self.SEND_LIMIT:
+                # If there is currently less than SEND_LIMIT bytes left to
+                # send in the string, extend it with the array data.
+                self.dataBuffer = _concatenate(
+                    self.dataBuffer, self.offset, self._tempDataBuffer)
+                self.offset = 0
+                self._tempDataBuffer = []
+                self._tempDataLen = 0
+
+            # Send as much data as you can.
+            if self.offset:
+                l = self.writeSomeData(
+                    lazyByteSlice(self.dataBuffer, self.offset))
+            else:
+                l = self.writeSomeData(self.dataBuffer)
+
+            # There is no writeSomeData implementation in Twisted which
+            # returns < 0, but the documentation for writeSomeData used to
+            # claim negative integers meant connection lost.  Keep supporting
+            # this here, although it may be worth deprecating and removing at
+            # some point.
+            if isinstance(l, Exception) or l < 0:
+                return l
+            self.offset += l
         # If there is nothing left to send,
         if self.offset == len(self.dataBuffer) and not self._tempDataLen:
             self.dataBuffer = b""
@@ -289,6 +308,52 @@ class FileDescriptor(_ConsumerMixin, _LogOwner):
                 return result
         return None
 
+    def _writeVectors(self):
+        """
+        Write as much buffered data as possible with C{writeSomeVectors},
+        without joining the buffered chunks, and discard what was written.
+
+        @return: The number of bytes written, or an exception if the
+            connection was lost.
+        """
+        vectors = []
+        if self.offset:
+            vectors.append(memoryview(self.dataBuffer)[self.offset:])
+        elif self.dataBuffer:
+            vectors.append(self.dataBuffer)
+        size = len(self.dataBuffer) - self.offset
+        for chunk in self._tempDataBuffer:
+            if size >= self.SEND_LIMIT or len(vectors) >= self._VECTOR_LIMIT:
+                break
+            vectors.append(chunk)
+            size += len(chunk)
+
+        written = self.writeSomeVectors(vectors)
+        if isinstance(written, Exception) or written < 0:
+            return written
+
+        # Discard everything which was written.  Whatever chunk the write
+        # ended in the middle of becomes the new dataBuffer.
+        remaining = written - (len(self.dataBuffer) - self.offset)
+        if remaining < 0:
+            self.offset += written
+            return written
+        consumed = 0
+        for chunk in self._tempDataBuffer:
+            if remaining < len(chunk):
+                break
+            remaining -= len(chunk)
+            self._tempDataLen -= len(chunk)
+            consumed += 1
+        else:
+            chunk = b""
+        self._tempDataLen -= len(chunk)
+        del self._tempDataBuffer[:consumed + 1]
+        self.dataBuffer = chunk
+        self.offset = remaining
+        return written
+
+
     def _postLoseConnection(self):
         """Called after a loseConnection(), when all data has been written.
 
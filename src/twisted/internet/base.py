@@ -16,11 +16,12 @@ import warnings
 from heapq import heappush, heappop, heapify
 
 import traceback
+from functools import partial
 
 from twisted.internet.interfaces import (
     IReactorCore, IReactorTime, IReactorThreads, IResolverSimple,
     IReactorPluggableResolver, IReactorPluggableNameResolver, IConnector,
-    IDelayedCall, _ISupportsExitSignalCapturing
+    IDelayedCall, IReactorMetrics, _ISupportsExitSignalCapturing
 )
 
 from twisted.internet import fdesc, main, error, abstract, defer, threads
@@ -33,6 +34,7 @@ from twisted.python import log, failure, reflect
 from twisted.python.compat import unicode, iteritems
 from twisted.python.runtime import seconds as runtimeSeconds, platform
 from twisted.internet.defer import Deferred, DeferredList
+from twisted.internet._metrics import ReactorMetrics
 from twisted.python._oldstyle import _oldStyle
 
 # This import is for side-effects!  Even if you don't see any code using it
@@ -49,6 +51,10 @@ class DelayedCall:
     debug = False
     _repr = None
 
+    # The position of this call in the _DelayedCallHeap holding it, or None
+    # if it is not held by one.
+    _heapIndex = None
+
     def __init__(self, time, func, args, kw, cancel, reset,
                  seconds=runtimeSeconds):
         """
@@ -226,6 +232,146 @@ class DelayedCall:
 
 
 
+class _DelayedCallHeap(object):
+    """
+    A binary min-heap of L{DelayedCall}s, ordered by their C{time} attribute,
+    which keeps track of the position of each call it holds.
+
+    Knowing where each call lives means a call can be removed from the heap,
+    or moved after its time changes, in O(log n) time instead of the O(n)
+    search needed to find it in a plain L{heapq} list.  The position is
+    stored on the call itself, as C{_heapIndex}.
+
+    @ivar _heap: The L{list} of L{DelayedCall}s, in heap order.
+    """
+
+    def __init__(self, calls=()):
+        """
+        @param calls: L{DelayedCall}s with which to populate the heap.
+        """
+        self._heap = []
+        for call in calls:
+            self.push(call)
+
+
+    def __len__(self):
+        return len(self._heap)
+
+
+    def __iter__(self):
+        return iter(self._heap)
+
+
+    def __getitem__(self, index):
+        return self._heap[index]
+
+
+    def push(self, call):
+        """
+        Add a call to the heap.
+
+        @param call: The L{DelayedCall} to add.  It must not already be held
+            by a L{_DelayedCallHeap}.
+        """
+        call._heapIndex = len(self._heap)
+        self._heap.append(call)
+        self._siftUp(call._heapIndex)
+
+
+    def pop(self):
+        """
+        Remove and return the call with the earliest time.
+
+        @raise IndexError: If the heap is empty.
+
+        @return: The removed L{DelayedCall}.
+        """
+        heap = self._heap
+        last = heap.pop()
+        if heap:
+            first = heap[0]
+            heap[0] = last
+            last._heapIndex = 0
+            self._siftDown(0)
+        else:
+            first = last
+        first._heapIndex = None
+        return first
+
+
+    def remove(self, call):
+        """
+        Remove a call from the heap.
+
+        @param call: A L{DelayedCall} held by this heap.
+        """
+        heap = self._heap
+        pos = call._heapIndex
+        last = heap.pop()
+        if last is not call:
+            heap[pos] = last
+            last._heapIndex = pos
+            self.update(last)
+        call._heapIndex = None
+
+
+    def update(self, call):
+        """
+        Restore the heap order after the C{time} of a call it holds changed.
+
+        @param call: A L{DelayedCall} held by this heap.
+        """
+        pos = call._heapIndex
+        if pos and call < self._heap[(pos - 1) >> 1]:
+            self._siftUp(pos)
+        else:
+            self._siftDown(pos)
+
+
+    def _siftUp(self, pos):
+        """
+        Move the call at C{pos} towards the root until its parent is not
+        later than it.
+        """
+        heap = self._heap
+        call = heap[pos]
+        while pos:
+            parentPos = (pos - 1) >> 1
+            parent = heap[parentPos]
+            if parent <= call:
+                break
+            heap[pos] = parent
+            parent._heapIndex = pos
+            pos = parentPos
+        heap[pos] = call
+        call._heapIndex = pos
+
+
+    def _siftDown(self, pos):
+        """
+        Move the call at C{pos} away from the root until neither of its
+        children is earlier than it.
+        """
+        heap = self._heap
+        size = len(heap)
+        call = heap[pos]
+        childPos = 2 * pos + 1
+        while childPos < size:
+            rightPos = childPos + 1
+            if rightPos < size and heap[rightPos] < heap[childPos]:
+                childPos = rightPos
+            child = heap[childPos]
+            if call <= child:
+                break
+            heap[pos] = child
+            child._heapIndex = pos
+            pos = childPos
+            childPos = 2 * pos + 1
+        heap[pos] = call
+        call._heapIndex = pos
+
+
+
 @implementer(IResolverSimple)
 class ThreadedResolver(object):
     """
@@ -451,7 +597,8 @@ class _ThreePhaseEvent(object):
 
 
 @implementer(IReactorCore, IReactorTime, IReactorPluggableResolver,
-             IReactorPluggableNameResolver, _ISupportsExitSignalCapturing)
+             IReactorPluggableNameResolver, IReactorMetrics,
+             _ISupportsExitSignalCapturing)
 class ReactorBase(object):
     """
     Default base class for Reactors.
@@ -481,9 +628,42 @@ class ReactorBase(object):
         If C{True}, registration will be done, otherwise it will not be.
 
     @ivar _exitSignal: See L{_ISupportsExitSignalCapturing._exitSignal}
+
+    @type indexedTimedCalls: C{bool}
+    @ivar indexedTimedCalls: A flag which selects how pending timed calls are
+        stored.  If C{False} (the default) they are kept in a plain L{heapq}
+        list: resetting a call to an earlier time needs a linear search and
+        cancelled calls are only discarded in bulk once enough have
+        accumulated.  If C{True} they are kept in a L{_DelayedCallHeap}, which
+        reschedules and removes calls in logarithmic time.  This is a better
+        choice for reactors managing a very large number of timed calls
+        which are frequently reset or cancelled, such as idle timeouts.  It
+        is consulted when the reactor is constructed, so it must be set on
+        the reactor class (or a subclass of it).
+
+    @ivar _pendingTimedCalls: The timed calls which have been inserted into
+        the timer queue, either a L{list} maintained with L{heapq} or a
+        L{_DelayedCallHeap}, depending on C{indexedTimedCalls}.
+
+    @ivar _metrics: The L{ReactorMetrics} being collected, or L{None} if
+        metrics are not being collected.
+
+    @ivar _ioDispatchMethods: The names of the methods which reactors
+        derived from this class call to handle each I/O event, with the
+        selectable the event is for as their first argument.  While metrics
+        are being collected they are replaced by wrappers which measure them,
+        as are C{runUntilCurrent} and C{doIteration}.
+    @type _ioDispatchMethods: L{tuple} of L{str}
+
+    @ivar _unmeasured: The methods replaced by wrappers while metrics are
+        being collected.
+    @type _unmeasured: L{dict} mapping L{str} to callables
     """
 
     _registerAsIOThread = True
+    indexedTimedCalls = False
+    _metrics = None
+    _ioDispatchMethods = ("_doReadOrWrite",)
 
     _stopped = True
     installed = False
@@ -496,7 +676,10 @@ class ReactorBase(object):
     def __init__(self):
         self.threadCallQueue = []
         self._eventTriggers = {}
-        self._pendingTimedCalls = []
+        if self.indexedTimedCalls:
+            self._pendingTimedCalls = _DelayedCallHeap()
+        else:
+            self._pendingTimedCalls = []
         self._newTimedCalls = []
         self._cancellations = 0
         self.running = False
@@ -784,8 +967,15 @@ class ReactorBase(object):
         return tple
 
     def _moveCallLaterSooner(self, tple):
-        # Linear time find: slow.
         heap = self._pendingTimedCalls
+        if self.indexedTimedCalls:
+            # Calls still in _newTimedCalls are not in the heap yet; they
+            # will be put at the right place when they are inserted.
+            if tple._heapIndex is not None:
+                heap.update(tple)
+            return
+
+        # Linear time find: slow.
         try:
             pos = heap.index(tple)
 
@@ -804,7 +994,10 @@ class ReactorBase(object):
             pass
 
     def _cancelCallLater(self, tple):
-        self._cancellations+=1
+        if tple._heapIndex is not None:
+            self._pendingTimedCalls.remove(tple)
+        else:
+            self._cancellations+=1
 
 
     def getDelayedCalls(self):
@@ -817,16 +1010,21 @@ class ReactorBase(object):
         @return: A list of outstanding delayed calls.
         @type: L{list} of L{DelayedCall}
         """
-        return [x for x in (self._pendingTimedCalls + self._newTimedCalls) if not x.cancelled]
+        return [x for x in (list(self._pendingTimedCalls) +
+                            self._newTimedCalls) if not x.cancelled]
 
 
     def _insertNewDelayedCalls(self):
+        if self.indexedTimedCalls:
+            push = self._pendingTimedCalls.push
+        else:
+            push = partial(heappush, self._pendingTimedCalls)
         for call in self._newTimedCalls:
             if call.cancelled:
                 self._cancellations-=1
             else:
                 call.activate_delay()
-                heappush(self._pendingTimedCalls, call)
+                push(call)
         self._newTimedCalls = []
 
 
@@ -860,10 +1058,47 @@ class ReactorBase(object):
         return max(0, min(longest, delay))
 
 
+    def startMetrics(self, slowCallThreshold=0.1):
+        """
+        See L{IReactorMetrics.startMetrics}.
+        """
+        self.stopMetrics()
+        metrics = ReactorMetrics(self, slowCallThreshold)
+        self._unmeasured = {}
+        toMeasure = [
+            ("runUntilCurrent", metrics.runUntilCurrentTime),
+            ("doIteration", metrics.doIterationTime),
+        ] + [(name, None) for name in self._ioDispatchMethods]
+        for name, histogram in toMeasure:
+            method = getattr(self, name, None)
+            if method is None:
+                continue
+            self._unmeasured[name] = method
+            if histogram is None:
+                setattr(self, name, metrics._timedIO(method))
+            else:
+                setattr(self, name, metrics._timed(histogram, method))
+        self._metrics = metrics
+        return metrics
+
+
+    def stopMetrics(self):
+        """
+        See L{IReactorMetrics.stopMetrics}.
+        """
+        if self._metrics is None:
+            return
+        for name in self._unmeasured:
+            delattr(self, name)
+        del self._unmeasured
+        self._metrics = None
+
+
     def runUntilCurrent(self):
         """
         Run all pending timed calls.
         """
+        metrics = self._metrics
         if self.threadCallQueue:
             # Keep track of how many calls we actually make, as we're
             # making them, in case another call is added to the queue
@@ -872,7 +1107,10 @@ class ReactorBase(object):
             total = len(self.threadCallQueue)
             for (f, a, kw) in self.threadCallQueue:
                 try:
-                    f(*a, **kw)
+                    if metrics is None:
+                        f(*a, **kw)
+                    else:
+                        metrics.runCall("thread", f, *a, **kw)
                 except:
                     log.err()
                 count += 1
@@ -885,21 +1123,30 @@ class ReactorBase(object):
         # insert new delayed calls now
         self._insertNewDelayedCalls()
 
+        heap = self._pendingTimedCalls
+        if self.indexedTimedCalls:
+            push, pop = heap.push, heap.pop
+        else:
+            push, pop = partial(heappush, heap), partial(heappop, heap)
+
         now = self.seconds()
-        while self._pendingTimedCalls and (self._pendingTimedCalls[0].time <= now):
-            call = heappop(self._pendingTimedCalls)
+        while heap and (heap[0].time <= now):
+            call = pop()
             if call.cancelled:
                 self._cancellations-=1
                 continue
 
             if call.delayed_time > 0:
                 call.activate_delay()
-                heappush(self._pendingTimedCalls, call)
+                push(call)
                 continue
 
             try:
                 call.called = 1
-                call.func(*call.args, **call.kw)
+                if metrics is None:
+                    call.func(*call.args, **call.kw)
+                else:
+                    metrics.runTimedCall(call, self.seconds())
             except:
                 log.deferr()
                 if hasattr(call, "creator"):
@@ -912,12 +1159,15 @@ class ReactorBase(object):
                     log.msg(e)
 
 
-        if (self._cancellations > 50 and
+        # Cancelled calls are removed from a _DelayedCallHeap right away, so
+        # there is never anything to compact in that case.
+        if (not self.indexedTimedCalls and self._cancellations > 50 and
              self._cancellations > len(self._pendingTimedCalls) >> 1):
             self._cancellations = 0
-            self._pendingTimedCalls = [x for x in self._pendingTimedCalls
-                                       if not x.cancelled]
-            heapify(self._pendingTimedCalls)
+            # Compact in place, so the list is the same one any outer
+            # (re-entrant) runUntilCurrent call is still working on.
+            heap[:] = [x for x in heap if not x.cancelled]
+            heapify(heap)
 
         if self._justStopped:
             self._justStopped = False
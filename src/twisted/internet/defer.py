@@ -624,12 +624,17 @@ class Deferred:
 
             finished = True
             current._chainedTo = None
-            while current.callbacks:
-                item = current.callbacks.pop(0)
-                callback, args, kw = item[
+            # Walk the callbacks by index and drop the ones which have run in
+            # one go afterwards, rather than popping each from the front of
+            # the list, which takes time proportional to the length of the
+            # list.  The list is re-measured on every step since callbacks
+            # may add more callbacks to it.
+            callbacks = current.callbacks
+            index = 0
+            while index < len(callbacks):
+                callback, args, kw = callbacks[index][
                     isinstance(current.result, failure.Failure)]
-                args = args or ()
-                kw = kw or {}
+                index += 1
 
                 # Avoid recursion if we can.
                 if callback is _CONTINUE:
@@ -651,7 +656,15 @@ class Deferred:
                 try:
                     current._runningCallbacks = True
                     try:
-                        current.result = callback(current.result, *args, **kw)
+                        # Most callbacks take no extra arguments; don't build
+                        # an argument tuple or keyword dictionary for them.
+                        if kw:
+                            current.result = callback(
+                                current.result, *(args or ()), **kw)
+                        elif args:
+                            current.result = callback(current.result, *args)
+                        else:
+                            current.result = callback(current.result)
                         if current.result is current:
                             warnAboutFunction(
                                 callback,
@@ -688,6 +701,8 @@ class Deferred:
                                 current.result._debugInfo.failResult = None
                             current.result = resultResult
 
+            del callbacks[:index]
+
             if finished:
                 # As much of the callback chain - perhaps all of it - as can be
                 # processed right now has been.  The current Deferred is waiting on
@@ -865,6 +880,12 @@ def _cancelledToTimedOutError(value, timeout):
 
 
 
+_coroutineTypes = (types.GeneratorType,)
+if hasattr(types, "CoroutineType"):
+    _coroutineTypes += (types.CoroutineType,)
+
+
+
 def ensureDeferred(coro):
     """
     Schedule the execution of a coroutine that awaits/yields from L{Deferred}s,
@@ -902,12 +923,15 @@ def ensureDeferred(coro):
 
     @rtype: L{Deferred}
     """
-    from types import GeneratorType
-
     if version_info >= (3, 4, 0):
+        # Recognize native coroutines and generators without importing
+        # asyncio, which only needs to be asked about anything else.
+        if isinstance(coro, _coroutineTypes):
+            return _cancellableInlineCallbacks(coro)
+
         from asyncio import iscoroutine
 
-        if iscoroutine(coro) or isinstance(coro, GeneratorType):
+        if iscoroutine(coro):
             return _cancellableInlineCallbacks(coro)
 
     if not isinstance(coro, Deferred):
@@ -1408,6 +1432,16 @@ def _inlineCallbacks(result, g, status):
     waiting = [True, # waiting for result?
                None] # result
 
+    # A single callback serves every Deferred this invocation has to wait
+    # for, since it only waits for one at a time.
+    def gotResult(r):
+        if waiting[0]:
+            waiting[0] = False
+            waiting[1] = r
+        else:
+            # We are not waiting for deferred result any more
+            _inlineCallbacks(r, g, status)
+
     while 1:
         try:
             # Send the last result back as the result of the yield expression.
@@ -1466,13 +1500,17 @@ def _inlineCallbacks(result, g, status):
 
         if isinstance(result, Deferred):
             # a deferred was yielded, get the result.
-            def gotResult(r):
-                if waiting[0]:
-                    waiting[0] = False
-                    waiting[1] = r
-                else:
-                    # We are not waiting for deferred result any more
-                    _inlineCallbacks(r, g, status)
+            if (result.called and not result.paused and
+                    not result.callbacks and not result._runningCallbacks):
+                # It already has its final result, so take that directly,
+                # leaving None behind just as gotResult would have.  This
+                # saves adding a callback only to have it run right away.
+                fired = result
+                result, fired.result = fired.result, None
+                if fired._debugInfo is not None:
+                    # Any failure is handled now.
+                    fired._debugInfo.failResult = None
+                continue
 
             result.addBoth(gotResult)
             if waiting[0]:
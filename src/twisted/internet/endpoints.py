@@ -23,7 +23,7 @@ import warnings
 from constantly import NamedConstant, Names
 from incremental import Version
 
-from zope.interface import implementer, directlyProvides, provider
+from zope.interface import implementer, alsoProvides, provider
 
 from twisted.internet import interfaces, defer, error, fdesc, threads
 from twisted.internet.abstract import isIPv6Address, isIPAddress
@@ -95,9 +95,10 @@ class _WrappingProtocol(Protocol):
 
         for iface in [interfaces.IHalfCloseableProtocol,
                       interfaces.IFileDescriptorReceiver,
-                      interfaces.IHandshakeListener]:
+                      interfaces.IHandshakeListener,
+                      interfaces.IBufferedProtocol]:
             if iface.providedBy(self._wrappedProtocol):
-                directlyProvides(self, iface)
+                alsoProvides(self, iface)
 
 
     def logPrefix(self):
@@ -132,6 +133,21 @@ class _WrappingProtocol(Protocol):
         return self._wrappedProtocol.fileDescriptorReceived(descriptor)
 
 
+    def getBuffer(self, sizeHint):
+        """
+        Proxy L{IBufferedProtocol.getBuffer} to our C{self._wrappedProtocol}
+        """
+        return self._wrappedProtocol.getBuffer(sizeHint)
+
+
+    def bufferUpdated(self, nbytes):
+        """
+        Proxy L{IBufferedProtocol.bufferUpdated} to our
+        C{self._wrappedProtocol}
+        """
+        self._wrappedProtocol.bufferUpdated(nbytes)
+
+
     def connectionLost(self, reason):
         """
         Proxy C{connectionLost} calls to our C{self._wrappedProtocol}
@@ -176,6 +192,9 @@ class _WrappingFactory(ClientFactory):
 
     @ivar _connector: A L{connector <twisted.internet.interfaces.IConnector>}
         that is managing the current or previous connection attempt.
+
+    @ivar readSizeBounds: See L{Factory.readSizeBounds}; initially those of
+        the wrapped factory.
     """
     protocol = _WrappingProtocol
 
@@ -186,6 +205,7 @@ class _WrappingFactory(ClientFactory):
             will be wrapped.
         """
         self._wrappedFactory = wrappedFactory
+        self.readSizeBounds = getattr(wrappedFactory, "readSizeBounds", None)
         self._onConnection = defer.Deferred(canceller=self._canceller)
 
 
@@ -264,6 +284,24 @@ class _WrappingFactory(ClientFactory):
 
 
 
+def _wrappingFactory(protocolFactory, readSizeBounds):
+    """
+    Wrap a factory for a client endpoint, overriding its read size bounds.
+
+    @param protocolFactory: The factory to wrap.
+
+    @param readSizeBounds: L{None}, to keep the C{readSizeBounds} of
+        C{protocolFactory}, or the bounds to use instead.
+
+    @return: A L{_WrappingFactory} around C{protocolFactory}.
+    """
+    wf = _WrappingFactory(protocolFactory)
+    if readSizeBounds is not None:
+        wf.readSizeBounds = readSizeBounds
+    return wf
+
+
+
 @implementer(interfaces.IStreamServerEndpoint)
 class StandardIOEndpoint(object):
     """
@@ -451,13 +489,89 @@ class ProcessEndpoint(object):
 
 
 
+def _listenReusePort(reactor, port, factory, backlog, interface):
+    """
+    Listen for TCP connections on a socket created with I{SO_REUSEPORT}, so
+    that other sockets with the option set, possibly in other processes, can
+    listen on the same address and port.
+
+    @param reactor: An L{IReactorSocket} provider.
+
+    @param port: The port number to listen on.
+    @type port: L{int}
+
+    @param factory: The factory for the accepted connections.
+
+    @param backlog: The size of the listen queue.
+    @type backlog: L{int}
+
+    @param interface: The address to bind to.
+    @type interface: L{str}
+
+    @raise CannotListenError: If the socket cannot be bound, or if the
+        platform or C{reactor} do not support listening this way.
+
+    @return: The L{IListeningPort} for the socket.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        raise error.CannotListenError(
+            interface, port, "SO_REUSEPORT is not supported on this platform")
+    if not interfaces.IReactorSocket.providedBy(reactor):
+        raise error.CannotListenError(
+            interface, port, "%r does not provide IReactorSocket" % (reactor,))
+    if isIPv6Address(interface):
+        family = socket.AF_INET6
+        address = socket.getaddrinfo(
+            interface, port, family, socket.SOCK_STREAM, 0,
+            socket.AI_NUMERICHOST)[0][4]
+    else:
+        family = socket.AF_INET
+        address = (interface, port)
+    skt = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        skt.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        skt.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        skt.bind(address)
+        skt.listen(backlog)
+        skt.setblocking(False)
+    except socket.error as e:
+        skt.close()
+        raise error.CannotListenError(interface, port, e)
+    try:
+        return reactor.adoptStreamPort(skt.fileno(), family, factory)
+    finally:
+        skt.close()
+
+
+
+def _setPortReadSizeBounds(port, readSizeBounds):
+    """
+    Configure the read size bounds of the connections a listening port
+    accepts.
+
+    @param port: The listening port.
+
+    @param readSizeBounds: L{None}, to keep the C{readSizeBounds} of the
+        factory, or a two-tuple of the smallest and largest number of bytes
+        accepted connections should read at once.  Only transports which
+        adapt the size of their reads honour it.
+
+    @return: C{port}
+    """
+    if readSizeBounds is not None:
+        port.readSizeBounds = readSizeBounds
+    return port
+
+
+
 @implementer(interfaces.IStreamServerEndpoint)
 class _TCPServerEndpoint(object):
     """
     A TCP server endpoint interface
     """
 
-    def __init__(self, reactor, port, backlog, interface):
+    def __init__(self, reactor, port, backlog, interface,
+                 readSizeBounds=None, reusePort=False):
         """
         @param reactor: An L{IReactorTCP} provider.
 
@@ -469,11 +583,21 @@ class _TCPServerEndpoint(object):
 
         @param interface: The hostname to bind to
         @type interface: str
+
+        @param readSizeBounds: See L{_setPortReadSizeBounds}.
+
+        @param reusePort: If C{True}, listen with I{SO_REUSEPORT}, so that
+            several processes can listen on the same port and have the kernel
+            balance incoming connections between them.  This requires
+            C{reactor} to also provide L{IReactorSocket}.
+        @type reusePort: L{bool}
         """
         self._reactor = reactor
         self._port = port
         self._backlog = backlog
         self._interface = interface
+        self._readSizeBounds = readSizeBounds
+        self._reusePort = reusePort
 
 
     def listen(self, protocolFactory):
@@ -481,11 +605,20 @@ class _TCPServerEndpoint(object):
         Implement L{IStreamServerEndpoint.listen} to listen on a TCP
         socket
         """
-        return defer.execute(self._reactor.listenTCP,
-                             self._port,
-                             protocolFactory,
-                             backlog=self._backlog,
-                             interface=self._interface)
+        if self._reusePort:
+            d = defer.execute(_listenReusePort,
+                              self._reactor,
+                              self._port,
+                              protocolFactory,
+                              self._backlog,
+                              self._interface)
+        else:
+            d = defer.execute(self._reactor.listenTCP,
+                              self._port,
+                              protocolFactory,
+                              backlog=self._backlog,
+                              interface=self._interface)
+        return d.addCallback(_setPortReadSizeBounds, self._readSizeBounds)
 
 
 
@@ -493,7 +626,8 @@ class TCP4ServerEndpoint(_TCPServerEndpoint):
     """
     Implements TCP server endpoint with an IPv4 configuration
     """
-    def __init__(self, reactor, port, backlog=50, interface=''):
+    def __init__(self, reactor, port, backlog=50, interface='',
+                 readSizeBounds=None, reusePort=False):
         """
         @param reactor: An L{IReactorTCP} provider.
 
@@ -505,8 +639,13 @@ class TCP4ServerEndpoint(_TCPServerEndpoint):
 
         @param interface: The hostname to bind to, defaults to '' (all)
         @type interface: str
+
+        @param readSizeBounds: See L{_setPortReadSizeBounds}.
+
+        @param reusePort: See L{_TCPServerEndpoint.__init__}.
         """
-        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface)
+        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface,
+                                    readSizeBounds, reusePort)
 
 
 
@@ -514,7 +653,8 @@ class TCP6ServerEndpoint(_TCPServerEndpoint):
     """
     Implements TCP server endpoint with an IPv6 configuration
     """
-    def __init__(self, reactor, port, backlog=50, interface='::'):
+    def __init__(self, reactor, port, backlog=50, interface='::',
+                 readSizeBounds=None, reusePort=False):
         """
         @param reactor: An L{IReactorTCP} provider.
 
@@ -526,8 +666,13 @@ class TCP6ServerEndpoint(_TCPServerEndpoint):
 
         @param interface: The hostname to bind to, defaults to C{::} (all)
         @type interface: str
+
+        @param readSizeBounds: See L{_setPortReadSizeBounds}.
+
+        @param reusePort: See L{_TCPServerEndpoint.__init__}.
         """
-        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface)
+        _TCPServerEndpoint.__init__(self, reactor, port, backlog, interface,
+                                    readSizeBounds, reusePort)
 
 
 
@@ -537,7 +682,8 @@ class TCP4ClientEndpoint(object):
     TCP client endpoint with an IPv4 configuration.
     """
 
-    def __init__(self, reactor, host, port, timeout=30, bindAddress=None):
+    def __init__(self, reactor, host, port, timeout=30, bindAddress=None,
+                 readSizeBounds=None):
         """
         @param reactor: An L{IReactorTCP} provider
 
@@ -554,12 +700,17 @@ class TCP4ClientEndpoint(object):
         @param bindAddress: A (host, port) tuple of local address to bind to,
             or None.
         @type bindAddress: tuple
+
+        @param readSizeBounds: L{None}, to keep the C{readSizeBounds} of the
+            factory, or a two-tuple of the smallest and largest number of
+            bytes the connection should read at once.
         """
         self._reactor = reactor
         self._host = host
         self._port = port
         self._timeout = timeout
         self._bindAddress = bindAddress
+        self._readSizeBounds = readSizeBounds
 
 
     def connect(self, protocolFactory):
@@ -567,7 +718,7 @@ class TCP4ClientEndpoint(object):
         Implement L{IStreamClientEndpoint.connect} to connect via TCP.
         """
         try:
-            wf = _WrappingFactory(protocolFactory)
+            wf = _wrappingFactory(protocolFactory, self._readSizeBounds)
             self._reactor.connectTCP(
                 self._host, self._port, wf,
                 timeout=self._timeout, bindAddress=self._bindAddress)
@@ -598,11 +749,14 @@ class TCP6ClientEndpoint(object):
     _GAI_ADDRESS = 4
     _GAI_ADDRESS_HOST = 0
 
-    def __init__(self, reactor, host, port, timeout=30, bindAddress=None):
+    def __init__(self, reactor, host, port, timeout=30, bindAddress=None,
+                 readSizeBounds=None):
         """
         @param host: An IPv6 address literal or a hostname with an
             IPv6 address
 
+        @param readSizeBounds: See L{TCP4ClientEndpoint.__init__}.
+
         @see: L{twisted.internet.interfaces.IReactorTCP.connectTCP}
         """
         self._reactor = reactor
@@ -610,6 +764,7 @@ class TCP6ClientEndpoint(object):
         self._port = port
         self._timeout = timeout
         self._bindAddress = bindAddress
+        self._readSizeBounds = readSizeBounds
 
 
     def connect(self, protocolFactory):
@@ -641,7 +796,7 @@ class TCP6ClientEndpoint(object):
         Connect to the server using the resolved hostname.
         """
         try:
-            wf = _WrappingFactory(protocolFactory)
+            wf = _wrappingFactory(protocolFactory, self._readSizeBounds)
             self._reactor.connectTCP(resolvedHost, self._port, wf,
                 timeout=self._timeout, bindAddress=self._bindAddress)
             return wf._onConnection
@@ -1143,7 +1298,8 @@ class UNIXServerEndpoint(object):
     """
     UnixSocket server endpoint.
     """
-    def __init__(self, reactor, address, backlog=50, mode=0o666, wantPID=0):
+    def __init__(self, reactor, address, backlog=50, mode=0o666, wantPID=0,
+                 readSizeBounds=None):
         """
         @param reactor: An L{IReactorUNIX} provider.
         @param address: The path to the Unix socket file, used when listening
@@ -1152,23 +1308,26 @@ class UNIXServerEndpoint(object):
             deprecated.  Permissions should be set on the directory which
             contains the UNIX socket.
         @param wantPID: If True, create a pidfile for the socket.
+        @param readSizeBounds: See L{_setPortReadSizeBounds}.
         """
         self._reactor = reactor
         self._address = address
         self._backlog = backlog
         self._mode = mode
         self._wantPID = wantPID
+        self._readSizeBounds = readSizeBounds
 
 
     def listen(self, protocolFactory):
         """
         Implement L{IStreamServerEndpoint.listen} to listen on a UNIX socket.
         """
-        return defer.execute(self._reactor.listenUNIX, self._address,
-                             protocolFactory,
-                             backlog=self._backlog,
-                             mode=self._mode,
-                             wantPID=self._wantPID)
+        d = defer.execute(self._reactor.listenUNIX, self._address,
+                          protocolFactory,
+                          backlog=self._backlog,
+                          mode=self._mode,
+                          wantPID=self._wantPID)
+        return d.addCallback(_setPortReadSizeBounds, self._readSizeBounds)
 
 
 
@@ -1177,7 +1336,8 @@ class UNIXClientEndpoint(object):
     """
     UnixSocket client endpoint.
     """
-    def __init__(self, reactor, path, timeout=30, checkPID=0):
+    def __init__(self, reactor, path, timeout=30, checkPID=0,
+                 readSizeBounds=None):
         """
         @param reactor: An L{IReactorUNIX} provider.
 
@@ -1191,11 +1351,14 @@ class UNIXClientEndpoint(object):
         @param checkPID: If True, check for a pid file to verify that a server
             is listening.
         @type checkPID: bool
+
+        @param readSizeBounds: See L{TCP4ClientEndpoint.__init__}.
         """
         self._reactor = reactor
         self._path = path
         self._timeout = timeout
         self._checkPID = checkPID
+        self._readSizeBounds = readSizeBounds
 
 
     def connect(self, protocolFactory):
@@ -1204,7 +1367,7 @@ class UNIXClientEndpoint(object):
         UNIX Socket
         """
         try:
-            wf = _WrappingFactory(protocolFactory)
+            wf = _wrappingFactory(protocolFactory, self._readSizeBounds)
             self._reactor.connectUNIX(
                 self._path, wf,
                 timeout=self._timeout,
@@ -1263,7 +1426,7 @@ class AdoptedStreamServerEndpoint(object):
 
 
 
-def _parseTCP(factory, port, interface="", backlog=50):
+def _parseTCP(factory, port, interface="", backlog=50, reusePort='0'):
     """
     Internal parser function for L{_parseServer} to convert the string
     arguments for a TCP(IPv4) stream endpoint into the structured arguments.
@@ -1281,12 +1444,19 @@ def _parseTCP(factory, port, interface="", backlog=50):
     @param backlog: the length of the listen queue
     @type backlog: C{str}
 
+    @param reusePort: A string '0' or '1', mapping to False and True
+        respectively.  See the C{reusePort} argument to L{TCP4ServerEndpoint},
+        which is only included in the keyword arguments if true since
+        L{IReactorTCP.listenTCP} does not accept it.
+
     @return: a 2-tuple of (args, kwargs), describing  the parameters to
         L{IReactorTCP.listenTCP} (or, modulo argument 2, the factory, arguments
         to L{TCP4ServerEndpoint}.
     """
-    return (int(port), factory), {'interface': interface,
-                                  'backlog': int(backlog)}
+    kwargs = {'interface': interface, 'backlog': int(backlog)}
+    if int(reusePort):
+        kwargs['reusePort'] = True
+    return (int(port), factory), kwargs
 
 
 
@@ -1494,7 +1664,8 @@ class _TCP6ServerParser(object):
     """
     prefix = "tcp6"     # Used in _parseServer to identify the plugin with the endpoint type
 
-    def _parseServer(self, reactor, port, backlog=50, interface='::'):
+    def _parseServer(self, reactor, port, backlog=50, interface='::',
+                     reusePort='0'):
         """
         Internal parser function for L{_parseServer} to convert the string
         arguments into structured arguments for the L{TCP6ServerEndpoint}
@@ -1509,10 +1680,15 @@ class _TCP6ServerParser(object):
 
         @param interface: The hostname to bind to
         @type interface: str
+
+        @param reusePort: A string '0' or '1', mapping to False and True
+            respectively.
+        @type reusePort: str
         """
         port = int(port)
         backlog = int(backlog)
-        return TCP6ServerEndpoint(reactor, port, backlog, interface)
+        return TCP6ServerEndpoint(reactor, port, backlog, interface,
+                                  reusePort=bool(int(reusePort)))
 
 
     def parseStreamServer(self, reactor, *args, **kwargs):
@@ -1678,6 +1854,12 @@ def serverFromString(reactor, description):
 
         serverFromString(reactor, "tcp:80:interface=127.0.0.1")
 
+    Several processes can listen on the same TCP port, with the kernel
+    balancing incoming connections between them, if each of them passes
+    C{reusePort=1} (which sets I{SO_REUSEPORT} on the listening socket)::
+
+        serverFromString(reactor, "tcp:80:reusePort=1")
+
     SSL server endpoints may be specified with the 'ssl' prefix, and the
     private key and certificate files may be specified by the C{privateKey} and
     C{certKey} arguments::
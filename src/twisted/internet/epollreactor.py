@@ -13,8 +13,9 @@ listeners or connectors are added)::
 
 from __future__ import division, absolute_import
 
-from select import epoll, EPOLLHUP, EPOLLERR, EPOLLIN, EPOLLOUT
+from select import epoll, EPOLLHUP, EPOLLERR, EPOLLIN, EPOLLOUT, EPOLLET
 import errno
+import sys
 
 from zope.interface import implementer
 
@@ -51,18 +52,103 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
     @ivar _continuousPolling: A L{_ContinuousPolling} instance, used to handle
         file descriptors (e.g. filesystem files) that are not supported by
         C{epoll(7)}.
+
+    @ivar edgeTriggered: If C{True}, descriptors which are only being read
+        from are registered for edge-triggered notification, and each read
+        event is dispatched by calling C{doRead} repeatedly until the
+        descriptor has no more data (or C{maxReadsPerEvent} reads have been
+        done), saving C{epoll_wait} calls and dispatch overhead on busy
+        connections.  Only descriptors which report when a read would block,
+        by setting C{_readWouldBlock} (as L{twisted.internet.tcp.Connection}
+        and L{twisted.internet.unix.Connection} do), are registered this way;
+        all others, and descriptors which are also being written to, are
+        registered level-triggered.
+    @type edgeTriggered: L{bool}
+
+    @ivar maxEvents: The largest number of events to retrieve from
+        C{epoll_wait} at once, or L{None} to use the number of descriptors
+        being monitored.
+    @type maxEvents: L{int} or L{None}
+
+    @ivar maxReadsPerEvent: In edge-triggered mode, the largest number of
+        times C{doRead} is called for one descriptor before the reactor moves
+        on to other work.  A descriptor which still has data is read from
+        again on the next iteration.
+    @type maxReadsPerEvent: L{int}
+
+    @ivar pollCount: The number of times the reactor has polled for events.
+    @type pollCount: L{int}
+
+    @ivar eventCount: The total number of events the reactor has dispatched.
+    @type eventCount: L{int}
+
+    @ivar lastEventCount: The number of events dispatched by the most recent
+        poll.
+    @type lastEventCount: L{int}
+
+    @ivar peakEventCount: The largest number of events dispatched by one
+        poll.
+    @type peakEventCount: L{int}
+
+    @ivar speculativeWrites: If C{True}, a descriptor which starts writing is
+        not registered for write readiness notification straight away.
+        Instead its C{doWrite} is called just before the next poll, and it is
+        only registered if it could not write everything it had buffered.
+        Request/response protocols usually can, so this saves two
+        C{epoll_ctl} calls and an event per response.  Only descriptors whose
+        C{doWrite} copes with the descriptor not being writable, which they
+        declare by setting C{_speculativeWrites} (as
+        L{twisted.internet.tcp.Connection} does), are handled this way.
+    @type speculativeWrites: L{bool}
+
+    @ivar _speculativeWriters: A dictionary mapping integer file descriptors
+        to the C{FileDescriptor}s which started writing since the last poll
+        and are not registered with C{_poller} for write readiness
+        notification.
+
+    @ivar _edgeTriggeredFDs: A set containing the integer file descriptors
+        currently registered with C{_poller} for edge-triggered notification.
+
+    @ivar _unfinishedReads: A dictionary mapping integer file descriptors to
+        the C{FileDescriptor}s which still had data to read when
+        C{maxReadsPerEvent} was reached, and must be read from again without
+        waiting for a new notification.
     """
 
+    maxReadsPerEvent = 16
+
+    pollCount = 0
+    eventCount = 0
+    lastEventCount = 0
+    peakEventCount = 0
+
+    # Edge-triggered reads are dispatched without going through
+    # _doReadOrWrite, so both are measured while metrics are collected.
+    _ioDispatchMethods = ("_doReadOrWrite", "_doEdgeTriggeredRead")
+
     # Attributes for _PollLikeMixin
     _POLL_DISCONNECTED = (EPOLLHUP | EPOLLERR)
     _POLL_IN = EPOLLIN
     _POLL_OUT = EPOLLOUT
 
-    def __init__(self):
+    def __init__(self, edgeTriggered=False, maxEvents=None,
+                 speculativeWrites=False):
         """
         Initialize epoll object, file descriptor tracking dictionaries, and the
         base class.
+
+        @param edgeTriggered: See L{EPollReactor.edgeTriggered}.
+
+        @param maxEvents: See L{EPollReactor.maxEvents}.
+
+        @param speculativeWrites: See L{EPollReactor.speculativeWrites}.
         """
+        self.edgeTriggered = edgeTriggered
+        self.maxEvents = maxEvents
+        self.speculativeWrites = speculativeWrites
+        self._speculativeWriters = {}
+        self._edgeTriggeredFDs = set()
+        self._unfinishedReads = {}
         # Create the poller we're going to use.  The 1024 here is just a hint
         # to the kernel, it is not a hard maximum.  After Linux 2.6.8, the size
         # argument is completely ignored.
@@ -92,6 +178,10 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             if fd in other:
                 flags |= antievent
                 self._poller.modify(fd, flags)
+                self._edgeTriggeredFDs.discard(fd)
+            elif self._readsEdgeTriggered(xer, flags):
+                self._poller.register(fd, flags | EPOLLET)
+                self._edgeTriggeredFDs.add(fd)
             else:
                 self._poller.register(fd, flags)
 
@@ -101,6 +191,17 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             selectables[fd] = xer
 
 
+    def _readsEdgeTriggered(self, xer, flags):
+        """
+        Determine whether a descriptor which will be registered for C{flags}
+        events should be registered for edge-triggered notification.
+
+        @see: L{EPollReactor.edgeTriggered}
+        """
+        return (self.edgeTriggered and flags == EPOLLIN and
+                getattr(xer, "_readWouldBlock", None) is not None)
+
+
     def addReader(self, reader):
         """
         Add a FileDescriptor for notification of data available to read.
@@ -122,6 +223,12 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         """
         Add a FileDescriptor for notification of data available to write.
         """
+        if (self.speculativeWrites and
+                getattr(writer, "_speculativeWrites", False)):
+            fd = writer.fileno()
+            if fd not in self._writes:
+                self._speculativeWriters[fd] = writer
+                return
         try:
             self._add(writer, self._writes, self._reads, self._selectables,
                       EPOLLOUT, EPOLLIN)
@@ -152,12 +259,17 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         if fd in primary:
             if fd in other:
                 flags = antievent
+                if self._readsEdgeTriggered(xer, flags):
+                    self._edgeTriggeredFDs.add(fd)
+                    flags |= EPOLLET
                 # See comment above modify call in _add.
                 self._poller.modify(fd, flags)
             else:
                 del selectables[fd]
                 # See comment above _control call in _add.
                 self._poller.unregister(fd)
+                self._edgeTriggeredFDs.discard(fd)
+                self._unfinishedReads.pop(fd, None)
             primary.remove(fd)
 
 
@@ -179,17 +291,39 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         if self._continuousPolling.isWriting(writer):
             self._continuousPolling.removeWriter(writer)
             return
+        if self._speculativeWriters and self._removeSpeculativeWriter(writer):
+            return
         self._remove(writer, self._writes, self._reads, self._selectables,
                      EPOLLOUT, EPOLLIN)
 
 
+    def _removeSpeculativeWriter(self, writer):
+        """
+        Remove C{writer} from C{_speculativeWriters}, if it is there.
+
+        @return: C{True} if it was there, C{False} otherwise.
+        """
+        fd = writer.fileno()
+        if fd == -1:
+            for fd, pending in self._speculativeWriters.items():
+                if writer is pending:
+                    break
+            else:
+                return False
+        if self._speculativeWriters.get(fd) is writer:
+            del self._speculativeWriters[fd]
+            return True
+        return False
+
+
     def removeAll(self):
         """
         Remove all selectables, and return a list of them.
         """
         return (self._removeAll(
                 [self._selectables[fd] for fd in self._reads],
-                [self._selectables[fd] for fd in self._writes]) +
+                [self._selectables[fd] for fd in self._writes] +
+                list(self._speculativeWriters.values())) +
                 self._continuousPolling.removeAll())
 
 
@@ -200,6 +334,7 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
 
     def getWriters(self):
         return ([self._selectables[fd] for fd in self._writes] +
+                list(self._speculativeWriters.values()) +
                 self._continuousPolling.getWriters())
 
 
@@ -210,12 +345,28 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
         if timeout is None:
             timeout = -1  # Wait indefinitely.
 
-        try:
+        if self._unfinishedReads or self._speculativeWriters:
+            # Some descriptors still have data to read, which epoll will not
+            # tell us about again, or have started writing since the last
+            # poll.  Deal with them first.  That may run application code
+            # which schedules timed calls or stops the reactor, which the
+            # timeout we were given does not account for, so don't block.
+            if self._unfinishedReads:
+                self._continueUnfinishedReads()
+            if self._speculativeWriters:
+                self._doSpeculativeWrites()
+            timeout = 0
+
+        maxEvents = self.maxEvents
+        if maxEvents is None:
             # Limit the number of events to the number of io objects we're
-            # currently tracking (because that's maybe a good heuristic) and
-            # the amount of time we block to the value specified by our
+            # currently tracking (because that's maybe a good heuristic).
+            maxEvents = len(self._selectables)
+
+        try:
+            # Limit the amount of time we block to the value specified by our
             # caller.
-            l = self._poller.poll(timeout, len(self._selectables))
+            l = self._poller.poll(timeout, maxEvents)
         except IOError as err:
             if err.errno == errno.EINTR:
                 return
@@ -225,23 +376,114 @@ class EPollReactor(posixbase.PosixReactorBase, posixbase._PollLikeMixin):
             # loudly.
             raise
 
+        self.pollCount += 1
+        self.lastEventCount = len(l)
+        self.eventCount += self.lastEventCount
+        if self.lastEventCount > self.peakEventCount:
+            self.peakEventCount = self.lastEventCount
+
         _drdw = self._doReadOrWrite
+        _detr = self._doEdgeTriggeredRead
+        edgeTriggeredFDs = self._edgeTriggeredFDs
         for fd, event in l:
             try:
                 selectable = self._selectables[fd]
             except KeyError:
                 pass
             else:
-                log.callWithLogger(selectable, _drdw, selectable, fd, event)
+                if fd in edgeTriggeredFDs and event & EPOLLIN:
+                    log.callWithLogger(selectable, _detr, selectable, fd,
+                                       event)
+                else:
+                    log.callWithLogger(selectable, _drdw, selectable, fd,
+                                       event)
+
+        if self._speculativeWriters:
+            # Write the responses to what was just read before going back to
+            # the main loop.
+            self._doSpeculativeWrites()
 
     doIteration = doPoll
 
 
-def install():
+    def _continueUnfinishedReads(self):
+        """
+        Read from the descriptors in C{_unfinishedReads} again.
+        """
+        unfinished, self._unfinishedReads = self._unfinishedReads, {}
+        for fd, selectable in unfinished.items():
+            # It may have been removed, or switched to level-triggered
+            # notification, by a previous read.
+            if (fd in self._edgeTriggeredFDs and
+                    self._selectables.get(fd) is selectable):
+                log.callWithLogger(selectable, self._doEdgeTriggeredRead,
+                                   selectable, fd, EPOLLIN)
+
+
+    def _doSpeculativeWrites(self):
+        """
+        Call C{doWrite} on each descriptor in C{_speculativeWriters}, and
+        register those which are left with something to write for write
+        readiness notification.
+        """
+        pending = self._speculativeWriters
+        for fd, writer in list(pending.items()):
+            if pending.get(fd) is not writer:
+                # Removed by a previous write.
+                continue
+            log.callWithLogger(writer, self._doReadOrWrite, writer, fd,
+                               EPOLLOUT)
+            if pending.get(fd) is writer:
+                # It did not stop writing, so it has more to write.
+                del pending[fd]
+                self._add(writer, self._writes, self._reads,
+                          self._selectables, EPOLLOUT, EPOLLIN)
+
+
+    def _doEdgeTriggeredRead(self, selectable, fd, event):
+        """
+        Dispatch a read event for a descriptor registered for edge-triggered
+        notification, reading from it until it has no more data.  C{doPoll}
+        dispatches its other events to C{_doReadOrWrite}.
+
+        Epoll will not report the descriptor as readable again until more
+        data arrives, so if the descriptor still has data after
+        C{maxReadsPerEvent} reads it is put in C{_unfinishedReads}.
+        """
+        why = None
+        try:
+            if selectable.fileno() == -1:
+                why = posixbase._NO_FILEDESC
+            else:
+                selectable._readWouldBlock = False
+                for i in range(self.maxReadsPerEvent):
+                    why = selectable.doRead()
+                    if (why or selectable._readWouldBlock or
+                            fd not in self._edgeTriggeredFDs):
+                        # Disconnected, out of data, or no longer only
+                        # being read from (in which case it is either not
+                        # being read from at all or level-triggered).
+                        break
+                else:
+                    self._unfinishedReads[fd] = selectable
+        except:
+            why = sys.exc_info()[1]
+            log.err()
+        if why:
+            self._disconnectSelectable(selectable, why, True)
+
+
+def install(edgeTriggered=False, maxEvents=None, speculativeWrites=False):
     """
     Install the epoll() reactor.
+
+    @param edgeTriggered: See L{EPollReactor.edgeTriggered}.
+
+    @param maxEvents: See L{EPollReactor.maxEvents}.
+
+    @param speculativeWrites: See L{EPollReactor.speculativeWrites}.
     """
-    p = EPollReactor()
+    p = EPollReactor(edgeTriggered, maxEvents, speculativeWrites)
     from twisted.internet.main import installReactor
     installReactor(p)
 
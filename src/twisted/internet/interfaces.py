@@ -1607,6 +1607,47 @@ class IReactorDaemonize(Interface):
 
 
 
+class IReactorMetrics(Interface):
+    """
+    A reactor which can measure how long the work it does takes, to help
+    find the callbacks which block its event loop.
+
+    While metrics are being collected the reactor records how late its timed
+    calls run, how long each pass through its timed calls and each wait for
+    I/O takes, and how long each timed call, call from a thread, and I/O
+    event handler runs for.  Each callback which runs for longer than a
+    threshold is logged as a warning with its fully qualified name.
+
+    Collecting metrics adds a little overhead to every callback; a reactor
+    which is not collecting metrics does not pay for it.
+    """
+
+    def startMetrics(slowCallThreshold=0.1):
+        """
+        Start collecting metrics about this reactor, discarding any collected
+        so far.
+
+        @param slowCallThreshold: The number of seconds a single callback may
+            run for before it is logged as slow.
+        @type slowCallThreshold: L{float}
+
+        @return: The collected metrics, which are updated as the reactor
+            runs until L{stopMetrics} is called.  Their C{report} method
+            emits them as a L{twisted.logger} event.
+        @rtype: L{twisted.internet._metrics.ReactorMetrics}
+        """
+
+
+    def stopMetrics():
+        """
+        Stop collecting metrics about this reactor.  This does nothing if
+        metrics are not being collected.
+
+        @return: L{None}.
+        """
+
+
+
 class IReactorFDSet(Interface):
     """
     Implement me to be able to use L{IFileDescriptor} type resources.
@@ -2149,6 +2190,46 @@ class IFileDescriptorReceiver(Interface):
 
 
 
+class IBufferedProtocol(Interface):
+    """
+    Protocols may implement L{IBufferedProtocol} in addition to L{IProtocol}
+    to have transports receive data directly into a buffer they provide,
+    instead of allocating a new L{bytes} object for each read and passing it
+    to C{dataReceived}.
+
+    Transports which cannot receive into a buffer - for example those which
+    decrypt or otherwise transform the data they receive - keep calling
+    C{dataReceived}, so it must be implemented as well.
+    """
+    def getBuffer(sizeHint):
+        """
+        Called before the transport reads from the connection, to get the
+        buffer to read into.
+
+        @param sizeHint: The number of bytes the transport would like to
+            read.  The buffer returned may be smaller or larger than this.
+        @type sizeHint: L{int}
+
+        @return: A non-empty writeable object supporting the buffer
+            protocol, such as a L{bytearray} or a L{memoryview} of part of
+            one.
+        """
+
+
+    def bufferUpdated(nbytes):
+        """
+        Called when data has been received into the buffer returned by the
+        last call to C{getBuffer}.
+
+        @param nbytes: The number of bytes received, written at the start of
+            the buffer.
+        @type nbytes: L{int}
+
+        @return: L{None}
+        """
+
+
+
 class IProtocolFactory(Interface):
     """
     Interface for protocol factories.
@@ -2341,6 +2422,44 @@ class IUNIXTransport(ITransport):
 
 
 
+class ISendfileTransport(ITransport):
+    """
+    A transport which can send the contents of a file without copying them
+    through user space, using the C{sendfile} system call where it is
+    available.
+    """
+
+    def sendFile(fileObject, offset=0, count=None):
+        """
+        Send part of a file over this transport.
+
+        The file contents are sent after any data already written to the
+        transport and before any data written after the transfer has
+        completed.  Nothing else should be written to the transport until the
+        returned L{Deferred} has fired.  A producer registered with the
+        transport is neither paused nor resumed during the transfer; it is
+        only told to stop producing if the connection is lost.
+
+        If the file contents cannot be sent directly - for example because
+        the connection has been switched to TLS, or because the file does not
+        support C{sendfile} - they are read and written to the transport
+        instead.
+
+        @param fileObject: A file object.  Its current position is neither
+            used nor changed.
+        @param offset: The offset in the file of the first byte to send.
+        @type offset: L{int}
+        @param count: The number of bytes to send, or L{None} to send
+            everything up to the end of the file.
+        @type count: L{int} or L{None}
+
+        @return: A L{Deferred} which fires with the number of bytes sent when
+            the transfer has completed, or fails if the connection is lost
+            first.
+        """
+
+
+
 class IOpenSSLServerConnectionCreator(Interface):
     """
     A provider of L{IOpenSSLServerConnectionCreator} can create
@@ -69,6 +69,7 @@ class KQueueReactor(posixbase.PosixReactorBase):
         which will be dispatched to the corresponding L{FileDescriptor}
         instances in C{_selectables}.
     """
+    _ioDispatchMethods = ("_doWriteOrRead",)
 
     def __init__(self, _kqueueImpl=select):
         """
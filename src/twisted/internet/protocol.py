@@ -28,6 +28,13 @@ class Factory:
 
     By default, buildProtocol will create a protocol of the class given in
     self.protocol.
+
+    @ivar readSizeBounds: L{None}, or a two-tuple of the smallest and largest
+        number of bytes the connections of the protocols built by this
+        factory should read at once.  Transports which adapt the size of
+        their reads to the amount of data arriving, such as TCP and UNIX
+        connections, keep it within these bounds.  If L{None}, the defaults
+        of the transport are used.
     """
 
     # Put a subclass of Protocol here:
@@ -35,6 +42,7 @@ class Factory:
 
     numPorts = 0
     noisy = True
+    readSizeBounds = None
 
     @classmethod
     def forProtocol(cls, protocol, *args, **kwargs):
@@ -10,6 +10,7 @@ from __future__ import division, absolute_import
 
 __metaclass__ = type
 
+import math
 import sys
 import time
 import warnings
@@ -837,6 +838,169 @@ class Clock:
 
 
 
+@implementer(IReactorTime)
+class TimingWheel(object):
+    """
+    A hashed timing wheel: an implementation of L{IReactorTime} for large
+    numbers of timed calls which do not need to run at a precise time, such
+    as idle timeouts.
+
+    Time is divided into ticks of C{tick} seconds, and each timed call is
+    kept in one of C{size} slots, chosen by the tick during which it is due.
+    Scheduling, cancelling and resetting a call are therefore constant time
+    operations, regardless of how many calls are pending.  The price is
+    precision: a call runs no earlier than the time it is scheduled for, but
+    may run up to one tick later.
+
+    While any calls are pending the wheel schedules a call on its underlying
+    clock once per tick; it schedules nothing while it is empty.
+
+    @ivar tick: The length of a tick, in seconds.
+
+    @ivar size: The number of slots in the wheel.
+
+    @ivar _clock: The L{IReactorTime} provider which drives the wheel.
+
+    @ivar _slots: A L{list} of C{size} L{set}s of L{base.DelayedCall}s.
+
+    @ivar _slotOf: A L{dict} mapping each pending L{base.DelayedCall} to the
+        index of the slot it is in.
+
+    @ivar _currentTick: The number of the last tick which has been processed.
+        Tick C{n} ends C{n * tick} seconds after the epoch.
+
+    @ivar _ticker: The L{IDelayedCall} provider for the next tick, or L{None}
+        if there are no pending calls.
+    """
+
+    def __init__(self, tick=0.1, size=512, clock=None):
+        """
+        @param tick: The length of a tick, in seconds.
+        @type tick: L{float}
+
+        @param size: The number of slots in the wheel.  Calls due more than
+            C{tick * size} seconds from now share their slot with nearer
+            calls and are skipped over once per turn of the wheel.
+        @type size: L{int}
+
+        @param clock: The L{IReactorTime} provider which drives the wheel.
+            If L{None}, the global reactor is used.
+        """
+        if clock is None:
+            from twisted.internet import reactor as clock
+        self.tick = tick
+        self.size = size
+        self._clock = clock
+        self._slots = [set() for i in range(size)]
+        self._slotOf = {}
+        self._currentTick = int(math.floor(clock.seconds() / tick))
+        self._ticker = None
+
+
+    def seconds(self):
+        """
+        See L{twisted.internet.interfaces.IReactorTime.seconds}.
+        """
+        return self._clock.seconds()
+
+
+    def callLater(self, delay, callable, *args, **kw):
+        """
+        See L{twisted.internet.interfaces.IReactorTime.callLater}.
+        """
+        call = base.DelayedCall(self.seconds() + delay, callable, args, kw,
+                                self._remove, self._reinsert, self.seconds)
+        self._insert(call)
+        return call
+
+
+    def getDelayedCalls(self):
+        """
+        See L{twisted.internet.interfaces.IReactorTime.getDelayedCalls}.
+        """
+        return list(self._slotOf)
+
+
+    def _tickOf(self, when):
+        """
+        Compute the number of the tick which ends at or after C{when}.
+        """
+        return int(math.ceil(when / self.tick))
+
+
+    def _insert(self, call):
+        """
+        Put a call in the slot for the tick during which it is due, and make
+        sure the wheel is turning.
+        """
+        if not self._slotOf:
+            # The wheel has been idle, so catch up with the clock.
+            self._currentTick = int(math.floor(self.seconds() / self.tick))
+        index = max(self._tickOf(call.time), self._currentTick + 1) % self.size
+        self._slots[index].add(call)
+        self._slotOf[call] = index
+        if self._ticker is None:
+            self._ticker = self._clock.callLater(
+                max(0, (self._currentTick + 1) * self.tick - self.seconds()),
+                self._advance)
+
+
+    def _remove(self, call):
+        """
+        Take a call out of the wheel.  This is the canceller of every call
+        scheduled by this wheel.
+        """
+        self._slots[self._slotOf.pop(call)].discard(call)
+        if not self._slotOf and self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+
+
+    def _reinsert(self, call):
+        """
+        Move a call whose time was brought forward to its new slot.  This is
+        the resetter of every call scheduled by this wheel.
+        """
+        self._slots[self._slotOf.pop(call)].discard(call)
+        self._insert(call)
+
+
+    def _advance(self):
+        """
+        Process every tick which has ended since the last one processed,
+        running the calls which are due and moving those which were delayed.
+        """
+        self._ticker = None
+        now = self.seconds()
+        lastTick = int(math.floor(now / self.tick))
+        firstTick = max(self._currentTick + 1, lastTick - self.size + 1)
+        self._currentTick = lastTick
+        for tick in range(firstTick, lastTick + 1):
+            slot = self._slots[tick % self.size]
+            for call in list(slot):
+                if call not in slot:
+                    # Cancelled or reset by a call run earlier in this loop.
+                    continue
+                if call.getTime() > now:
+                    # Either it was delayed or it is due on a later turn of
+                    # the wheel.
+                    call.activate_delay()
+                    self._reinsert(call)
+                    continue
+                slot.discard(call)
+                del self._slotOf[call]
+                call.called = 1
+                try:
+                    call.func(*call.args, **call.kw)
+                except:
+                    log.err(None, "Unhandled error in TimingWheel call")
+        if self._slotOf and self._ticker is None:
+            self._ticker = self._clock.callLater(
+                max(0, (self._currentTick + 1) * self.tick - now),
+                self._advance)
+
+
+
 def deferLater(clock, delay, callable, *args, **kw):
     """
     Call the given function after a certain period of time has passed.
@@ -940,7 +1104,7 @@ def react(main, argv=(), _reactor=None):
 __all__ = [
     'LoopingCall',
 
-    'Clock',
+    'Clock', 'TimingWheel',
 
     'SchedulerStopped', 'Cooperator', 'coiterate',
 
@@ -81,10 +81,10 @@ else:
     from os import strerror
 
 
-from errno import errorcode
+from errno import errorcode, ECONNRESET, EPIPE
 
 # Twisted Imports
-from twisted.internet import base, address, fdesc
+from twisted.internet import base, address, fdesc, defer
 from twisted.internet.task import deferLater
 from twisted.python import log, failure, reflect
 from twisted.python.util import untilConcludes
@@ -92,6 +92,9 @@ from twisted.internet.error import CannotListenError
 from twisted.internet import abstract, main, interfaces, error
 from twisted.internet.protocol import Protocol
 
+# Not all platforms have sendfile.
+_sendfile = getattr(os, "sendfile", None)
+
 # Not all platforms have, or support, this flag.
 _AI_NUMERICSERV = getattr(socket, "AI_NUMERICSERV", 0)
 
@@ -197,7 +200,179 @@ class _AbortingMixin(object):
 
 
 
-@implementer(interfaces.ITCPTransport, interfaces.ISystemHandle)
+@implementer(interfaces.IPullProducer)
+class _SendfileProducer(object):
+    """
+    A pull producer registered with a L{Connection} by
+    L{Connection.sendFile} which sends part of a file with C{os.sendfile}
+    whenever the connection's write buffer is empty.
+
+    If C{os.sendfile} cannot be used, because the connection has been
+    switched to TLS, because the platform does not provide it or because the
+    file object does not support it, the file contents are read and written
+    to the connection instead.
+
+    @ivar transport: The L{Connection} the file is sent over.
+    @ivar fileObject: The file object to send from.
+    @ivar offset: The offset in the file of the next byte to send.
+    @ivar remaining: The number of bytes left to send, or L{None} to send
+        everything up to the end of the file.
+    @ivar sent: The number of bytes sent so far.
+    @ivar deferred: The L{Deferred} returned by L{Connection.sendFile}, or
+        L{None} once it has fired.
+
+    @ivar _useSendfile: C{True} as long as C{os.sendfile} may be used.
+    @ivar _previous: A L{tuple} of the producer registered with the
+        transport before the transfer started, if any, whether it is a
+        streaming producer and whether it was paused.  It is registered again
+        once the transfer is over.
+    """
+
+    chunkSize = 2 ** 20
+
+    def __init__(self, transport, fileObject, offset, count):
+        self.transport = transport
+        self.fileObject = fileObject
+        self.offset = offset
+        self.remaining = count
+        self.sent = 0
+        self.deferred = defer.Deferred()
+        self._useSendfile = (_sendfile is not None and not transport.TLS)
+        self._previous = (transport.producer, transport.streamingProducer,
+                          transport.producerPaused)
+
+
+    def _bufferedData(self):
+        """
+        @return: C{True} if the transport still has data written before this
+            transfer in its write buffer.
+        """
+        transport = self.transport
+        return bool(len(transport.dataBuffer) - transport.offset or
+                    transport._tempDataLen)
+
+
+    def _release(self):
+        """
+        Unregister from the transport, and register the producer that was
+        registered with it before the transfer again.
+        """
+        transport = self.transport
+        transport.unregisterProducer()
+        producer, streaming, paused = self._previous
+        if producer is not None:
+            transport.registerProducer(producer, streaming)
+            if paused:
+                # The write buffer is empty now.
+                producer.resumeProducing()
+
+
+    def _finish(self):
+        """
+        The transfer has completed; give the transport back and fire the
+        L{Deferred}.
+        """
+        self._release()
+        deferred, self.deferred = self.deferred, None
+        deferred.callback(self.sent)
+
+
+    def _fail(self, reason):
+        """
+        The file could not be sent.  The peer has been sent a truncated copy
+        of it, so the connection is aborted as well.
+        """
+        self._release()
+        self.transport.abortConnection()
+        deferred, self.deferred = self.deferred, None
+        deferred.errback(reason)
+
+
+    def resumeProducing(self):
+        """
+        Send the next part of the file, if the transport's write buffer has
+        been emptied.
+        """
+        if self.deferred is None or self._bufferedData():
+            # The transport will resume us once that has been written.
+            return
+        size = self.chunkSize
+        if self.remaining is not None:
+            size = min(size, self.remaining)
+        if size == 0:
+            self._finish()
+            return
+
+        if self._useSendfile:
+            try:
+                written = _sendfile(self.transport.fileno(),
+                                    self.fileObject.fileno(),
+                                    self.offset, size)
+            except (EnvironmentError, ValueError) as e:
+                if getattr(e, "errno", None) in (EWOULDBLOCK, ENOBUFS):
+                    written = None
+                elif self.sent == 0 and getattr(e, "errno", None) not in (
+                        EPIPE, ECONNRESET):
+                    # Not supported for this file or socket.
+                    self._useSendfile = False
+                    self.resumeProducing()
+                    return
+                else:
+                    self._fail(failure.Failure())
+                    return
+            if written == 0:
+                # End of the file.
+                self._finish()
+                return
+            if written is not None:
+                self._advance(written)
+            # Have doWrite resume us when the socket is writeable again.
+            self.transport.startWriting()
+            return
+
+        try:
+            # Leave the file's position where the caller left it.
+            position = self.fileObject.tell()
+            self.fileObject.seek(self.offset)
+            try:
+                data = self.fileObject.read(size)
+            finally:
+                self.fileObject.seek(position)
+        except EnvironmentError:
+            self._fail(failure.Failure())
+            return
+        if not data:
+            self._finish()
+            return
+        self._advance(len(data))
+        self.transport.write(data)
+
+
+    def _advance(self, count):
+        """
+        Account for C{count} more bytes of the file having been sent.
+        """
+        self.offset += count
+        self.sent += count
+        if self.remaining is not None:
+            self.remaining -= count
+
+
+    def stopProducing(self):
+        """
+        The connection was lost before the transfer completed.
+        """
+        producer = self._previous[0]
+        if producer is not None:
+            producer.stopProducing()
+        if self.deferred is not None:
+            deferred, self.deferred = self.deferred, None
+            deferred.errback(failure.Failure(error.ConnectionLost()))
+
+
+
+@implementer(interfaces.ITCPTransport, interfaces.ISystemHandle,
+             interfaces.ISendfileTransport)
 class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
                  _AbortingMixin):
     """
@@ -208,8 +383,57 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
 
     @ivar logstr: prefix used when logging events related to this connection.
     @type logstr: C{str}
+
+    @ivar _readWouldBlock: Set to C{True} by L{doRead} when there was nothing
+        to read from the socket.  Edge-triggered reactors reset it and call
+        L{doRead} until it is set to find out when the socket has been
+        drained.
+    @type _readWouldBlock: L{bool}
+
+    @ivar _speculativeWrites: C{True}, to tell reactors that L{doWrite} may be
+        called when the socket is not known to be writable.
+    @type _speculativeWrites: L{bool}
+
+    @ivar minimumReadSize: The smallest number of bytes L{doRead} will ask
+        the socket for.
+    @type minimumReadSize: L{int}
+
+    @ivar maximumReadSize: The largest number of bytes L{doRead} will ask the
+        socket for.
+    @type maximumReadSize: L{int}
+
+    @ivar smallReadsBeforeShrinking: The number of consecutive reads which
+        fill no more than a quarter of the read size after which the read
+        size is halved.
+    @type smallReadsBeforeShrinking: L{int}
+
+    @ivar readCount: The number of reads which returned data.
+    @type readCount: L{int}
+
+    @ivar bytesRead: The number of bytes returned by those reads.
+    @type bytesRead: L{int}
+
+    @ivar _readSize: The number of bytes L{doRead} currently asks the socket
+        for; it starts at C{bufferSize}, is doubled whenever a read fills it
+        and is halved after C{smallReadsBeforeShrinking} small reads, within
+        the bounds given by C{minimumReadSize} and C{maximumReadSize}.
+    @type _readSize: L{int}
+
+    @ivar _smallReads: The number of consecutive small reads so far.
+    @type _smallReads: L{int}
     """
 
+    _readWouldBlock = False
+    _speculativeWrites = True
+    _vectoredWrites = hasattr(socket.socket, "sendmsg")
+
+    minimumReadSize = 2 ** 12
+    maximumReadSize = 2 ** 20
+    smallReadsBeforeShrinking = 16
+    readCount = 0
+    bytesRead = 0
+    _readSize = None
+    _smallReads = 0
 
     def __init__(self, skt, protocol, reactor=None):
         abstract.FileDescriptor.__init__(self, reactor=reactor)
@@ -224,18 +448,85 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         return self.socket
 
 
+    def setReadSizeBounds(self, minimum, maximum):
+        """
+        Set the bounds within which the number of bytes asked for by each
+        read of this connection is adapted to the amount of data arriving.
+
+        @param minimum: The smallest number of bytes to read at once.
+        @type minimum: L{int}
+
+        @param maximum: The largest number of bytes to read at once.
+        @type maximum: L{int}
+
+        @raise ValueError: If C{minimum} is not positive or is larger than
+            C{maximum}.
+        """
+        if not 0 < minimum <= maximum:
+            raise ValueError(
+                "Invalid read size bounds: (%r, %r)" % (minimum, maximum))
+        self.minimumReadSize = minimum
+        self.maximumReadSize = maximum
+        if self._readSize is not None:
+            self._readSize = min(max(self._readSize, minimum), maximum)
+
+
+    def _getReadSize(self):
+        """
+        @return: The number of bytes the next read should ask for.
+        @rtype: L{int}
+        """
+        if self._readSize is None:
+            self._readSize = min(max(self.bufferSize, self.minimumReadSize),
+                                 self.maximumReadSize)
+        return self._readSize
+
+
+    def _adaptReadSize(self, nbytes):
+        """
+        Account for a read which returned C{nbytes} bytes, and grow or shrink
+        the read size accordingly.
+
+        @param nbytes: The number of bytes read.
+        @type nbytes: L{int}
+        """
+        self.readCount += 1
+        self.bytesRead += nbytes
+        size = self._getReadSize()
+        if nbytes >= size:
+            self._smallReads = 0
+            if size < self.maximumReadSize:
+                self._readSize = min(size * 2, self.maximumReadSize)
+        elif nbytes <= size // 4:
+            self._smallReads += 1
+            if self._smallReads >= self.smallReadsBeforeShrinking:
+                self._smallReads = 0
+                if size > self.minimumReadSize:
+                    self._readSize = max(size // 2, self.minimumReadSize)
+        else:
+            self._smallReads = 0
+
+
     def doRead(self):
         """Calls self.protocol.dataReceived with all available data.
 
-        This reads up to self.bufferSize bytes of data from its socket, then
-        calls self.dataReceived(data) to process it.  If the connection is not
-        lost through an error in the physical recv(), this function will return
-        the result of the dataReceived call.
+        This reads up to as many bytes of data from its socket as the
+        adaptive read size allows (see L{setReadSizeBounds}), then calls
+        self.dataReceived(data) to process it.  If the connection is not lost
+        through an error in the physical recv(), this function will return the
+        result of the dataReceived call.
+
+        If the protocol provides L{interfaces.IBufferedProtocol}, the data is
+        received into the buffer it provides instead, and its
+        C{bufferUpdated} method is called.
         """
+        if interfaces.IBufferedProtocol.providedBy(self.protocol):
+            return self._doReadInto()
         try:
-            data = self.socket.recv(self.bufferSize)
+            data = self.socket.recv(self._getReadSize())
         except socket.error as se:
             if se.args[0] == EWOULDBLOCK:
+                self._readWouldBlock = True
                 return
             else:
                 return main.CONNECTION_LOST
@@ -243,9 +534,35 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
         return self._dataReceived(data)
 
 
+    def _doReadInto(self):
+        """
+        Receive data into the buffer of an L{interfaces.IBufferedProtocol}
+        provider, without allocating a new L{bytes} object.
+        """
+        try:
+            nbytes = self.socket.recv_into(
+                self.protocol.getBuffer(self._getReadSize()))
+        except socket.error as se:
+            if se.args[0] == EWOULDBLOCK:
+                self._readWouldBlock = True
+                return
+            else:
+                return main.CONNECTION_LOST
+
+        return self._bufferUpdated(nbytes)
+
+
+    def _bufferUpdated(self, nbytes):
+        if not nbytes:
+            return main.CONNECTION_DONE
+        self._adaptReadSize(nbytes)
+        self.protocol.bufferUpdated(nbytes)
+
+
     def _dataReceived(self, data):
         if not data:
             return main.CONNECTION_DONE
+        self._adaptReadSize(len(data))
         rval = self.protocol.dataReceived(data)
         if rval is not None:
             offender = self.protocol.dataReceived
@@ -280,6 +597,40 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
                 return main.CONNECTION_LOST
 
 
+    def writeSomeVectors(self, vectors):
+        """
+        Write as much as possible of the given chunks of data to this TCP
+        connection with a single C{sendmsg} call, without joining them.
+
+        @param vectors: A L{list} of bytes-like objects.
+
+        @return: The number of bytes written, or an exception if the
+            connection was lost.
+        """
+        try:
+            return untilConcludes(self.socket.sendmsg, vectors)
+        except socket.error as se:
+            if se.args[0] in (EWOULDBLOCK, ENOBUFS):
+                return 0
+            else:
+                return main.CONNECTION_LOST
+
+
+    def sendFile(self, fileObject, offset=0, count=None):
+        """
+        Send part of a file over this connection, with C{os.sendfile} where
+        possible.
+
+        @see: L{interfaces.ISendfileTransport.sendFile}
+        """
+        producer = _SendfileProducer(self, fileObject, offset, count)
+        deferred = producer.deferred
+        # Any producer already registered is set aside for the duration.
+        self.producer = None
+        self.registerProducer(producer, False)
+        return deferred
+
+
     def _closeWriteConnection(self):
         try:
             self.socket.shutdown(1)
@@ -350,6 +701,27 @@ class Connection(_TLSConnectionMixin, abstract.FileDescriptor, _SocketCloser,
 
 
 
+def _applyReadSizeBounds(transport, source):
+    """
+    Apply the read size bounds configured for a listening port or a connector
+    to a connection it created.
+
+    @param transport: The new connection.
+    @type transport: L{Connection}
+
+    @param source: The L{Port} or connector which created C{transport}.  Its
+        own C{readSizeBounds} attribute takes precedence over the one of its
+        C{factory}; if neither is set the defaults of C{transport} are kept.
+    """
+    bounds = getattr(source, "readSizeBounds", None)
+    if bounds is None:
+        bounds = getattr(getattr(source, "factory", None),
+                         "readSizeBounds", None)
+    if bounds is not None:
+        transport.setReadSizeBounds(*bounds)
+
+
+
 class _BaseBaseClient(object):
     """
     Code shared with other (non-POSIX) reactors for management of general
@@ -639,6 +1011,7 @@ class BaseClient(_BaseBaseClient, _TLSClientMixin, Connection):
         This hook is overridden by L{ssl.Client} to initiate the TLS protocol.
         """
         self.protocol = self.connector.buildProtocol(self.getPeer())
+        _applyReadSizeBounds(self, self.connector)
         self.connected = 1
         logPrefix = self._getLogPrefix(self.protocol)
         self.logstr = "%s,client" % logPrefix
@@ -813,6 +1186,7 @@ class Server(_TLSServerMixin, Connection):
         if len(client) != 2:
             self._addressType = address.IPv6Address
         self.server = server
+        _applyReadSizeBounds(self, server)
         self.client = client
         self.sessionno = sessionno
         self.hostname = client[0]
@@ -1162,7 +1536,14 @@ class _BuffersLogs(object):
 
 
 
-def _accept(logger, accepts, listener, reservedFD):
+# Python 3 creates sockets, including accepted ones, non-inheritable (with
+# SOCK_CLOEXEC where accept4 is available), so setting FD_CLOEXEC on accepted
+# sockets again is only needed on Python 2.
+_inheritableSockets = not hasattr(socket.socket, "get_inheritable")
+
+
+
+def _accept(logger, accepts, listener, reservedFD, onEMFILE=None):
     """
     Return a generator that yields client sockets from the provided
     listening socket until there are none left or an unrecoverable
@@ -1185,6 +1566,10 @@ def _accept(logger, accepts, listener, reservedFD):
         recover from C{EMFILE} on UNIX-like systems.
     @type reservedFD: L{_IFileDescriptorReservation}
 
+    @param onEMFILE: If not L{None}, called with no arguments each time
+        C{accept} fails with C{EMFILE}.
+    @type onEMFILE: 0-argument callable
+
     @return: A generator that yields C{(socket, addr)} tuples from
         L{socket.socket.accept}
     """
@@ -1192,6 +1577,8 @@ def _accept(logger, accepts, listener, reservedFD):
         try:
             client, address = listener.accept()
         except socket.error as e:
+            if e.args[0] == EMFILE and onEMFILE is not None:
+                onEMFILE()
             if e.args[0] in (EWOULDBLOCK, EAGAIN):
                 # No more clients.
                 return
@@ -1269,6 +1656,44 @@ class Port(base.BasePort, _SocketCloser):
         was created and initialized outside of the reactor and will be used to
         listen for connections (instead of a new socket being created by this
         L{Port}).
+
+    @ivar readSizeBounds: L{None}, or a two-tuple of the smallest and largest
+        number of bytes connections accepted by this port read at once (see
+        L{Connection.setReadSizeBounds}).  If L{None}, the C{readSizeBounds}
+        of the factory are used instead.
+
+    @ivar reusePort: If C{True}, the listening socket is created with
+        I{SO_REUSEPORT}, so that several processes can listen on the same
+        port and have the kernel balance incoming connections between them.
+        C{twist --workers} sets this on the class in its worker processes.
+    @type reusePort: L{bool}
+
+    @ivar numberAccepts: The largest number of connections L{doRead} will
+        accept before returning to the reactor.  It grows while there are
+        connections left to accept after a batch, and shrinks to the size of
+        the last batch otherwise.
+    @type numberAccepts: L{int}
+
+    @ivar maxAcceptsPerRead: If not L{None}, the largest value
+        C{numberAccepts} may grow to.  Lower values let the reactor serve
+        established connections sooner during a connection storm, at the
+        cost of more iterations to drain the listen queue.
+    @type maxAcceptsPerRead: L{int} or L{None}
+
+    @ivar acceptCount: The number of connections accepted.
+    @type acceptCount: L{int}
+
+    @ivar acceptBatchCount: The number of times L{doRead} was called.
+    @type acceptBatchCount: L{int}
+
+    @ivar fullAcceptBatchCount: The number of times L{doRead} accepted as
+        many connections as C{numberAccepts} allowed, which means more
+        connections were likely left waiting in the listen queue.
+    @type fullAcceptBatchCount: L{int}
+
+    @ivar emfileCount: The number of times accepting a connection failed
+        because the process was out of file descriptors.
+    @type emfileCount: L{int}
     """
 
     socketType = socket.SOCK_STREAM
@@ -1277,6 +1702,13 @@ class Port(base.BasePort, _SocketCloser):
     sessionno = 0
     interface = ''
     backlog = 50
+    readSizeBounds = None
+    reusePort = False
+    maxAcceptsPerRead = None
+    acceptCount = 0
+    acceptBatchCount = 0
+    fullAcceptBatchCount = 0
+    emfileCount = 0
 
     _type = 'TCP'
 
@@ -1340,6 +1772,8 @@ class Port(base.BasePort, _SocketCloser):
         s = base.BasePort.createInternetSocket(self)
         if platformType == "posix" and sys.platform != "cygwin":
             s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if self.reusePort:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         return s
 
 
@@ -1397,6 +1831,9 @@ class Port(base.BasePort, _SocketCloser):
         wire-level protocol.
         """
         try:
+            if self.maxAcceptsPerRead is not None:
+                self.numberAccepts = min(self.numberAccepts,
+                                         self.maxAcceptsPerRead)
             if platformType == "posix":
                 numAccepts = self.numberAccepts
             else:
@@ -1404,16 +1841,20 @@ class Port(base.BasePort, _SocketCloser):
                 # in an iteration of the event loop.
                 numAccepts = 1
 
+            self.acceptBatchCount += 1
             with _BuffersLogs(self._logger.namespace,
                               self._logger.observer) as bufferingLogger:
                 accepted = 0
                 clients = _accept(bufferingLogger,
                                   range(numAccepts),
                                   self.socket,
-                                  _reservedFD)
+                                  _reservedFD,
+                                  self._emfileEncountered)
 
                 for accepted, (skt, addr) in enumerate(clients, 1):
-                    fdesc._setCloseOnExec(skt.fileno())
+                    self.acceptCount += 1
+                    if _inheritableSockets:
+                        fdesc._setCloseOnExec(skt.fileno())
 
                     if len(addr) == 4:
                         # IPv6, make sure we get the scopeID if it
@@ -1439,7 +1880,11 @@ class Port(base.BasePort, _SocketCloser):
             # there might be still more clients to serve the next time
             # the reactor calls us.  Prepare to accept some more.
             if accepted == self.numberAccepts:
+                self.fullAcceptBatchCount += 1
                 self.numberAccepts += 20
+                if self.maxAcceptsPerRead is not None:
+                    self.numberAccepts = min(self.numberAccepts,
+                                             self.maxAcceptsPerRead)
             # Otherwise, don't attempt to accept any more clients than
             # we just accepted or any less than 1.
             else:
@@ -1454,6 +1899,15 @@ class Port(base.BasePort, _SocketCloser):
             # and return, so handling it here works just as well.
             log.deferr()
 
+
+    def _emfileEncountered(self):
+        """
+        Count a failure to accept a connection because the process was out of
+        file descriptors.
+        """
+        self.emfileCount += 1
+
+
     def loseConnection(self, connDone=failure.Failure(main.CONNECTION_DONE)):
         """
         Stop accepting connections on this port.
@@ -19,7 +19,8 @@ from twisted.internet.interfaces import (IReactorTime, IReactorThreads,
 from twisted.internet.error import DNSLookupError
 from twisted.internet._resolver import FirstOneWins
 from twisted.internet.defer import Deferred
-from twisted.internet.base import ThreadedResolver, DelayedCall, ReactorBase
+from twisted.internet.base import (
+    ThreadedResolver, DelayedCall, ReactorBase, _DelayedCallHeap)
 from twisted.internet.task import Clock
 from twisted.trial.unittest import TestCase, SkipTest
 
@@ -382,6 +383,212 @@ class DelayedCallDebugTests(DelayedCallMixin, TestCase):
 
 
 
+class DelayedCallHeapTests(TestCase):
+    """
+    Tests for L{_DelayedCallHeap}.
+    """
+    def _getDelayedCallAt(self, time):
+        """
+        Get a L{DelayedCall} instance at a given C{time}.
+
+        @param time: The absolute time at which the returned L{DelayedCall}
+            will be scheduled.
+        """
+        def noop(call):
+            pass
+        return DelayedCall(time, lambda: None, (), {}, noop, noop, None)
+
+
+    def _popAll(self, heap):
+        """
+        Pop every call from C{heap}.
+
+        @return: The times of the popped calls, in the order they were popped.
+        """
+        times = []
+        while heap:
+            times.append(heap.pop().time)
+        return times
+
+
+    def test_popOrder(self):
+        """
+        L{_DelayedCallHeap.pop} returns calls in order of their time,
+        regardless of the order in which they were pushed.
+        """
+        times = [5, 3, 9, 1, 7, 1, 4, 8, 2, 6, 0]
+        heap = _DelayedCallHeap(
+            [self._getDelayedCallAt(t) for t in times])
+        self.assertEqual(len(heap), len(times))
+        self.assertEqual(heap[0].time, 0)
+        self.assertEqual(self._popAll(heap), sorted(times))
+
+
+    def test_positionTracking(self):
+        """
+        Each call held by a L{_DelayedCallHeap} records its position in the
+        heap, and the record is cleared when the call is popped.
+        """
+        calls = [self._getDelayedCallAt(t) for t in [4, 2, 6, 1, 3]]
+        heap = _DelayedCallHeap(calls)
+        for call in calls:
+            self.assertIs(heap[call._heapIndex], call)
+        first = heap.pop()
+        self.assertIsNone(first._heapIndex)
+        for call in heap:
+            self.assertIs(heap[call._heapIndex], call)
+
+
+    def test_remove(self):
+        """
+        L{_DelayedCallHeap.remove} removes the given call and leaves the
+        remaining calls in heap order.
+        """
+        calls = [self._getDelayedCallAt(t) for t in range(10)]
+        heap = _DelayedCallHeap(reversed(calls))
+        for call in (calls[0], calls[9], calls[4]):
+            heap.remove(call)
+            self.assertIsNone(call._heapIndex)
+        self.assertEqual(self._popAll(heap), [1, 2, 3, 5, 6, 7, 8])
+
+
+    def test_update(self):
+        """
+        L{_DelayedCallHeap.update} moves a call whose time changed to its new
+        place in the heap, whether it moved earlier or later.
+        """
+        calls = [self._getDelayedCallAt(t) for t in range(10)]
+        heap = _DelayedCallHeap(calls)
+        calls[8].time = -1
+        heap.update(calls[8])
+        calls[1].time = 20
+        heap.update(calls[1])
+        self.assertEqual(
+            self._popAll(heap), [-1, 0, 2, 3, 4, 5, 6, 7, 9, 20])
+
+
+
+class IndexedTimedCallsReactor(ReactorBase):
+    """
+    A L{ReactorBase} which keeps its timed calls in a L{_DelayedCallHeap}
+    and takes its time from a L{Clock}.
+    """
+    indexedTimedCalls = True
+
+    def __init__(self):
+        self.clock = Clock()
+        self.seconds = self.clock.seconds
+        ReactorBase.__init__(self)
+
+
+    def installWaker(self):
+        """
+        Required method, unused.
+        """
+
+
+
+class IndexedTimedCallsTests(TestCase):
+    """
+    Tests for L{ReactorBase} with C{indexedTimedCalls} set.
+    """
+    def setUp(self):
+        self.reactor = IndexedTimedCallsReactor()
+        self.calls = []
+
+
+    def _callLater(self, delay, name):
+        """
+        Schedule a call which records C{name} in C{self.calls}.
+        """
+        return self.reactor.callLater(delay, self.calls.append, name)
+
+
+    def _runUntil(self, when):
+        """
+        Advance the reactor's clock to C{when} and run the timed calls that
+        are due.
+        """
+        self.reactor.clock.advance(when - self.reactor.seconds())
+        self.reactor.runUntilCurrent()
+
+
+    def test_pendingTimedCalls(self):
+        """
+        The pending timed calls are kept in a L{_DelayedCallHeap}.
+        """
+        self.assertIsInstance(
+            self.reactor._pendingTimedCalls, _DelayedCallHeap)
+
+
+    def test_runInOrder(self):
+        """
+        Timed calls are run once their time has come, in time order.
+        """
+        self._callLater(3, "c")
+        self._callLater(1, "a")
+        self._callLater(2, "b")
+        self._runUntil(2)
+        self.assertEqual(self.calls, ["a", "b"])
+        self._runUntil(3)
+        self.assertEqual(self.calls, ["a", "b", "c"])
+        self.assertEqual(self.reactor.getDelayedCalls(), [])
+
+
+    def test_cancelRemovesImmediately(self):
+        """
+        Cancelling a timed call which is already in the heap removes it right
+        away rather than waiting for it to expire.
+        """
+        first = self._callLater(1, "a")
+        second = self._callLater(2, "b")
+        self.assertEqual(self.reactor.timeout(), 1)
+        first.cancel()
+        self.assertEqual(list(self.reactor._pendingTimedCalls), [second])
+        self.assertEqual(self.reactor.timeout(), 2)
+        self.assertEqual(self.reactor._cancellations, 0)
+
+
+    def test_cancelNewCall(self):
+        """
+        A timed call cancelled before it is inserted into the heap is never
+        run and never inserted.
+        """
+        self._callLater(1, "a").cancel()
+        self._runUntil(1)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(len(self.reactor._pendingTimedCalls), 0)
+        self.assertEqual(self.reactor._cancellations, 0)
+
+
+    def test_resetSooner(self):
+        """
+        Resetting a timed call to an earlier time moves it ahead of the calls
+        which are now due after it.
+        """
+        self._callLater(2, "a")
+        call = self._callLater(3, "b")
+        self.reactor.timeout()
+        call.reset(1)
+        self.assertEqual(self.reactor.timeout(), 1)
+        self._runUntil(1)
+        self.assertEqual(self.calls, ["b"])
+
+
+    def test_resetLater(self):
+        """
+        Resetting a timed call to a later time delays it.
+        """
+        call = self._callLater(1, "a")
+        self._callLater(2, "b")
+        self.reactor.timeout()
+        call.reset(3)
+        self._runUntil(2)
+        self.assertEqual(self.calls, ["b"])
+        self._runUntil(3)
+        self.assertEqual(self.calls, ["b", "a"])
+
+
 class TestSpySignalCapturingReactor(ReactorBase):
 
     """
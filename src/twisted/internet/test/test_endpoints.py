@@ -9,6 +9,7 @@ L{twisted.internet.endpoints}.
 from __future__ import division, absolute_import
 
 from errno import EPERM
+import socket
 from socket import AF_INET, AF_INET6, SOCK_STREAM, IPPROTO_TCP, gaierror
 from unicodedata import normalize
 from types import FunctionType
@@ -160,6 +161,34 @@ class TestFileDescriptorReceiverProtocol(TestProtocol):
 
 
 
+@implementer(interfaces.IBufferedProtocol)
+class TestBufferedProtocol(TestProtocol):
+    """
+    A Protocol that implements L{IBufferedProtocol} and records how its
+    methods are called.
+
+    @ivar buffer: The buffer returned by C{getBuffer}.
+
+    @ivar calls: A C{list} of the names and arguments of the
+        L{IBufferedProtocol} methods called.
+    """
+
+    def __init__(self):
+        TestProtocol.__init__(self)
+        self.buffer = bytearray(16)
+        self.calls = []
+
+
+    def getBuffer(self, sizeHint):
+        self.calls.append(("getBuffer", sizeHint))
+        return self.buffer
+
+
+    def bufferUpdated(self, nbytes):
+        self.calls.append(("bufferUpdated", nbytes))
+
+
+
 @implementer(interfaces.IHandshakeListener)
 class TestHandshakeListener(TestProtocol):
     """
@@ -231,6 +260,17 @@ class WrappingFactoryTests(unittest.TestCase):
         self.assertEqual(2, factory.numPorts)
 
 
+    def test_readSizeBounds(self):
+        """
+        L{_WrappingFactory.readSizeBounds} is initially the C{readSizeBounds}
+        of the wrapped factory.
+        """
+        factory = ClientFactory()
+        factory.readSizeBounds = (2 ** 10, 2 ** 11)
+        wf = endpoints._WrappingFactory(factory)
+        self.assertEqual(wf.readSizeBounds, (2 ** 10, 2 ** 11))
+
+
     def test_failedBuildProtocol(self):
         """
         An exception raised in C{buildProtocol} of our wrappedFactory
@@ -408,6 +448,47 @@ class WrappingFactoryTests(unittest.TestCase):
         self.assertEqual(wrappedProtocol.receivedDescriptors, [42])
 
 
+    def test_wrappingProtocolBuffered(self):
+        """
+        Our L{_WrappingProtocol} provides L{IBufferedProtocol} if the wrapped
+        protocol does, and passes its calls on to it.
+        """
+        wrappedProtocol = TestBufferedProtocol()
+        wrapper = endpoints._WrappingProtocol(None, wrappedProtocol)
+        self.assertTrue(verifyObject(interfaces.IBufferedProtocol, wrapper))
+        self.assertIs(wrapper.getBuffer(100), wrappedProtocol.buffer)
+        wrapper.bufferUpdated(10)
+        self.assertEqual(wrappedProtocol.calls,
+                         [("getBuffer", 100), ("bufferUpdated", 10)])
+
+
+    def test_wrappingProtocolNotBuffered(self):
+        """
+        Our L{_WrappingProtocol} does not provide L{IBufferedProtocol} if the
+        wrapped protocol doesn't.
+        """
+        p = endpoints._WrappingProtocol(None, TestProtocol())
+        self.assertFalse(interfaces.IBufferedProtocol.providedBy(p))
+
+
+    def test_wrappingProtocolBufferedHalfCloseable(self):
+        """
+        Our L{_WrappingProtocol} provides both L{IBufferedProtocol} and
+        L{IHalfCloseableProtocol} if the wrapped protocol provides both.
+        """
+        @implementer(interfaces.IHalfCloseableProtocol)
+        class BufferedHalfCloseable(TestBufferedProtocol):
+            def readConnectionLost(self):
+                pass
+
+            def writeConnectionLost(self):
+                pass
+
+        p = endpoints._WrappingProtocol(None, BufferedHalfCloseable())
+        self.assertTrue(interfaces.IBufferedProtocol.providedBy(p))
+        self.assertTrue(interfaces.IHalfCloseableProtocol.providedBy(p))
+
+
     def test_wrappingProtocolHalfCloseable(self):
         """
         Our L{_WrappingProtocol} should be an L{IHalfCloseableProtocol} if the
@@ -1413,6 +1494,83 @@ class TCP4EndpointsTests(EndpointTestCaseMixin, unittest.TestCase):
                 address)
 
 
+    def test_serverReadSizeBounds(self):
+        """
+        The C{readSizeBounds} given to L{TCP4ServerEndpoint} are set on the
+        port it listens on.
+        """
+        reactor = MemoryReactor()
+        ep = endpoints.TCP4ServerEndpoint(
+            reactor, 0, readSizeBounds=(2 ** 10, 2 ** 11))
+        port = self.successResultOf(ep.listen(Factory()))
+        self.assertEqual(port.readSizeBounds, (2 ** 10, 2 ** 11))
+
+
+    def test_reusePort(self):
+        """
+        Several L{TCP4ServerEndpoint}s created with C{reusePort} can listen
+        on the same port.
+        """
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise unittest.SkipTest("SO_REUSEPORT is not supported.")
+        first = self.successResultOf(endpoints.TCP4ServerEndpoint(
+            reactor, 0, interface="127.0.0.1", reusePort=True
+        ).listen(Factory()))
+        self.addCleanup(first.stopListening)
+        portNumber = first.getHost().port
+
+        second = self.successResultOf(endpoints.TCP4ServerEndpoint(
+            reactor, portNumber, interface="127.0.0.1", reusePort=True
+        ).listen(Factory()))
+        self.addCleanup(second.stopListening)
+
+        self.assertEqual(second.getHost().port, portNumber)
+
+
+    def test_reusePortAdoptsSocket(self):
+        """
+        L{TCP4ServerEndpoint.listen}, if created with C{reusePort}, creates
+        the listening socket itself and has the reactor adopt it.
+        """
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise unittest.SkipTest("SO_REUSEPORT is not supported.")
+        reactor = MemoryReactor()
+        factory = Factory()
+        ep = endpoints.TCP4ServerEndpoint(
+            reactor, 0, interface="127.0.0.1", reusePort=True)
+        self.successResultOf(ep.listen(factory))
+        self.assertEqual(reactor.tcpServers, [])
+        self.assertEqual(
+            [(family, f) for (fd, family, f) in reactor.adoptedPorts],
+            [(AF_INET, factory)])
+
+
+    def test_reusePortUnsupportedReactor(self):
+        """
+        L{TCP4ServerEndpoint.listen} fails with L{error.CannotListenError} if
+        created with C{reusePort} and its reactor does not provide
+        L{interfaces.IReactorSocket}.
+        """
+        ep = endpoints.TCP4ServerEndpoint(object(), 0, reusePort=True)
+        self.failureResultOf(ep.listen(Factory()), error.CannotListenError)
+
+
+    def test_clientReadSizeBounds(self):
+        """
+        The C{readSizeBounds} given to L{TCP4ClientEndpoint} are set on the
+        factory it connects with, in place of those of the factory passed to
+        C{connect}.
+        """
+        reactor = MemoryReactor()
+        ep = endpoints.TCP4ClientEndpoint(
+            reactor, "127.0.0.1", 80, readSizeBounds=(2 ** 10, 2 ** 11))
+        factory = ClientFactory()
+        factory.readSizeBounds = (2 ** 12, 2 ** 13)
+        ep.connect(factory)
+        self.assertEqual(reactor.tcpClients[0][2].readSizeBounds,
+                         (2 ** 10, 2 ** 11))
+
+
 
 class TCP6EndpointsTests(EndpointTestCaseMixin, unittest.TestCase):
     """
@@ -3075,6 +3233,16 @@ class ServerStringTests(unittest.TestCase):
         self.assertEqual(server._port, 1234)
         self.assertEqual(server._backlog, 12)
         self.assertEqual(server._interface, "10.0.0.1")
+        self.assertFalse(server._reusePort)
+
+
+    def test_tcpReusePort(self):
+        """
+        The C{reusePort} argument of a TCP strports description is passed to
+        the L{TCP4ServerEndpoint}.
+        """
+        server = endpoints.serverFromString(object(), "tcp:1234:reusePort=1")
+        self.assertTrue(server._reusePort)
 
 
     def test_ssl(self):
@@ -3868,6 +4036,17 @@ class TCP6ServerEndpointPluginTests(unittest.TestCase):
         self.assertEqual(ep._port, 8080)
         self.assertEqual(ep._backlog, 12)
         self.assertEqual(ep._interface, '::1')
+        self.assertFalse(ep._reusePort)
+
+
+    def test_stringDescriptionReusePort(self):
+        """
+        The C{reusePort} argument of a 'tcp6' endpoint string description is
+        passed to the L{TCP6ServerEndpoint}.
+        """
+        ep = endpoints.serverFromString(
+            MemoryReactor(), "tcp6:8080:reusePort=1")
+        self.assertTrue(ep._reusePort)
 
 
 
@@ -7,13 +7,21 @@ Tests for L{twisted.internet.epollreactor}.
 
 from __future__ import division, absolute_import
 
+import errno
+import socket
+
 from twisted.trial.unittest import TestCase
 try:
     from twisted.internet.epollreactor import _ContinuousPolling
 except ImportError:
     _ContinuousPolling = None
+try:
+    from twisted.internet.epollreactor import EPollReactor
+except ImportError:
+    EPollReactor = None
 from twisted.internet.task import Clock
 from twisted.internet.error import ConnectionDone
+from twisted.internet.protocol import Factory, Protocol
 
 
 
@@ -246,3 +254,379 @@ class ContinuousPollingTests(TestCase):
 
     if _ContinuousPolling is None:
         skip = "epoll not supported in this environment."
+
+
+
+class SocketReader(object):
+    """
+    Reads from a socket a few bytes at a time, reporting when the read would
+    block, as if it were a L{twisted.internet.tcp.Connection}.
+
+    @ivar received: The chunks of data read, in order.
+
+    @ivar writes: The number of times C{doWrite} was called.
+    """
+    _readWouldBlock = False
+
+    def __init__(self, skt, bufferSize=1):
+        self.socket = skt
+        self.socket.setblocking(False)
+        self.bufferSize = bufferSize
+        self.received = []
+        self.writes = 0
+
+
+    def fileno(self):
+        return self.socket.fileno()
+
+
+    def logPrefix(self):
+        return "SocketReader"
+
+
+    def doRead(self):
+        try:
+            data = self.socket.recv(self.bufferSize)
+        except socket.error as e:
+            if e.args[0] == errno.EAGAIN:
+                self._readWouldBlock = True
+                return
+            raise
+        if not data:
+            return ConnectionDone()
+        self.received.append(data)
+
+
+    def doWrite(self):
+        self.writes += 1
+
+
+    def connectionLost(self, reason):
+        reason.trap(ConnectionDone)
+        self.received.append(None)
+
+
+
+class EdgeTriggeredTests(TestCase):
+    """
+    Tests for L{EPollReactor} in edge-triggered mode.
+    """
+    def setUp(self):
+        self.reactor = EPollReactor(edgeTriggered=True)
+        self.addCleanup(self.reactor._poller.close)
+        self.addCleanup(self.reactor.waker.connectionLost, None)
+        self.client, server = socket.socketpair()
+        self.addCleanup(self.client.close)
+        self.addCleanup(server.close)
+        self.reader = SocketReader(server)
+
+
+    def test_registration(self):
+        """
+        A descriptor which reports when reads would block is registered for
+        edge-triggered notification while it is only being read from.
+        """
+        fd = self.reader.fileno()
+        self.reactor.addReader(self.reader)
+        self.assertIn(fd, self.reactor._edgeTriggeredFDs)
+        self.reactor.addWriter(self.reader)
+        self.assertNotIn(fd, self.reactor._edgeTriggeredFDs)
+        self.reactor.removeWriter(self.reader)
+        self.assertIn(fd, self.reactor._edgeTriggeredFDs)
+        self.reactor.removeReader(self.reader)
+        self.assertNotIn(fd, self.reactor._edgeTriggeredFDs)
+
+
+    def test_otherDescriptorsLevelTriggered(self):
+        """
+        Descriptors which do not report when reads would block, like the
+        waker, are registered for level-triggered notification.
+        """
+        self.assertNotIn(self.reactor.waker.fileno(),
+                         self.reactor._edgeTriggeredFDs)
+
+
+    def test_levelTriggeredByDefault(self):
+        """
+        Without C{edgeTriggered}, every descriptor is registered for
+        level-triggered notification.
+        """
+        reactor = EPollReactor()
+        self.addCleanup(reactor._poller.close)
+        self.addCleanup(reactor.waker.connectionLost, None)
+        reactor.addReader(self.reader)
+        self.assertEqual(reactor._edgeTriggeredFDs, set())
+
+
+    def test_readUntilBlocked(self):
+        """
+        A read event causes C{doRead} to be called until the descriptor has
+        no more data.
+        """
+        self.reactor.addReader(self.reader)
+        self.client.send(b"abcde")
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reader.received, [b"a", b"b", b"c", b"d", b"e"])
+        self.assertEqual(self.reactor._unfinishedReads, {})
+
+
+    def test_maxReadsPerEvent(self):
+        """
+        A descriptor which still has data after C{maxReadsPerEvent} reads is
+        read from again on the next iteration, even though epoll does not
+        report it again.
+        """
+        self.reactor.maxReadsPerEvent = 2
+        self.reactor.addReader(self.reader)
+        self.client.send(b"abcde")
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reader.received, [b"a", b"b"])
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reader.received, [b"a", b"b", b"c", b"d"])
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reader.received, [b"a", b"b", b"c", b"d", b"e"])
+        self.assertEqual(self.reactor._unfinishedReads, {})
+
+
+    def test_unfinishedReadRemoved(self):
+        """
+        A descriptor which is removed from the reactor is not read from again
+        even if it had unfinished reads.
+        """
+        self.reactor.maxReadsPerEvent = 1
+        self.reactor.addReader(self.reader)
+        self.client.send(b"ab")
+        self.reactor.doPoll(1)
+        self.reactor.removeReader(self.reader)
+        self.reactor.doPoll(0)
+        self.assertEqual(self.reader.received, [b"a"])
+
+
+    def test_disconnect(self):
+        """
+        A descriptor which indicates disconnection while being read from is
+        disconnected.
+        """
+        self.reactor.addReader(self.reader)
+        self.client.send(b"a")
+        self.client.close()
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reader.received, [b"a", None])
+        self.assertNotIn(self.reader, self.reactor.getReaders())
+
+
+    def test_eventCounters(self):
+        """
+        The reactor counts how many polls it did and how many events they
+        returned.
+        """
+        self.reactor.addReader(self.reader)
+        self.reactor.doPoll(0)
+        self.assertEqual(
+            (self.reactor.pollCount, self.reactor.lastEventCount,
+             self.reactor.eventCount), (1, 0, 0))
+        self.client.send(b"a")
+        self.reactor.doPoll(1)
+        self.assertEqual(
+            (self.reactor.pollCount, self.reactor.lastEventCount,
+             self.reactor.eventCount, self.reactor.peakEventCount),
+            (2, 1, 1, 1))
+
+
+    def test_maxEvents(self):
+        """
+        No more than C{maxEvents} events are retrieved by one poll.
+        """
+        other, otherServer = socket.socketpair()
+        self.addCleanup(other.close)
+        self.addCleanup(otherServer.close)
+        otherReader = SocketReader(otherServer)
+        self.reactor.maxEvents = 1
+        self.reactor.addReader(self.reader)
+        self.reactor.addReader(otherReader)
+        self.client.send(b"a")
+        other.send(b"b")
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reactor.lastEventCount, 1)
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reactor.lastEventCount, 1)
+        self.assertEqual(self.reader.received + otherReader.received,
+                         [b"a", b"b"])
+
+
+    def test_unixConnection(self):
+        """
+        A UNIX connection reports when a read would block, so once it has
+        read everything available it is not read from again until more data
+        arrives.
+        """
+        from twisted.internet.unix import Server
+        received = []
+
+        class Receiver(Protocol):
+            def dataReceived(self, data):
+                received.append(data)
+
+        other, otherServer = socket.socketpair()
+        self.addCleanup(other.close)
+        self.addCleanup(otherServer.close)
+        otherServer.setblocking(False)
+        connection = Server._fromConnectedSocket(
+            otherServer.fileno(), Factory.forProtocol(Receiver), self.reactor)
+        self.addCleanup(connection.socket.close)
+        self.addCleanup(connection.stopReading)
+        self.assertIn(connection.fileno(), self.reactor._edgeTriggeredFDs)
+        self.reactor.maxReadsPerEvent = 2
+        other.send(b"abc")
+        self.reactor.doPoll(1)
+        self.assertEqual(received, [b"abc"])
+        self.assertEqual(self.reactor._unfinishedReads, {})
+
+
+    def test_metrics(self):
+        """
+        While metrics are being collected, the time each edge-triggered read
+        takes is recorded once.
+        """
+        metrics = self.reactor.startMetrics()
+        self.addCleanup(self.reactor.stopMetrics)
+        self.reactor.addReader(self.reader)
+        self.client.send(b"ab")
+        self.reactor.doPoll(1)
+        self.assertEqual(self.reader.received, [b"a", b"b"])
+        self.assertEqual(metrics.callTime.count, 1)
+
+    if EPollReactor is None:
+        skip = "epoll not supported in this environment."
+
+
+
+class SocketWriter(SocketReader):
+    """
+    Writes to a socket, as if it were a L{twisted.internet.tcp.Connection},
+    stopping writing once everything buffered has been written.
+
+    @ivar buffered: The data not yet written.
+    """
+    _speculativeWrites = True
+
+    def __init__(self, skt, reactor):
+        SocketReader.__init__(self, skt)
+        self.reactor = reactor
+        self.buffered = b""
+
+
+    def write(self, data):
+        self.buffered += data
+        self.reactor.addWriter(self)
+
+
+    def doWrite(self):
+        self.writes += 1
+        try:
+            sent = self.socket.send(self.buffered)
+        except socket.error as e:
+            if e.args[0] == errno.EAGAIN:
+                return
+            raise
+        self.buffered = self.buffered[sent:]
+        if not self.buffered:
+            self.reactor.removeWriter(self)
+
+
+
+class SpeculativeWritesTests(TestCase):
+    """
+    Tests for L{EPollReactor} with C{speculativeWrites}.
+    """
+    def setUp(self):
+        self.reactor = EPollReactor(speculativeWrites=True)
+        self.addCleanup(self.reactor._poller.close)
+        self.addCleanup(self.reactor.waker.connectionLost, None)
+        self.client, server = socket.socketpair()
+        self.addCleanup(self.client.close)
+        self.addCleanup(server.close)
+        self.writer = SocketWriter(server, self.reactor)
+
+
+    def test_notRegistered(self):
+        """
+        A descriptor which starts writing is not registered with epoll, but
+        is reported as a writer.
+        """
+        self.writer.write(b"abc")
+        self.assertEqual(self.reactor._writes, set())
+        self.assertEqual(self.reactor.getWriters(), [self.writer])
+
+
+    def test_writtenBeforePoll(self):
+        """
+        A descriptor which starts writing has its C{doWrite} called by the next
+        poll, and is not registered with epoll if it writes everything.
+        """
+        self.writer.write(b"abc")
+        self.reactor.doPoll(0)
+        self.assertEqual(self.writer.writes, 1)
+        self.assertEqual(self.client.recv(10), b"abc")
+        self.assertEqual(self.reactor.getWriters(), [])
+        self.assertEqual(self.reactor._writes, set())
+
+
+    def test_registeredIfUnfinished(self):
+        """
+        A descriptor which does not write everything it has buffered is
+        registered with epoll for write readiness notification.
+        """
+        self.writer.write(b"x" * (16 * 1024 * 1024))
+        self.reactor.doPoll(0)
+        self.assertEqual(self.reactor._writes, set([self.writer.fileno()]))
+        self.assertEqual(self.reactor.getWriters(), [self.writer])
+        self.assertEqual(self.reactor._speculativeWriters, {})
+
+
+    def test_removeWriter(self):
+        """
+        A descriptor which stops writing before the next poll is not written
+        to.
+        """
+        self.writer.write(b"abc")
+        self.reactor.removeWriter(self.writer)
+        self.reactor.doPoll(0)
+        self.assertEqual(self.writer.writes, 0)
+        self.assertEqual(self.reactor.getWriters(), [])
+
+
+    def test_removeAll(self):
+        """
+        L{EPollReactor.removeAll} removes and returns descriptors which have
+        started writing since the last poll.
+        """
+        self.writer.write(b"abc")
+        self.assertIn(self.writer, self.reactor.removeAll())
+        self.assertEqual(self.reactor.getWriters(), [])
+
+
+    def test_writtenAfterDispatch(self):
+        """
+        Writing started while dispatching events is done before the poll
+        returns.
+        """
+        self.reactor.addReader(self.writer)
+        self.writer.doRead = lambda: self.writer.write(b"response")
+        self.client.send(b"request")
+        self.reactor.doPoll(1)
+        self.assertEqual(self.writer.writes, 1)
+        self.assertEqual(self.client.recv(10), b"response")
+
+
+    def test_otherDescriptorsRegistered(self):
+        """
+        A descriptor which does not set C{_speculativeWrites} is registered
+        with epoll as soon as it starts writing.
+        """
+        reader = SocketReader(self.client)
+        self.reactor.addWriter(reader)
+        self.assertEqual(self.reactor._writes, set([reader.fileno()]))
+
+    if EPollReactor is None:
+        skip = "epoll not supported in this environment."
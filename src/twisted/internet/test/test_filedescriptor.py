@@ -55,6 +55,33 @@ class MemoryFile(FileDescriptor):
 
 
 
+class VectorMemoryFile(MemoryFile):
+    """
+    A L{MemoryFile} which accepts data with C{writeSomeVectors}.
+
+    @ivar vectors: A C{list} of the lists of chunks passed to
+        C{writeSomeVectors}.
+    """
+    _vectoredWrites = True
+
+    def __init__(self):
+        MemoryFile.__init__(self)
+        self.vectors = []
+
+
+    def writeSomeVectors(self, vectors):
+        """
+        Copy at most C{self._freeSpace} bytes from C{vectors} into
+        C{self._written}.
+
+        @return: A C{int} indicating how many bytes were copied.
+        """
+        chunks = [memoryview(chunk).tobytes() for chunk in vectors]
+        self.vectors.append(chunks)
+        return self.writeSomeData(b"".join(chunks))
+
+
+
 class FileDescriptorTests(SynchronousTestCase):
     """
     Tests for L{FileDescriptor}.
@@ -97,3 +124,87 @@ class WriteDescriptorTests(SynchronousTestCase):
         descriptor = MemoryFile()
         descriptor.write(b"hello, world")
         self.assertIsNone(descriptor.doWrite())
+
+
+
+class VectoredWriteTests(SynchronousTestCase):
+    """
+    Tests for L{FileDescriptor.doWrite} when C{_vectoredWrites} is set.
+    """
+    def setUp(self):
+        self.descriptor = VectorMemoryFile()
+
+
+    def test_chunksNotJoined(self):
+        """
+        The buffered chunks are passed to C{writeSomeVectors} separately.
+        """
+        self.descriptor._freeSpace = 100
+        self.descriptor.writeSequence([b"head", b"er", b"body"])
+        self.descriptor.write(b"more")
+        self.assertIsNone(self.descriptor.doWrite())
+        self.assertEqual(self.descriptor.vectors,
+                         [[b"head", b"er", b"body", b"more"]])
+        self.assertEqual(self.descriptor._written, [b"headerbodymore"])
+        self.assertEqual(self.descriptor._tempDataBuffer, [])
+        self.assertEqual(self.descriptor._tempDataLen, 0)
+        self.assertEqual(self.descriptor.dataBuffer, b"")
+
+
+    def test_partialWrite(self):
+        """
+        When only part of the data is written, the rest is written, in order,
+        by later calls to C{doWrite}.
+        """
+        self.descriptor.writeSequence([b"abc", b"defg", b"hi"])
+        for space in (2, 3, 0, 3, 1):
+            self.descriptor._freeSpace = space
+            self.assertIsNone(self.descriptor.doWrite())
+        self.assertEqual(self.descriptor.vectors, [
+            [b"abc", b"defg", b"hi"],
+            [b"c", b"defg", b"hi"],
+            [b"fg", b"hi"],
+            [b"fg", b"hi"],
+            [b"i"],
+        ])
+        self.assertEqual(b"".join(self.descriptor._written), b"abcdefghi")
+        self.assertEqual(self.descriptor._tempDataLen, 0)
+
+
+    def test_dataWrittenBetweenPartialWrites(self):
+        """
+        Data written after a partial write is sent after the data which was
+        already buffered.
+        """
+        self.descriptor.write(b"abcd")
+        self.descriptor._freeSpace = 2
+        self.descriptor.doWrite()
+        self.descriptor.write(b"ef")
+        self.descriptor._freeSpace = 10
+        self.descriptor.doWrite()
+        self.assertEqual(self.descriptor.vectors[-1], [b"cd", b"ef"])
+        self.assertEqual(b"".join(self.descriptor._written), b"abcdef")
+
+
+    def test_vectorLimit(self):
+        """
+        No more than C{_VECTOR_LIMIT} chunks are passed to C{writeSomeVectors}
+        at once.
+        """
+        self.descriptor._VECTOR_LIMIT = 2
+        self.descriptor._freeSpace = 100
+        self.descriptor.writeSequence([b"a", b"b", b"c"])
+        self.descriptor.doWrite()
+        self.descriptor.doWrite()
+        self.assertEqual(self.descriptor.vectors, [[b"a", b"b"], [b"c"]])
+
+
+    def test_connectionLost(self):
+        """
+        If C{writeSomeVectors} returns an exception, L{FileDescriptor.doWrite}
+        returns it.
+        """
+        lost = Exception("lost")
+        self.descriptor.writeSomeVectors = lambda vectors: lost
+        self.descriptor.write(b"abc")
+        self.assertIs(self.descriptor.doWrite(), lost)
@@ -0,0 +1,331 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.internet._metrics} and the L{IReactorMetrics}
+implementation of L{twisted.internet.base.ReactorBase}.
+"""
+
+from __future__ import division, absolute_import
+
+from zope.interface.verify import verifyObject
+
+from twisted.internet._metrics import Histogram, ReactorMetrics
+from twisted.internet.base import ReactorBase
+from twisted.internet.interfaces import IReactorMetrics
+from twisted.internet.protocol import Protocol
+from twisted.internet.task import Clock
+from twisted.logger import LogLevel, formatEvent, globalLogPublisher
+from twisted.protocols.policies import ProtocolWrapper, WrappingFactory
+from twisted.trial.unittest import SynchronousTestCase
+
+
+
+class HistogramTests(SynchronousTestCase):
+    """
+    Tests for L{Histogram}.
+    """
+
+    def test_empty(self):
+        """
+        An empty L{Histogram} summarizes to zeros.
+        """
+        self.assertEqual(Histogram().summary(), {
+            "count": 0, "mean": 0.0, "max": 0.0,
+            "p50": 0.0, "p90": 0.0, "p99": 0.0,
+        })
+
+
+    def test_record(self):
+        """
+        L{Histogram.record} counts each duration in the bucket whose upper
+        bound is the smallest one at least as large as it, and keeps track
+        of the count, total and maximum.
+        """
+        histogram = Histogram()
+        histogram.record(0.001)
+        histogram.record(0.002)
+        histogram.record(20)
+        self.assertEqual(histogram.counts[Histogram.bounds.index(0.001)], 1)
+        self.assertEqual(histogram.counts[Histogram.bounds.index(0.0025)], 1)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(sum(histogram.counts), 3)
+        self.assertEqual(histogram.count, 3)
+        self.assertAlmostEqual(histogram.total, 20.003)
+        self.assertEqual(histogram.maximum, 20)
+
+
+    def test_percentile(self):
+        """
+        L{Histogram.percentile} returns the upper bound of the bucket holding
+        the percentile, or the largest duration if that is smaller.
+        """
+        histogram = Histogram()
+        for i in range(98):
+            histogram.record(0.0003)
+        histogram.record(0.2)
+        histogram.record(30)
+        self.assertEqual(histogram.percentile(50), 0.0005)
+        self.assertEqual(histogram.percentile(99), 0.25)
+        self.assertEqual(histogram.percentile(100), 30)
+
+        small = Histogram()
+        small.record(0.003)
+        self.assertEqual(small.percentile(50), 0.003)
+
+
+
+class MetricsReactor(ReactorBase):
+    """
+    A L{ReactorBase} which takes its time from a L{Clock} and whose event
+    loop handles the I/O events given to it.
+
+    @ivar events: The selectables and events handled by L{_doReadOrWrite}.
+    """
+
+    def __init__(self):
+        self.clock = Clock()
+        self.seconds = self.clock.seconds
+        self.events = []
+        ReactorBase.__init__(self)
+
+
+    def installWaker(self):
+        """
+        Required method, unused.
+        """
+
+
+    def doIteration(self, delay):
+        """
+        Wait for C{delay} seconds.
+        """
+        self.clock.advance(delay)
+
+
+    def _doReadOrWrite(self, selectable, event):
+        """
+        Handle an I/O event, which takes C{selectable.duration} seconds.
+        """
+        self.clock.advance(selectable.duration)
+        self.events.append((selectable, event))
+
+
+
+class SlowSelectable(object):
+    """
+    A selectable whose events take some time to handle.
+    """
+
+    def __init__(self, duration, protocol=None):
+        self.duration = duration
+        if protocol is not None:
+            self.protocol = protocol
+
+
+
+class ReactorMetricsTests(SynchronousTestCase):
+    """
+    Tests for L{ReactorBase.startMetrics}, L{ReactorBase.stopMetrics} and
+    L{ReactorMetrics}.
+    """
+
+    def setUp(self):
+        self.reactor = MetricsReactor()
+        self.metrics = self.reactor.startMetrics(slowCallThreshold=0.5)
+        self.metrics._clock = self.reactor.seconds
+        self.events = []
+        globalLogPublisher.addObserver(self.events.append)
+        self.addCleanup(globalLogPublisher.removeObserver, self.events.append)
+
+
+    def _slowCallEvents(self):
+        """
+        Get the events logged about slow callbacks.
+        """
+        return [event for event in self.events
+                if event.get("log_namespace") ==
+                "twisted.internet._metrics.ReactorMetrics" and
+                event["log_level"] == LogLevel.warn]
+
+
+    def test_interface(self):
+        """
+        L{ReactorBase} provides L{IReactorMetrics}, and
+        L{ReactorBase.startMetrics} returns a L{ReactorMetrics}.
+        """
+        self.assertTrue(verifyObject(IReactorMetrics, self.reactor))
+        self.assertIsInstance(self.metrics, ReactorMetrics)
+        self.assertEqual(self.metrics.slowCallThreshold, 0.5)
+
+
+    def test_timedCalls(self):
+        """
+        How late each timed call runs and how long it runs for are recorded,
+        and so is the time the reactor spends running timed calls.
+        """
+        self.reactor.callLater(1, self.reactor.clock.advance, 0.25)
+        self.reactor.callLater(1, self.reactor.clock.advance, 0.125)
+        self.reactor.clock.advance(2)
+        self.reactor.runUntilCurrent()
+
+        self.assertEqual(self.metrics.loopLag.count, 2)
+        self.assertEqual(self.metrics.loopLag.total, 1 + 1.25)
+        self.assertEqual(self.metrics.callTime.total, 0.375)
+        self.assertEqual(self.metrics.runUntilCurrentTime.count, 1)
+        self.assertEqual(self.metrics.runUntilCurrentTime.total, 0.375)
+        self.assertEqual(self.metrics.slowCalls, 0)
+        self.assertEqual(self._slowCallEvents(), [])
+
+
+    def test_slowTimedCall(self):
+        """
+        A timed call which runs for at least the slow callback threshold is
+        logged as a warning with its fully qualified name.
+        """
+        self.reactor.callLater(0, self.reactor.clock.advance, 0.5)
+        self.reactor.runUntilCurrent()
+
+        self.assertEqual(self.metrics.slowCalls, 1)
+        [event] = self._slowCallEvents()
+        self.assertEqual(event["kind"], "timed")
+        self.assertEqual(event["duration"], 0.5)
+        self.assertEqual(
+            event["callable"], "twisted.internet.task.Clock.advance")
+        self.assertEqual(
+            formatEvent(event),
+            "Slow reactor callback: twisted.internet.task.Clock.advance ran "
+            "for 0.500 seconds")
+
+
+    def test_failingTimedCall(self):
+        """
+        A timed call which raises an exception is still measured, and the
+        exception is logged as usual.
+        """
+        def fail():
+            self.reactor.clock.advance(1)
+            raise ZeroDivisionError()
+        self.reactor.callLater(0, fail)
+        self.reactor.runUntilCurrent()
+
+        self.assertEqual(self.metrics.callTime.total, 1)
+        self.assertEqual(self.metrics.slowCalls, 1)
+        self.assertEqual(len(self.flushLoggedErrors(ZeroDivisionError)), 1)
+
+
+    def test_threadCalls(self):
+        """
+        Calls from threads are measured.
+        """
+        self.reactor.threadCallQueue.append(
+            (self.reactor.clock.advance, (1,), {}))
+        self.reactor.runUntilCurrent()
+
+        self.assertEqual(self.metrics.callTime.total, 1)
+        self.assertEqual(self.metrics.loopLag.count, 0)
+        [event] = self._slowCallEvents()
+        self.assertEqual(event["kind"], "thread")
+
+
+    def test_doIteration(self):
+        """
+        The time each iteration of the reactor's I/O loop takes is recorded.
+        """
+        self.reactor.doIteration(3)
+        self.assertEqual(self.metrics.doIterationTime.count, 1)
+        self.assertEqual(self.metrics.doIterationTime.total, 3)
+
+
+    def test_io(self):
+        """
+        The time each I/O event takes to handle is recorded, and events
+        which take too long are logged with the name of the selectable's
+        class if it has no protocol.
+        """
+        fast, slow = SlowSelectable(0.25), SlowSelectable(2)
+        self.reactor._doReadOrWrite(fast, "read")
+        self.reactor._doReadOrWrite(slow, "write")
+
+        self.assertEqual(
+            self.reactor.events, [(fast, "read"), (slow, "write")])
+        self.assertEqual(self.metrics.callTime.count, 2)
+        self.assertEqual(self.metrics.callTime.total, 2.25)
+        [event] = self._slowCallEvents()
+        self.assertEqual(event["kind"], "io")
+        self.assertEqual(
+            event["callable"],
+            "twisted.internet.test.test_metrics.SlowSelectable")
+
+
+    def test_ioProtocol(self):
+        """
+        I/O events which take too long are logged with the name of the
+        class of the selectable's protocol, or of the protocol it wraps.
+        """
+        wrapper = ProtocolWrapper(WrappingFactory(None), Protocol())
+        self.reactor._doReadOrWrite(SlowSelectable(1, Protocol()), "read")
+        self.reactor._doReadOrWrite(SlowSelectable(1, wrapper), "read")
+
+        self.assertEqual(
+            [event["callable"] for event in self._slowCallEvents()],
+            ["twisted.internet.protocol.Protocol"] * 2)
+
+
+    def test_stopMetrics(self):
+        """
+        After L{ReactorBase.stopMetrics}, nothing more is recorded.
+        """
+        self.reactor.stopMetrics()
+        self.reactor.callLater(0, self.reactor.clock.advance, 1)
+        self.reactor.runUntilCurrent()
+        self.reactor.doIteration(1)
+        self.reactor._doReadOrWrite(SlowSelectable(1), "read")
+
+        self.assertEqual(self.metrics.callTime.count, 0)
+        self.assertEqual(self.metrics.runUntilCurrentTime.count, 0)
+        self.assertEqual(self.metrics.doIterationTime.count, 0)
+        self.assertNotIn("runUntilCurrent", vars(self.reactor))
+        self.assertNotIn("doIteration", vars(self.reactor))
+        self.assertNotIn("_doReadOrWrite", vars(self.reactor))
+        self.assertIsNone(self.reactor._metrics)
+
+        self.reactor.stopMetrics()
+
+
+    def test_restartMetrics(self):
+        """
+        Starting metrics again replaces the metrics being collected rather
+        than measuring everything twice.
+        """
+        metrics = self.reactor.startMetrics()
+        metrics._clock = self.reactor.seconds
+        self.reactor.doIteration(1)
+
+        self.assertEqual(self.metrics.doIterationTime.count, 0)
+        self.assertEqual(metrics.doIterationTime.count, 1)
+
+
+    def test_report(self):
+        """
+        L{ReactorMetrics.report} logs a snapshot of the metrics along with
+        the number of pending timed calls.
+        """
+        self.reactor.callLater(0, self.reactor.clock.advance, 0.001)
+        self.reactor.callLater(10, lambda: None)
+        self.reactor.runUntilCurrent()
+        del self.events[:]
+
+        self.metrics.report()
+
+        [event] = self.events
+        self.assertEqual(event["log_level"], LogLevel.info)
+        self.assertEqual(event["timedCalls"], 1)
+        self.assertEqual(event["slowCalls"], 0)
+        self.assertEqual(event["callTime"]["count"], 1)
+        self.assertEqual(event["metrics"], self.metrics.snapshot())
+        self.assertNotIn("readers", event)
+        self.assertEqual(
+            formatEvent(event),
+            "Reactor metrics: 1 timed calls pending, loop lag p99 0.0000s, "
+            "callback time p99 0.0010s, 0 slow callbacks")
@@ -43,7 +43,8 @@ from twisted.internet.test.reactormixins import (
     ReactorBuilder, needsRunningReactor, stopOnError)
 from twisted.internet.interfaces import (
     ILoggingContext, IConnector, IReactorFDSet, IReactorSocket, IReactorTCP,
-    IResolverSimple, ITLSTransport)
+    IResolverSimple, ISendfileTransport, ITLSTransport, IBufferedProtocol)
+from twisted.internet import abstract
 from twisted.internet.address import IPv4Address, IPv6Address
 from twisted.internet.defer import (
     Deferred, DeferredList, maybeDeferred, gatherResults, succeed, fail)
@@ -57,6 +58,7 @@ from twisted.internet.tcp import (
     _FileDescriptorReservation,
     _IFileDescriptorReservation,
     _NullFileDescriptorReservation,
+    Port,
     Server,
     _resolveIPv6,
 )
@@ -405,6 +407,155 @@ class TCPConnectionTests(TestCase):
 
 
 
+class SizedReadSocket(FakeSocket):
+    """
+    A L{FakeSocket} which returns a configurable number of bytes from each
+    C{recv} call, no more than the number asked for, and records how many
+    were asked for.
+
+    @ivar available: The number of bytes the next C{recv} call may return.
+
+    @ivar sizes: A C{list} of the sizes passed to C{recv}.
+    """
+    def __init__(self):
+        FakeSocket.__init__(self, b"")
+        self.available = 0
+        self.sizes = []
+
+
+    def recv(self, size):
+        self.sizes.append(size)
+        return b"x" * min(size, self.available)
+
+
+
+class AdaptiveReadSizeTests(TestCase):
+    """
+    Tests for the adaptive read size of L{twisted.internet.tcp.Connection}.
+    """
+    def setUp(self):
+        self.skt = SizedReadSocket()
+        self.conn = Connection(self.skt, Protocol())
+
+
+    def test_initialReadSize(self):
+        """
+        The first read of a L{Connection} asks for C{bufferSize} bytes.
+        """
+        self.skt.available = 1
+        self.conn.doRead()
+        self.assertEqual(self.skt.sizes, [self.conn.bufferSize])
+
+
+    def test_growOnFullReads(self):
+        """
+        The read size is doubled each time a read fills it, up to
+        C{maximumReadSize}.
+        """
+        self.conn.setReadSizeBounds(2 ** 10, 2 ** 12)
+        self.conn.bufferSize = 2 ** 10
+        self.skt.available = 2 ** 20
+        for i in range(4):
+            self.conn.doRead()
+        self.assertEqual(self.skt.sizes, [2 ** 10, 2 ** 11, 2 ** 12, 2 ** 12])
+
+
+    def test_shrinkOnSustainedSmallReads(self):
+        """
+        The read size is halved after C{smallReadsBeforeShrinking}
+        consecutive reads which fill no more than a quarter of it, down to
+        C{minimumReadSize}.
+        """
+        self.conn.setReadSizeBounds(2 ** 14, 2 ** 16)
+        self.conn.smallReadsBeforeShrinking = 2
+        self.skt.available = 10
+        for i in range(6):
+            self.conn.doRead()
+        self.assertEqual(
+            self.skt.sizes,
+            [2 ** 16, 2 ** 16, 2 ** 15, 2 ** 15, 2 ** 14, 2 ** 14])
+
+
+    def test_mediumReadResetsSmallReads(self):
+        """
+        A read which fills more than a quarter of the read size, but not all
+        of it, restarts the count of consecutive small reads.
+        """
+        self.conn.setReadSizeBounds(2 ** 14, 2 ** 16)
+        self.conn.smallReadsBeforeShrinking = 2
+        for available in [10, 2 ** 15, 10, 10]:
+            self.skt.available = available
+            self.conn.doRead()
+        self.assertEqual(self.skt.sizes, [2 ** 16] * 4)
+        self.skt.available = 10
+        self.conn.doRead()
+        self.assertEqual(self.skt.sizes[-1], 2 ** 15)
+
+
+    def test_counters(self):
+        """
+        C{readCount} and C{bytesRead} count the reads which returned data and
+        the bytes they returned; the end of the connection is not counted.
+        """
+        for available in [10, 20, 0]:
+            self.skt.available = available
+            self.conn.doRead()
+        self.assertEqual((self.conn.readCount, self.conn.bytesRead), (2, 30))
+
+
+    def test_boundsClampReadSize(self):
+        """
+        L{Connection.setReadSizeBounds} brings the current read size within
+        the new bounds.
+        """
+        self.skt.available = 1
+        self.conn.doRead()
+        self.conn.setReadSizeBounds(2 ** 8, 2 ** 9)
+        self.conn.doRead()
+        self.assertEqual(self.skt.sizes, [self.conn.bufferSize, 2 ** 9])
+
+
+    def test_invalidBounds(self):
+        """
+        L{Connection.setReadSizeBounds} raises L{ValueError} if the minimum is
+        not positive or is larger than the maximum.
+        """
+        self.assertRaises(ValueError, self.conn.setReadSizeBounds, 0, 10)
+        self.assertRaises(ValueError, self.conn.setReadSizeBounds, 11, 10)
+
+
+    def test_serverBoundsFromFactory(self):
+        """
+        A L{Server} uses the C{readSizeBounds} of the factory of its port.
+        """
+        class FakePort(object):
+            _realPortNumber = 3
+            readSizeBounds = None
+            factory = ServerFactory()
+        FakePort.factory.readSizeBounds = (2 ** 8, 2 ** 9)
+        server = Server(SizedReadSocket(), Protocol(), ("", 0), FakePort(),
+                        None, _FakeFDSetReactor())
+        self.assertEqual((server.minimumReadSize, server.maximumReadSize),
+                         (2 ** 8, 2 ** 9))
+
+
+    def test_serverBoundsFromPort(self):
+        """
+        The C{readSizeBounds} of the port of a L{Server} take precedence over
+        those of its factory.
+        """
+        class FakePort(object):
+            _realPortNumber = 3
+            readSizeBounds = (2 ** 10, 2 ** 11)
+            factory = ServerFactory()
+        FakePort.factory.readSizeBounds = (2 ** 8, 2 ** 9)
+        server = Server(SizedReadSocket(), Protocol(), ("", 0), FakePort(),
+                        None, _FakeFDSetReactor())
+        self.assertEqual((server.minimumReadSize, server.maximumReadSize),
+                         (2 ** 10, 2 ** 11))
+
+
+
 class TCPCreator(EndpointCreator):
     """
     Create IPv4 TCP endpoints for L{runProtocolsWithReactor}-based tests.
@@ -1960,6 +2111,52 @@ def assertNotReading(testCase, reactor, transport):
 
 
 
+class ReadSizeBoundsTestsBuilder(ReactorBuilder):
+    """
+    Tests for the configuration of the read size bounds of TCP connections
+    by endpoints.
+    """
+    requiredInterfaces = (IReactorFDSet, IReactorTCP)
+
+    def test_endpointReadSizeBounds(self):
+        """
+        The connections set up by L{TCP4ServerEndpoint} and
+        L{TCP4ClientEndpoint} use the C{readSizeBounds} given to them.
+        """
+        reactor = self.buildReactor()
+        transports = []
+        ports = []
+
+        class RecordingProtocol(Protocol):
+            def connectionMade(self):
+                transports.append(self.transport)
+                if len(transports) == 2:
+                    for transport in transports:
+                        transport.abortConnection()
+                    ports[0].stopListening()
+                    reactor.stop()
+
+        def listening(port):
+            ports.append(port)
+            client = TCP4ClientEndpoint(
+                reactor, "127.0.0.1", port.getHost().port,
+                readSizeBounds=(2 ** 12, 2 ** 13))
+            return client.connect(ClientFactory.forProtocol(RecordingProtocol))
+
+        server = TCP4ServerEndpoint(reactor, 0, interface="127.0.0.1",
+                                    readSizeBounds=(2 ** 10, 2 ** 11))
+        d = server.listen(ServerFactory.forProtocol(RecordingProtocol))
+        d.addCallback(listening)
+        d.addErrback(log.err)
+        self.runReactor(reactor)
+
+        self.assertEqual(
+            sorted((transport.minimumReadSize, transport.maximumReadSize)
+                   for transport in transports),
+            [(2 ** 10, 2 ** 11), (2 ** 12, 2 ** 13)])
+
+
+
 class TCPConnectionTestsBuilder(ReactorBuilder):
     """
     Builder defining tests relating to L{twisted.internet.tcp.Connection}.
@@ -2472,14 +2669,263 @@ class AdoptStreamConnectionTestsBuilder(TCPTransportServerAddressTestMixin,
 
 
 
+class _FileSendingProtocol(ConnectableProtocol):
+    """
+    A protocol which writes a header, sends part of a file with
+    L{ISendfileTransport.sendFile}, writes a trailer and disconnects.
+
+    @ivar result: The result of the L{Deferred} returned by C{sendFile}.
+    @ivar unsupported: C{True} if the transport does not provide
+        L{ISendfileTransport}.
+    """
+
+    result = None
+    unsupported = False
+
+    def __init__(self, fileObject, offset, count, producer=None):
+        self.fileObject = fileObject
+        self.offset = offset
+        self.count = count
+        self.producer = producer
+
+
+    def connectionMade(self):
+        if not ISendfileTransport.providedBy(self.transport):
+            self.unsupported = True
+            self.transport.loseConnection()
+            return
+        if self.producer is not None:
+            self.transport.registerProducer(self.producer, True)
+        self.transport.write(b"header")
+        d = self.transport.sendFile(self.fileObject, self.offset, self.count)
+        d.addBoth(self._sent)
+
+
+    def _sent(self, result):
+        self.result = result
+        self.transport.write(b"trailer")
+        if self.producer is not None:
+            self.producerAfter = self.transport.producer
+            self.transport.unregisterProducer()
+        self.transport.loseConnection()
+
+
+
+class _AccumulatingProtocol(ConnectableProtocol):
+    """
+    A protocol which collects everything it receives.
+    """
+
+    def connectionMade(self):
+        self.received = []
+
+
+    def dataReceived(self, data):
+        self.received.append(data)
+
+
+
+@implementer(IPushProducer)
+class _DummyPushProducer(object):
+    """
+    A push producer which does nothing.
+    """
+
+    def pauseProducing(self):
+        pass
+
+
+    def resumeProducing(self):
+        pass
+
+
+    def stopProducing(self):
+        pass
+
+
+
+class SendFileTestsBuilder(ReactorBuilder):
+    """
+    Tests for L{Connection.sendFile}.
+    """
+
+    content = b"".join(
+        b"%08d" % (i,) for i in range(2 ** 16))
+
+    def _sendFile(self, fileObject, offset=0, count=None, producer=None):
+        """
+        Connect a client to a L{_FileSendingProtocol}, and return what it
+        received and the server protocol.
+        """
+        server = _FileSendingProtocol(fileObject, offset, count, producer)
+        client = _AccumulatingProtocol()
+        runProtocolsWithReactor(self, server, client, TCPCreator())
+        if server.unsupported:
+            raise SkipTest("Transport does not provide ISendfileTransport.")
+        return b"".join(client.received), server
+
+
+    def _makeFile(self):
+        """
+        Create a file holding C{self.content}, opened for reading.
+        """
+        path = self.mktemp()
+        with open(path, "wb") as f:
+            f.write(self.content)
+        fileObject = open(path, "rb")
+        self.addCleanup(fileObject.close)
+        return fileObject
+
+
+    def test_sendFile(self):
+        """
+        L{Connection.sendFile} sends the whole file after the data written
+        before it and fires its L{Deferred} with the number of bytes sent,
+        leaving the file position unchanged.
+        """
+        fileObject = self._makeFile()
+        received, server = self._sendFile(fileObject)
+        self.assertEqual(received, b"header" + self.content + b"trailer")
+        self.assertEqual(server.result, len(self.content))
+        self.assertEqual(fileObject.tell(), 0)
+
+
+    def test_sendFileRange(self):
+        """
+        L{Connection.sendFile} sends C{count} bytes starting at C{offset}.
+        """
+        received, server = self._sendFile(self._makeFile(), 1000, 300000)
+        self.assertEqual(
+            received, b"header" + self.content[1000:301000] + b"trailer")
+        self.assertEqual(server.result, 300000)
+
+
+    def test_sendFileWithoutFileDescriptor(self):
+        """
+        L{Connection.sendFile} reads and writes the contents of file objects
+        which have no file descriptor, leaving their position unchanged.
+        """
+        fileObject = io.BytesIO(self.content)
+        fileObject.seek(5)
+        received, server = self._sendFile(fileObject, 8, 64)
+        self.assertEqual(received, b"header" + self.content[8:72] + b"trailer")
+        self.assertEqual(server.result, 64)
+        self.assertEqual(fileObject.tell(), 5)
+
+
+    def test_producerRegisteredAgain(self):
+        """
+        A producer registered with the transport before L{Connection.sendFile}
+        is called is registered again once the file has been sent.
+        """
+        producer = _DummyPushProducer()
+        received, server = self._sendFile(self._makeFile(), producer=producer)
+        self.assertEqual(received, b"header" + self.content + b"trailer")
+        self.assertIs(server.producerAfter, producer)
+
+
+
+class _WritingProtocol(ConnectableProtocol):
+    """
+    A protocol which writes some bytes and disconnects.
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+
+    def connectionMade(self):
+        self.transport.write(self.data)
+        self.transport.loseConnection()
+
+
+
+@implementer(IBufferedProtocol)
+class _BufferedAccumulatingProtocol(ConnectableProtocol):
+    """
+    A protocol which collects everything it receives, using a small buffer
+    of its own when its transport supports that.
+
+    @ivar sizeHints: The size hints passed to C{getBuffer}.
+    @ivar updates: The number of calls to C{bufferUpdated}.
+    """
+
+    def connectionMade(self):
+        self.buffer = bytearray(1000)
+        self.received = []
+        self.sizeHints = []
+        self.updates = 0
+
+
+    def getBuffer(self, sizeHint):
+        self.sizeHints.append(sizeHint)
+        return self.buffer
+
+
+    def bufferUpdated(self, nbytes):
+        self.updates += 1
+        self.received.append(bytes(self.buffer[:nbytes]))
+
+
+    def dataReceived(self, data):
+        self.received.append(data)
+
+
+
+class BufferedProtocolTestsMixin(object):
+    """
+    Tests for L{IBufferedProtocol} support in stream transports.
+
+    @ivar endpoints: An L{EndpointCreator} for the transport tested.
+    """
+
+    def test_receiveIntoBuffer(self):
+        """
+        A transport receives data into the buffer returned by the
+        C{getBuffer} method of an L{IBufferedProtocol} provider, passing its
+        current read size as the size hint, and calls C{bufferUpdated} with
+        the number of bytes received instead of calling C{dataReceived}.
+        """
+        data = b"".join(b"%08d" % (i,) for i in range(2 ** 14))
+        server = _WritingProtocol(data)
+        client = _BufferedAccumulatingProtocol()
+        runProtocolsWithReactor(self, server, client, self.endpoints)
+        self.assertEqual(b"".join(client.received), data)
+        if not isinstance(client.transport, Connection):
+            raise SkipTest("Transport does not support IBufferedProtocol.")
+        # The buffer is smaller than the data, so it is reused.
+        self.assertEqual(client.updates, len(client.received))
+        self.assertGreater(client.updates, len(data) // len(client.buffer))
+        self.assertEqual(client.sizeHints[0],
+                         abstract.FileDescriptor.bufferSize)
+        self.assertTrue(
+            client.transport.minimumReadSize <= min(client.sizeHints) <=
+            max(client.sizeHints) <= client.transport.maximumReadSize)
+
+
+
+class TCPBufferedProtocolTestsBuilder(BufferedProtocolTestsMixin,
+                                      ReactorBuilder):
+    """
+    Tests for L{IBufferedProtocol} support in TCP transports.
+    """
+
+    requiredInterfaces = (IReactorTCP,)
+    endpoints = TCPCreator()
+
+
+
 globals().update(TCP4ClientTestsBuilder.makeTestCaseClasses())
 globals().update(TCP6ClientTestsBuilder.makeTestCaseClasses())
 globals().update(TCPPortTestsBuilder.makeTestCaseClasses())
 globals().update(TCPFDPortTestsBuilder.makeTestCaseClasses())
 globals().update(TCPConnectionTestsBuilder.makeTestCaseClasses())
+globals().update(ReadSizeBoundsTestsBuilder.makeTestCaseClasses())
 globals().update(TCP4ConnectorTestsBuilder.makeTestCaseClasses())
 globals().update(TCP6ConnectorTestsBuilder.makeTestCaseClasses())
 globals().update(TCPTransportTestsBuilder.makeTestCaseClasses())
+globals().update(SendFileTestsBuilder.makeTestCaseClasses())
+globals().update(TCPBufferedProtocolTestsBuilder.makeTestCaseClasses())
 globals().update(AdoptStreamConnectionTestsBuilder.makeTestCaseClasses())
 
 
@@ -3011,6 +3457,42 @@ globals().update(AbortConnectionTests.makeTestCaseClasses())
 
 
 
+class PortReusePortTests(TestCase):
+    """
+    Tests for L{twisted.internet.tcp.Port.reusePort}.
+    """
+    if not hasattr(socket, "SO_REUSEPORT"):
+        skip = "SO_REUSEPORT is not supported on this platform."
+
+    def _reusePortOption(self, port):
+        """
+        Create the listening socket of C{port} and return whether it has
+        I{SO_REUSEPORT} set.
+        """
+        skt = port.createInternetSocket()
+        self.addCleanup(skt.close)
+        return bool(skt.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT))
+
+
+    def test_default(self):
+        """
+        By default, the listening socket of a L{Port} does not have
+        I{SO_REUSEPORT} set.
+        """
+        self.assertFalse(self._reusePortOption(Port(0, ServerFactory())))
+
+
+    def test_reusePort(self):
+        """
+        The listening socket of a L{Port} with C{reusePort} set has
+        I{SO_REUSEPORT} set.
+        """
+        port = Port(0, ServerFactory())
+        port.reusePort = True
+        self.assertTrue(self._reusePortOption(port))
+
+
+
 class SimpleUtilityTests(TestCase):
     """
     Simple, direct tests for helpers within L{twisted.internet.tcp}.
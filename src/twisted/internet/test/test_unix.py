@@ -37,7 +37,8 @@ from twisted.internet.test.connectionmixins import EndpointCreator
 from twisted.internet.test.reactormixins import ReactorBuilder
 from twisted.internet.test.test_core import ObjectModelIntegrationMixin
 from twisted.internet.test.test_tcp import (StreamTransportTestsMixin,
-    WriteSequenceTestsMixin, MyClientFactory, MyServerFactory,)
+    WriteSequenceTestsMixin, MyClientFactory, MyServerFactory,
+    BufferedProtocolTestsMixin)
 from twisted.internet.test.connectionmixins import ConnectableProtocol
 from twisted.internet.test.connectionmixins import ConnectionTestsMixin
 from twisted.internet.test.connectionmixins import StreamClientTestsMixin
@@ -453,6 +454,8 @@ class UNIXTestsBuilder(UNIXFamilyMixin, ReactorBuilder, ConnectionTestsMixin):
             def __init__(self, skt, proto):
                 self.socket = skt
                 self.protocol = proto
+            def _getReadSize(self):
+                return self.bufferSize
             def _dataReceived(self, data):
                 pass
             def getHost(self):
@@ -680,6 +683,18 @@ class UNIXTestsBuilder(UNIXFamilyMixin, ReactorBuilder, ConnectionTestsMixin):
 
 
 
+class UNIXBufferedProtocolTestsBuilder(UNIXFamilyMixin,
+                                       BufferedProtocolTestsMixin,
+                                       ReactorBuilder):
+    """
+    Tests for L{IBufferedProtocol} support in UNIX stream transports.
+    """
+
+    requiredInterfaces = (IReactorUNIX,)
+    endpoints = UNIXCreator()
+
+
+
 class UNIXDatagramTestsBuilder(UNIXFamilyMixin, ReactorBuilder):
     """
     Builder defining tests relating to L{IReactorUNIXDatagram}.
@@ -944,6 +959,7 @@ class UNIXAdoptStreamConnectionTestsBuilder(WriteSequenceTestsMixin, ReactorBuil
 
 globals().update(UNIXTestsBuilder.makeTestCaseClasses())
 globals().update(UNIXDatagramTestsBuilder.makeTestCaseClasses())
+globals().update(UNIXBufferedProtocolTestsBuilder.makeTestCaseClasses())
 globals().update(UNIXPortTestsBuilder.makeTestCaseClasses())
 globals().update(UNIXFDPortTestsBuilder.makeTestCaseClasses())
 globals().update(UNIXAdoptStreamConnectionTestsBuilder.makeTestCaseClasses())
@@ -152,22 +152,45 @@ class _SendmsgMixin(object):
             return result
 
 
+    def writeSomeVectors(self, vectors):
+        """
+        Send as much of C{vectors} as possible.  If there are file descriptors
+        to send, the data is joined and sent by L{writeSomeData}, which knows
+        how to send them along with it.
+        """
+        if self._sendmsgQueue:
+            return self.writeSomeData(b"".join(vectors))
+        return self._writeSomeDataBase.writeSomeVectors(self, vectors)
+
+
     def doRead(self):
         """
         Calls {IProtocol.dataReceived} with all available data and
         L{IFileDescriptorReceiver.fileDescriptorReceived} once for each
         received file descriptor in ancillary data.
 
-        This reads up to C{self.bufferSize} bytes of data from its socket, then
-        dispatches the data to protocol callbacks to be handled.  If the
-        connection is not lost through an error in the underlying recvmsg(),
-        this function will return the result of the dataReceived call.
+        This reads up to as many bytes of data from its socket as the adaptive
+        read size allows, then dispatches the data to protocol callbacks to be
+        handled.  If the connection is not lost through an error in the
+        underlying recvmsg(), this function will return the result of the
+        dataReceived call.
+
+        If the protocol provides L{interfaces.IBufferedProtocol}, the data is
+        received into the buffer it provides instead, and its
+        C{bufferUpdated} method is called.
         """
+        buffered = interfaces.IBufferedProtocol.providedBy(self.protocol)
         try:
-            data, ancillary, flags = untilConcludes(
-                sendmsg.recvmsg, self.socket, self.bufferSize)
+            if buffered:
+                data, ancillary, flags = untilConcludes(
+                    sendmsg.recvmsgInto, self.socket,
+                    self.protocol.getBuffer(self._getReadSize()))
+            else:
+                data, ancillary, flags = untilConcludes(
+                    sendmsg.recvmsg, self.socket, self._getReadSize())
         except socket.error as se:
             if se.args[0] == EWOULDBLOCK:
+                self._readWouldBlock = True
                 return
             else:
                 return main.CONNECTION_LOST
@@ -188,6 +211,8 @@ class _SendmsgMixin(object):
                     cmsgLevel=cmsgLevel, cmsgType=cmsgType,
                 )
 
+        if buffered:
+            return self._bufferUpdated(data)
         return self._dataReceived(data)
 
 
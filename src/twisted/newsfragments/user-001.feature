@@ -0,0 +1 @@
+Reactors can now keep their pending timed calls in an indexed heap, enabled with indexedTimedCalls, which makes resetting and cancelling DelayedCalls O(log n).
@@ -0,0 +1 @@
+twisted.internet.task.TimingWheel is a new IReactorTime provider for coarse-grained timeouts, and TimeoutMixin and TimeoutFactory can use a shared wheel through their new coarseTimeouts flag.
@@ -0,0 +1 @@
+EPollReactor has an edgeTriggered mode which reads each readable connection until it is drained, a maxEvents limit, and counters of polls and events.
@@ -0,0 +1 @@
+EPollReactor has a speculativeWrites mode which writes to connections before registering them for write readiness notification.
@@ -0,0 +1 @@
+ISendfileTransport lets TCP connections send files with sendfile(2), which FileSender and twisted.web.static.File now use when they can.
@@ -0,0 +1 @@
+Protocols providing the new IBufferedProtocol interface receive data from TCP and UNIX connections directly into a buffer of their own.
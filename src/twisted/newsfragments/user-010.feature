@@ -0,0 +1 @@
+TCP server endpoints and the tcp and tcp6 endpoint strings accept reusePort to listen with SO_REUSEPORT, and twist --workers N runs an application in N supervised worker processes sharing its ports.
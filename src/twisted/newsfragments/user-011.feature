@@ -0,0 +1 @@
+tcp.Port.maxAcceptsPerRead bounds how many connections a listening port accepts at once, and ports now count accepts, accept batches and EMFILE failures.
@@ -0,0 +1 @@
+Reactors can collect histograms of loop lag and of the time spent running timed calls, calls from threads and I/O handlers through the new opt-in IReactorMetrics interface.
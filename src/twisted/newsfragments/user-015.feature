@@ -0,0 +1 @@
+twisted.python.failure.Failure now builds its frames, stack and parents lazily, and Failure(..., captureTraceback=False) makes a cheap Failure meant for errors which are expected to be trapped.
@@ -11,7 +11,7 @@ from __future__ import absolute_import, division
 
 # System imports
 import re
-from struct import pack, unpack, calcsize
+from struct import pack, unpack_from, calcsize
 from io import BytesIO
 import math
 
@@ -524,6 +524,9 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
     """
     line_mode = 1
     _buffer = b''
+    _bufferStart = 0
+    _partial = ()
+    _partialLength = 0
     _busyReceiving = False
     delimiter = b'\r\n'
     MAX_LENGTH = 16384
@@ -535,7 +538,13 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
         @return: All of the cleared buffered data.
         @rtype: C{bytes}
         """
-        b, self._buffer = self._buffer, b""
+        b = self._buffer[self._bufferStart:]
+        if self._partialLength:
+            b = b"".join([b] + self._partial)
+            self._partial = ()
+            self._partialLength = 0
+        self._buffer = b""
+        self._bufferStart = 0
         return b
 
 
@@ -549,38 +558,70 @@ class LineReceiver(protocol.Protocol, _PauseableMixin):
             self._buffer += data
             return
 
+        # The start of a line which has not been completely received yet is
+        # kept in _partial as a list of chunks, so that a long line arriving
+        # in many small chunks is only joined together once.
+        if self._partialLength:
+            if self.line_mode and not self.paused:
+                delimiter = self.delimiter
+                overlap = len(delimiter) - 1
+                last = self._partial[-1]
+                if (len(last) >= overlap and data.find(delimiter) == -1 and
+                        (last[len(last) - overlap:] +
+                         data[:overlap]).find(delimiter) == -1):
+                    self._partial.append(data)
+                    self._partialLength += len(data)
+                    if self._partialLength >= (self.MAX_LENGTH +
+                                               len(delimiter)):
+                        return self.lineLengthExceeded(self.clearLineBuffer())
+                    return
+            data = self.clearLineBuffer() + data
+        elif self._buffer:
+            data = self._buffer + data
+
+        # Lines are sliced off the received data at an offset kept in
+        # _bufferStart, rather than by splitting off the rest of it for each
+        # line.
+        self._buffer = data
+        self._bufferStart = 0
         try:
             self._busyReceiving = True
-            self._buffer += data
-            while self._buffer and not self.paused:
+            while not self.paused:
+                buf = self._buffer
+                start = self._bufferStart
+                if len(buf) <= start:
+                    break
                 if self.line_mode:
-                    try:
-                        line, self._buffer = self._buffer.split(
-                            self.delimiter, 1)
-                    except ValueError:
-                        if len(self._buffer) >= (self.MAX_LENGTH
-                                                 + len(self.delimiter)):
-                            line, self._buffer = self._buffer, b''
-                            return self.lineLengthExceeded(line)
+                    end = buf.find(self.delimiter, start)
+                    if end == -1:
+                        if len(buf) - start >= (self.MAX_LENGTH
+                                                + len(self.delimiter)):
+                            return self.lineLengthExceeded(
+                                self.clearLineBuffer())
+                        rest = self.clearLineBuffer()
+                        self._partial = [rest]
+                        self._partialLength = len(rest)
                         return
-                    else:
-                        lineLength = len(line)
-                        if lineLength > self.MAX_LENGTH:
-                            exceeded = line + self.delimiter + self._buffer
-                            self._buffer = b''
-                            return self.lineLengthExceeded(exceeded)
-                        why = self.lineReceived(line)
-                        if (why or self.transport and
-                            self.transport.disconnecting):
-                            return why
+                    line = buf[start:end]
+                    self._bufferStart = end + len(self.delimiter)
+                    if end - start > self.MAX_LENGTH:
+                        exceeded = (line + self.delimiter +
+                                    self.clearLineBuffer())
+                        return self.lineLengthExceeded(exceeded)
+                    why = self.lineReceived(line)
+                    if (why or self.transport and
+                        self.transport.disconnecting):
+                        return why
                 else:
-                    data = self._buffer
-                    self._buffer = b''
+                    data = self.clearLineBuffer()
                     why = self.rawDataReceived(data)
                     if why:
                         return why
         finally:
             self._busyReceiving = False
+            if self._bufferStart:
+                self._buffer = self._buffer[self._bufferStart:]
+                self._bufferStart = 0
 
 
     def setLineMode(self, extra=b''):
@@ -675,7 +716,10 @@ class _RecvdCompatHack(object):
     the default __set__ behavior in both new-style and old-style subclasses.
     """
     def __get__(self, oself, type=None):
-        return oself._unprocessed[oself._compatibilityOffset:]
+        unprocessed = oself._unprocessed[oself._compatibilityOffset:]
+        if oself._pending:
+            return b"".join([unprocessed] + oself._pending)
+        return unprocessed
 
 
 
@@ -700,11 +744,26 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
     @ivar _compatibilityOffset: the offset within C{_unprocessed} to the next
         message to be parsed. (used to generate the recvd attribute)
     @type _compatibilityOffset: C{int}
+
+    @ivar _pending: bytes received after C{_unprocessed} while the message
+        at its start was still incomplete, kept as a list of chunks so that
+        a large message arriving in many small chunks is only joined once.
+    @type _pending: C{list} of C{bytes}
+
+    @ivar _pendingLength: the total length of the chunks in C{_pending}.
+    @type _pendingLength: C{int}
+
+    @ivar _needed: the number of bytes C{_unprocessed} and C{_pending} must
+        hold together before another message can be parsed.
+    @type _needed: C{int}
     """
 
     MAX_LENGTH = 99999
     _unprocessed = b""
     _compatibilityOffset = 0
+    _pending = ()
+    _pendingLength = 0
+    _needed = 0
 
     # Backwards compatibility support for applications which directly touch the
     # "internal" parse buffer.
@@ -737,18 +796,35 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
         """
         Convert int prefixed strings into calls to stringReceived.
         """
+        if (len(self._unprocessed) + self._pendingLength + len(data) <
+                self._needed):
+            # Still not enough for the next message; save joining it all
+            # together until there is.
+            if self._pendingLength:
+                self._pending.append(data)
+            else:
+                self._pending = [data]
+            self._pendingLength += len(data)
+            return
+
         # Try to minimize string copying (via slices) by keeping one buffer
         # containing all the data we have so far and a separate offset into that
         # buffer.
-        alldata = self._unprocessed + data
+        if self._pendingLength:
+            alldata = b"".join([self._unprocessed] + self._pending + [data])
+            self._pending = ()
+            self._pendingLength = 0
+        else:
+            alldata = self._unprocessed + data
         currentOffset = 0
         prefixLength = self.prefixLength
         fmt = self.structFormat
         self._unprocessed = alldata
+        self._needed = 0
 
         while len(alldata) >= (currentOffset + prefixLength) and not self.paused:
             messageStart = currentOffset + prefixLength
-            length, = unpack(fmt, alldata[currentOffset:messageStart])
+            length, = unpack_from(fmt, alldata, currentOffset)
             if length > self.MAX_LENGTH:
                 self._unprocessed = alldata
                 self._compatibilityOffset = currentOffset
@@ -756,6 +832,7 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
                 return
             messageEnd = messageStart + length
             if len(alldata) < messageEnd:
+                self._needed = messageEnd - currentOffset
                 break
 
             # Here we have to slice the working buffer so we can send just the
@@ -775,6 +852,9 @@ class IntNStringReceiver(protocol.Protocol, _PauseableMixin):
                 if alldata:
                     continue
                 return
+        else:
+            if not self.paused:
+                self._needed = prefixLength
 
         # Slice off all the data that has been processed, avoiding holding onto
         # memory to store it, and update the compatibility attributes to reflect
@@ -889,6 +969,11 @@ class FileSender:
     This is a helper for protocols that, at some point, will take a
     file-like object, read its contents, and write them out to the network,
     optionally performing some transformation on the bytes in between.
+
+    If there is no transformation and the consumer is a transport providing
+    L{interfaces.ISendfileTransport}, the file is handed to the transport's
+    C{sendFile} instead, so its contents need not be copied through user
+    space.
     """
 
     CHUNK_SIZE = 2 ** 14
@@ -920,10 +1005,46 @@ class FileSender:
         self.transform = transform
 
         self.deferred = deferred = defer.Deferred()
+        if (transform is None and
+                interfaces.ISendfileTransport.providedBy(consumer)):
+            try:
+                start = file.tell()
+            except (AttributeError, EnvironmentError):
+                # Not a seekable file; read it instead.
+                pass
+            else:
+                consumer.sendFile(file, start).addCallbacks(
+                    self._fileSent, self._fileNotSent, callbackArgs=(start,))
+                return deferred
         self.consumer.registerProducer(self, False)
         return deferred
 
 
+    def _fileSent(self, sent, start):
+        """
+        The consumer has sent C{sent} bytes of the file, starting at
+        C{start}; leave the file positioned after them, as if they had been
+        read, and fire the transfer's L{Deferred}.
+        """
+        if sent:
+            self.file.seek(start + sent - 1)
+            self.lastSent = self.file.read(1)
+        self.file = None
+        if self.deferred:
+            self.deferred.callback(self.lastSent)
+            self.deferred = None
+
+
+    def _fileNotSent(self, reason):
+        """
+        The consumer failed to send the file.
+        """
+        self.file = None
+        if self.deferred:
+            self.deferred.errback(reason)
+            self.deferred = None
+
+
     def resumeProducing(self):
         chunk = ''
         if self.file:
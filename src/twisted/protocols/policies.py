@@ -18,7 +18,8 @@ from zope.interface import directlyProvides, providedBy
 # twisted imports
 from twisted.internet.protocol import ServerFactory, Protocol, ClientFactory
 from twisted.internet import error
-from twisted.internet.interfaces import ILoggingContext
+from twisted.internet.task import TimingWheel
+from twisted.internet.interfaces import ILoggingContext, ISendfileTransport
 from twisted.python import log
 
 
@@ -36,6 +37,24 @@ def _wrappedLogPrefix(wrapper, wrapped):
 
 
 
+_timingWheel = None
+
+def _coarseCallLater(period, func):
+    """
+    Schedule a call on a L{TimingWheel} driven by the global reactor, shared
+    by every timeout which does not need to be precise.
+
+    @see: L{TimeoutMixin.coarseTimeouts}, L{TimeoutFactory.coarseTimeouts}
+
+    @return: An L{IDelayedCall} provider.
+    """
+    global _timingWheel
+    if _timingWheel is None:
+        _timingWheel = TimingWheel()
+    return _timingWheel.callLater(period, func)
+
+
+
 class ProtocolWrapper(Protocol):
     """
     Wraps protocol instances and acts as their transport as well.
@@ -68,8 +87,12 @@ class ProtocolWrapper(Protocol):
         When a connection is made, register this wrapper with its factory,
         save the real transport, and connect the wrapped protocol to this
         L{ProtocolWrapper} to intercept any transport calls it makes.
+
+        The wrapper provides the interfaces of the transport, except for
+        L{ISendfileTransport}: a file sent with C{sendFile} would go straight
+        to the real transport, bypassing the wrapper's C{write}.
         """
-        directlyProvides(self, providedBy(transport))
+        directlyProvides(self, providedBy(transport) - ISendfileTransport)
         Protocol.makeConnection(self, transport)
         self.factory.registerProtocol(self)
         self.wrappedProtocol.makeConnection(self)
@@ -552,8 +575,14 @@ class TimeoutProtocol(ProtocolWrapper):
 class TimeoutFactory(WrappingFactory):
     """
     Factory for TimeoutWrapper.
+
+    @cvar coarseTimeouts: If C{True}, timeouts are scheduled on a
+        L{TimingWheel} shared by all coarse timeouts, which makes setting,
+        resetting and cancelling them cheaper at the cost of them firing up
+        to a tenth of a second late.
     """
     protocol = TimeoutProtocol
+    coarseTimeouts = False
 
 
     def __init__(self, wrappedFactory, timeoutPeriod=30*60):
@@ -572,6 +601,8 @@ class TimeoutFactory(WrappingFactory):
         L{reactor.callLater<twisted.internet.interfaces.IReactorTime.callLater>}
         for test purpose.
         """
+        if self.coarseTimeouts:
+            return _coarseCallLater(period, func)
         from twisted.internet import reactor
         return reactor.callLater(period, func)
 
@@ -682,8 +713,15 @@ class TimeoutMixin:
     default, closes the connection.
 
     @cvar timeOut: The number of seconds after which to timeout the connection.
+
+    @cvar coarseTimeouts: If C{True}, the timeout is scheduled on a
+        L{TimingWheel} shared by all coarse timeouts, which makes setting,
+        resetting and cancelling it cheaper at the cost of it firing up to a
+        tenth of a second late.  This suits idle timeouts on servers with many
+        connections.
     """
     timeOut = None
+    coarseTimeouts = False
 
     __timeoutCall = None
 
@@ -693,6 +731,8 @@ class TimeoutMixin:
         L{reactor.callLater<twisted.internet.interfaces.IReactorTime.callLater>}
         for test purpose.
         """
+        if self.coarseTimeouts:
+            return _coarseCallLater(period, func)
         from twisted.internet import reactor
         return reactor.callLater(period, func)
 
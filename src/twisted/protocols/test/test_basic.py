@@ -11,14 +11,16 @@ import sys
 import struct
 from io import BytesIO
 
+from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
 from twisted.python.compat import _PY3, iterbytes
 from twisted.trial import unittest
 from twisted.protocols import basic
 from twisted.python import reflect
-from twisted.internet import protocol, task
-from twisted.internet.interfaces import IProducer
+from twisted.internet import protocol, task, defer
+from twisted.internet.error import ConnectionLost
+from twisted.internet.interfaces import IProducer, ISendfileTransport
 from twisted.test import proto_helpers
 
 _PY3NEWSTYLESKIP = "All classes are new style on Python 3."
@@ -292,6 +294,53 @@ a'''
         self.assertEqual(protocol.rest, b'')
 
 
+    def test_clearLineBufferIncludesReentrantData(self):
+        """
+        L{LineReceiver.clearLineBuffer} called from beneath C{dataReceived}
+        also returns data passed to C{dataReceived} by a callback.
+        """
+        class ClearingReceiver(basic.LineReceiver):
+            def lineReceived(self, line):
+                self.dataReceived(b'quux')
+                self.rest = self.clearLineBuffer()
+
+        protocol = ClearingReceiver()
+        protocol.dataReceived(b'foo\r\nbar\r\nbaz')
+        self.assertEqual(protocol.rest, b'bar\r\nbazquux')
+
+
+    def test_processedDataReleased(self):
+        """
+        L{LineReceiver} only keeps the data it has not delivered yet once
+        C{dataReceived} returns.
+        """
+        protocol = LineTester()
+        protocol.makeConnection(proto_helpers.StringTransport())
+        protocol.dataReceived(b'foo\nbar\nba')
+        self.assertEqual(protocol.received, [b'foo', b'bar'])
+        self.assertEqual(protocol.clearLineBuffer(), b'ba')
+
+
+    def test_lineInManyChunks(self):
+        """
+        A line delivered one byte at a time is received once its delimiter
+        arrives.
+        """
+        class Receiver(basic.LineReceiver):
+            delimiter = b'\n'
+            def connectionMade(self):
+                self.received = []
+            def lineReceived(self, line):
+                self.received.append(line)
+
+        protocol = Receiver()
+        protocol.makeConnection(proto_helpers.StringTransport())
+        line = b'x' * 1000
+        for c in iterbytes(line + b'\n'):
+            protocol.dataReceived(c)
+        self.assertEqual(protocol.received, [line])
+
+
     def test_stackRecursion(self):
         """
         Test switching modes many times on the same data.
@@ -903,6 +952,26 @@ class IntNTestCaseMixin(LPTestCaseMixin):
         self.assertEqual(r.received, [])
 
 
+    def test_longStringInManyChunks(self):
+        """
+        A string delivered in many chunks is kept as a list of chunks until
+        all of it has arrived, and then passed to C{stringReceived}.
+        """
+        r = self.getProtocol()
+        r.MAX_LENGTH = 1000
+        length = 2 ** (8 * r.prefixLength) - 1
+        length = min(length, r.MAX_LENGTH)
+        message = struct.pack(r.structFormat, length) + b'x' * length
+        for c in iterbytes(message[:-1]):
+            r.dataReceived(c)
+        self.assertEqual(r.received, [])
+        self.assertEqual(r.recvd, message[:-1])
+        self.assertLessEqual(len(r._unprocessed), r.prefixLength)
+        r.dataReceived(message[-1:] + message[:1])
+        self.assertEqual(r.received, [b'x' * length])
+        self.assertEqual(r.recvd, message[:1])
+
+
     def test_stringReceivedNotImplemented(self):
         """
         When L{IntNStringReceiver.stringReceived} is not overridden in a
@@ -1262,6 +1331,24 @@ class ProducerTests(unittest.SynchronousTestCase):
 
 
 
+@implementer(ISendfileTransport)
+class SendfileTransport(proto_helpers.StringTransport):
+    """
+    A L{proto_helpers.StringTransport} which records calls to C{sendFile}.
+    """
+
+    def __init__(self):
+        proto_helpers.StringTransport.__init__(self)
+        self.files = []
+
+
+    def sendFile(self, fileObject, offset=0, count=None):
+        d = defer.Deferred()
+        self.files.append((fileObject, offset, count, d))
+        return d
+
+
+
 class FileSenderTests(unittest.TestCase):
     """
     Tests for L{basic.FileSender}.
@@ -1371,6 +1458,54 @@ class FileSenderTests(unittest.TestCase):
                          str(failure.value))
 
 
+    def test_sendFile(self):
+        """
+        L{basic.FileSender.beginFileTransfer} hands the rest of the file to
+        the C{sendFile} method of a consumer which provides
+        L{ISendfileTransport}, and fires with the last byte sent once it has
+        been sent, leaving the file positioned after it.
+        """
+        source = BytesIO(b"Test content")
+        source.seek(5)
+        consumer = SendfileTransport()
+        sender = basic.FileSender()
+        d = sender.beginFileTransfer(source, consumer)
+        self.assertIsNone(consumer.producer)
+        [(fileObject, offset, count, sent)] = consumer.files
+        self.assertEqual((fileObject, offset, count), (source, 5, None))
+        self.assertNoResult(d)
+
+        sent.callback(7)
+        self.assertEqual(b"t", self.successResultOf(d))
+        self.assertEqual(12, source.tell())
+
+
+    def test_sendFileFailed(self):
+        """
+        The C{Deferred} returned by L{basic.FileSender.beginFileTransfer}
+        fails if C{sendFile} does.
+        """
+        consumer = SendfileTransport()
+        sender = basic.FileSender()
+        d = sender.beginFileTransfer(BytesIO(b"Test content"), consumer)
+        consumer.files[0][3].errback(ConnectionLost())
+        self.failureResultOf(d, ConnectionLost)
+
+
+    def test_sendFileWithTransform(self):
+        """
+        L{basic.FileSender.beginFileTransfer} reads the file and writes it to
+        a consumer which provides L{ISendfileTransport} if there is a
+        C{transform}.
+        """
+        consumer = SendfileTransport()
+        sender = basic.FileSender()
+        sender.beginFileTransfer(
+            BytesIO(b"Test content"), consumer, lambda chunk: chunk)
+        self.assertEqual(consumer.files, [])
+        self.assertIs(consumer.producer, sender)
+
+
 
 class MiceDeprecationTests(unittest.TestCase):
     """
@@ -182,6 +182,33 @@ class _Code(object):
 
 
 
+class _Lazy(object):
+    """
+    An attribute of a L{Failure} which is only computed when it is first
+    used, and from then on is an ordinary instance attribute.
+
+    This is a non-data descriptor, so once the value is stored in the
+    instance's C{__dict__} (or assigned by other code) it is found there
+    without involving the descriptor at all.
+
+    @ivar _name: The name of the attribute.
+    @ivar _compute: A function taking the instance and returning the value.
+    """
+
+    def __init__(self, name, compute):
+        self._name = name
+        self._compute = compute
+
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = self._compute(instance)
+        instance.__dict__[self._name] = value
+        return value
+
+
+
 _inlineCallbacksExtraneous = []
 
 def _extraneous(f):
@@ -214,14 +241,26 @@ class Failure(BaseException):
     C{locals().items()}/C{globals().items()} for that frame, or an empty tuple
     if those details were not captured.
 
+    Unless locals and globals are captured, C{frames}, C{stack} and
+    C{parents} are only built when they are first used, since a L{Failure}
+    which is trapped right away never needs them.  Until then the traceback
+    is kept in C{tb}, and the calling frames as just their code objects and
+    line numbers.
+
     @ivar value: The exception instance responsible for this failure.
     @ivar type: The exception's class.
     @ivar stack: list of frames, innermost last, excluding C{Failure.__init__}.
     @ivar frames: list of frames, innermost first.
+    @ivar parents: The fully qualified names of the exception's class and its
+        base classes, or a list of just C{type} if that is not a subclass of
+        L{Exception}.
+
+    @ivar _stackCalls: The code objects and line numbers of the calling
+        frames, innermost first, from which C{stack} is built.
+    @type _stackCalls: L{list} of L{tuple}
     """
 
     pickled = 0
-    stack = None
 
     # The opcode of "yield" in Python bytecode. We need this in
     # _findFailure in order to identify whether an exception was
@@ -236,7 +275,7 @@ class Failure(BaseException):
 
 
     def __init__(self, exc_value=None, exc_type=None, exc_tb=None,
-                 captureVars=False):
+                 captureVars=False, captureTraceback=True):
         """
         Initialize me with an explanation of the error.
 
@@ -259,6 +298,11 @@ class Failure(BaseException):
         @param captureVars: if set, capture locals and globals of stack
             frames.  This is pretty slow, and makes no difference unless you
             are going to use L{printDetailedTraceback}.
+
+        @param captureTraceback: if not set, make a cheap L{Failure} which
+            records only the exception and its type, without a traceback or
+            any stack frames.  This suits failures which are expected to be
+            trapped, or whose traceback would not be interesting anyway.
         """
         global count
         count = count + 1
@@ -308,6 +352,12 @@ class Failure(BaseException):
             del self.value.__failure__
             return
 
+        if not captureTraceback:
+            self.tb = None
+            self.frames = []
+            self.stack = []
+            return
+
         if tb is None:
             if exc_tb:
                 tb = exc_tb
@@ -315,9 +365,6 @@ class Failure(BaseException):
                 # Python 3
                 tb = self.value.__traceback__
 
-        frames = self.frames = []
-        stack = self.stack = []
-
         # Added 2003-06-23 by Chris Armstrong. Yes, I actually have a
         # use case where I need this traceback object, and I've made
         # sure that it'll be cleaned up.
@@ -345,6 +392,20 @@ class Failure(BaseException):
         #   catching means tracebacks generated here don't tend to show
         #   what called upon the PB object.
 
+        if not captureVars:
+            # The traceback itself never changes, so the frames can be read
+            # from it later, but the calling frames carry on running (or, in
+            # a generator, get detached from their callers): note where they
+            # are now.
+            stackCalls = self._stackCalls = []
+            while f:
+                stackCalls.append((f.f_code, f.f_lineno))
+                f = f.f_back
+            return
+
+        frames = self.frames = []
+        stack = self.stack = []
+
         while f:
             if captureVars:
                 localz = f.f_locals.copy()
@@ -391,11 +452,46 @@ class Failure(BaseException):
                 globalz,
                 ))
             tb = tb.tb_next
+
+
+    def _buildFrames(self):
+        """
+        Build C{frames} from the traceback.
+        """
+        frames = []
+        tb = getattr(self, "tb", None)
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frames.append((code.co_name, code.co_filename, tb.tb_lineno,
+                           (), ()))
+            tb = tb.tb_next
+        return frames
+
+    frames = _Lazy("frames", _buildFrames)
+
+
+    def _buildStack(self):
+        """
+        Build C{stack} from C{_stackCalls}.
+        """
+        stackCalls = self.__dict__.get("_stackCalls")
+        if stackCalls is None:
+            return None
+        return [(code.co_name, code.co_filename, lineno, (), ())
+                for code, lineno in reversed(stackCalls)]
+
+    stack = _Lazy("stack", _buildStack)
+
+
+    def _buildParents(self):
+        """
+        Build C{parents} from C{type}.
+        """
         if inspect.isclass(self.type) and issubclass(self.type, Exception):
-            parentCs = getmro(self.type)
-            self.parents = list(map(reflect.qual, parentCs))
-        else:
-            self.parents = [self.type]
+            return list(map(reflect.qual, getmro(self.type)))
+        return [self.type]
+
+    parents = _Lazy("parents", _buildParents)
 
 
     def _extrapolate(self, otherFailure):
@@ -471,9 +567,14 @@ class Failure(BaseException):
                           fully-qualified class names.
         @returns: the matching L{Exception} type, or None if no match.
         """
+        isException = (inspect.isclass(self.type) and
+                       issubclass(self.type, Exception))
         for error in errorTypes:
             err = error
             if inspect.isclass(error) and issubclass(error, Exception):
+                if isException and issubclass(self.type, error):
+                    # Then its name is certainly in self.parents.
+                    return error
                 err = reflect.qual(error)
             if err in self.parents:
                 return error
@@ -599,6 +700,10 @@ class Failure(BaseException):
         # Added 2003-06-23. See comment above in __init__
         c['tb'] = None
 
+        # Code objects can't be pickled; the stack is built from them below.
+        c.pop('_stackCalls', None)
+        c['parents'] = self.parents
+
         if self.stack is not None:
             # XXX: This is a band-aid.  I can't figure out where these
             # (failure.stack is None) instances are coming from.
@@ -763,6 +868,9 @@ def _safeReprVars(varsDictItems):
         C{locals().items()}.
     @returns: a sequence of (name, repr) pairs.
     """
+    if not varsDictItems:
+        # The usual case: locals and globals were not captured.
+        return []
     return [(name, reflect.safe_repr(obj)) for (name, obj) in varsDictItems]
 
 
@@ -771,7 +879,7 @@ def _safeReprVars(varsDictItems):
 DO_POST_MORTEM = True
 
 def _debuginit(self, exc_value=None, exc_type=None, exc_tb=None,
-               captureVars=False,
+               captureVars=False, captureTraceback=True,
                Failure__init__=Failure.__init__):
     """
     Initialize failure object, possibly spawning pdb.
@@ -787,7 +895,8 @@ def _debuginit(self, exc_value=None, exc_type=None, exc_tb=None,
                   (strrepr,))
             import pdb
             pdb.post_mortem(exc[2])
-    Failure__init__(self, exc_value, exc_type, exc_tb, captureVars)
+    Failure__init__(self, exc_value, exc_type, exc_tb, captureVars,
+                    captureTraceback)
 
 
 
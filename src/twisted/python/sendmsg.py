@@ -11,7 +11,8 @@ from __future__ import absolute_import, division
 from collections import namedtuple
 from twisted.python.compat import _PY3
 
-__all__ = ["sendmsg", "recvmsg", "getSocketFamily", "SCM_RIGHTS"]
+__all__ = ["sendmsg", "recvmsg", "recvmsgInto", "getSocketFamily",
+           "SCM_RIGHTS"]
 
 if not _PY3:
     from twisted.python._sendmsg import send1msg, recv1msg
@@ -91,6 +92,43 @@ def recvmsg(socket, maxSize=8192, cmsgSize=4096, flags=0):
 
 
 
+def recvmsgInto(socket, buffer, cmsgSize=4096, flags=0):
+    """
+    Receive a message on a socket into a buffer.
+
+    @param socket: The socket to receive the message on.
+    @type socket: L{socket.socket}
+
+    @param buffer: A writeable object supporting the buffer protocol, such as
+        a L{bytearray}, to receive up to its length in bytes into using the
+        datagram or stream mechanism.
+
+    @param cmsgSize: The maximum number of bytes to receive from the socket
+        outside of the normal datagram or stream mechanism. The default maximum
+        is 4096.
+    @type cmsgSize: L{int}
+
+    @param flags: Flags to affect how the message is sent.  See the C{MSG_}
+        constants in the sendmsg(2) manual page. By default no flags are set.
+    @type flags: L{int}
+
+    @return: A named 3-tuple of the number of bytes received into C{buffer},
+        a L{list} of L{tuple}s giving ancillary received data, and flags as an
+        L{int} describing the data received.
+    """
+    if _PY3:
+        nbytes, ancillary, flags = socket.recvmsg_into(
+            [buffer], CMSG_SPACE(cmsgSize), flags)[0:3]
+    else:
+        data, flags, ancillary = recv1msg(
+            socket.fileno(), flags, len(buffer), cmsgSize)
+        nbytes = len(data)
+        memoryview(buffer)[:nbytes] = data
+
+    return RecievedMessage(data=nbytes, ancillary=ancillary, flags=flags)
+
+
+
 def getSocketFamily(socket):
     """
     Return the family of the given socket.
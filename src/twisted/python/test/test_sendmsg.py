@@ -39,7 +39,7 @@ else:
 
 
 try:
-    from twisted.python.sendmsg import sendmsg, recvmsg
+    from twisted.python.sendmsg import sendmsg, recvmsg, recvmsgInto
     from twisted.python.sendmsg import SCM_RIGHTS, getSocketFamily
 except ImportError:
     importSkip = "Platform doesn't support sendmsg."
@@ -673,6 +673,18 @@ class SendmsgTests(TestCase):
         self.assertEqual(result.ancillary, [])
 
 
+    def test_roundtripInto(self):
+        """
+        L{recvmsgInto} will receive a message sent via L{sendmsg} into a
+        buffer, returning the number of bytes received.
+        """
+        sendmsg(self.input, b"hello, world!")
+        buffer = bytearray(64)
+        result = recvmsgInto(self.output, buffer)
+        self.assertEqual(result, (13, [], 0))
+        self.assertEqual(buffer[:result.data], b"hello, world!")
+
+
     def test_shortsend(self):
         """
         L{sendmsg} returns the number of bytes which it was able to send.
@@ -459,6 +459,8 @@ class CopyableFailure(failure.Failure, Copyable):
         state['tb'] = None
         state['frames'] = []
         state['stack'] = []
+        state.pop('_stackCalls', None)
+        state['parents'] = self.parents
         state['value'] = str(self.value) # Exception instance
         if isinstance(self.type, bytes):
             state['type'] = self.type
@@ -884,6 +884,60 @@ class DeferredTests(unittest.SynchronousTestCase, ImmediateFailureMixin):
         self.assertEqual(exception.args, (exceptionMessage,))
 
 
+    def test_callbacksRemovedOnceRun(self):
+        """
+        Callbacks are removed from L{Deferred.callbacks} once they have run,
+        and the ones which have not run yet because the L{Deferred} is
+        waiting on another L{Deferred} are kept, in order.
+        """
+        deferred = defer.Deferred()
+        inner = defer.Deferred()
+        called = []
+        def wait(result):
+            called.append("wait")
+            return inner
+        def after(result):
+            called.append(result)
+        deferred.addCallback(called.append)
+        deferred.addCallback(wait)
+        deferred.addCallback(after)
+        deferred.addCallback(after)
+        deferred.callback("first")
+
+        self.assertEqual(called, ["first", "wait"])
+        self.assertEqual(
+            [callbacks[0][0] for callbacks in deferred.callbacks],
+            [after, after])
+
+        inner.callback("second")
+        self.assertEqual(called, ["first", "wait", "second", None])
+        self.assertEqual(deferred.callbacks, [])
+
+
+    def test_callbackArguments(self):
+        """
+        Callbacks and errbacks are called with the result and the positional
+        and keyword arguments they were added with, if any.
+        """
+        deferred = defer.Deferred()
+        called = []
+        def callback(result, *args, **kw):
+            called.append((result, args, kw))
+            return result
+        deferred.addCallback(callback)
+        deferred.addCallback(callback, 1, 2)
+        deferred.addCallback(callback, 3, key="value")
+        deferred.addCallbacks(
+            callback, callbackArgs=None, callbackKeywords={"key": 4})
+        deferred.callback("result")
+        self.assertEqual(called, [
+            ("result", (), {}),
+            ("result", (1, 2), {}),
+            ("result", (3,), {"key": "value"}),
+            ("result", (), {"key": 4}),
+        ])
+
+
     def test_synchronousImplicitChain(self):
         """
         If a first L{Deferred} with a result is returned from a callback on a
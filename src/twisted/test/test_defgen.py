@@ -322,6 +322,58 @@ class InlineCallbacksTests(BaseDefgenTests, unittest.TestCase):
             str(self.assertRaises(TypeError, _noYield)))
 
 
+    def test_yieldFiredDeferred(self):
+        """
+        The result of a L{Deferred} which already has its final result when
+        it is yielded is sent into the generator, and the L{Deferred} is left
+        with a result of L{None}, as if a callback had consumed it.
+        """
+        fired = defer.succeed("result")
+        results = []
+        def _gen():
+            results.append((yield fired))
+        inlineCallbacks(_gen)()
+        self.assertEqual(results, ["result"])
+        self.assertIsNone(fired.result)
+        self.assertEqual(fired.callbacks, [])
+
+
+    def test_yieldFailedDeferred(self):
+        """
+        The exception of a L{Deferred} which has already failed when it is
+        yielded is raised in the generator, and the L{Deferred} no longer
+        reports it as unhandled.
+        """
+        failed = defer.fail(TerminalException("already failed"))
+        def _gen():
+            try:
+                yield failed
+            except TerminalException as e:
+                returnValue(str(e))
+        d = inlineCallbacks(_gen)()
+        self.assertEqual(self.successResultOf(d), "already failed")
+        self.assertIsNone(failed.result)
+        self.assertIsNone(failed._debugInfo.failResult)
+
+
+    def test_yieldDeferredWithCallbacks(self):
+        """
+        A L{Deferred} with a result but callbacks still to run, because it
+        is paused, is waited on until its callbacks have run, and the
+        generator gets the result they leave.
+        """
+        paused = defer.succeed(1)
+        paused.pause()
+        paused.addCallback(lambda result: result + 1)
+        results = []
+        def _gen():
+            results.append((yield paused))
+        inlineCallbacks(_gen)()
+        self.assertEqual(results, [])
+        paused.unpause()
+        self.assertEqual(results, [2])
+
+
 
 class DeprecateDeferredGeneratorTests(unittest.SynchronousTestCase):
     """
@@ -566,6 +566,94 @@ class FailureTests(SynchronousTestCase):
 
 
 
+class LazyFailureTests(SynchronousTestCase):
+    """
+    Tests for the deferred construction of the frames, stack and parents of
+    a L{failure.Failure}, and for cheap L{failure.Failure}s.
+    """
+
+    def test_framesBuiltWhenUsed(self):
+        """
+        The frames of a L{failure.Failure} are only built when they are first
+        used, and then describe the traceback.
+        """
+        f = getDivisionFailure()
+        self.assertNotIn("frames", vars(f))
+        self.assertNotIn("stack", vars(f))
+        self.assertNotIn("parents", vars(f))
+
+        self.assertEqual(
+            [(name, lineno) for (name, _, lineno, _, _) in f.frames],
+            [("getDivisionFailure", f.tb.tb_lineno)])
+        self.assertIn("frames", vars(f))
+
+
+    def test_stackLineNumbersFromCreation(self):
+        """
+        The line numbers of the calling frames in the stack of a
+        L{failure.Failure} are those of when it was created, even if it is
+        only built later.
+        """
+        line = sys._getframe().f_lineno + 1
+        f = getDivisionFailure()
+        self.assertEqual(f.stack[-1][0], "test_stackLineNumbersFromCreation")
+        self.assertEqual(f.stack[-1][2], line)
+
+
+    def test_trapWithoutParents(self):
+        """
+        Trapping a L{failure.Failure} by one of the classes of its exception
+        does not need to build its C{parents}, while trapping it by the name
+        of one still works.
+        """
+        f = getDivisionFailure()
+        self.assertEqual(f.trap(ArithmeticError), ArithmeticError)
+        self.assertNotIn("parents", vars(f))
+        self.assertEqual(
+            f.trap("exceptions.ArithmeticError", "builtins.ArithmeticError"),
+            "builtins.ArithmeticError" if _PY3
+            else "exceptions.ArithmeticError")
+
+
+    def test_cleanFailureBuildsEverything(self):
+        """
+        L{failure.Failure.cleanFailure} builds the frames, stack and parents
+        of the L{failure.Failure} before it lets go of the traceback, and
+        leaves nothing behind which cannot be pickled.
+        """
+        f = getDivisionFailure()
+        frames = f.frames
+        stackLength = len(f.stack)
+        f.cleanFailure()
+        self.assertIsNone(f.tb)
+        self.assertNotIn("_stackCalls", vars(f))
+        self.assertEqual(
+            [frame[:3] for frame in f.frames],
+            [list(frame[:3]) for frame in frames])
+        self.assertEqual(len(f.stack), stackLength)
+        self.assertIn(reflect.qual(ZeroDivisionError), vars(f)["parents"])
+
+
+    def test_cheapFailure(self):
+        """
+        A L{failure.Failure} made with C{captureTraceback=False} keeps only
+        the exception, and can be trapped, checked and printed.
+        """
+        f = getDivisionFailure(captureTraceback=False)
+        self.assertIs(f.type, ZeroDivisionError)
+        self.assertIsNone(f.tb)
+        self.assertEqual(f.frames, [])
+        self.assertEqual(f.stack, [])
+        self.assertIsNone(f.getTracebackObject())
+        self.assertEqual(f.trap(ZeroDivisionError), ZeroDivisionError)
+        self.assertIsNone(f.check(KeyError))
+        self.assertEqual(
+            f.getTraceback(),
+            "Traceback (most recent call last):\nFailure: %s: %s\n" % (
+                reflect.qual(ZeroDivisionError), f.getErrorMessage()))
+
+
+
 class BrokenStr(Exception):
     """
     An exception class the instances of which cannot be presented as strings via
@@ -15,6 +15,7 @@ from twisted.test.proto_helpers import StringTransport
 from twisted.test.proto_helpers import StringTransportWithDisconnection
 
 from twisted.internet import protocol, reactor, address, defer, task
+from twisted.internet.interfaces import ISendfileTransport
 from twisted.protocols import policies
 
 
@@ -171,6 +172,30 @@ class WrapperTests(unittest.TestCase):
         self.assertTrue(IStubTransport.providedBy(proto.transport))
 
 
+    def test_notSendfileTransport(self):
+        """
+        The transport wrapper does not provide L{ISendfileTransport}, even if
+        the original transport does, since a file sent with C{sendFile} would
+        bypass the wrapper.
+        """
+        class IStubTransport(Interface):
+            pass
+
+        @implementer(IStubTransport, ISendfileTransport)
+        class StubTransport:
+            pass
+
+        implementedBy(policies.ProtocolWrapper)
+
+        proto = protocol.Protocol()
+        wrapper = policies.ProtocolWrapper(
+            policies.WrappingFactory(None), proto)
+
+        wrapper.makeConnection(StubTransport())
+        self.assertTrue(IStubTransport.providedBy(proto.transport))
+        self.assertFalse(ISendfileTransport.providedBy(proto.transport))
+
+
     def test_factoryLogPrefix(self):
         """
         L{WrappingFactory.logPrefix} is customized to mention both the original
@@ -872,6 +897,49 @@ class TimeoutMixinTests(unittest.TestCase):
 
 
 
+class CoarseTimeoutTests(unittest.TestCase):
+    """
+    Tests for the C{coarseTimeouts} option of L{policies.TimeoutMixin} and
+    L{policies.TimeoutFactory}.
+    """
+    def setUp(self):
+        self.clock = task.Clock()
+        self.patch(policies, "_timingWheel",
+                   task.TimingWheel(clock=self.clock))
+
+
+    def test_timeoutMixin(self):
+        """
+        A L{policies.TimeoutMixin} with C{coarseTimeouts} set schedules its
+        timeout on the shared L{task.TimingWheel}.
+        """
+        timedOut = []
+        proto = policies.TimeoutMixin()
+        proto.coarseTimeouts = True
+        proto.timeoutConnection = lambda: timedOut.append(True)
+        proto.setTimeout(1)
+        self.assertEqual(len(policies._timingWheel.getDelayedCalls()), 1)
+        self.clock.advance(0.9)
+        proto.resetTimeout()
+        self.clock.pump([0.1] * 9)
+        self.assertEqual(timedOut, [])
+        self.clock.advance(0.2)
+        self.assertEqual(timedOut, [True])
+
+
+    def test_timeoutFactory(self):
+        """
+        A L{policies.TimeoutFactory} with C{coarseTimeouts} set schedules its
+        timeouts on the shared L{task.TimingWheel}.
+        """
+        factory = policies.TimeoutFactory(Server(), 1)
+        factory.coarseTimeouts = True
+        proto = factory.buildProtocol(None)
+        self.assertEqual(policies._timingWheel.getDelayedCalls(),
+                         [proto.timeoutCall])
+
+
+
 class LimitTotalConnectionsFactoryTests(unittest.TestCase):
     """Tests for policies.LimitTotalConnectionsFactory"""
     def testConnectionCounting(self):
@@ -7,6 +7,8 @@ Tests for L{twisted.internet.task}.
 
 from __future__ import division, absolute_import
 
+from zope.interface.verify import verifyObject
+
 from twisted.trial import unittest
 
 from twisted.internet import interfaces, task, reactor, defer, error
@@ -251,6 +253,147 @@ class ClockTests(unittest.TestCase):
 
 
 
+class TimingWheelTests(unittest.TestCase):
+    """
+    Tests for L{task.TimingWheel}.
+    """
+    def setUp(self):
+        self.clock = task.Clock()
+        self.wheel = task.TimingWheel(tick=1, size=8, clock=self.clock)
+        self.calls = []
+
+
+    def _record(self, name):
+        """
+        Record that C{name} was called, and when.
+        """
+        self.calls.append((name, self.clock.seconds()))
+
+
+    def test_interface(self):
+        """
+        L{task.TimingWheel} provides L{interfaces.IReactorTime}.
+        """
+        self.assertTrue(verifyObject(interfaces.IReactorTime, self.wheel))
+
+
+    def test_seconds(self):
+        """
+        L{task.TimingWheel.seconds} returns the time of its clock.
+        """
+        self.clock.advance(12.5)
+        self.assertEqual(self.wheel.seconds(), 12.5)
+
+
+    def test_callLater(self):
+        """
+        A call scheduled with L{task.TimingWheel.callLater} runs with the given
+        arguments at the end of the tick during which it is due.
+        """
+        call = self.wheel.callLater(
+            1.5, lambda *a, **kw: self.calls.append((a, kw)), 1, b=2)
+        self.assertTrue(interfaces.IDelayedCall.providedBy(call))
+        self.assertEqual(self.wheel.getDelayedCalls(), [call])
+        self.clock.advance(1.5)
+        self.assertEqual(self.calls, [])
+        self.clock.advance(0.5)
+        self.assertEqual(self.calls, [((1,), {"b": 2})])
+        self.assertFalse(call.active())
+        self.assertEqual(self.wheel.getDelayedCalls(), [])
+
+
+    def test_neverEarly(self):
+        """
+        Calls never run before the time they are scheduled for, including
+        calls due more than one turn of the wheel away.
+        """
+        for delay in (0, 1, 3, 8, 9, 20):
+            self.wheel.callLater(delay, self._record, delay)
+        self.clock.pump([0.25] * 100)
+        self.assertEqual(sorted(name for (name, when) in self.calls),
+                         [0, 1, 3, 8, 9, 20])
+        for name, when in self.calls:
+            self.assertTrue(name <= when <= name + 1)
+
+
+    def test_cancel(self):
+        """
+        A cancelled call does not run, and the wheel stops scheduling ticks on
+        its clock once it has no calls left.
+        """
+        call = self.wheel.callLater(2, self._record, "a")
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+        call.cancel()
+        self.assertEqual(self.wheel.getDelayedCalls(), [])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.clock.advance(3)
+        self.assertEqual(self.calls, [])
+
+
+    def test_resetLater(self):
+        """
+        A call reset to a later time runs at the new time.
+        """
+        call = self.wheel.callLater(2, self._record, "a")
+        self.clock.advance(1)
+        call.reset(3)
+        self.clock.pump([1] * 2)
+        self.assertEqual(self.calls, [])
+        self.clock.advance(1)
+        self.assertEqual(self.calls, [("a", 4)])
+
+
+    def test_resetSooner(self):
+        """
+        A call reset to an earlier time runs at the new time.
+        """
+        call = self.wheel.callLater(5, self._record, "a")
+        call.reset(1)
+        self.clock.advance(1)
+        self.assertEqual(self.calls, [("a", 1)])
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+
+
+    def test_lateTicks(self):
+        """
+        If the clock jumps forward by more than a turn of the wheel, every
+        call which became due runs.
+        """
+        for delay in (1, 4, 7, 10, 30):
+            self.wheel.callLater(delay, self._record, delay)
+        self.clock.advance(12)
+        self.assertEqual(sorted(name for (name, when) in self.calls),
+                         [1, 4, 7, 10])
+        self.clock.advance(20)
+        self.assertEqual(len(self.calls), 5)
+
+
+    def test_callScheduledFromCall(self):
+        """
+        A call scheduled by another call run by the wheel is run in a later
+        tick.
+        """
+        self.wheel.callLater(
+            1, lambda: self.wheel.callLater(0, self._record, "b"))
+        self.clock.advance(1)
+        self.assertEqual(self.calls, [])
+        self.clock.advance(1)
+        self.assertEqual(self.calls, [("b", 2)])
+
+
+    def test_failingCall(self):
+        """
+        An exception raised by a call is logged, and does not prevent other
+        calls from running.
+        """
+        self.wheel.callLater(1, lambda: 1 // 0)
+        self.wheel.callLater(1, self._record, "a")
+        self.clock.advance(1)
+        self.assertEqual(self.calls, [("a", 1)])
+        self.assertEqual(len(self.flushLoggedErrors(ZeroDivisionError)), 1)
+
+
+
 class LoopTests(unittest.TestCase):
     """
     Tests for L{task.LoopingCall} based on a fake L{IReactorTime}
@@ -288,6 +288,61 @@ class SelectReactorTests(TestCase):
         self.assertEqual(port.numberAccepts, 1)
 
 
+    def test_acceptLimit(self):
+        """
+        L{tcp.Port.doRead} does not grow the number of consecutive C{accept}
+        calls it performs beyond C{maxAcceptsPerRead}, and counts the
+        connections it accepted and the batches which were full.
+        """
+        factory = ServerFactory()
+        factory.protocol = Protocol
+        port = self.port(0, factory, interface='127.0.0.1')
+        port.maxAcceptsPerRead = 2
+
+        clients = []
+
+        def closeAll():
+            for client in clients:
+                client.close()
+
+        self.addCleanup(closeAll)
+
+        for i in range(3):
+            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            client.connect(("127.0.0.1", port.getHost().port))
+            clients.append(client)
+
+        port.doRead()
+        # The initial number of accepts is larger than the limit.
+        self.assertEqual(port.numberAccepts, 2)
+        self.assertEqual(port.acceptCount, 2)
+        self.assertEqual(port.fullAcceptBatchCount, 1)
+
+        port.doRead()
+        self.assertEqual(port.numberAccepts, 1)
+        self.assertEqual(port.acceptCount, 3)
+        self.assertEqual(port.acceptBatchCount, 2)
+        self.assertEqual(port.fullAcceptBatchCount, 1)
+
+
+    def test_emfileCount(self):
+        """
+        L{tcp.Port.doRead} counts the C{accept} calls which failed with
+        C{EMFILE}.
+        """
+        class FakeSocket(object):
+            def accept(self):
+                raise socket.error(EMFILE, os.strerror(EMFILE))
+
+        port = self.port(0, ServerFactory(), interface='127.0.0.1')
+        self.patch(port, "socket", FakeSocket())
+
+        port.doRead()
+
+        self.assertEqual(port.emfileCount, 1)
+        self.assertEqual(port.acceptCount, 0)
+
+
     def test_permissionFailure(self):
         """
         C{accept(2)} returning C{EPERM} is treated as a transient
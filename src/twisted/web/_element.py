@@ -182,4 +182,9 @@ class Element(object):
         loader = self.loader
         if loader is None:
             raise MissingTemplateLoader(self)
+        if getattr(loader, "preFlatten", False):
+            # The loaders in twisted.web.template can flatten the parts of
+            # their templates which are the same for every request ahead of
+            # time, when asked to.
+            return loader._loadPreFlattened()
         return loader.load()
@@ -156,6 +156,24 @@ def escapedComment(data):
 
 
 
+class _PreFlattened(object):
+    """
+    Part of a document which has already been flattened.
+
+    @ivar data: The flattened form of the part of the document, as it is
+        written in the content of a tag.
+    @type data: L{bytes}
+    """
+
+    def __init__(self, data):
+        self.data = data
+
+
+    def __repr__(self):
+        return '_PreFlattened(%r)' % (self.data,)
+
+
+
 def _getSlotValue(name, slotData, default=None):
     """
     Find the value of the named slot in the given stack of slot data.
@@ -216,6 +234,8 @@ def _flattenElement(request, root, write, slotData, renderFactory,
                                renderFactory, dataEscaper)
     if isinstance(root, (bytes, unicode)):
         write(dataEscaper(root))
+    elif isinstance(root, _PreFlattened):
+        write(root.data)
     elif isinstance(root, slot):
         slotValue = _getSlotValue(root.name, slotData, root.default)
         yield keepGoing(slotValue)
@@ -293,7 +313,56 @@ def _flattenElement(request, root, write, slotData, renderFactory,
 
 
 
-def _flattenTree(request, root, write):
+class _BufferedWriter(object):
+    """
+    Coalesce many small writes into fewer, larger ones.
+
+    @ivar _write: The callable to which coalesced data is written.
+
+    @ivar _bufferSize: The number of bytes to collect before writing them.
+    @type _bufferSize: L{int}
+
+    @ivar _buffer: The data collected since the last write.
+    @type _buffer: L{list} of L{bytes}
+
+    @ivar _bufferedLength: The total length of C{_buffer}.
+    @type _bufferedLength: L{int}
+    """
+
+    def __init__(self, write, bufferSize):
+        self._write = write
+        self._bufferSize = bufferSize
+        self._buffer = []
+        self._bufferedLength = 0
+
+
+    def write(self, data):
+        """
+        Collect some data, writing everything collected so far once there is
+        at least C{_bufferSize} bytes of it.
+
+        @param data: The data to write.
+        @type data: L{bytes}
+        """
+        self._buffer.append(data)
+        self._bufferedLength += len(data)
+        if self._bufferedLength >= self._bufferSize:
+            self.flush()
+
+
+    def flush(self):
+        """
+        Write everything collected so far.
+        """
+        if self._buffer:
+            data = b"".join(self._buffer)
+            self._buffer = []
+            self._bufferedLength = 0
+            self._write(data)
+
+
+
+def _flattenTree(request, root, write, bufferSize=None):
     """
     Make C{root} into an iterable of L{bytes} and L{Deferred} by doing a depth
     first traversal of the tree.
@@ -309,11 +378,20 @@ def _flattenTree(request, root, write):
     @param write: A callable which will be invoked with each L{bytes} produced
         by flattening C{root}.
 
+    @param bufferSize: If not L{None}, the number of bytes to coalesce before
+        calling C{write}.  Whatever has been coalesced is also written before
+        waiting on a L{Deferred}, when flattening fails, and when it is done.
+    @type bufferSize: L{int} or L{None}
+
     @return: An iterator which yields objects of type L{bytes} and L{Deferred}.
         A L{Deferred} is only yielded when one is encountered in the process of
         flattening C{root}.  The returned iterator must not be iterated again
         until the L{Deferred} is called back.
     """
+    buffered = None
+    if bufferSize is not None:
+        buffered = _BufferedWriter(write, bufferSize)
+        write = buffered.write
     stack = [_flattenElement(request, root, write, [], None, escapeForContent)]
     while stack:
         try:
@@ -327,6 +405,8 @@ def _flattenTree(request, root, write):
             for generator in stack:
                 roots.append(generator.gi_frame.f_locals['root'])
             roots.append(frame.f_locals['root'])
+            if buffered is not None:
+                buffered.flush()
             raise FlattenerError(e, roots, extract_tb(exc_info()[2]))
         else:
             if isinstance(element, Deferred):
@@ -334,9 +414,146 @@ def _flattenTree(request, root, write):
                     original, toFlatten = originalAndToFlatten
                     stack.append(toFlatten)
                     return original
+                if buffered is not None and (
+                        not element.called or element.paused):
+                    buffered.flush()
                 yield element.addCallback(cbx)
             else:
                 stack.append(element)
+    if buffered is not None:
+        buffered.flush()
+
+
+
+def _isStatic(root, inContent):
+    """
+    Determine whether part of a document flattens the same way every time
+    it is flattened, without needing a request, renderers, or slots.
+
+    @param root: The part of the document.
+
+    @param inContent: Whether C{root} is part of the content of a tag, where
+        strings are always escaped the same way, rather than at the top level
+        of a document.
+    @type inContent: L{bool}
+
+    @rtype: L{bool}
+    """
+    if isinstance(root, (bytes, unicode)):
+        return inContent
+    elif isinstance(root, (CharRef, Comment, CDATA, _PreFlattened)):
+        return True
+    elif isinstance(root, Tag):
+        if root.render is not None or root.slotData:
+            return False
+        for value in root.attributes.values():
+            if not isinstance(value, (bytes, unicode)):
+                return False
+        if root.tagName:
+            inContent = True
+        for child in root.children:
+            if not _isStatic(child, inContent):
+                return False
+        return True
+    elif isinstance(root, (list, tuple)):
+        for element in root:
+            if not _isStatic(element, inContent):
+                return False
+        return True
+    return False
+
+
+
+def _preFlattenChildren(children, inContent):
+    """
+    Replace each run of static parts of a list of parts of a document with
+    their flattened form.
+
+    @param children: The parts of the document.
+    @type children: L{list} or L{tuple}
+
+    @param inContent: See L{_isStatic}.
+
+    @return: A new L{list} which flattens as C{children} does.
+    """
+    result = []
+    static = []
+    for child in children:
+        if _isStatic(child, inContent):
+            static.append(child)
+            continue
+        if static:
+            result.append(_preFlattenStatic(static))
+            static = []
+        result.append(_preFlattenDynamic(child, inContent))
+    if static:
+        result.append(_preFlattenStatic(static))
+    return result
+
+
+
+def _preFlattenStatic(root):
+    """
+    Flatten a static part of a document.
+
+    @param root: A part of a document for which L{_isStatic} is true.
+
+    @rtype: L{_PreFlattened}
+    """
+    data = []
+    # Static parts of a document have no Deferreds to wait for, so this
+    # flattens all of root.
+    for _ in _flattenTree(None, root, data.append):
+        pass
+    return _PreFlattened(b"".join(data))
+
+
+
+def _preFlattenDynamic(root, inContent):
+    """
+    Flatten the static parts within a part of a document which is not static
+    itself.
+
+    @param root: A part of a document for which L{_isStatic} is false.
+
+    @param inContent: See L{_isStatic}.
+
+    @return: An object which flattens as C{root} does.  Tags which have
+        renderers or slot data are returned unchanged, since renderers may
+        inspect their tag and its children.
+    """
+    if isinstance(root, Tag):
+        if root.render is not None or root.slotData:
+            return root
+        return Tag(
+            root.tagName,
+            attributes=root.attributes,
+            children=_preFlattenChildren(
+                root.children, inContent or bool(root.tagName)),
+            filename=root.filename,
+            lineNumber=root.lineNumber,
+            columnNumber=root.columnNumber)
+    elif isinstance(root, (list, tuple)):
+        return _preFlattenChildren(root, inContent)
+    return root
+
+
+
+def _preFlatten(document):
+    """
+    Flatten the parts of a template which are the same every time it is
+    rendered, so that only its renderers and slots are evaluated when it is.
+
+    The parts of a template within a tag which has a renderer are left
+    alone, since the renderer is given that tag.
+
+    @param document: A template, as returned by L{ITemplateLoader.load}.
+    @type document: L{list}
+
+    @return: A new L{list} which flattens as C{document} does.
+    """
+    return _preFlattenChildren(document, False)
+
 
 
 def _writeFlattenedData(state, write, result):
@@ -373,7 +590,7 @@ def _writeFlattenedData(state, write, result):
 
 
 
-def flatten(request, root, write):
+def flatten(request, root, write, bufferSize=None):
     """
     Incrementally write out a string representation of C{root} using C{write}.
 
@@ -392,12 +609,19 @@ def flatten(request, root, write):
     @param write: A callable which will be invoked with each L{bytes} produced
         by flattening C{root}.
 
+    @param bufferSize: If not L{None}, C{write} is called with chunks of at
+        least this many bytes, rather than with each small piece of
+        C{root}.  Whatever has been flattened is still written before
+        waiting on a L{Deferred} found in C{root}, so output is not held
+        back while data is unavailable.
+    @type bufferSize: L{int} or L{None}
+
     @return: A L{Deferred} which will be called back when C{root} has been
         completely flattened into C{write} or which will be errbacked if an
         unexpected exception occurs.
     """
     result = Deferred()
-    state = _flattenTree(request, root, write)
+    state = _flattenTree(request, root, write, bufferSize)
     _writeFlattenedData(state, write, result)
     return result
 
@@ -0,0 +1,907 @@
+# -*- test-case-name: twisted.web.test.test_http2client -*-
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+HTTP/2 client implementation.
+
+This is the client-side counterpart of L{twisted.web._http2}: an L{IProtocol}
+which sends L{twisted.web._newclient.Request}s as streams multiplexed over one
+connection, and delivers each response as a
+L{twisted.web._newclient.Response}, so that it can be used by
+L{twisted.web.client.HTTPConnectionPool} in place of
+L{twisted.web._newclient.HTTP11ClientProtocol} when a server negotiates
+HTTP/2.
+
+This API is currently considered private because it's in early draft form.
+"""
+
+from __future__ import absolute_import, division
+
+from collections import deque
+
+from zope.interface import implementer
+
+import h2.config
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.error import ConnectionLost
+from twisted.internet.interfaces import IConsumer, IProtocol, IPushProducer
+from twisted.internet.protocol import Protocol
+from twisted.logger import Logger
+from twisted.python.compat import intToBytes
+from twisted.python.failure import Failure
+from twisted.web.http import RESPONSES
+from twisted.web.http_headers import Headers
+from twisted.web.iweb import UNKNOWN_LENGTH
+from twisted.web._newclient import (
+    BadHeaders, ConnectionAborted, ExcessWrite, RequestGenerationFailed,
+    RequestNotSent, RequestTransmissionFailed, Response, ResponseFailed,
+    ResponseNeverReceived, WrongBodyLength)
+
+
+# This API is currently considered private.
+__all__ = []
+
+
+# Headers which only have meaning for an HTTP/1.1 connection, and which
+# HTTP/2 forbids.  The Host header becomes the :authority pseudo-header.
+_CONNECTION_HEADERS = frozenset([
+    b'connection', b'host', b'keep-alive', b'proxy-connection',
+    b'transfer-encoding', b'upgrade'])
+
+
+
+@implementer(IProtocol, IPushProducer)
+class H2ClientProtocol(Protocol):
+    """
+    A client for a single HTTP/2 connection, which sends each request it is
+    given as a new stream.
+
+    Requests beyond the number of streams which may be open at once are
+    queued until earlier ones are done.
+
+    This works hand in hand with L{_H2ClientStream}, one of which is made for
+    each request to send its body and receive its response.
+
+    @ivar _conn: The HTTP/2 connection state machine.
+    @type _conn: L{h2.connection.H2Connection}
+
+    @ivar _streams: The streams which are open, by stream ID.
+    @type _streams: L{dict} mapping L{int} to L{_H2ClientStream}
+
+    @ivar _queued: Requests waiting for a stream, with the L{Deferred}s
+        returned for them by L{H2ClientProtocol.request}.
+    @type _queued: L{collections.deque} of two-tuples
+
+    @ivar _maxConcurrentStreams: The most streams this will open at once,
+        if the server allows as many.
+    @type _maxConcurrentStreams: L{int}
+
+    @ivar _quiescentCallback: Called with this protocol when it is connected
+        and has no requests to send or responses to receive.
+
+    @ivar _state: C{'CONNECTED'} while new requests may be sent,
+        C{'CLOSING'} once the server has sent I{GOAWAY} or the connection has
+        failed, and
+        C{'CONNECTION_LOST'} once the connection has been lost.
+    @type _state: L{str}
+
+    @ivar _transportPaused: Whether the transport has asked for no more data
+        for now, in which case request bodies are paused.
+    @type _transportPaused: L{bool}
+
+    @ivar _lostDeferreds: L{Deferred}s returned by L{H2ClientProtocol.abort}
+        and L{H2ClientProtocol._whenLost}, which fire when the connection is
+        lost.
+    @type _lostDeferreds: L{list} of L{Deferred}
+    """
+    _state = 'CONNECTED'
+    _transportPaused = False
+    _log = Logger()
+
+    def __init__(self, quiescentCallback=lambda c: None,
+                 maxConcurrentStreams=100):
+        config = h2.config.H2Configuration(
+            client_side=True, header_encoding=None
+        )
+        self._conn = h2.connection.H2Connection(config=config)
+        self._streams = {}
+        self._queued = deque()
+        self._maxConcurrentStreams = maxConcurrentStreams
+        self._quiescentCallback = quiescentCallback
+        self._lostDeferreds = []
+
+
+    @property
+    def state(self):
+        return self._state
+
+
+    def connectionMade(self):
+        """
+        Send the HTTP/2 connection preamble, and register as the transport's
+        producer so that request bodies can be paused when it is full.
+        """
+        self._conn.initiate_connection()
+        self._flush()
+        self.transport.registerProducer(self, True)
+
+
+    def dataReceived(self, data):
+        """
+        Called whenever a chunk of data is received from the transport.
+
+        @param data: The data received from the transport.
+        @type data: L{bytes}
+        """
+        try:
+            events = self._conn.receive_data(data)
+        except h2.exceptions.ProtocolError:
+            # A remote protocol error terminates the connection.
+            self._state = 'CLOSING'
+            self._flush()
+            self.transport.loseConnection()
+            return
+
+        for event in events:
+            if isinstance(event, h2.events.ResponseReceived):
+                self._responseReceived(event)
+            elif isinstance(event, h2.events.DataReceived):
+                self._responseDataReceived(event)
+            elif isinstance(event, h2.events.StreamEnded):
+                self._responseEnded(event)
+            elif isinstance(event, h2.events.StreamReset):
+                self._streamReset(event)
+            elif isinstance(event, h2.events.WindowUpdated):
+                self._handleWindowUpdate(event)
+            elif isinstance(event, h2.events.RemoteSettingsChanged):
+                self._handleSettingsChanged(event)
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self._handleGoAway(event)
+
+        self._flush()
+
+
+    def connectionLost(self, reason):
+        """
+        Fail every request still waiting to be sent or for its response.
+
+        @param reason: Why the connection was lost.
+        @type reason: L{Failure}
+        """
+        self._state = 'CONNECTION_LOST'
+        while self._queued:
+            request, d = self._queued.popleft()
+            if not d.called:
+                d.errback(Failure(RequestNotSent()))
+        streams, self._streams = self._streams, {}
+        for stream in streams.values():
+            stream._connectionLost(reason)
+        lostDeferreds, self._lostDeferreds = self._lostDeferreds, []
+        for d in lostDeferreds:
+            d.callback(None)
+
+
+    def request(self, request):
+        """
+        Send C{request} on a new stream, or once one is available.
+
+        @param request: The request to send.
+        @type request: L{twisted.web._newclient.Request}
+
+        @return: A L{Deferred} which fires with a
+            L{twisted.web._newclient.Response}, or fails as
+            L{twisted.web._newclient.HTTP11ClientProtocol.request} documents.
+        @rtype: L{Deferred}
+        """
+        if self._state != 'CONNECTED':
+            return fail(RequestNotSent())
+
+        def cancel(d):
+            entry = (request, d)
+            if entry in self._queued:
+                self._queued.remove(entry)
+                return
+            for stream in list(self._streams.values()):
+                if stream._responseDeferred is d:
+                    stream._cancel()
+        d = Deferred(cancel)
+        if len(self._streams) >= self._streamLimit():
+            self._queued.append((request, d))
+        else:
+            self._startRequest(request, d)
+        return d
+
+
+    def abort(self):
+        """
+        Close the connection and cause all outstanding L{request} L{Deferred}s
+        to fire with an error.
+
+        @return: A L{Deferred} which fires when the connection is lost.
+        """
+        if self._state == 'CONNECTION_LOST':
+            return succeed(None)
+        self.transport.abortConnection()
+        return self._whenLost()
+
+
+    def _whenLost(self):
+        """
+        Find out when the connection is lost, however that happens.
+
+        @return: A L{Deferred} which fires with L{None} when the connection is
+            lost, or has already fired if it has been.
+        """
+        if self._state == 'CONNECTION_LOST':
+            return succeed(None)
+        d = Deferred()
+        self._lostDeferreds.append(d)
+        return d
+
+
+    def _streamLimit(self):
+        """
+        Get the most streams which may be open at once.
+
+        @rtype: L{int}
+        """
+        return min(self._maxConcurrentStreams,
+                   self._conn.remote_settings.max_concurrent_streams)
+
+
+    def _flush(self):
+        """
+        Write whatever the connection state machine has to send.
+        """
+        data = self._conn.data_to_send()
+        if data:
+            self.transport.write(data)
+
+
+    def _requestHeaders(self, request):
+        """
+        Convert the method, URI and headers of a request to an HTTP/2 header
+        block.
+
+        @param request: The request.
+        @type request: L{twisted.web._newclient.Request}
+
+        @return: The header block.
+        @rtype: L{list} of two-tuples of L{bytes}
+        """
+        hosts = request.headers.getRawHeaders(b'host', ())
+        if len(hosts) != 1:
+            raise BadHeaders(u"Exactly one Host header required")
+        parsedURI = request._parsedURI
+        scheme = parsedURI.scheme if parsedURI is not None else b'https'
+        headers = [
+            (b':method', request.method),
+            (b':scheme', scheme),
+            (b':authority', hosts[0]),
+            (b':path', request.uri),
+        ]
+        for name, values in request.headers.getAllRawHeaders():
+            name = name.lower()
+            if name in _CONNECTION_HEADERS:
+                continue
+            for value in values:
+                headers.append((name, value))
+        bodyProducer = request.bodyProducer
+        if (bodyProducer is not None and
+                bodyProducer.length is not UNKNOWN_LENGTH):
+            headers.append(
+                (b'content-length', intToBytes(bodyProducer.length)))
+        return headers
+
+
+    def _startRequest(self, request, d):
+        """
+        Open a stream for a request, send its headers, and start sending its
+        body if it has one.
+
+        @param request: The request.
+        @type request: L{twisted.web._newclient.Request}
+
+        @param d: The L{Deferred} to fire with the response.
+        @type d: L{Deferred}
+        """
+        endStream = request.bodyProducer is None
+        try:
+            headers = self._requestHeaders(request)
+            streamID = self._conn.get_next_available_stream_id()
+            self._conn.send_headers(streamID, headers, end_stream=endStream)
+        except:
+            d.errback(Failure(RequestGenerationFailed([Failure()])))
+            self._maybeQuiescent()
+            return
+        stream = _H2ClientStream(self, streamID, request, d)
+        self._streams[streamID] = stream
+        self._flush()
+        if not endStream:
+            stream._startProducing()
+
+
+    def _startQueued(self):
+        """
+        Start as many queued requests as there are streams available for.
+        """
+        while (self._state == 'CONNECTED' and self._queued and
+               len(self._streams) < self._streamLimit()):
+            request, d = self._queued.popleft()
+            self._startRequest(request, d)
+        self._flush()
+
+
+    def _maybeQuiescent(self):
+        """
+        Tell the quiescent callback when there is nothing left to do.
+        """
+        if not self._streams and not self._queued:
+            if self._state == 'CONNECTED':
+                self._quiescentCallback(self)
+
+
+    def _streamDone(self, streamID):
+        """
+        Forget a stream which is finished, and give its place to a queued
+        request.
+
+        @param streamID: The ID of the stream.
+        @type streamID: L{int}
+        """
+        if self._streams.pop(streamID, None) is None:
+            return
+        self._startQueued()
+        self._maybeQuiescent()
+
+
+    def _sendData(self, stream):
+        """
+        Send as much of a stream's request body as flow control allows, and
+        end the stream once all of it is sent.
+
+        @param stream: The stream.
+        @type stream: L{_H2ClientStream}
+        """
+        streamID = stream.streamID
+        outbound = stream._outbound
+        while outbound:
+            window = min(self._conn.local_flow_control_window(streamID),
+                         self._conn.max_outbound_frame_size)
+            if window <= 0:
+                break
+            chunk = outbound[0]
+            if len(chunk) > window:
+                outbound[0] = chunk[window:]
+                chunk = chunk[:window]
+            else:
+                outbound.popleft()
+            self._conn.send_data(streamID, chunk)
+        if not outbound and stream._bodyFinished:
+            self._conn.end_stream(streamID)
+            stream._bodySent()
+        self._flush()
+        stream._updateProducer()
+
+
+    def _responseReceived(self, event):
+        """
+        Internal handler for when a stream's response headers are received.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.ResponseReceived}
+        """
+        stream = self._streams.get(event.stream_id)
+        if stream is not None:
+            stream._responseReceived(event.headers)
+
+
+    def _responseDataReceived(self, event):
+        """
+        Internal handler for when some of a stream's response body is
+        received.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.DataReceived}
+        """
+        stream = self._streams.get(event.stream_id)
+        if stream is None:
+            self._conn.acknowledge_received_data(
+                event.flow_controlled_length, event.stream_id)
+            return
+        stream._dataReceived(event.data, event.flow_controlled_length)
+
+
+    def _responseEnded(self, event):
+        """
+        Internal handler for when a stream's response is complete.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.StreamEnded}
+        """
+        stream = self._streams.get(event.stream_id)
+        if stream is not None:
+            stream._responseEnded()
+            self._streamDone(event.stream_id)
+
+
+    def _streamReset(self, event):
+        """
+        Internal handler for when the server resets a stream.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.StreamReset}
+        """
+        stream = self._streams.get(event.stream_id)
+        if stream is not None:
+            stream._connectionLost(Failure(ConnectionLost(
+                "HTTP/2 stream reset: %r" % (event.error_code,))))
+            self._streamDone(event.stream_id)
+
+
+    def _handleWindowUpdate(self, event):
+        """
+        Internal handler for when the server lets more data be sent, either
+        on one stream or on the whole connection.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.WindowUpdated}
+        """
+        if event.stream_id:
+            streams = [self._streams.get(event.stream_id)]
+        else:
+            streams = list(self._streams.values())
+        for stream in streams:
+            if stream is not None and stream._outbound:
+                self._sendData(stream)
+
+
+    def _handleSettingsChanged(self, event):
+        """
+        Internal handler for when the server changes its settings, which may
+        let more streams be opened or more data be sent.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.RemoteSettingsChanged}
+        """
+        self._startQueued()
+        for stream in list(self._streams.values()):
+            if stream._outbound:
+                self._sendData(stream)
+
+
+    def _handleGoAway(self, event):
+        """
+        Internal handler for when the server says it will accept no more
+        streams.  Streams it did not process are failed so that their
+        requests may be retried elsewhere, and the connection is closed.
+
+        The connection state machine accepts nothing more once it has
+        received I{GOAWAY}, so the responses to streams the server did
+        process are lost with the connection rather than waited for.
+
+        @param event: The HTTP/2 event.
+        @type event: L{h2.events.ConnectionTerminated}
+        """
+        self._state = 'CLOSING'
+        lastStreamID = event.last_stream_id
+        if lastStreamID is None:
+            lastStreamID = 0
+        for streamID, stream in list(self._streams.items()):
+            if streamID > lastStreamID:
+                del self._streams[streamID]
+                stream._refused()
+        while self._queued:
+            request, d = self._queued.popleft()
+            if not d.called:
+                d.errback(Failure(RequestNotSent()))
+        self.transport.loseConnection()
+
+
+    def _acknowledge(self, streamID, length):
+        """
+        Let the server send more response data on a stream, after some has
+        been consumed.
+
+        @param streamID: The ID of the stream.
+        @type streamID: L{int}
+
+        @param length: The flow-controlled length of the data consumed.
+        @type length: L{int}
+        """
+        if self._state == 'CONNECTION_LOST':
+            return
+        try:
+            self._conn.acknowledge_received_data(length, streamID)
+        except h2.exceptions.StreamClosedError:
+            return
+        self._flush()
+
+
+    # Implementation of IPushProducer, for the transport.
+    def pauseProducing(self):
+        """
+        Pause request bodies, because the transport has as much data as it
+        wants for now.
+        """
+        self._transportPaused = True
+        for stream in list(self._streams.values()):
+            stream._updateProducer()
+
+
+    def resumeProducing(self):
+        """
+        Resume request bodies, unless flow control stops them.
+        """
+        self._transportPaused = False
+        for stream in list(self._streams.values()):
+            stream._updateProducer()
+
+
+    def stopProducing(self):
+        """
+        The transport will take no more data, so close the connection.
+        """
+        self.transport.loseConnection()
+
+
+
+@implementer(IConsumer, IPushProducer)
+class _H2ClientStream(object):
+    """
+    One request sent by an L{H2ClientProtocol}, and its response.
+
+    This is the consumer of the request's body producer, buffering what it
+    writes while flow control holds it back and pausing it meanwhile.  It is
+    also the transport given to the response's body protocol, which may pause
+    it to stop the server sending more response data.
+
+    @ivar streamID: The ID of the stream.
+    @type streamID: L{int}
+
+    @ivar _protocol: The connection the stream is on.
+    @type _protocol: L{H2ClientProtocol}
+
+    @ivar _request: The request.
+    @type _request: L{twisted.web._newclient.Request}
+
+    @ivar _responseDeferred: The L{Deferred} to fire with the response.
+
+    @ivar _response: The response, once its headers are received.
+    @type _response: L{twisted.web._newclient.Response} or L{None}
+
+    @ivar _outbound: Request body data waiting to be sent.
+    @type _outbound: L{collections.deque} of L{bytes}
+
+    @ivar _bodyFinished: Whether the body producer is done, although some of
+        what it wrote may still be in C{_outbound}.
+
+    @ivar _sending: Whether the request is still being sent.
+
+    @ivar _producerPaused: Whether the body producer has been paused.
+
+    @ivar _remaining: How much more of the request body is expected, or
+        L{None} if its length is unknown.
+
+    @ivar _paused: Whether the response body protocol has paused this, in
+        which case the response data received is not acknowledged, so that
+        the server sends no more than the flow-control window.
+
+    @ivar _unacknowledged: The flow-controlled length of the response data
+        received but not acknowledged while paused.
+    """
+    _response = None
+    _bodyFinished = False
+    _sending = False
+    _producerPaused = False
+    _remaining = None
+    _paused = True
+    _unacknowledged = 0
+
+    def __init__(self, protocol, streamID, request, responseDeferred):
+        self._protocol = protocol
+        self.streamID = streamID
+        self._request = request
+        self._responseDeferred = responseDeferred
+        self._outbound = deque()
+
+
+    def _startProducing(self):
+        """
+        Start the request's body producer, with this as its consumer.
+        """
+        bodyProducer = self._request.bodyProducer
+        self._sending = True
+        if bodyProducer.length is not UNKNOWN_LENGTH:
+            self._remaining = bodyProducer.length
+        d = bodyProducer.startProducing(self)
+        d.addCallbacks(self._producerFinished, self._producerFailed)
+
+
+    def _producerFinished(self, ignored):
+        """
+        The body producer is done.  End the stream once everything it wrote is
+        sent, unless it wrote too little.
+        """
+        if not self._sending:
+            return
+        if self._remaining:
+            self._sending = False
+            self._fail(Failure(RequestGenerationFailed([Failure(
+                WrongBodyLength(u"too few bytes written"))])))
+            return
+        self._bodyFinished = True
+        self._protocol._sendData(self)
+
+
+    def _producerFailed(self, reason):
+        """
+        The body producer failed, so reset the stream.
+        """
+        if not self._sending:
+            return
+        self._sending = False
+        self._fail(Failure(RequestGenerationFailed([reason])))
+
+
+    def _bodySent(self):
+        """
+        The whole request body has been sent.
+        """
+        self._sending = False
+        self._bodyFinished = False
+
+
+    def _updateProducer(self):
+        """
+        Pause the body producer while there is data waiting to be sent or the
+        transport is paused, and resume it otherwise.
+        """
+        if not self._sending or self._bodyFinished:
+            return
+        blocked = bool(self._outbound) or self._protocol._transportPaused
+        if blocked and not self._producerPaused:
+            self._producerPaused = True
+            self._request.bodyProducer.pauseProducing()
+        elif not blocked and self._producerPaused:
+            self._producerPaused = False
+            self._request.bodyProducer.resumeProducing()
+
+
+    def _fail(self, reason):
+        """
+        Reset the stream and fail the request or its response.
+
+        @param reason: Why the request failed.
+        @type reason: L{Failure}
+        """
+        self._reset(h2.errors.ErrorCodes.CANCEL)
+        self._deliverFailure(reason)
+        self._protocol._streamDone(self.streamID)
+
+
+    def _reset(self, errorCode):
+        """
+        Tell the server the stream is abandoned.
+
+        @param errorCode: Why.
+        @type errorCode: L{h2.errors.ErrorCodes}
+        """
+        protocol = self._protocol
+        if protocol._state == 'CONNECTION_LOST':
+            return
+        try:
+            protocol._conn.reset_stream(self.streamID, errorCode)
+        except h2.exceptions.StreamClosedError:
+            return
+        protocol._flush()
+
+
+    def _deliverFailure(self, reason):
+        """
+        Fail the request, or the response body if the response was received.
+
+        @param reason: Why.
+        @type reason: L{Failure}
+        """
+        if self._response is not None:
+            if not reason.check(ResponseFailed):
+                reason = Failure(ResponseFailed([reason]))
+            response, self._response = self._response, None
+            response._bodyDataFinished(reason)
+        elif not self._responseDeferred.called:
+            self._responseDeferred.errback(reason)
+
+
+    def _connectionLost(self, reason):
+        """
+        The stream or its connection was lost.
+
+        @param reason: Why.
+        @type reason: L{Failure}
+        """
+        sending, self._sending = self._sending, False
+        if sending:
+            self._request.bodyProducer.stopProducing()
+        if self._response is not None:
+            self._deliverFailure(Failure(ResponseFailed([reason])))
+        elif sending:
+            self._deliverFailure(
+                Failure(RequestTransmissionFailed([reason])))
+        else:
+            self._deliverFailure(Failure(ResponseNeverReceived([reason])))
+
+
+    def _cancel(self):
+        """
+        Abandon the request before its response is received, because its
+        L{Deferred} was cancelled.
+        """
+        sending, self._sending = self._sending, False
+        if sending:
+            self._request.bodyProducer.stopProducing()
+        self._reset(h2.errors.ErrorCodes.CANCEL)
+        self._protocol._streamDone(self.streamID)
+
+
+    def _refused(self):
+        """
+        The server will not process the stream, so the request was not sent.
+        """
+        sending, self._sending = self._sending, False
+        if sending:
+            self._request.bodyProducer.stopProducing()
+        self._deliverFailure(Failure(RequestNotSent()))
+
+
+    def _responseReceived(self, headers):
+        """
+        Make the response from its headers, and give it to whoever made the
+        request.
+
+        @param headers: The HTTP/2 header block.
+        @type headers: L{list} of two-tuples of L{bytes}
+        """
+        responseHeaders = Headers()
+        code = None
+        for name, value in headers:
+            if name == b':status':
+                code = int(value)
+            elif not name.startswith(b':'):
+                responseHeaders.addRawHeader(name, value)
+        response = Response._construct(
+            (b'HTTP', 2, 0), code, RESPONSES.get(code, b''),
+            responseHeaders, self, self._request)
+        lengths = responseHeaders.getRawHeaders(b'content-length')
+        if (lengths is not None and len(lengths) == 1 and
+                self._request.method != b'HEAD'):
+            try:
+                response.length = int(lengths[0])
+            except ValueError:
+                pass
+        self._response = response
+        if not self._responseDeferred.called:
+            self._responseDeferred.callback(response)
+
+
+    def _dataReceived(self, data, flowControlledLength):
+        """
+        Deliver some of the response body, and let the server send more unless
+        the body protocol has paused this.
+
+        @param data: The data.
+        @type data: L{bytes}
+
+        @param flowControlledLength: How much of the flow-control window the
+            data used.
+        @type flowControlledLength: L{int}
+        """
+        if self._response is not None:
+            self._response._bodyDataReceived(data)
+        if self._paused:
+            self._unacknowledged += flowControlledLength
+        else:
+            self._protocol._acknowledge(self.streamID, flowControlledLength)
+
+
+    def _responseEnded(self):
+        """
+        The whole response has been received.  If the request body is still
+        being sent, the server has no use for the rest of it.
+        """
+        sending, self._sending = self._sending, False
+        if sending:
+            self._request.bodyProducer.stopProducing()
+            self._reset(h2.errors.ErrorCodes.NO_ERROR)
+        response, self._response = self._response, None
+        if response is not None:
+            response._bodyDataFinished()
+        elif not self._responseDeferred.called:
+            self._responseDeferred.errback(Failure(ResponseNeverReceived(
+                [Failure(ConnectionLost("HTTP/2 stream ended without a "
+                                        "response"))])))
+
+
+    # Implementation of IConsumer, for the request body producer.
+    def write(self, data):
+        """
+        Send some of the request body, or buffer it until flow control lets
+        it be sent.
+
+        @param data: The data.
+        @type data: L{bytes}
+        """
+        if not self._sending:
+            return
+        if self._remaining is not None:
+            if len(data) > self._remaining:
+                self._sending = False
+                self._request.bodyProducer.stopProducing()
+                self._fail(Failure(RequestGenerationFailed(
+                    [Failure(WrongBodyLength(u"too many bytes written"))])))
+                raise ExcessWrite()
+            self._remaining -= len(data)
+        if data:
+            self._outbound.append(data)
+            self._protocol._sendData(self)
+
+
+    def registerProducer(self, producer, streaming):
+        """
+        Nothing to do, as the request's body producer is always this stream's
+        producer.
+        """
+
+
+    def unregisterProducer(self):
+        """
+        Nothing to do, as the request's body producer is always this stream's
+        producer.
+        """
+
+
+    # Implementation of IPushProducer, for the response body protocol.
+    def pauseProducing(self):
+        """
+        Stop letting the server send more response data.
+        """
+        self._paused = True
+
+
+    def resumeProducing(self):
+        """
+        Let the server send more response data.
+        """
+        self._paused = False
+        unacknowledged, self._unacknowledged = self._unacknowledged, 0
+        if unacknowledged:
+            self._protocol._acknowledge(self.streamID, unacknowledged)
+
+
+    def stopProducing(self):
+        """
+        Abandon the response.
+        """
+        if self._response is None:
+            return
+        self._fail(Failure(ResponseFailed([Failure(ConnectionAborted())])))
+
+
+    def loseConnection(self):
+        """
+        Abandon the response.
+        """
+        self.stopProducing()
+
+
+    def abortConnection(self):
+        """
+        Abandon the response.
+        """
+        self.stopProducing()
@@ -1426,6 +1426,9 @@ class HTTP11ClientProtocol(Protocol):
 
     @ivar _abortDeferreds: A list of C{Deferred} instances that will fire when
         the connection is lost.
+
+    @ivar _lostDeferreds: A list of C{Deferred} instances returned by
+        L{_whenLost}, which will fire when the connection is lost.
     """
     _state = 'QUIESCENT'
     _parser = None
@@ -1439,6 +1442,7 @@ class HTTP11ClientProtocol(Protocol):
     def __init__(self, quiescentCallback=lambda c: None):
         self._quiescentCallback = quiescentCallback
         self._abortDeferreds = []
+        self._lostDeferreds = []
 
 
     @property
@@ -1618,12 +1622,37 @@ class HTTP11ClientProtocol(Protocol):
             self._giveUp(Failure())
 
 
-    def connectionLost(self, reason):
+    def _connectionLost(self, reason):
         """
         The underlying transport went away.  If appropriate, notify the parser
         object.
         """
-    connectionLost = makeStatefulDispatcher('connectionLost', connectionLost)
+    _connectionLost = makeStatefulDispatcher('connectionLost', _connectionLost)
+
+
+    def connectionLost(self, reason):
+        """
+        The underlying transport went away.  Clean up as the current state
+        requires, then fire the L{Deferred}s returned by L{_whenLost}.
+        """
+        self._connectionLost(reason)
+        lostDeferreds, self._lostDeferreds = self._lostDeferreds, []
+        for d in lostDeferreds:
+            d.callback(None)
+
+
+    def _whenLost(self):
+        """
+        Find out when the connection is lost, however that happens.
+
+        @return: A L{Deferred} which fires with L{None} when the connection is
+            lost, or has already fired if it has been.
+        """
+        if self._state == 'CONNECTION_LOST':
+            return succeed(None)
+        d = Deferred()
+        self._lostDeferreds.append(d)
+        return d
 
 
     def _connectionLost_QUIESCENT(self, reason):
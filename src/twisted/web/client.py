@@ -25,6 +25,16 @@ except ImportError:
 import zlib
 from functools import wraps
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 from zope.interface import implementer
 
 from twisted.python.compat import _PY3, networkString
@@ -38,7 +48,8 @@ from twisted.python.deprecate import getDeprecationWarningString
 from twisted.web import http
 from twisted.internet import defer, protocol, task, reactor
 from twisted.internet.abstract import isIPv6Address
-from twisted.internet.interfaces import IProtocol, IOpenSSLContextFactory
+from twisted.internet.interfaces import (
+    IProtocol, IOpenSSLContextFactory, IHandshakeListener, ISSLTransport)
 from twisted.internet.endpoints import HostnameEndpoint, wrapClientTLS
 from twisted.python.util import InsensitiveDict
 from twisted.python.components import proxyForInterface
@@ -827,6 +838,10 @@ from twisted.web._newclient import (
     _WrapperException,
     )
 
+try:
+    from twisted.web._http2client import H2ClientProtocol
+except ImportError:
+    H2ClientProtocol = None
 
 
 try:
@@ -916,9 +931,16 @@ class WebClientContextFactory(object):
 class BrowserLikePolicyForHTTPS(object):
     """
     SSL connection creator for web clients.
+
+    @ivar _acceptableProtocols: The application protocols to offer with ALPN
+        or NPN, most preferred first, or L{None} to offer none.  Offering
+        C{b'h2'} lets an L{HTTPConnectionPool} with C{http2} set speak HTTP/2
+        to servers which support it.
+    @type _acceptableProtocols: L{list} of L{bytes} or L{None}
     """
-    def __init__(self, trustRoot=None):
+    def __init__(self, trustRoot=None, acceptableProtocols=None):
         self._trustRoot = trustRoot
+        self._acceptableProtocols = acceptableProtocols
 
 
     @_requireSSL
@@ -942,8 +964,9 @@ class BrowserLikePolicyForHTTPS(object):
         @rtype: L{client connection creator
             <twisted.internet.interfaces.IOpenSSLClientConnectionCreator>}
         """
-        return optionsForClientTLS(hostname.decode("ascii"),
-                                   trustRoot=self._trustRoot)
+        return optionsForClientTLS(
+            hostname.decode("ascii"), trustRoot=self._trustRoot,
+            acceptableProtocols=self._acceptableProtocols)
 
 
 
@@ -1233,6 +1256,120 @@ class _HTTP11ClientFactory(protocol.Factory):
 
 
 
+@implementer(IHandshakeListener)
+class _NegotiatingClientProtocol(protocol.Protocol):
+    """
+    A protocol which waits for the TLS handshake of its connection, if it has
+    one, and then speaks HTTP/2 over it if the server chose C{b'h2'} with
+    ALPN or NPN, or HTTP/1.1 otherwise.
+
+    @ivar _negotiated: A L{Deferred} which fires with the protocol chosen,
+        once it is connected, or fails if the connection is lost first.
+
+    @ivar _protocol: The protocol chosen, which this passes received data
+        and the loss of the connection on to.
+    """
+    _protocol = None
+
+    def __init__(self, quiescentCallback, http2QuiescentCallback,
+                 maxConcurrentStreams):
+        self._quiescentCallback = quiescentCallback
+        self._http2QuiescentCallback = http2QuiescentCallback
+        self._maxConcurrentStreams = maxConcurrentStreams
+        self._negotiated = defer.Deferred()
+
+
+    def negotiated(self):
+        """
+        Get the protocol chosen for the connection.
+
+        @return: A L{Deferred} which fires with an L{HTTP11ClientProtocol} or
+            an L{H2ClientProtocol}.
+        """
+        return self._negotiated
+
+
+    def connectionMade(self):
+        """
+        Choose HTTP/1.1 straight away if the connection does not use TLS.
+        """
+        if not ISSLTransport.providedBy(self.transport):
+            self._choose(None)
+
+
+    def handshakeCompleted(self):
+        """
+        Choose a protocol based on what the server picked in the TLS
+        handshake.
+        """
+        self._choose(getattr(self.transport, 'negotiatedProtocol', None))
+
+
+    def _choose(self, negotiatedProtocol):
+        """
+        Connect the protocol for C{negotiatedProtocol} to the transport.
+
+        @param negotiatedProtocol: The protocol the server chose, or L{None}.
+        @type negotiatedProtocol: L{bytes} or L{None}
+        """
+        if negotiatedProtocol == b'h2' and H2ClientProtocol is not None:
+            chosen = H2ClientProtocol(self._http2QuiescentCallback,
+                                      self._maxConcurrentStreams)
+        else:
+            chosen = HTTP11ClientProtocol(self._quiescentCallback)
+        self._protocol = chosen
+        chosen.makeConnection(self.transport)
+        self._negotiated.callback(chosen)
+
+
+    def dataReceived(self, data):
+        """
+        Pass received data on to the protocol chosen.
+        """
+        self._protocol.dataReceived(data)
+
+
+    def connectionLost(self, reason):
+        """
+        Pass the loss of the connection on to the protocol chosen, or fail the
+        negotiation if none was.
+        """
+        if self._protocol is not None:
+            self._protocol.connectionLost(reason)
+        else:
+            self._negotiated.errback(reason)
+
+
+
+class _NegotiatingClientFactory(protocol.Factory):
+    """
+    A factory for L{_NegotiatingClientProtocol}, used by
+    L{HTTPConnectionPool} when C{http2} is set.
+
+    @ivar _metadata: Metadata about the low-level connection details,
+        used to make the repr more useful.
+    """
+    def __init__(self, quiescentCallback, http2QuiescentCallback,
+                 maxConcurrentStreams, metadata):
+        self._quiescentCallback = quiescentCallback
+        self._http2QuiescentCallback = http2QuiescentCallback
+        self._maxConcurrentStreams = maxConcurrentStreams
+        self._metadata = metadata
+
+
+    def __repr__(self):
+        return '_NegotiatingClientFactory({}, {})'.format(
+            self._quiescentCallback,
+            self._metadata)
+
+
+    def buildProtocol(self, addr):
+        return _NegotiatingClientProtocol(
+            self._quiescentCallback, self._http2QuiescentCallback,
+            self._maxConcurrentStreams)
+
+
+
 class _RetryingHTTP11ClientProtocol(object):
     """
     A wrapper for L{HTTP11ClientProtocol} that automatically retries requests.
@@ -1298,6 +1435,62 @@ class _RetryingHTTP11ClientProtocol(object):
 
 
 
+class _ConnectionPoolStatistics(object):
+    """
+    Counts of the connections an L{HTTPConnectionPool} has for one key, and
+    how long it has taken to make them.
+
+    @ivar idle: The number of connections cached, waiting to be reused.
+    @type idle: L{int}
+
+    @ivar active: The number of connections being made, or handed out for a
+        request and not yet returned to the pool or lost.  An HTTP/2
+        connection counts as active for as long as it is open.
+    @type active: L{int}
+
+    @ivar pending: The number of L{HTTPConnectionPool.getConnection} calls
+        waiting for fewer connections to be active.
+    @type pending: L{int}
+
+    @ivar connects: The number of connections made.
+    @type connects: L{int}
+
+    @ivar connectFailures: The number of attempts to make a connection which
+        failed or were cancelled.
+    @type connectFailures: L{int}
+
+    @ivar connectTime: The total number of seconds the C{connects}
+        connections took to make, if the pool's reactor provides
+        C{IReactorTime}.
+    @type connectTime: L{float}
+
+    @ivar lastConnectTime: The number of seconds the most recent connection
+        took to make, or L{None} if none has been made.
+    @type lastConnectTime: L{float} or L{None}
+    """
+
+    def __init__(self):
+        self.idle = 0
+        self.active = 0
+        self.pending = 0
+        self.connects = 0
+        self.connectFailures = 0
+        self.connectTime = 0.0
+        self.lastConnectTime = None
+
+
+    def copy(self):
+        """
+        Take a snapshot of these counts.
+
+        @rtype: L{_ConnectionPoolStatistics}
+        """
+        copy = _ConnectionPoolStatistics()
+        copy.__dict__.update(self.__dict__)
+        return copy
+
+
+
 class HTTPConnectionPool(object):
     """
     A pool of persistent HTTP connections.
@@ -1305,6 +1498,9 @@ class HTTPConnectionPool(object):
     Features:
      - Cached connections will eventually time out.
      - Limits on maximum number of persistent connections.
+     - Connections can be made ahead of requests, with L{warmUp}.
+     - Optional limits on the number of connections in use at once.
+     - Counts of connections, with L{statistics}.
 
     Connections are stored using keys, which should be chosen such that any
     connections stored under a given key can be used interchangeably.
@@ -1313,6 +1509,12 @@ class HTTPConnectionPool(object):
     once if they use an idempotent method (e.g. GET), in case the HTTP server
     timed them out.
 
+    With C{http2} set, a server which chooses HTTP/2 during the TLS handshake
+    is spoken to with L{H2ClientProtocol}, and if the pool is persistent, all
+    requests for the same key share that one connection, as concurrent
+    streams.  This needs an L{IPolicyForHTTPS} which offers C{b'h2'}, such as
+    C{BrowserLikePolicyForHTTPS(acceptableProtocols=[b'h2', b'http/1.1'])}.
+
     @ivar persistent: Boolean indicating whether connections should be
         persistent. Connections are persistent by default.
 
@@ -1326,13 +1528,51 @@ class HTTPConnectionPool(object):
     @ivar retryAutomatically: C{boolean} indicating whether idempotent
         requests should be retried once if no response was received.
 
+    @ivar http2: C{boolean} indicating whether to speak HTTP/2 to servers
+        which choose it.  This needs the C{http2} extra to be installed.
+
+    @ivar maxConcurrentStreamsPerHost: The most requests to send at once over
+        an HTTP/2 connection, unless the server allows fewer.  Any more wait
+        for earlier ones to finish.
+    @type maxConcurrentStreamsPerHost: C{int}
+
+    @ivar maxConnectionsPerHost: The most connections for a key which may be
+        being made or in use at once, or L{None} for no limit.  Once there
+        are this many, L{getConnection} waits for one to be returned to the
+        pool or lost.  Connections made to retry a request, or by
+        L{warmUp}, are counted but never wait.
+    @type maxConnectionsPerHost: C{int} or L{None}
+
+    @ivar reusePolicy: C{"FIFO"} to reuse the cached connection which has
+        been idle longest, spreading requests across all of them, or
+        C{"LIFO"} to reuse the one most recently returned, letting the rest
+        time out when there are more than are needed.
+    @type reusePolicy: C{str}
+
     @ivar _factory: The factory used to connect to the proxy.
 
     @ivar _connections: Map (scheme, host, port) to lists of
         L{HTTP11ClientProtocol} instances.
 
-    @ivar _timeouts: Map L{HTTP11ClientProtocol} instances to a
-        C{IDelayedCall} instance of their timeout.
+    @ivar _timeouts: Map L{HTTP11ClientProtocol} and idle
+        L{H2ClientProtocol} instances to a C{IDelayedCall} instance of their
+        timeout.
+
+    @ivar _http2Connections: Map (scheme, host, port) to the
+        L{H2ClientProtocol} shared by requests for it.
+
+    @ivar _negotiating: Map (scheme, host, port) to a list of L{Deferred}s
+        for requests waiting to find out whether a new connection for it
+        speaks HTTP/2, and so can be shared.
+
+    @ivar _pending: Map (scheme, host, port) to a list of L{Deferred}s for
+        requests waiting for fewer connections for it to be active.
+
+    @ivar _active: Map connections which are active, as
+        L{_ConnectionPoolStatistics} counts them, to their keys.
+
+    @ivar _statistics: Map (scheme, host, port) to the
+        L{_ConnectionPoolStatistics} for it.
 
     @since: 12.1
     """
@@ -1341,6 +1581,10 @@ class HTTPConnectionPool(object):
     maxPersistentPerHost = 2
     cachedConnectionTimeout = 240
     retryAutomatically = True
+    http2 = False
+    maxConcurrentStreamsPerHost = 100
+    maxConnectionsPerHost = None
+    reusePolicy = "FIFO"
     _log = Logger()
 
     def __init__(self, reactor, persistent=True):
@@ -1348,6 +1592,11 @@ class HTTPConnectionPool(object):
         self.persistent = persistent
         self._connections = {}
         self._timeouts = {}
+        self._http2Connections = {}
+        self._negotiating = {}
+        self._pending = {}
+        self._active = {}
+        self._statistics = {}
 
 
     def getConnection(self, key, endpoint):
@@ -1371,33 +1620,227 @@ class HTTPConnectionPool(object):
         @return: A C{Deferred} that will fire with a L{HTTP11ClientProtocol}
            (or a wrapper) that can be used to send a single HTTP request.
         """
+        if self.http2 and self.persistent:
+            connection = self._http2Connections.get(key)
+            if connection is not None:
+                if connection.state == "CONNECTED":
+                    timeout = self._timeouts.pop(connection, None)
+                    if timeout is not None:
+                        timeout.cancel()
+                    return defer.succeed(
+                        self._retrying(connection, key, endpoint))
+                del self._http2Connections[key]
+            waiting = self._negotiating.get(key)
+            if waiting is not None:
+                # Whether a connection being made for this key can be shared
+                # is only known once it is made.
+                d = defer.Deferred()
+                waiting.append(d)
+                return d.addCallback(
+                    lambda ignored: self.getConnection(key, endpoint))
+
         # Try to get cached version:
         connections = self._connections.get(key)
         while connections:
-            connection = connections.pop(0)
+            if self.reusePolicy == "LIFO":
+                connection = connections.pop()
+            else:
+                connection = connections.pop(0)
             # Cancel timeout:
             self._timeouts[connection].cancel()
             del self._timeouts[connection]
             if connection.state == "QUIESCENT":
-                if self.retryAutomatically:
-                    newConnection = lambda: self._newConnection(key, endpoint)
-                    connection = _RetryingHTTP11ClientProtocol(
-                        connection, newConnection)
-                return defer.succeed(connection)
+                self._active[connection] = key
+                self._statisticsFor(key).active += 1
+                return defer.succeed(
+                    self._retrying(connection, key, endpoint))
+
+        if (self.maxConnectionsPerHost is not None and
+                self._statisticsFor(key).active >=
+                self.maxConnectionsPerHost):
+            pending = self._pending.setdefault(key, [])
+            d = defer.Deferred(pending.remove)
+            pending.append(d)
+            return d.addCallback(
+                lambda ignored: self.getConnection(key, endpoint))
 
         return self._newConnection(key, endpoint)
 
 
+    def warmUp(self, key, endpoint, count):
+        """
+        Make connections ahead of any requests which will use them, and cache
+        them, so that there are C{count} cached connections for C{key}, or
+        C{maxPersistentPerHost} if that is fewer.
+
+        @param key: A unique key identifying connections that can be used
+            interchangeably.
+
+        @param endpoint: An endpoint that can be used to open new
+            connections.
+
+        @param count: How many connections to have cached.
+        @type count: L{int}
+
+        @return: A L{Deferred} which fires with the number of connections
+            made, once every attempt has succeeded or failed.  Failures are
+            logged.
+        """
+        if not self.persistent:
+            return defer.succeed(0)
+        wanted = (min(count, self.maxPersistentPerHost) -
+                  len(self._connections.get(key, [])))
+
+        def connected(connection):
+            if (H2ClientProtocol is not None and
+                    isinstance(connection, H2ClientProtocol)):
+                self._putHTTP2Connection(key, connection)
+            else:
+                self._putConnection(key, connection)
+            return 1
+
+        def failed(reason):
+            self._log.failure(
+                "Failed to warm up a connection for {key!r}", reason, key=key)
+            return 0
+
+        results = []
+        for i in range(wanted):
+            d = self._newConnection(key, endpoint)
+            d.addCallbacks(connected, failed)
+            results.append(d)
+        return defer.gatherResults(results).addCallback(sum)
+
+
+    def statistics(self, key):
+        """
+        Get the number of connections for a key which are cached, in use and
+        waited for, and how long connecting for it has taken.
+
+        @param key: A unique key identifying connections that can be used
+            interchangeably.
+
+        @return: A snapshot of the counts.
+        @rtype: L{_ConnectionPoolStatistics}
+        """
+        statistics = self._statisticsFor(key).copy()
+        statistics.idle = len(self._connections.get(key, []))
+        statistics.pending = len(self._pending.get(key, []))
+        return statistics
+
+
+    def _statisticsFor(self, key):
+        """
+        Get the L{_ConnectionPoolStatistics} to update for a key.
+        """
+        statistics = self._statistics.get(key)
+        if statistics is None:
+            statistics = self._statistics[key] = _ConnectionPoolStatistics()
+        return statistics
+
+
+    def _release(self, key):
+        """
+        Stop counting a connection for a key as active, and let the request
+        which has waited longest for one try again.
+        """
+        self._statisticsFor(key).active -= 1
+        pending = self._pending.get(key)
+        if pending:
+            pending.pop(0).callback(None)
+
+
+    def _lost(self, key, connection):
+        """
+        Forget a connection made by this pool once it is lost, wherever it
+        was.  A cached one is removed from the cache at once, rather than
+        being handed out and failing a request.
+        """
+        if connection in self._active:
+            del self._active[connection]
+            self._release(key)
+            return
+        connections = self._connections.get(key, [])
+        if connection in connections:
+            connections.remove(connection)
+            self._timeouts.pop(connection).cancel()
+
+
+    def _retrying(self, connection, key, endpoint):
+        """
+        Wrap a cached connection so that requests which fail on it are
+        retried once on a new connection, if C{retryAutomatically} is set.
+        """
+        if self.retryAutomatically:
+            newConnection = lambda: self._newConnection(key, endpoint)
+            connection = _RetryingHTTP11ClientProtocol(
+                connection, newConnection)
+        return connection
+
+
     def _newConnection(self, key, endpoint):
         """
         Create a new connection.
 
         This implements the new connection code path for L{getConnection}.
         """
+        statistics = self._statisticsFor(key)
+        statistics.active += 1
+        # Connect times are only measured if the reactor can tell the time.
+        seconds = getattr(self._reactor, "seconds", None)
+        if seconds is not None:
+            started = seconds()
+
+        def connected(connection):
+            statistics.connects += 1
+            if seconds is not None:
+                connectTime = seconds() - started
+                statistics.connectTime += connectTime
+                statistics.lastConnectTime = connectTime
+            whenLost = getattr(connection, "_whenLost", None)
+            if whenLost is None:
+                # There is no telling when this connection is lost, so it
+                # cannot be counted as active.
+                self._release(key)
+            else:
+                self._active[connection] = key
+                whenLost().addCallback(
+                    lambda ignored: self._lost(key, connection))
+            return connection
+
+        def failed(reason):
+            statistics.connectFailures += 1
+            self._release(key)
+            return reason
+
         def quiescentCallback(protocol):
             self._putConnection(key, protocol)
-        factory = self._factory(quiescentCallback, repr(endpoint))
-        return endpoint.connect(factory)
+        if not self.http2 or H2ClientProtocol is None:
+            factory = self._factory(quiescentCallback, repr(endpoint))
+            d = endpoint.connect(factory)
+            d.addCallbacks(connected, failed)
+            return d
+
+        def http2QuiescentCallback(protocol):
+            self._putHTTP2Connection(key, protocol)
+        factory = _NegotiatingClientFactory(
+            quiescentCallback, http2QuiescentCallback,
+            self.maxConcurrentStreamsPerHost, repr(endpoint))
+        if self.persistent:
+            self._negotiating.setdefault(key, [])
+
+        def negotiated(result):
+            if (self.persistent and
+                    isinstance(result, H2ClientProtocol)):
+                self._http2Connections[key] = result
+            for waiting in self._negotiating.pop(key, []):
+                waiting.callback(None)
+            return result
+        d = endpoint.connect(factory)
+        d.addCallback(lambda protocol: protocol.negotiated())
+        d.addCallbacks(connected, failed)
+        d.addBoth(negotiated)
+        return d
 
 
     def _removeConnection(self, key, connection):
@@ -1434,6 +1877,36 @@ class HTTPConnectionPool(object):
                                       self._removeConnection,
                                       key, connection)
         self._timeouts[connection] = cid
+        if connection in self._active:
+            del self._active[connection]
+            self._release(key)
+
+
+    def _putHTTP2Connection(self, key, connection):
+        """
+        Start the timeout of an HTTP/2 connection which has no requests left
+        to send or responses left to receive, or close it if it is not being
+        shared.  This will be called by L{H2ClientProtocol}.
+        """
+        if self._http2Connections.get(key) is not connection:
+            connection.transport.loseConnection()
+            return
+        timeout = self._timeouts.pop(connection, None)
+        if timeout is not None:
+            timeout.cancel()
+        self._timeouts[connection] = self._reactor.callLater(
+            self.cachedConnectionTimeout, self._removeHTTP2Connection,
+            key, connection)
+
+
+    def _removeHTTP2Connection(self, key, connection):
+        """
+        Stop sharing an idle HTTP/2 connection and disconnect it.
+        """
+        connection.transport.loseConnection()
+        if self._http2Connections.get(key) is connection:
+            del self._http2Connections[key]
+        del self._timeouts[connection]
 
 
     def closeCachedConnections(self):
@@ -1448,6 +1921,9 @@ class HTTPConnectionPool(object):
             for p in protocols:
                 results.append(p.abort())
         self._connections = {}
+        for p in itervalues(self._http2Connections):
+            results.append(p.abort())
+        self._http2Connections = {}
         for dc in itervalues(self._timeouts):
             dc.cancel()
         self._timeouts = {}
@@ -1958,33 +2434,97 @@ class GzipDecoder(proxyForInterface(IResponse)):
 
 
 
-class _GzipProtocol(proxyForInterface(IProtocol)):
+class BrotliDecoder(proxyForInterface(IResponse)):
+    """
+    A wrapper for a L{Response} instance which handles a brotli-compressed
+    body.  This needs the C{brotli} module, so only offer it to servers
+    when that can be imported.
+
+    @ivar original: The original L{Response} object.
+    """
+
+    def __init__(self, response):
+        self.original = response
+        self.length = UNKNOWN_LENGTH
+
+
+    def deliverBody(self, protocol):
+        """
+        Override C{deliverBody} to wrap the given C{protocol} with
+        L{_BrotliProtocol}.
+        """
+        self.original.deliverBody(_BrotliProtocol(protocol, self.original))
+
+
+
+class ZstandardDecoder(proxyForInterface(IResponse)):
+    """
+    A wrapper for a L{Response} instance which handles a
+    Zstandard-compressed body.  This needs the C{zstandard} module, so only
+    offer it to servers when that can be imported.
+
+    @ivar original: The original L{Response} object.
+    """
+
+    def __init__(self, response):
+        self.original = response
+        self.length = UNKNOWN_LENGTH
+
+
+    def deliverBody(self, protocol):
+        """
+        Override C{deliverBody} to wrap the given C{protocol} with
+        L{_ZstandardProtocol}.
+        """
+        self.original.deliverBody(
+            _ZstandardProtocol(protocol, self.original))
+
+
+
+class _DecompressingProtocol(proxyForInterface(IProtocol)):
     """
     A L{Protocol} implementation which wraps another one, transparently
-    decompressing received data.
+    decompressing received data as it arrives.
+
+    The data is decompressed as gzip, unless a subclass makes another
+    decompressor.
 
-    @ivar _zlibDecompress: A zlib decompress object used to decompress the data
-        stream.
+    @cvar _errors: The exceptions which mean the data could not be
+        decompressed.
 
     @ivar _response: A reference to the original response, in case of errors.
 
-    @since: 11.1
+    @ivar _decompress: Decompresses some data, returning the data
+        decompressed so far.
+
+    @ivar _flush: Returns any data the decompressor had left at the end.
     """
+    _errors = (zlib.error,)
 
     def __init__(self, protocol, response):
         self.original = protocol
         self._response = response
-        self._zlibDecompress = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._decompress, self._flush = self._decompressor()
+
+
+    def _decompressor(self):
+        """
+        Make a decompressor for gzip-compressed data.
+
+        @return: The callables to use as C{_decompress} and C{_flush}.
+        @rtype: L{tuple} of two callables
+        """
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        return decompressor.decompress, decompressor.flush
 
 
     def dataReceived(self, data):
         """
-        Decompress C{data} with the zlib decompressor, forwarding the raw data
-        to the original protocol.
+        Decompress C{data}, forwarding the raw data to the original protocol.
         """
         try:
-            rawData = self._zlibDecompress.decompress(data)
-        except zlib.error:
+            rawData = self._decompress(data)
+        except self._errors:
             raise ResponseFailed([Failure()], self._response)
         if rawData:
             self.original.dataReceived(rawData)
@@ -1996,8 +2536,8 @@ class _GzipProtocol(proxyForInterface(IProtocol)):
         decompressor if any.
         """
         try:
-            rawData = self._zlibDecompress.flush()
-        except zlib.error:
+            rawData = self._flush()
+        except self._errors:
             raise ResponseFailed([reason, Failure()], self._response)
         if rawData:
             self.original.dataReceived(rawData)
@@ -2005,6 +2545,50 @@ class _GzipProtocol(proxyForInterface(IProtocol)):
 
 
 
+class _GzipProtocol(_DecompressingProtocol):
+    """
+    A L{Protocol} implementation which wraps another one, transparently
+    decompressing received data.
+
+    @since: 11.1
+    """
+
+
+
+class _BrotliProtocol(_DecompressingProtocol):
+    """
+    A L{Protocol} implementation which wraps another one, transparently
+    decompressing received brotli-compressed data.
+    """
+
+    def __init__(self, protocol, response):
+        self._errors = (brotli.error,)
+        _DecompressingProtocol.__init__(self, protocol, response)
+
+
+    def _decompressor(self):
+        decompressor = brotli.Decompressor()
+        return decompressor.process, lambda: b''
+
+
+
+class _ZstandardProtocol(_DecompressingProtocol):
+    """
+    A L{Protocol} implementation which wraps another one, transparently
+    decompressing received Zstandard-compressed data.
+    """
+
+    def __init__(self, protocol, response):
+        self._errors = (zstandard.ZstdError,)
+        _DecompressingProtocol.__init__(self, protocol, response)
+
+
+    def _decompressor(self):
+        decompressor = zstandard.ZstdDecompressor().decompressobj()
+        return decompressor.decompress, lambda: b''
+
+
+
 @implementer(IAgent)
 class ContentDecoderAgent(object):
     """
@@ -2295,6 +2879,8 @@ __all__ = [
     'downloadPage',
     'getPage',
     'GzipDecoder',
+    'BrotliDecoder',
+    'ZstandardDecoder',
     'HTTPClientFactory',
     'HTTPConnectionPool',
     'HTTPDownloader',
@@ -105,7 +105,8 @@ from twisted.protocols import policies, basic
 
 from twisted.web.iweb import (
     IRequest, IAccessLogFormatter, INonQueuedRequestFactory)
-from twisted.web.http_headers import Headers, _sanitizeLinearWhitespace
+from twisted.web.http_headers import (
+    Headers, _sanitizeLinearWhitespace, _commonHeaderNames, _maxCachedNames)
 
 try:
     from twisted.web._http2 import H2Connection
@@ -114,6 +115,11 @@ except ImportError:
     H2Connection = None
     H2_ENABLED = False
 
+try:
+    import httptools
+except ImportError:
+    httptools = None
+
 
 from twisted.web._responses import (
     SWITCHING,
@@ -1851,6 +1857,180 @@ class _ChunkedTransferDecoder(object):
 
 
 
+class _MalformedRequestHeadError(Exception):
+    """
+    A request head parser (see L{HTTPChannel.requestHeadParser}) raises
+    L{_MalformedRequestHeadError} when it is given a request head it cannot
+    parse.  L{HTTPChannel} then processes the request head line by line, so
+    that the request is accepted or rejected exactly as it would otherwise
+    be.
+    """
+
+
+
+def _parseRequestHead(head):
+    """
+    Parse the head of a request in one pass.
+
+    Only the simple, well-formed request heads which make up nearly all
+    traffic are accepted; anything unusual, such as a header continued over
+    several lines, is left to L{HTTPChannel}'s line-by-line parsing.
+
+    @param head: The request line and header lines of a request, separated
+        by CRLF, without the empty line which ends them.
+    @type head: L{bytes}
+
+    @return: The command, path and version from the request line, and a
+        L{list} of each header's name, lowercased, and value, stripped of
+        surrounding whitespace.
+    @rtype: 4-L{tuple} of L{bytes}, L{bytes}, L{bytes} and L{list} of
+        2-L{tuple}s of L{bytes}
+
+    @raise _MalformedRequestHeadError: If C{head} is not accepted.
+    """
+    lines = head.split(b"\r\n")
+    parts = lines[0].split()
+    if len(parts) != 3:
+        raise _MalformedRequestHeadError(lines[0])
+    command, path, version = parts
+    try:
+        command.decode("ascii")
+    except UnicodeDecodeError:
+        raise _MalformedRequestHeadError(lines[0])
+    headers = []
+    for i in range(1, len(lines)):
+        line = lines[i]
+        name, sep, value = line.partition(b":")
+        if not sep or line[:1] in b" \t":
+            raise _MalformedRequestHeadError(line)
+        headers.append((name.lower(), value.strip()))
+    return command, path, version, headers
+
+
+
+class _HTTPToolsHeadCollector(object):
+    """
+    The callbacks of an C{httptools.HttpRequestParser} used by
+    L{_parseRequestHeadHTTPTools}.
+
+    @ivar url: The request target, in the pieces it was received in.
+    @type url: L{list} of L{bytes}
+
+    @ivar headers: The names, lowercased, and values of the headers.
+    @type headers: L{list} of 2-L{tuple}s of L{bytes}
+
+    @ivar complete: Whether the parser has found a whole request head.
+    @type complete: L{bool}
+    """
+
+    def __init__(self):
+        self.url = []
+        self.headers = []
+        self.complete = False
+
+
+    def on_url(self, url):
+        self.url.append(url)
+
+
+    def on_header(self, name, value):
+        self.headers.append((name.lower(), value.strip()))
+
+
+    def on_headers_complete(self):
+        self.complete = True
+
+
+
+def _parseRequestHeadHTTPTools(head):
+    """
+    Parse the head of a request in one pass using the C{httptools} parser.
+
+    C{httptools} is stricter than L{HTTPChannel}, so request heads it
+    rejects are left to L{HTTPChannel}'s line-by-line parsing rather than
+    rejected outright.
+
+    @param head: See L{_parseRequestHead}.
+
+    @return: See L{_parseRequestHead}.
+
+    @raise _MalformedRequestHeadError: If C{head} is not accepted.
+    """
+    collector = _HTTPToolsHeadCollector()
+    parser = httptools.HttpRequestParser(collector)
+    try:
+        parser.feed_data(head + b"\r\n\r\n")
+    except httptools.HttpParserUpgrade:
+        # Raised once the head of a CONNECT or upgrade request has been
+        # parsed; what happens next is up to the request.
+        pass
+    except httptools.HttpParserError as e:
+        raise _MalformedRequestHeadError(str(e))
+    if not collector.complete:
+        # There was no request line; httptools skips the empty lines it is
+        # given before one.
+        raise _MalformedRequestHeadError(head)
+    version = parser.get_http_version()
+    if version == "0.9":
+        # httptools takes a request line without a version to be an HTTP/0.9
+        # request, which HTTPChannel rejects.
+        raise _MalformedRequestHeadError(head)
+    return (parser.get_method(), b"".join(collector.url),
+            b"HTTP/" + version.encode("ascii"), collector.headers)
+
+
+
+if httptools is None:
+    _defaultRequestHeadParser = _parseRequestHead
+else:
+    _defaultRequestHeadParser = _parseRequestHeadHTTPTools
+
+
+
+# Status lines for each status code in RESPONSES with its standard reason
+# phrase, keyed on the version, code, and reason given to
+# HTTPChannel.writeHeaders.
+_statusLines = {}
+for _version in (b"HTTP/1.0", b"HTTP/1.1"):
+    for _code, _reason in RESPONSES.items():
+        _code = intToBytes(_code)
+        _statusLines[_version, _code, _reason] = (
+            _version + b" " + _code + b" " + _reason + b"\r\n")
+del _version, _code, _reason
+
+# Header names given to HTTPChannel.writeHeaders mapped to the start of their
+# header lines.  Filled in ahead of time for common headers, and then as
+# other names are written until it holds _maxCachedNames entries.
+_headerLinePrefixes = {}
+for _name in _commonHeaderNames:
+    _headerLinePrefixes[_name] = _name + b": "
+del _name
+
+
+
+def _headerLinePrefix(name):
+    """
+    Get the start of the line for a header, as L{Headers} would write it.
+
+    @param name: The name of a header.
+    @type name: L{bytes} or L{unicode}
+
+    @return: The header name, sanitized and in its canonical capitalization,
+        followed by C{b": "}.
+    @rtype: L{bytes}
+    """
+    prefix = _headerLinePrefixes.get(name)
+    if prefix is None:
+        headers = Headers()
+        headers.setRawHeaders(name, [])
+        [(canonicalName, values)] = headers.getAllRawHeaders()
+        prefix = canonicalName + b": "
+        if len(_headerLinePrefixes) < _maxCachedNames:
+            _headerLinePrefixes[name] = prefix
+    return prefix
+
+
+
 @implementer(interfaces.IPushProducer)
 class _NoPushProducer(object):
     """
@@ -1896,6 +2076,166 @@ class _NoPushProducer(object):
 
 
 
+class _PipelinedRequestChannel(object):
+    """
+    The channel given to a request which an L{HTTPChannel} received while
+    it was still answering earlier ones, so that its response is written
+    after theirs even though it is processed at the same time.
+
+    Until the responses ahead of it have been written, the response is
+    buffered here, and any producer registered for it is kept here and
+    paused if the channel is buffering more than its C{pipelineBufferSize}.
+    After that, and for everything else, this forwards to the
+    L{HTTPChannel}.
+
+    @ivar _channel: The channel the request was received on.
+    @type _channel: L{HTTPChannel}
+
+    @ivar _request: The request, once it has been made.
+
+    @ivar _buffer: The response written so far, or L{None} once the
+        response is written straight to C{_channel}.
+    @type _buffer: L{list} of L{bytes} or L{None}
+
+    @ivar _bufferSize: The number of bytes in C{_buffer}.
+    @type _bufferSize: L{int}
+
+    @ivar _finished: Whether the request has been finished.
+    @type _finished: L{bool}
+
+    @ivar _producer: The producer registered for the request while its
+        response is buffered, if any.
+
+    @ivar _streaming: Whether C{_producer} is a streaming producer.
+    @type _streaming: L{bool}
+
+    @ivar _producerPaused: Whether C{_producer} has been paused because too
+        much is buffered.
+    @type _producerPaused: L{bool}
+    """
+
+    _request = None
+    _bufferSize = 0
+    _finished = False
+    _producer = None
+    _streaming = False
+    _producerPaused = False
+
+    def __init__(self, channel):
+        self._channel = channel
+        self._buffer = []
+
+
+    def __getattr__(self, name):
+        """
+        Forward any other attribute access to the L{HTTPChannel}.
+        """
+        return getattr(self._channel, name)
+
+
+    def _buffered(self, data):
+        """
+        Buffer part of the response.
+
+        @param data: The data to buffer.
+        @type data: L{list} of L{bytes}
+        """
+        size = sum(map(len, data))
+        self._buffer.extend(data)
+        self._bufferSize += size
+        channel = self._channel
+        channel._pipelineBuffered += size
+        if (channel._pipelineBuffered > channel.pipelineBufferSize and
+                self._streaming and not self._producerPaused):
+            self._producerPaused = True
+            self._producer.pauseProducing()
+
+
+    def writeHeaders(self, version, code, reason, headers):
+        """
+        See L{HTTPChannel.writeHeaders}.
+        """
+        if self._buffer is None:
+            self._channel.writeHeaders(version, code, reason, headers)
+        else:
+            self._buffered(
+                self._channel._encodeHeaders(version, code, reason, headers))
+
+
+    def write(self, data):
+        """
+        See L{HTTPChannel.write}.
+        """
+        if self._buffer is None:
+            self._channel.write(data)
+        else:
+            self._buffered([data])
+
+
+    def writeSequence(self, iovec):
+        """
+        See L{HTTPChannel.writeSequence}.
+        """
+        if self._buffer is None:
+            self._channel.writeSequence(iovec)
+        else:
+            self._buffered(iovec)
+
+
+    def registerProducer(self, producer, streaming):
+        """
+        See L{HTTPChannel.registerProducer}.
+        """
+        if self._buffer is None:
+            self._channel.registerProducer(producer, streaming)
+        else:
+            self._producer = producer
+            self._streaming = streaming
+
+
+    def unregisterProducer(self):
+        """
+        See L{HTTPChannel.unregisterProducer}.
+        """
+        if self._buffer is None:
+            self._channel.unregisterProducer()
+        else:
+            self._producer = None
+            self._streaming = self._producerPaused = False
+
+
+    def requestDone(self, request):
+        """
+        See L{HTTPChannel.requestDone}.
+        """
+        if self._buffer is None:
+            self._channel.requestDone(request)
+        else:
+            self._finished = True
+
+
+    def _writeBuffered(self):
+        """
+        Write the buffered response, now that the responses ahead of it have
+        been written, and forward everything to the L{HTTPChannel} from now
+        on.
+        """
+        buffered, self._buffer = self._buffer, None
+        channel = self._channel
+        channel._pipelineBuffered -= self._bufferSize
+        if buffered:
+            channel.writeSequence(buffered)
+        if self._producer is not None:
+            channel.registerProducer(self._producer, self._streaming)
+            if self._producerPaused:
+                self._producerPaused = False
+                self._producer.resumeProducing()
+            self._producer = None
+        if self._finished:
+            channel.requestDone(self._request)
+
+
+
 @implementer(interfaces.ITransport,
              interfaces.IPushProducer,
              interfaces.IConsumer)
@@ -2002,11 +2342,47 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         This behavior has been in place since Twisted 17.9.0 .
 
     @type _optimisticEagerReadSize: L{int}
+
+    @ivar requestHeadParser: A callable which parses the request line and
+        header lines of a request, once all of them have been received, in
+        one pass.  It is called with them as L{bytes}, separated by CRLF, and
+        returns the command, path, version and a L{list} of header names,
+        lowercased, and values, stripped of surrounding whitespace.  If it
+        raises L{_MalformedRequestHeadError}, or if this is L{None}, the
+        request head is processed one line at a time by L{lineReceived} and
+        L{headerReceived}, as it also is if a subclass overrides either of
+        those.  By default, this is a parser using C{httptools} if it is
+        installed, or one written in Python if it is not.
+
+    @ivar maxPipelinedRequests: The number of requests which may be
+        processed at once.  While fewer than this many are outstanding,
+        further requests pipelined by the client are received and processed
+        without waiting for the earlier ones to be answered; their responses
+        are buffered until they can be written in order.  With the default of
+        1, each request is only received once the one before it has been
+        answered.
+    @type maxPipelinedRequests: L{int}
+
+    @ivar pipelineBufferSize: The number of bytes of responses to pipelined
+        requests which may be buffered before no further requests are
+        received until they have been written, and the producers registered
+        for any further responses are paused.
+    @type pipelineBufferSize: L{int}
+
+    @ivar _pipelinedChannels: The L{_PipelinedRequestChannel}s of the
+        outstanding requests which were given one, in order.
+    @type _pipelinedChannels: L{list}
+
+    @ivar _pipelineBuffered: The number of bytes of responses buffered by
+        C{_pipelinedChannels}.
+    @type _pipelineBuffered: L{int}
     """
 
     maxHeaders = 500
     totalHeadersSize = 16384
     abortTimeout = 15
+    maxPipelinedRequests = 1
+    pipelineBufferSize = 2 ** 20
 
     length = 0
     persistent = 1
@@ -2016,6 +2392,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
 
     # set in instances or subclasses
     requestFactory = Request
+    requestHeadParser = staticmethod(_defaultRequestHeadParser)
 
     _savedTimeOut = None
     _receivedHeaderCount = 0
@@ -2025,6 +2402,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
     _waitingForTransport = False
     _abortingCall = None
     _optimisticEagerReadSize = 0x4000
+    _pipelineBuffered = 0
     _log = Logger()
 
     def __init__(self):
@@ -2033,6 +2411,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         self._handlingRequest = False
         self._dataBuffer = []
         self._transferDecoder = None
+        self._pipelinedChannels = []
 
 
     def connectionMade(self):
@@ -2068,13 +2447,7 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
                 self.__first_line = 2
                 return
 
-            # create a new Request object
-            if INonQueuedRequestFactory.providedBy(self.requestFactory):
-                request = self.requestFactory(self)
-            else:
-                request = self.requestFactory(self, len(self.requests))
-            self.requests.append(request)
-
+            self._newRequest()
             self.__first_line = 0
 
             parts = line.split()
@@ -2117,9 +2490,133 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             self.__header = line
 
 
+    def _newRequest(self):
+        """
+        Create a new request object, and add it to the queue of requests.
+
+        A request received while earlier ones are outstanding is given a
+        L{_PipelinedRequestChannel}, so that its response is written after
+        theirs.
+
+        @return: The request.
+        """
+        channel = self
+        if self.requests:
+            channel = _PipelinedRequestChannel(self)
+            self._pipelinedChannels.append(channel)
+        if INonQueuedRequestFactory.providedBy(self.requestFactory):
+            request = self.requestFactory(channel)
+        else:
+            # The request may always write its response to its channel.
+            request = self.requestFactory(channel, False)
+        if channel is not self:
+            channel._request = request
+        self.requests.append(request)
+        return request
+
+
     def _finishRequestBody(self, data):
-        self.allContentReceived()
         self._dataBuffer.append(data)
+        self.allContentReceived()
+
+
+    def _requestHeadReceived(self, command, path, version, headers):
+        """
+        Process the head of a request parsed in one pass by
+        C{requestHeadParser}, as L{lineReceived} would process it line by
+        line.
+
+        @param command: The request's command.
+        @type command: L{bytes}
+
+        @param path: The request's path.
+        @type path: L{bytes}
+
+        @param version: The request's version.
+        @type version: L{bytes}
+
+        @param headers: The names, lowercased, and values of the request's
+            headers.
+        @type headers: L{list} of 2-L{tuple}s of L{bytes}
+        """
+        request = self._newRequest()
+        self.__first_line = 0
+        self._command = command
+        self._path = path
+        self._version = version
+
+        for header, data in headers:
+            if header == b'content-length' or header == b'transfer-encoding':
+                if not self._lengthHeaderReceived(header, data):
+                    return
+        self._receivedHeaderCount = len(headers)
+        request.requestHeaders = Headers._fromParsed(headers)
+
+        self.allHeadersReceived()
+        if self.length == 0:
+            self.allContentReceived()
+        else:
+            self.setRawMode()
+
+
+    def _overridesLineParsing(self):
+        """
+        Determine whether this channel's class overrides L{lineReceived} or
+        L{headerReceived}, in which case request heads have to be given to it
+        a line at a time.
+
+        @return: C{True} if either method is overridden.
+        @rtype: L{bool}
+        """
+        cls = self.__class__
+        for name in ("lineReceived", "headerReceived"):
+            # On Python 2 these are unbound methods, which are made anew on
+            # every attribute access; compare the functions they wrap.
+            method = getattr(cls, name)
+            default = getattr(HTTPChannel, name)
+            if (getattr(method, "__func__", method) is not
+                    getattr(default, "__func__", default)):
+                return True
+        return False
+
+
+    def _requestHeadsReceived(self, data):
+        """
+        Parse and process as many complete request heads at the start of the
+        received data as possible, each in one pass.
+
+        @param data: The data received, which follows any data already
+            buffered.
+        @type data: L{bytes}
+
+        @return: The data which is left to be processed by
+            L{basic.LineReceiver.dataReceived}, or L{None} if there is none.
+        @rtype: L{bytes} or L{None}
+        """
+        data = self.clearLineBuffer() + data
+        parse = self.requestHeadParser
+        limit = min(self.totalHeadersSize, self.MAX_LENGTH)
+        start = 0
+        while (self.line_mode and self.__first_line == 1 and
+               self.persistent and not self.paused):
+            end = data.find(b"\r\n\r\n", start)
+            if end == -1 or end - start > limit:
+                # A request head received in pieces is processed a line at
+                # a time as they arrive.
+                break
+            try:
+                command, path, version, headers = parse(data[start:end])
+            except _MalformedRequestHeadError:
+                break
+            if len(headers) > self.maxHeaders:
+                break
+            self.resetTimeout()
+            self._requestHeadReceived(command, path, version, headers)
+            start = end + 4
+            if (start == len(data) or
+                    self.transport and self.transport.disconnecting):
+                return None
+        return data[start:]
 
 
     def headerReceived(self, line):
@@ -2140,8 +2637,54 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             self._respondToBadRequestAndDisconnect()
             return False
 
-        header = header.lower()
-        data = data.strip()
+        return self._processHeader(header.lower(), data.strip())
+
+
+    def _processHeader(self, header, data):
+        """
+        Do pre-processing (for content-length) and store a header away.
+        Enforce the per-request header limit.
+
+        @param header: The header's name, lowercased.
+        @type header: L{bytes}
+
+        @param data: The header's value, stripped of surrounding whitespace.
+        @type data: L{bytes}
+
+        @return: A flag indicating whether the header was valid.
+        @rtype: L{bool}
+        """
+        if not self._lengthHeaderReceived(header, data):
+            return False
+        reqHeaders = self.requests[-1].requestHeaders
+        values = reqHeaders.getRawHeaders(header)
+        if values is not None:
+            values.append(data)
+        else:
+            reqHeaders.setRawHeaders(header, [data])
+
+        self._receivedHeaderCount += 1
+        if self._receivedHeaderCount > self.maxHeaders:
+            self._respondToBadRequestAndDisconnect()
+            return False
+
+        return True
+
+
+    def _lengthHeaderReceived(self, header, data):
+        """
+        Set up the decoding of the request body according to a header, if it
+        is one which gives the body's length or encoding.
+
+        @param header: The header's name, lowercased.
+        @type header: L{bytes}
+
+        @param data: The header's value, stripped of surrounding whitespace.
+        @type data: L{bytes}
+
+        @return: A flag indicating whether the header was valid.
+        @rtype: L{bool}
+        """
         if header == b'content-length':
             try:
                 self.length = int(data)
@@ -2157,18 +2700,6 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
             self.length = None
             self._transferDecoder = _ChunkedTransferDecoder(
                 self.requests[-1].handleContentChunk, self._finishRequestBody)
-        reqHeaders = self.requests[-1].requestHeaders
-        values = reqHeaders.getRawHeaders(header)
-        if values is not None:
-            values.append(data)
-        else:
-            reqHeaders.setRawHeaders(header, [data])
-
-        self._receivedHeaderCount += 1
-        if self._receivedHeaderCount > self.maxHeaders:
-            self._respondToBadRequestAndDisconnect()
-            return False
-
         return True
 
 
@@ -2190,16 +2721,54 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         if self.timeOut:
             self._savedTimeOut = self.setTimeout(None)
 
+        # Anything received after this request is buffered, rather than
+        # parsed, until _resumeReceiving is called.
         self._handlingRequest = True
+        self.setRawMode()
 
         req = self.requests[-1]
         req.requestReceived(command, path, version)
 
+        if self._handlingRequest and self._mayReceiveRequest():
+            self._resumeReceiving()
+
+
+    def _mayReceiveRequest(self):
+        """
+        Determine whether another request may be received.
+
+        @return: L{True} if the connection is persistent, there are fewer than
+            C{maxPipelinedRequests} requests outstanding and no more than
+            C{pipelineBufferSize} bytes of responses are buffered.
+        @rtype: L{bool}
+        """
+        return (self.persistent and
+                len(self.requests) < self.maxPipelinedRequests and
+                self._pipelineBuffered <= self.pipelineBufferSize)
+
+
+    def _resumeReceiving(self):
+        """
+        Receive another request, starting with any data buffered since the
+        last one.
+        """
+        self._handlingRequest = False
+        data = b''.join(self._dataBuffer)
+        self._dataBuffer = []
+        self.setLineMode(data)
+
 
     def dataReceived(self, data):
         """
         Data was received from the network.  Process it.
         """
+        if (self._pipelineBuffered > self.pipelineBufferSize and
+                not self._handlingRequest and
+                self.line_mode and self.__first_line == 1):
+            # Too much of the responses to pipelined requests is buffered to
+            # receive another request until some of them have been written.
+            self._handlingRequest = True
+
         # If we're currently handling a request, buffer this data.
         if self._handlingRequest:
             self._dataBuffer.append(data)
@@ -2214,10 +2783,20 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
                 # ready.  See docstring for _optimisticEagerReadSize above.
                 self._networkProducer.pauseProducing()
             return
+        if (self.requestHeadParser is not None and self.line_mode and
+                self.__first_line == 1 and not self._busyReceiving and
+                not self._overridesLineParsing()):
+            data = self._requestHeadsReceived(data)
+            if data is None:
+                return
         return basic.LineReceiver.dataReceived(self, data)
 
 
     def rawDataReceived(self, data):
+        if self._handlingRequest:
+            # This follows a request which has been received in full.
+            return self.dataReceived(data)
+
         self.resetTimeout()
 
         try:
@@ -2295,18 +2874,21 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         if not self._waitingForTransport:
             self._networkProducer.resumeProducing()
 
-        if self.persistent:
-            self._handlingRequest = False
-
+        if self.requests:
+            # The response to the next request can be written now.
+            if (self._pipelinedChannels and
+                    self._pipelinedChannels[0]._request is self.requests[0]):
+                self._pipelinedChannels.pop(0)._writeBuffered()
+        elif self.persistent:
             if self._savedTimeOut:
                 self.setTimeout(self._savedTimeOut)
-
-            # Receive our buffered data, if any.
-            data = b''.join(self._dataBuffer)
-            self._dataBuffer = []
-            self.setLineMode(data)
         else:
             self.loseConnection()
+            return
+
+        # Receive our buffered data, if any.
+        if self._handlingRequest and self._mayReceiveRequest():
+            self._resumeReceiving()
 
 
     def timeoutConnection(self):
@@ -2382,19 +2964,49 @@ class HTTPChannel(basic.LineReceiver, policies.TimeoutMixin):
         @param headers: The headers to write to the transport.
         @type headers: L{twisted.web.http_headers.Headers}
         """
-        sanitizedHeaders = Headers()
-        for name, value in headers:
-            sanitizedHeaders.addRawHeader(name, value)
+        self.transport.writeSequence(
+            self._encodeHeaders(version, code, reason, headers))
 
-        responseLine = version + b" " + code + b" " + reason + b"\r\n"
+
+    def _encodeHeaders(self, version, code, reason, headers):
+        """
+        Encode a status line and a complete set of HTTP headers.
+
+        @param version: See L{writeHeaders}.
+
+        @param code: See L{writeHeaders}.
+
+        @param reason: See L{writeHeaders}.
+
+        @param headers: See L{writeHeaders}.
+
+        @return: The encoded status line and headers, followed by the empty
+            line which ends them.
+        @rtype: L{list} of L{bytes}
+        """
+        # Group the lines of headers with the same name, as Headers would, in
+        # the order each name first appears.
+        headerLines = {}
+        groups = []
+        for name, value in headers:
+            prefix = _headerLinePrefix(name)
+            if isinstance(value, unicode):
+                value = value.encode('utf8')
+            line = prefix + _sanitizeLinearWhitespace(value) + b"\r\n"
+            lines = headerLines.get(prefix)
+            if lines is None:
+                lines = headerLines[prefix] = []
+                groups.append(lines)
+            lines.append(line)
+
+        responseLine = _statusLines.get((version, code, reason))
+        if responseLine is None:
+            responseLine = version + b" " + code + b" " + reason + b"\r\n"
         headerSequence = [responseLine]
-        headerSequence.extend(
-            name + b': ' + value + b"\r\n"
-            for name, values in sanitizedHeaders.getAllRawHeaders()
-            for value in values
-        )
+        for lines in groups:
+            headerSequence.extend(lines)
         headerSequence.append(b"\r\n")
-        self.transport.writeSequence(headerSequence)
+        return headerSequence
 
 
     def write(self, data):
@@ -2882,6 +3494,28 @@ class _GenericHTTPChannelProtocol(proxyForInterface(IProtocol, "_channel")):
         self._channel.callLater = value
 
 
+    @property
+    def maxPipelinedRequests(self):
+        """
+        The number of pipelined requests the backing channel may process at
+        once.  See L{HTTPChannel.maxPipelinedRequests}.
+        """
+        return self._channel.maxPipelinedRequests
+
+
+    @maxPipelinedRequests.setter
+    def maxPipelinedRequests(self, value):
+        """
+        Sets the number of pipelined requests the backing channel may
+        process at once.  HTTP/2 channels multiplex requests instead, so this
+        is not propagated to one.
+
+        @param value: The number of requests.
+        @type value: L{int}
+        """
+        self._channel.maxPipelinedRequests = value
+
+
     def dataReceived(self, data):
         """
         An override of L{IProtocol.dataReceived} that checks what protocol we're
@@ -2942,9 +3576,14 @@ class HTTPFactory(protocol.ServerFactory):
     @type _logDateTime: C{str}
 
     @ivar _logDateTimeCall: A delayed call for the next update to the cached
-        log datetime string.
+        log datetime string and I{Date} header.
     @type _logDateTimeCall: L{IDelayedCall} provided
 
+    @ivar _dateHeader: A cached value for the I{Date} header of responses,
+        updated by C{_logDateTimeCall}, or L{None} while the factory is not
+        started.
+    @type _dateHeader: L{bytes}
+
     @ivar _logFormatter: See the C{logFormatter} parameter to L{__init__}
 
     @ivar _nativeize: A flag that indicates whether the log file being written
@@ -2954,6 +3593,10 @@ class HTTPFactory(protocol.ServerFactory):
 
     @ivar _reactor: An L{IReactorTime} provider used to compute logging
         timestamps.
+
+    @ivar maxPipelinedRequests: The C{maxPipelinedRequests} of the channels
+        this factory builds; see L{HTTPChannel.maxPipelinedRequests}.
+    @type maxPipelinedRequests: L{int}
     """
 
     protocol = _genericHTTPChannelProtocolFactory
@@ -2962,6 +3605,8 @@ class HTTPFactory(protocol.ServerFactory):
 
     timeOut = _REQUEST_TIMEOUT
 
+    maxPipelinedRequests = 1
+
     def __init__(self, logPath=None, timeout=_REQUEST_TIMEOUT,
                  logFormatter=None, reactor=None):
         """
@@ -2993,16 +3638,21 @@ class HTTPFactory(protocol.ServerFactory):
             logFormatter = combinedLogFormatter
         self._logFormatter = logFormatter
 
-        # For storing the cached log datetime and the callback to update it
+        # For storing the cached log datetime and Date header and the
+        # callback to update them
         self._logDateTime = None
+        self._dateHeader = None
         self._logDateTimeCall = None
 
 
     def _updateLogDateTime(self):
         """
-        Update log datetime periodically, so we aren't always recalculating it.
+        Update log datetime and the I{Date} header periodically, so we aren't
+        always recalculating them.
         """
-        self._logDateTime = datetimeToLogString(self._reactor.seconds())
+        now = self._reactor.seconds()
+        self._logDateTime = datetimeToLogString(now)
+        self._dateHeader = datetimeToString(now)
         self._logDateTimeCall = self._reactor.callLater(1, self._updateLogDateTime)
 
 
@@ -3019,6 +3669,7 @@ class HTTPFactory(protocol.ServerFactory):
         # timeOut needs to be on the Protocol instance cause
         # TimeoutMixin expects it there
         p.timeOut = self.timeOut
+        p.maxPipelinedRequests = self.maxPipelinedRequests
         return p
 
 
@@ -3044,6 +3695,7 @@ class HTTPFactory(protocol.ServerFactory):
         if self._logDateTimeCall is not None and self._logDateTimeCall.active():
             self._logDateTimeCall.cancel()
             self._logDateTimeCall = None
+        self._dateHeader = None
 
 
     def _openLogFile(self, path):
@@ -11,6 +11,50 @@ from __future__ import division, absolute_import
 from twisted.python.compat import comparable, cmp, unicode
 
 
+
+# The names of headers commonly sent in requests and responses, in their
+# canonical capitalization.
+_commonHeaderNames = [
+    b"Accept", b"Accept-Charset", b"Accept-Encoding", b"Accept-Language",
+    b"Accept-Ranges", b"Access-Control-Allow-Origin", b"Age", b"Allow",
+    b"Authorization", b"Cache-Control", b"Connection",
+    b"Content-Disposition", b"Content-Encoding", b"Content-Language",
+    b"Content-Length", b"Content-Location", b"Content-MD5",
+    b"Content-Range", b"Content-Type", b"Cookie", b"DNT", b"Date", b"ETag",
+    b"Expect", b"Expires", b"Forwarded", b"From", b"Host", b"If-Match",
+    b"If-Modified-Since", b"If-None-Match", b"If-Range",
+    b"If-Unmodified-Since", b"Keep-Alive", b"Last-Modified", b"Link",
+    b"Location", b"Origin", b"P3P", b"Pragma", b"Proxy-Authenticate",
+    b"Proxy-Authorization", b"Range", b"Referer", b"Retry-After",
+    b"Server", b"Set-Cookie", b"Strict-Transport-Security", b"TE",
+    b"Trailer", b"Transfer-Encoding", b"Upgrade", b"User-Agent", b"Vary",
+    b"Via", b"WWW-Authenticate", b"Warning", b"X-Forwarded-For",
+    b"X-Forwarded-Host", b"X-Forwarded-Proto", b"X-Requested-With",
+    b"X-XSS-Protection",
+]
+
+# The most names _encodedNames and _canonicalNames will each hold, so that
+# a peer sending many different header names cannot make them grow without
+# bound.
+_maxCachedNames = 1000
+
+# Header names as given to Headers, as bytes or unicode, mapped to their
+# lowercase bytes form.
+_encodedNames = {}
+
+# Lowercase header names mapped to their canonical capitalization.
+_canonicalNames = {}
+
+for _name in _commonHeaderNames:
+    _lowercaseName = _name.lower()
+    _canonicalNames[_lowercaseName] = _name
+    for _spelling in (_name, _lowercaseName):
+        _encodedNames[_spelling] = _lowercaseName
+        _encodedNames[_spelling.decode("ascii")] = _lowercaseName
+del _name, _lowercaseName, _spelling
+
+
+
 def _dashCapitalize(name):
     """
     Return a byte string which is capitalized using '-' as a word separator.
@@ -37,6 +81,8 @@ def _sanitizeLinearWhitespace(headerComponent):
     @return: The sanitized header key or value.
     @rtype: L{bytes}
     """
+    if b'\n' not in headerComponent and b'\r' not in headerComponent:
+        return headerComponent
     return b' '.join(headerComponent.splitlines())
 
 
@@ -57,6 +103,10 @@ class Headers(object):
     ensure no decoding or encoding is done, and L{Headers} will treat the keys
     and values as opaque byte strings.
 
+    Header names are lowercased and capitalized through tables which are
+    filled in ahead of time for common headers, and as other names are
+    used.
+
     @cvar _caseMappings: A L{dict} that maps lowercase header names
         to their canonicalized representation.
 
@@ -79,6 +129,32 @@ class Headers(object):
                 self.setRawHeaders(name, values)
 
 
+    @classmethod
+    def _fromParsed(cls, headers):
+        """
+        Create a L{Headers} from the headers of a parsed message, in one
+        pass.
+
+        @param headers: The name, already lowercased, and value of each
+            header, in the order they were received.
+        @type headers: iterable of 2-L{tuple}s of L{bytes}
+
+        @return: The headers.
+        @rtype: L{Headers}
+        """
+        self = cls()
+        rawHeaders = self._rawHeaders
+        for name, value in headers:
+            name = _sanitizeLinearWhitespace(name)
+            value = _sanitizeLinearWhitespace(value)
+            values = rawHeaders.get(name)
+            if values is None:
+                rawHeaders[name] = [value]
+            else:
+                values.append(value)
+        return self
+
+
     def __repr__(self):
         """
         Return a string fully describing the headers set on this object.
@@ -109,9 +185,15 @@ class Headers(object):
         @return: C{name}, encoded if required, lowercased
         @rtype: L{bytes}
         """
-        if isinstance(name, unicode):
-            return name.lower().encode('iso-8859-1')
-        return name.lower()
+        encoded = _encodedNames.get(name)
+        if encoded is None:
+            if isinstance(name, unicode):
+                encoded = name.lower().encode('iso-8859-1')
+            else:
+                encoded = name.lower()
+            if len(_encodedNames) < _maxCachedNames:
+                _encodedNames[name] = encoded
+        return encoded
 
 
     def _encodeValue(self, value):
@@ -170,7 +252,12 @@ class Headers(object):
 
         @return: A new L{Headers}
         """
-        return self.__class__(self._rawHeaders)
+        # The names and values are already encoded and sanitized, so only the
+        # lists of values need copying.
+        copied = self.__class__()
+        copied._rawHeaders = dict(
+            (name, values[:]) for name, values in self._rawHeaders.items())
+        return copied
 
 
     def hasHeader(self, name):
@@ -216,10 +303,8 @@ class Headers(object):
                             "instance of %r instead" % (name, type(values)))
 
         name = _sanitizeLinearWhitespace(self._encodeName(name))
-        encodedValues = [_sanitizeLinearWhitespace(v)
-                         for v in self._encodeValues(values)]
-
-        self._rawHeaders[name] = self._encodeValues(encodedValues)
+        self._rawHeaders[name] = [_sanitizeLinearWhitespace(v)
+                                  for v in self._encodeValues(values)]
 
 
     def addRawHeader(self, name, value):
@@ -287,7 +372,14 @@ class Headers(object):
         @rtype: L{bytes}
         @return: The canonical name of the header.
         """
-        return self._caseMappings.get(name, _dashCapitalize(name))
+        canonical = self._caseMappings.get(name)
+        if canonical is None:
+            canonical = _canonicalNames.get(name)
+            if canonical is None:
+                canonical = _dashCapitalize(name)
+                if len(_canonicalNames) < _maxCachedNames:
+                    _canonicalNames[name] = canonical
+        return canonical
 
 
 
@@ -0,0 +1 @@
+HTTPChannel now parses each request head received all at once in one pass, using httptools when it is installed.
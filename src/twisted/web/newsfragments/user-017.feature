@@ -0,0 +1 @@
+HTTPChannel.maxPipelinedRequests lets a connection process several pipelined requests at once, buffering their responses so they are still written in order.
@@ -0,0 +1 @@
+twisted.web.template.flatten takes a bufferSize to coalesce its output into fewer writes, which renderElement uses, and TagLoader, XMLString and XMLFile take preFlatten=True to flatten the static parts of their templates once, ahead of rendering.
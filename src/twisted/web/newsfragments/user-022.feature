@@ -0,0 +1 @@
+WSGIResource takes maxQueuedRequests, to answer requests with 503 Service Unavailable rather than queueing them without bound, and writeBufferSize, to batch the writes of WSGI applications.
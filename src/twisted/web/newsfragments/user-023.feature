@@ -0,0 +1 @@
+twisted.web.client.HTTPConnectionPool can speak HTTP/2 to servers which negotiate it with ALPN when its new http2 attribute is set, sending concurrent requests to the same server over one connection.
@@ -0,0 +1 @@
+HTTPConnectionPool can warm up connections with warmUp, cap the connections per host with maxConnectionsPerHost, reuse connections most-recently-returned-first with reusePolicy, and report per-host statistics, and it drops cached connections as soon as they are lost.
@@ -0,0 +1 @@
+twisted.web.server can compress responses with brotli and Zstandard through the new BrotliEncoderFactory and ZstandardEncoderFactory, all compressing encoder factories can skip small or incompressible responses and lower their level under load, twisted.web.client gains BrotliDecoder and ZstandardDecoder, and twisted.web.static.File can serve pre-compressed files through precompressedEncodings.
@@ -17,7 +17,6 @@ from __future__ import division, absolute_import
 
 import copy
 import os
-import re
 try:
     from urllib import quote
 except ImportError:
@@ -29,6 +28,17 @@ except ImportError:
 
 import zlib
 from binascii import hexlify
+from timeit import default_timer as _clock
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 from zope.interface import implementer
 
@@ -57,7 +67,9 @@ __all__ = [
     'Site',
     'version',
     'NOT_DONE_YET',
-    'GzipEncoderFactory'
+    'GzipEncoderFactory',
+    'BrotliEncoderFactory',
+    'ZstandardEncoderFactory',
 ]
 
 
@@ -179,7 +191,10 @@ class Request(Copyable, http.Request, components.Componentized):
 
         # set various default headers
         self.setHeader(b'server', version)
-        self.setHeader(b'date', http.datetimeToString())
+        date = getattr(self.site, "_dateHeader", None)
+        if date is None:
+            date = http.datetimeToString()
+        self.setHeader(b'date', date)
 
         # Resource Identification
         self.prepath = []
@@ -570,77 +585,344 @@ class Request(Copyable, http.Request, components.Componentized):
         self.finish()
 
 
+def _encodingQuality(request, encoding):
+    """
+    Find how much the client which sent a request would like its response
+    in a content coding, from the request's I{Accept-Encoding} headers.
+
+    @param request: The request.
+    @type request: L{twisted.web.iweb.IRequest}
+
+    @param encoding: The name of the content coding, in lower case.
+    @type encoding: L{bytes}
+
+    @return: The quality value the client gave the coding, or gave C{*} if
+        it did not name it; 0 if the coding is not acceptable.
+    @rtype: L{float}
+    """
+    wildcard = 0.0
+    for value in request.requestHeaders.getRawHeaders(b'accept-encoding', []):
+        for element in value.split(b','):
+            params = element.split(b';')
+            name = params[0].strip().lower()
+            quality = 1.0
+            for param in params[1:]:
+                key, _, q = param.partition(b'=')
+                if key.strip().lower() == b'q':
+                    try:
+                        quality = float(q.strip())
+                    except ValueError:
+                        quality = 0.0
+            if name == encoding:
+                return quality
+            if name == b'*':
+                wildcard = quality
+    return wildcard
+
+
+
 @implementer(iweb._IRequestEncoderFactory)
-class GzipEncoderFactory(object):
+class _CompressingEncoderFactory(object):
     """
-    @cvar compressLevel: The compression level used by the compressor, default
-        to 9 (highest).
+    A factory for encoders which compress responses with a content coding,
+    for clients which accept it.
 
-    @since: 12.3
+    Whether to compress a response is decided when it is first written, by
+    which time its headers are set.
+
+    Responses are compressed with gzip, unless a subclass sets another
+    C{encoding} and makes a compressor for it.
+
+    @cvar encoding: The name of the content coding.
+    @type encoding: L{bytes}
+
+    @cvar compressLevel: The compression level used by the compressor.
+    @type compressLevel: L{int}
+
+    @cvar minimumLength: Responses whose I{Content-Length} is less than this
+        are not compressed.  Responses of unknown length are.
+    @type minimumLength: L{int}
+
+    @cvar contentTypes: The media types of the responses to compress, or
+        L{None} to compress responses of any type.  A type such as
+        C{b"text/*"} stands for all of its subtypes.
+    @type contentTypes: L{None} or a collection of L{bytes}
+
+    @cvar loadCompressLevel: The compression level to use instead of
+        C{compressLevel} while compressing keeps the reactor busy, or L{None}
+        to always use C{compressLevel}.
+    @type loadCompressLevel: L{int} or L{None}
+
+    @cvar maximumLoad: The fraction of its time the reactor may spend
+        compressing for this factory, measured over about a second, before
+        C{loadCompressLevel} is used.
+    @type maximumLoad: L{float}
+
+    @ivar _loadStarted: When the current measurement of the time spent
+        compressing began, or L{None} before anything has been compressed.
+
+    @ivar _busy: The number of seconds spent compressing since
+        C{_loadStarted}.
+
+    @ivar _load: The fraction of its time the reactor spent compressing in
+        the last complete measurement.
     """
-    _gzipCheckRegex = re.compile(br'(:?^|[\s,])gzip(:?$|[\s,])')
+    encoding = b'gzip'
     compressLevel = 9
+    minimumLength = 0
+    contentTypes = None
+    loadCompressLevel = None
+    maximumLoad = 0.5
+
+    _loadInterval = 1.0
+    _loadStarted = None
+    _busy = 0.0
+    _load = 0.0
 
     def encoderForRequest(self, request):
         """
-        Check the headers if the client accepts gzip encoding, and encodes the
-        request if so.
+        Check the headers if the client accepts this encoding, and return an
+        encoder for the response if so.
+        """
+        if self._available() and _encodingQuality(request, self.encoding):
+            return _CompressingEncoder(self, request)
+
+
+    def _available(self):
+        """
+        @return: Whether the module this factory's encoding needs can be used.
+        @rtype: L{bool}
+        """
+        return True
+
+
+    def _compressor(self, compressLevel):
         """
-        acceptHeaders = b','.join(
-            request.requestHeaders.getRawHeaders(b'accept-encoding', []))
-        if self._gzipCheckRegex.search(acceptHeaders):
-            encoding = request.responseHeaders.getRawHeaders(
-                b'content-encoding')
-            if encoding:
-                encoding = b','.join(encoding + [b'gzip'])
+        Make a compressor.
+
+        @param compressLevel: The compression level to use.
+        @type compressLevel: L{int}
+
+        @return: A callable which compresses some data with gzip, and a
+            callable which returns the rest of the compressed data at the
+            end.
+        @rtype: L{tuple} of two callables
+        """
+        compressor = zlib.compressobj(
+            compressLevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+
+
+    def _shouldCompress(self, request):
+        """
+        Decide whether to compress a response, given its headers.
+
+        @param request: The request the response is for.
+        @type request: L{Request}
+
+        @rtype: L{bool}
+        """
+        if request.code in (http.NO_CONTENT, http.NOT_MODIFIED):
+            return False
+        headers = request.responseHeaders
+        if self.minimumLength:
+            contentLength = headers.getRawHeaders(b'content-length')
+            if (contentLength is not None and contentLength[0].isdigit() and
+                    int(contentLength[0]) < self.minimumLength):
+                return False
+        if self.contentTypes is not None:
+            contentType = headers.getRawHeaders(b'content-type')
+            if contentType is None:
+                return False
+            mediaType = contentType[0].split(b';')[0].strip().lower()
+            for wanted in self.contentTypes:
+                if wanted == mediaType:
+                    break
+                if (wanted.endswith(b'/*') and
+                        mediaType.startswith(wanted[:-1])):
+                    break
             else:
-                encoding = b'gzip'
+                return False
+        return True
 
-            request.responseHeaders.setRawHeaders(b'content-encoding',
-                                                  [encoding])
-            return _GzipEncoder(self.compressLevel, request)
+
+    def _currentCompressLevel(self):
+        """
+        Choose the compression level for a response, lowering it if
+        compressing has been keeping the reactor busy.
+
+        @rtype: L{int}
+        """
+        if self.loadCompressLevel is not None:
+            self._compressed(0.0)
+            if self._load > self.maximumLoad:
+                return self.loadCompressLevel
+        return self.compressLevel
+
+
+    def _compressed(self, duration):
+        """
+        Count time spent compressing towards the current measurement of the
+        load compressing puts on the reactor, and finish the measurement if
+        it has gone on long enough.
+
+        @param duration: The number of seconds spent compressing.
+        @type duration: L{float}
+        """
+        now = _clock()
+        if self._loadStarted is None:
+            self._loadStarted = now - duration
+        self._busy += duration
+        elapsed = now - self._loadStarted
+        if elapsed >= self._loadInterval:
+            self._load = self._busy / elapsed
+            self._loadStarted = now
+            self._busy = 0.0
+
+
+    def _timed(self, f, *args):
+        """
+        Call a compressor, measuring how long it takes if the load compressing
+        puts on the reactor is being measured.
+        """
+        if self.loadCompressLevel is None:
+            return f(*args)
+        started = _clock()
+        result = f(*args)
+        self._compressed(_clock() - started)
+        return result
+
+
+
+class GzipEncoderFactory(_CompressingEncoderFactory):
+    """
+    A factory for encoders which compress responses with gzip.
+
+    @cvar compressLevel: The compression level used by the compressor, default
+        to 9 (highest).
+
+    @since: 12.3
+    """
+    encoding = b'gzip'
+    compressLevel = 9
+
+
+
+class BrotliEncoderFactory(_CompressingEncoderFactory):
+    """
+    A factory for encoders which compress responses with brotli.  This needs
+    the C{brotli} module; without it, no responses are compressed.
+
+    @cvar compressLevel: The brotli quality used by the compressor, from 0 to
+        11, default to 4.
+    """
+    encoding = b'br'
+    compressLevel = 4
+
+    def _available(self):
+        return brotli is not None
+
+
+    def _compressor(self, compressLevel):
+        compressor = brotli.Compressor(quality=compressLevel)
+        return compressor.process, compressor.finish
+
+
+
+class ZstandardEncoderFactory(_CompressingEncoderFactory):
+    """
+    A factory for encoders which compress responses with Zstandard.  This
+    needs the C{zstandard} module; without it, no responses are compressed.
+
+    @cvar compressLevel: The compression level used by the compressor, default
+        to 3.
+    """
+    encoding = b'zstd'
+    compressLevel = 3
+
+    def _available(self):
+        return zstandard is not None
+
+
+    def _compressor(self, compressLevel):
+        compressor = zstandard.ZstdCompressor(
+            level=compressLevel).compressobj()
+        return compressor.compress, compressor.flush
 
 
 
 @implementer(iweb._IRequestEncoder)
-class _GzipEncoder(object):
+class _CompressingEncoder(object):
     """
-    An encoder which supports gzip.
+    An encoder which compresses a response, if its factory decides to when it
+    is first written.
 
-    @ivar _zlibCompressor: The zlib compressor instance used to compress the
-        stream.
+    @ivar _factory: The L{_CompressingEncoderFactory} which made this.
 
     @ivar _request: A reference to the originating request.
 
-    @since: 12.3
-    """
+    @ivar _started: Whether the factory has decided whether to compress the
+        response yet.
 
-    _zlibCompressor = None
+    @ivar _compress: Compresses some of the response, or L{None} if it is not
+        being compressed.
 
-    def __init__(self, compressLevel, request):
-        self._zlibCompressor = zlib.compressobj(
-            compressLevel, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    @ivar _flush: Returns the rest of the compressed response, or L{None} if
+        it is not being compressed.
+    """
+    _started = False
+    _compress = None
+    _flush = None
+
+    def __init__(self, factory, request):
+        self._factory = factory
         self._request = request
 
 
+    def _start(self):
+        """
+        Decide whether to compress the response, before its headers are
+        written, and say so in them if so.
+        """
+        self._started = True
+        if not self._factory._shouldCompress(self._request):
+            return
+        headers = self._request.responseHeaders
+        encoding = headers.getRawHeaders(b'content-encoding')
+        if encoding:
+            encoding = b','.join(encoding + [self._factory.encoding])
+        else:
+            encoding = self._factory.encoding
+        headers.setRawHeaders(b'content-encoding', [encoding])
+        # Remove the content-length header, we can't honor it because we
+        # compress on the fly.
+        headers.removeHeader(b'content-length')
+        self._compress, self._flush = self._factory._compressor(
+            self._factory._currentCompressLevel())
+
+
     def encode(self, data):
         """
         Write to the request, automatically compressing data on the fly.
         """
-        if not self._request.startedWriting:
-            # Remove the content-length header, we can't honor it
-            # because we compress on the fly.
-            self._request.responseHeaders.removeHeader(b'content-length')
-        return self._zlibCompressor.compress(data)
+        if not self._started:
+            self._start()
+        if self._compress is None:
+            return data
+        return self._factory._timed(self._compress, data)
 
 
     def finish(self):
         """
-        Finish handling the request request, flushing any data from the zlib
-        buffer.
+        Finish handling the request request, flushing any data from the
+        compressor.
         """
-        remain = self._zlibCompressor.flush()
-        self._zlibCompressor = None
+        if not self._started:
+            self._start()
+        if self._flush is None:
+            return b''
+        remain = self._factory._timed(self._flush)
+        self._compress = self._flush = None
         return remain
 
 
@@ -204,6 +204,13 @@ class File(resource.Resource, filepath.FilePath):
     @ivar contentEncodings: a mapping of extensions to encoding types used to
         set default value for the Content-Encoding header.
     @type contentEncodings: C{dict}
+
+    @ivar precompressedEncodings: pairs of an extension and an encoding
+        type, such as C{(".gz", "gzip")}, in order of preference.  A file
+        with the extension added to this one's name, compressed ahead of
+        time, is sent instead of this one to clients which accept the
+        encoding, unless it is older than this one.  Empty by default.
+    @type precompressedEncodings: C{list} of C{tuple}
     """
 
     contentTypes = loadMimeTypes()
@@ -217,6 +224,8 @@ class File(resource.Resource, filepath.FilePath):
 
     indexNames = ["index", "index.html", "index.htm", "index.rpy"]
 
+    precompressedEncodings = ()
+
     type = None
 
     def __init__(self, path, defaultType="text/html", ignoredExts=(), registry=None, allowExt=0):
@@ -657,6 +666,12 @@ class File(resource.Resource, filepath.FilePath):
         if self.isdir():
             return self.redirect(request)
 
+        if self.precompressedEncodings and not self.encoding:
+            request.setHeader(b'vary', b'accept-encoding')
+            precompressed = self._precompressedFor(request)
+            if precompressed is not None:
+                return precompressed.render_GET(request)
+
         request.setHeader(b'accept-ranges', b'bytes')
 
         try:
@@ -690,6 +705,29 @@ class File(resource.Resource, filepath.FilePath):
     render_HEAD = render_GET
 
 
+    def _precompressedFor(self, request):
+        """
+        Find the file compressed ahead of time to send instead of this one, if
+        there is one the client accepts.
+
+        @param request: The L{twisted.web.http.Request} object.
+
+        @return: A L{File} for the compressed file, with this one's type, or
+            L{None}.
+        """
+        for extension, encoding in self.precompressedEncodings:
+            if not server._encodingQuality(request, networkString(encoding)):
+                continue
+            precompressed = self.siblingExtension(extension)
+            if (precompressed.isfile() and
+                    precompressed.getModificationTime() >=
+                    self.getModificationTime()):
+                f = self.createSimilarFile(precompressed.path)
+                f.type = self.type
+                f.encoding = encoding
+                return f
+
+
     def redirect(self, request):
         return redirectTo(_addSlash(request), request)
 
@@ -711,10 +749,38 @@ class File(resource.Resource, filepath.FilePath):
         f.processors = self.processors
         f.indexNames = self.indexNames[:]
         f.childNotFound = self.childNotFound
+        f.precompressedEncodings = self.precompressedEncodings
         return f
 
 
 
+def _sendfileTransport(request):
+    """
+    Find the transport the body of a response to C{request} can be sent over
+    with L{interfaces.ISendfileTransport.sendFile}.
+
+    @param request: The L{IRequest} being responded to.
+
+    @return: The transport of the request's channel, if it supports
+        C{sendFile} and the body would be written to it unmodified, otherwise
+        L{None}.
+    """
+    channel = getattr(request, "channel", None)
+    if not isinstance(channel, http.HTTPChannel):
+        return None
+    transport = channel.transport
+    if not interfaces.ISendfileTransport.providedBy(transport):
+        return None
+    if (getattr(request, "_encoder", None) is not None or
+            getattr(request, "_inFakeHead", False)):
+        return None
+    if not request.responseHeaders.hasHeader(b"content-length"):
+        # The body would be sent with the chunked transfer coding.
+        return None
+    return transport
+
+
+
 @implementer(interfaces.IPullProducer)
 class StaticProducer(object):
     """
@@ -755,6 +821,43 @@ class StaticProducer(object):
         self.request = None
 
 
+    def _sendFile(self, offset, size):
+        """
+        Write the response headers, then send part of the file directly over
+        the request's transport, if it allows that.
+
+        @param offset: The offset into the file of the first byte to send.
+        @param size: The number of bytes to send, or L{None} to send the rest
+            of the file.
+
+        @return: C{True} if the file is being sent, C{False} if it has to be
+            written to the request instead.
+        """
+        transport = _sendfileTransport(self.request)
+        if transport is None:
+            return False
+        self.request.write(b"")
+        d = transport.sendFile(self.fileObject, offset, size)
+        d.addCallbacks(self._fileSent, self._fileNotSent)
+        return True
+
+
+    def _fileSent(self, sent):
+        """
+        The file has been sent by the transport; finish the request.
+        """
+        self.request.sentLength += sent
+        self.request.finish()
+        self.stopProducing()
+
+
+    def _fileNotSent(self, reason):
+        """
+        The connection was lost before the file had been sent.
+        """
+        self.stopProducing()
+
+
 
 class NoRangeStaticProducer(StaticProducer):
     """
@@ -762,7 +865,8 @@ class NoRangeStaticProducer(StaticProducer):
     """
 
     def start(self):
-        self.request.registerProducer(self, False)
+        if not self._sendFile(0, None):
+            self.request.registerProducer(self, False)
 
 
     def resumeProducing(self):
@@ -800,8 +904,10 @@ class SingleRangeStaticProducer(StaticProducer):
 
 
     def start(self):
-        self.fileObject.seek(self.offset)
         self.bytesWritten = 0
+        if self._sendFile(self.offset, self.size):
+            return
+        self.fileObject.seek(self.offset)
         self.request.registerProducer(self, 0)
 
 
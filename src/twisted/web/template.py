@@ -53,6 +53,10 @@ TEMPLATE_NAMESPACE = 'http://twistedmatrix.com/ns/twisted.web.template/0.1'
 NOT_DONE_YET = 1
 _moduleLog = Logger()
 
+# The size of the chunks renderElement writes a rendered element to its
+# request in, rather than writing each of its tags and strings separately.
+_RENDER_BUFFER_SIZE = 2 ** 16
+
 
 class _NSContext(object):
     """
@@ -358,21 +362,183 @@ def _flatsaxParse(fl):
     return s.document
 
 
+# Parsed templates, least recently used first, keyed on what they were
+# parsed from: the text of an XMLString, or the path, modification time and
+# size of the file of an XMLFile.
+_parsedTemplates = OrderedDict()
+
+# The most templates _parsedTemplates holds.
+_MAX_PARSED_TEMPLATES = 256
+
+
+
+class _ParsedTemplate(object):
+    """
+    A parsed template, shared through L{_parsedTemplates} by the loaders of
+    the same XML.
+
+    @ivar _document: The parsed template, which is never given out so that
+        changes made to a loaded template do not leak into other loaders.
+    @type _document: a C{list} of Stan objects.
+
+    @ivar _preFlattened: The pre-flattened form of C{_document}, or L{None}
+        if it has not been needed yet.
+    @type _preFlattened: L{list} or L{None}
+    """
+
+    def __init__(self, document):
+        self._document = document
+        self._preFlattened = None
+
+
+    def copy(self):
+        """
+        Copy the parsed template.
+
+        @return: A deep copy of the parsed template.
+        @rtype: a C{list} of Stan objects.
+        """
+        return [node.clone() if isinstance(node, Tag) else node
+                for node in self._document]
+
+
+    def preFlattened(self):
+        """
+        Copy the pre-flattened form of the parsed template, pre-flattening it
+        the first time this is called.
+
+        The flattened parts are shared by every copy, but the tags left to be
+        rendered are copied, since their renderers may change them in place.
+
+        @return: A L{list} which flattens as the parsed template does.
+        """
+        if self._preFlattened is None:
+            self._preFlattened = _preFlatten(self._document)
+        return [node.clone() if isinstance(node, Tag) else node
+                for node in self._preFlattened]
+
+
+
+def _parseCached(key, parse):
+    """
+    Find a parsed template in L{_parsedTemplates}, parsing it and adding it
+    there if it is not there already.
+
+    @param key: What the template is parsed from.
+
+    @param parse: A callable which takes no arguments, and parses the
+        template.
+
+    @rtype: L{_ParsedTemplate}
+    """
+    parsed = _parsedTemplates.pop(key, None)
+    if parsed is None:
+        parsed = _ParsedTemplate(parse())
+    _parsedTemplates[key] = parsed
+    while len(_parsedTemplates) > _MAX_PARSED_TEMPLATES:
+        _parsedTemplates.popitem(last=False)
+    return parsed
+
+
+
+class _PreFlatteningLoader(object):
+    """
+    Base for the L{ITemplateLoader}s here, which can keep their templates
+    with the parts which are the same for every request flattened ahead of
+    time, for L{Element.render} to use.
+
+    @ivar preFlatten: If C{True}, L{Element.render} is given the template
+        with the parts which do not depend on renderers or slots flattened
+        when it is first rendered, and the template must not be changed in
+        place after that.  If C{False}, it is given the template as loaded.
+    @type preFlatten: L{bool}
+
+    @ivar _preFlattened: The template last returned by C{load} and its
+        pre-flattened form, or L{None} if it has not been pre-flattened yet.
+    @type _preFlattened: 2-L{tuple} of L{list}, or L{None}
+
+    @ivar _parsed: The template returned by C{_copyParsed} and the
+        L{_ParsedTemplate} it was copied from, or L{None}.
+    @type _parsed: 2-L{tuple} of L{list} and L{_ParsedTemplate}, or L{None}
+    """
+    preFlatten = False
+    _preFlattened = None
+    _parsed = None
+
+    def _copyParsed(self, parsed):
+        """
+        Copy a parsed template for this loader to load, so that it can use
+        the pre-flattened form shared by the loaders of the same template.
+
+        @param parsed: The parsed template.
+        @type parsed: L{_ParsedTemplate}
+
+        @return: A copy of the parsed template.
+        @rtype: a C{list} of Stan objects.
+        """
+        document = parsed.copy()
+        self._parsed = (list(document), parsed)
+        return document
+
+
+    def _loadPreFlattened(self):
+        """
+        Load the template, and pre-flatten it if C{load} returned something
+        else last time.
+
+        @return: A L{list} which flattens as the result of C{load} does.
+        """
+        document = self.load()
+        if self._preFlattened is not None:
+            loaded, preFlattened = self._preFlattened
+            if _sameDocument(loaded, document):
+                return preFlattened
+        if self._parsed is not None and _sameDocument(self._parsed[0],
+                                                      document):
+            preFlattened = self._parsed[1].preFlattened()
+        else:
+            preFlattened = _preFlatten(document)
+        self._preFlattened = (list(document), preFlattened)
+        return preFlattened
+
+
+
+def _sameDocument(a, b):
+    """
+    Determine whether two templates are made of the same objects.
+
+    @type a: L{list}
+    @type b: L{list}
+    @rtype: L{bool}
+    """
+    return len(a) == len(b) and all(x is y for (x, y) in zip(a, b))
+
+
+
 @implementer(ITemplateLoader)
-class TagLoader(object):
+class TagLoader(_PreFlatteningLoader):
     """
     An L{ITemplateLoader} that loads existing L{IRenderable} providers.
 
+    If C{preFlatten} is set, the parts of C{tag} which do not depend on
+    renderers or slots are flattened when an L{Element} first renders it, so
+    C{tag} should not be changed in place after that; set C{tag} to a new
+    object instead.
+
     @ivar tag: The object which will be loaded.
     @type tag: An L{IRenderable} provider.
     """
 
-    def __init__(self, tag):
+    def __init__(self, tag, preFlatten=False):
         """
         @param tag: The object which will be loaded.
         @type tag: An L{IRenderable} provider.
+
+        @param preFlatten: See L{_PreFlatteningLoader.preFlatten}.
+        @type preFlatten: L{bool}
         """
         self.tag = tag
+        self.preFlatten = preFlatten
 
 
     def load(self):
@@ -381,7 +547,7 @@ class TagLoader(object):
 
 
 @implementer(ITemplateLoader)
-class XMLString(object):
+class XMLString(_PreFlatteningLoader):
     """
     An L{ITemplateLoader} that loads and parses XML from a string.
 
@@ -389,17 +555,24 @@ class XMLString(object):
     @type _loadedTemplate: a C{list} of Stan objects.
     """
 
-    def __init__(self, s):
+    def __init__(self, s, preFlatten=False):
         """
-        Run the parser on a L{NativeStringIO} copy of the string.
+        Run the parser on a L{NativeStringIO} copy of the string, unless the
+        same string has been parsed recently.
 
         @param s: The string from which to load the XML.
         @type s: C{str}, or a UTF-8 encoded L{bytes}.
+
+        @param preFlatten: See L{_PreFlatteningLoader.preFlatten}.
+        @type preFlatten: L{bool}
         """
+        self.preFlatten = preFlatten
         if not isinstance(s, str):
             s = s.decode('utf8')
 
-        self._loadedTemplate = _flatsaxParse(NativeStringIO(s))
+        parsed = _parseCached(
+            s, lambda: _flatsaxParse(NativeStringIO(s)))
+        self._loadedTemplate = self._copyParsed(parsed)
 
 
     def load(self):
@@ -414,7 +587,7 @@ class XMLString(object):
 
 
 @implementer(ITemplateLoader)
-class XMLFile(object):
+class XMLFile(_PreFlatteningLoader):
     """
     An L{ITemplateLoader} that loads and parses XML from a file.
 
@@ -425,13 +598,17 @@ class XMLFile(object):
         loaded from.
     """
 
-    def __init__(self, path):
+    def __init__(self, path, preFlatten=False):
         """
         Run the parser on a file.
 
         @param path: The file from which to load the XML.
         @type path: L{FilePath}
+
+        @param preFlatten: See L{_PreFlatteningLoader.preFlatten}.
+        @type preFlatten: L{bool}
         """
+        self.preFlatten = preFlatten
         if not isinstance(path, FilePath):
             warnings.warn(
                 "Passing filenames or file objects to XMLFile is deprecated "
@@ -443,7 +620,8 @@ class XMLFile(object):
 
     def _loadDoc(self):
         """
-        Read and parse the XML.
+        Read and parse the XML, unless a L{FilePath} with the same path,
+        modification time, and size has been parsed recently.
 
         @return: the loaded document.
         @rtype: a C{list} of Stan objects.
@@ -451,8 +629,13 @@ class XMLFile(object):
         if not isinstance(self._path, FilePath):
             return _flatsaxParse(self._path)
         else:
-            with self._path.open('r') as f:
-                return _flatsaxParse(f)
+            def parse():
+                with self._path.open('r') as f:
+                    return _flatsaxParse(f)
+            self._path.restat()
+            key = (self._path.path, self._path.getModificationTime(),
+                   self._path.getsize())
+            return self._copyParsed(_parseCached(key, parse))
 
 
     def __repr__(self):
@@ -541,13 +724,12 @@ def renderElement(request, element,
     @since: 12.1
     """
     if doctype is not None:
-        request.write(doctype)
-        request.write(b'\n')
+        request.write(doctype + b'\n')
 
     if _failElement is None:
         _failElement = twisted.web.util.FailureElement
 
-    d = flatten(request, element, request.write)
+    d = flatten(request, element, request.write, _RENDER_BUFFER_SIZE)
 
     def eb(failure):
         _moduleLog.failure(
@@ -571,5 +753,5 @@ def renderElement(request, element,
 
 
 from twisted.web._element import Element, renderer
-from twisted.web._flatten import flatten, flattenString
+from twisted.web._flatten import flatten, flattenString, _preFlatten
 import twisted.web.util
@@ -39,7 +39,8 @@ from twisted.web.iweb import (
 from twisted.web.http_headers import Headers
 from twisted.web._newclient import HTTP11ClientProtocol, Response
 
-from twisted.internet.interfaces import IOpenSSLClientConnectionCreator
+from twisted.internet.interfaces import (
+    IOpenSSLClientConnectionCreator, ISSLTransport)
 from zope.interface.declarations import implementer
 from twisted.web.iweb import IPolicyForHTTPS
 from twisted.python.deprecate import getDeprecationWarningString
@@ -54,6 +55,16 @@ from twisted.test.test_sslverify import certificatesForAuthorityAndServer
 from twisted.web.error import SchemeNotSupported
 from twisted.logger import globalLogPublisher
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 try:
     from twisted.internet import ssl
 except ImportError:
@@ -87,9 +98,12 @@ class StubHTTPProtocol(Protocol):
     @ivar requests: A C{list} of two-tuples.  Each time a request is made, a
         tuple consisting of the request and the L{Deferred} returned from the
         request method is appended to this list.
+
+    @ivar lost: A C{list} of the L{Deferred}s returned by C{_whenLost}.
     """
     def __init__(self):
         self.requests = []
+        self.lost = []
         self.state = 'QUIESCENT'
 
 
@@ -104,6 +118,24 @@ class StubHTTPProtocol(Protocol):
         return result
 
 
+    def connectionLost(self, reason):
+        """
+        Fire the L{Deferred}s returned by C{_whenLost}.
+        """
+        self.state = 'CONNECTION_LOST'
+        for d in self.lost:
+            d.callback(None)
+
+
+    def _whenLost(self):
+        """
+        @return: A L{Deferred} which fires when the connection is lost.
+        """
+        d = Deferred()
+        self.lost.append(d)
+        return d
+
+
 
 class FileConsumer(object):
     def __init__(self, outputFile):
@@ -751,6 +783,415 @@ class HTTPConnectionPoolTests(TestCase, FakeReactorAndConnectMixin):
                          CancelledError)
 
 
+    def test_warmUp(self):
+        """
+        L{HTTPConnectionPool.warmUp} makes and caches as many connections as
+        it is asked for, counting those already cached, and fires with the
+        number it made.
+        """
+        key = ("http", b"example.com", 80)
+        self.pool.maxPersistentPerHost = 3
+        self.pool._putConnection(key, StubHTTPProtocol())
+        self.assertEqual(
+            self.successResultOf(self.pool.warmUp(key, DummyEndpoint(), 3)),
+            2)
+        self.assertEqual(len(self.pool._connections[key]), 3)
+        self.assertEqual(self.pool.statistics(key).idle, 3)
+        self.assertEqual(self.pool.statistics(key).active, 0)
+
+
+    def test_warmUpMaxPersistent(self):
+        """
+        L{HTTPConnectionPool.warmUp} makes no more than
+        C{maxPersistentPerHost} connections.
+        """
+        key = ("http", b"example.com", 80)
+        self.assertEqual(
+            self.successResultOf(self.pool.warmUp(key, DummyEndpoint(), 5)),
+            2)
+        self.assertEqual(len(self.pool._connections[key]), 2)
+
+
+    def test_warmUpFailure(self):
+        """
+        L{HTTPConnectionPool.warmUp} logs connections it fails to make, and
+        does not count them.
+        """
+        class FailingEndpoint(object):
+            def connect(self, factory):
+                return defer.fail(ConnectionRefusedError())
+
+        key = ("http", b"example.com", 80)
+        self.assertEqual(
+            self.successResultOf(self.pool.warmUp(key, FailingEndpoint(), 1)),
+            0)
+        self.assertEqual(len(self.flushLoggedErrors(ConnectionRefusedError)),
+                         1)
+        self.assertEqual(self.pool.statistics(key).connectFailures, 1)
+
+
+    def test_reuseFIFO(self):
+        """
+        By default, the cached connection which has been idle longest is
+        reused first.
+        """
+        key = ("http", b"example.com", 80)
+        first, second = StubHTTPProtocol(), StubHTTPProtocol()
+        for p in first, second:
+            p.makeConnection(StringTransport())
+            self.pool._putConnection(key, p)
+        self.assertIdentical(
+            self.successResultOf(self.pool.getConnection(key, BadEndpoint())),
+            first)
+
+
+    def test_reuseLIFO(self):
+        """
+        If C{reusePolicy} is C{"LIFO"}, the cached connection most recently
+        returned to the pool is reused first.
+        """
+        self.pool.reusePolicy = "LIFO"
+        key = ("http", b"example.com", 80)
+        first, second = StubHTTPProtocol(), StubHTTPProtocol()
+        for p in first, second:
+            p.makeConnection(StringTransport())
+            self.pool._putConnection(key, p)
+        self.assertIdentical(
+            self.successResultOf(self.pool.getConnection(key, BadEndpoint())),
+            second)
+
+
+    def test_maxConnectionsPerHost(self):
+        """
+        Once C{maxConnectionsPerHost} connections for a key are in use,
+        L{HTTPConnectionPool.getConnection} waits for one to be returned to
+        the pool, and then reuses it.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        key = ("http", b"example.com", 80)
+        first = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        second = self.pool.getConnection(key, BadEndpoint())
+        self.assertNoResult(second)
+        self.assertIsInstance(
+            self.successResultOf(self.pool.getConnection(
+                ("http", b"example.org", 80), DummyEndpoint())),
+            StubHTTPProtocol)
+        statistics = self.pool.statistics(key)
+        self.assertEqual((statistics.idle, statistics.active,
+                          statistics.pending), (0, 1, 1))
+
+        self.pool._putConnection(key, first)
+        self.assertIdentical(self.successResultOf(second), first)
+        statistics = self.pool.statistics(key)
+        self.assertEqual((statistics.idle, statistics.active,
+                          statistics.pending), (0, 1, 0))
+
+
+    def test_maxConnectionsPerHostLost(self):
+        """
+        When a connection in use is lost, a request waiting for fewer
+        connections to be in use gets a new one.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        key = ("http", b"example.com", 80)
+        first = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        second = self.pool.getConnection(key, DummyEndpoint())
+        first.connectionLost(Failure(ConnectionDone()))
+        connection = self.successResultOf(second)
+        self.assertNotIdentical(connection, first)
+        self.assertEqual(self.pool.statistics(key).active, 1)
+
+
+    def test_maxConnectionsPerHostConnectFailed(self):
+        """
+        When making a connection fails, a request waiting for fewer
+        connections to be in use tries to make one.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        key = ("http", b"example.com", 80)
+        connecting = Deferred()
+
+        class Endpoint(object):
+            def connect(self, factory):
+                return connecting
+
+        first = self.pool.getConnection(key, Endpoint())
+        second = self.pool.getConnection(key, DummyEndpoint())
+        self.assertNoResult(second)
+        connecting.errback(ConnectionRefusedError())
+        self.failureResultOf(first, ConnectionRefusedError)
+        self.assertIsInstance(self.successResultOf(second), StubHTTPProtocol)
+
+
+    def test_cancelPending(self):
+        """
+        Cancelling the L{Deferred} for a request waiting for fewer connections
+        to be in use stops it waiting.
+        """
+        self.pool.maxConnectionsPerHost = 1
+        key = ("http", b"example.com", 80)
+        first = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        second = self.pool.getConnection(key, BadEndpoint())
+        second.cancel()
+        self.failureResultOf(second, CancelledError)
+        self.assertEqual(self.pool.statistics(key).pending, 0)
+
+        self.pool._putConnection(key, first)
+        self.assertEqual(self.pool._connections[key], [first])
+
+
+    def test_cachedConnectionLost(self):
+        """
+        A cached connection which is lost is removed from the cache at once,
+        and its timeout cancelled.
+        """
+        key = ("http", b"example.com", 80)
+        connection = self.successResultOf(
+            self.pool.getConnection(key, DummyEndpoint()))
+        self.pool._putConnection(key, connection)
+        timeout = self.pool._timeouts[connection]
+
+        connection.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(self.pool._connections[key], [])
+        self.assertNotIn(connection, self.pool._timeouts)
+        self.assertTrue(timeout.cancelled)
+        self.assertEqual(self.pool.statistics(key).active, 0)
+
+
+    def test_statisticsConnectTime(self):
+        """
+        L{HTTPConnectionPool.statistics} reports how many connections for a
+        key have been made and how long they took, and how many could not be
+        made.
+        """
+        key = ("http", b"example.com", 80)
+        attempts = []
+
+        class Endpoint(object):
+            def connect(self, factory):
+                d = Deferred()
+                attempts.append(d)
+                return d
+
+        statistics = self.pool.statistics(key)
+        self.assertEqual((statistics.connects, statistics.connectFailures,
+                          statistics.connectTime, statistics.lastConnectTime),
+                         (0, 0, 0.0, None))
+
+        for connectTime in 2, 3:
+            d = self.pool.getConnection(key, Endpoint())
+            self.fakeReactor.advance(connectTime)
+            attempts[-1].callback(StubHTTPProtocol())
+            self.successResultOf(d)
+        d = self.pool.getConnection(key, Endpoint())
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+
+        statistics = self.pool.statistics(key)
+        self.assertEqual((statistics.connects, statistics.connectFailures,
+                          statistics.connectTime, statistics.lastConnectTime),
+                         (2, 1, 5.0, 3.0))
+        self.assertEqual(statistics.active, 2)
+
+
+    def test_statisticsWithoutTime(self):
+        """
+        A pool whose reactor cannot tell the time still makes connections,
+        but does not measure how long they took.
+        """
+        key = ("http", b"example.com", 80)
+        pool = HTTPConnectionPool(None)
+        self.successResultOf(pool.getConnection(key, DummyEndpoint()))
+
+        statistics = pool.statistics(key)
+        self.assertEqual((statistics.connects, statistics.connectTime,
+                          statistics.lastConnectTime),
+                         (1, 0.0, None))
+
+
+    def test_connectionWithoutWhenLost(self):
+        """
+        A connection which cannot tell the pool when it is lost is not
+        counted as active, so it does not hold up other requests.
+        """
+        key = ("http", b"example.com", 80)
+        self.pool.maxConnectionsPerHost = 1
+
+        class Endpoint(object):
+            def connect(self, factory):
+                return succeed(object())
+
+        self.successResultOf(self.pool.getConnection(key, Endpoint()))
+        self.assertEqual(self.pool.statistics(key).active, 0)
+        self.successResultOf(self.pool.getConnection(key, Endpoint()))
+
+
+
+@implementer(ISSLTransport)
+class NegotiatingTransport(StringTransport):
+    """
+    A L{StringTransport} which pretends to be a TLS connection, with the
+    application protocol the server chose in the handshake.
+    """
+    negotiatedProtocol = None
+
+
+
+class NegotiatingEndpoint(object):
+    """
+    An endpoint whose connections pretend to be TLS connections, which are
+    made at once but whose handshakes are left to the test.
+
+    @ivar protocols: The protocols connected, in order.
+    """
+    def __init__(self):
+        self.protocols = []
+
+
+    def connect(self, factory):
+        protocol = factory.buildProtocol(None)
+        protocol.makeConnection(NegotiatingTransport())
+        self.protocols.append(protocol)
+        return succeed(protocol)
+
+
+
+class HTTPConnectionPoolHTTP2Tests(TestCase):
+    """
+    Tests for L{HTTPConnectionPool} with C{http2} set.
+    """
+    if client.H2ClientProtocol is None:
+        skip = "HTTP/2 support not enabled"
+
+    def setUp(self):
+        self.clock = Clock()
+        self.pool = HTTPConnectionPool(self.clock)
+        self.pool.http2 = True
+        self.pool.retryAutomatically = False
+        self.endpoint = NegotiatingEndpoint()
+        self.key = (b"https", b"example.com", 443)
+
+
+    def handshake(self, protocol, negotiatedProtocol):
+        """
+        Finish the TLS handshake of a connection.
+        """
+        protocol.transport.negotiatedProtocol = negotiatedProtocol
+        protocol.handshakeCompleted()
+
+
+    def test_shared(self):
+        """
+        Requests for a key while its connection is being made wait to find
+        out what the server chose, and if it was HTTP/2, share the connection
+        with later requests too.
+        """
+        first = self.pool.getConnection(self.key, self.endpoint)
+        second = self.pool.getConnection(self.key, self.endpoint)
+        self.assertNoResult(first)
+        self.assertNoResult(second)
+        self.assertEqual(len(self.endpoint.protocols), 1)
+
+        self.handshake(self.endpoint.protocols[0], b"h2")
+        connection = self.successResultOf(first)
+        self.assertIsInstance(connection, client.H2ClientProtocol)
+        self.assertIs(self.successResultOf(second), connection)
+        self.assertIs(
+            self.successResultOf(
+                self.pool.getConnection(self.key, self.endpoint)),
+            connection)
+        self.assertEqual(len(self.endpoint.protocols), 1)
+
+
+    def test_http11Negotiated(self):
+        """
+        If the server does not choose HTTP/2, requests which were waiting for
+        the connection make their own, as usual.
+        """
+        first = self.pool.getConnection(self.key, self.endpoint)
+        second = self.pool.getConnection(self.key, self.endpoint)
+        self.handshake(self.endpoint.protocols[0], None)
+        self.assertIsInstance(
+            self.successResultOf(first), HTTP11ClientProtocol)
+        self.assertEqual(len(self.endpoint.protocols), 2)
+        self.assertNoResult(second)
+        self.assertEqual(self.pool._http2Connections, {})
+
+
+    def test_notTLS(self):
+        """
+        A connection which does not use TLS speaks HTTP/1.1.
+        """
+        class Endpoint(object):
+            def connect(self, factory):
+                protocol = factory.buildProtocol(None)
+                protocol.makeConnection(StringTransport())
+                return succeed(protocol)
+
+        self.assertIsInstance(
+            self.successResultOf(
+                self.pool.getConnection(self.key, Endpoint())),
+            HTTP11ClientProtocol)
+
+
+    def test_idleTimeout(self):
+        """
+        A shared HTTP/2 connection with nothing to do is closed after
+        C{cachedConnectionTimeout} seconds, unless it is used again.
+        """
+        d = self.pool.getConnection(self.key, self.endpoint)
+        self.handshake(self.endpoint.protocols[0], b"h2")
+        connection = self.successResultOf(d)
+
+        connection._quiescentCallback(connection)
+        self.clock.advance(self.pool.cachedConnectionTimeout - 1)
+        self.successResultOf(self.pool.getConnection(self.key, self.endpoint))
+        self.clock.advance(1)
+        self.assertFalse(connection.transport.disconnecting)
+
+        connection._quiescentCallback(connection)
+        self.clock.advance(self.pool.cachedConnectionTimeout)
+        self.assertTrue(connection.transport.disconnecting)
+        self.assertEqual(self.pool._http2Connections, {})
+        self.assertEqual(self.pool._timeouts, {})
+
+
+    def test_notPersistent(self):
+        """
+        A pool which is not persistent does not share HTTP/2 connections,
+        and closes them when they have nothing to do.
+        """
+        self.pool.persistent = False
+        first = self.pool.getConnection(self.key, self.endpoint)
+        second = self.pool.getConnection(self.key, self.endpoint)
+        self.assertEqual(len(self.endpoint.protocols), 2)
+        self.handshake(self.endpoint.protocols[0], b"h2")
+        connection = self.successResultOf(first)
+        self.assertNoResult(second)
+
+        connection._quiescentCallback(connection)
+        self.assertTrue(connection.transport.disconnecting)
+
+
+    def test_closeCachedConnections(self):
+        """
+        L{HTTPConnectionPool.closeCachedConnections} aborts shared HTTP/2
+        connections.
+        """
+        d = self.pool.getConnection(self.key, self.endpoint)
+        self.handshake(self.endpoint.protocols[0], b"h2")
+        connection = self.successResultOf(d)
+
+        closed = self.pool.closeCachedConnections()
+        self.assertTrue(connection.transport.disconnecting)
+        self.assertEqual(self.pool._http2Connections, {})
+        connection.connectionLost(Failure(ConnectionDone()))
+        self.successResultOf(closed)
+
+
 
 class AgentTestsMixin(object):
     """
@@ -2474,6 +2915,107 @@ class ContentDecoderAgentWithGzipTests(TestCase,
 
 
 
+class DecompressingDecoderTests(TestCase):
+    """
+    Tests for L{client.BrotliDecoder}, L{client.ZstandardDecoder} and the
+    protocol wrappers they use.
+    """
+
+    def deliver(self, decoder, data):
+        """
+        Deliver the body of a response, wrapped by a decoder, to a protocol.
+
+        @param decoder: The decoder to wrap the response in.
+        @param data: The body of the response.
+
+        @return: The protocol.
+        @rtype: L{SimpleAgentProtocol}
+        """
+        response = Response((b'HTTP', 1, 1), 200, b'OK', Headers(),
+                            StringTransport())
+        response._bodyDataReceived(data[:5])
+        response._bodyDataReceived(data[5:])
+        response._bodyDataFinished()
+        result = decoder(response)
+        self.assertEqual(result.length, UNKNOWN_LENGTH)
+        protocol = SimpleAgentProtocol()
+        result.deliverBody(protocol)
+        return protocol
+
+
+    def test_brotli(self):
+        """
+        L{client.BrotliDecoder} wraps a response to deliver its body
+        decompressed with brotli.
+        """
+        protocol = self.deliver(client.BrotliDecoder,
+                                brotli.compress(b'x' * 6 + b'y' * 4))
+        self.assertEqual(b''.join(protocol.received), b'x' * 6 + b'y' * 4)
+        self.successResultOf(protocol.finished)
+
+    if brotli is None:
+        test_brotli.skip = "brotli is not installed"
+
+
+    def test_brotliBrokenContent(self):
+        """
+        If the body isn't valid brotli-compressed data, delivering it fails
+        with a L{client.ResponseFailed} with the brotli error.
+        """
+        error = self.assertRaises(client.ResponseFailed, self.deliver,
+                                  client.BrotliDecoder, b'not compressed')
+        error.reasons[0].trap(brotli.error)
+
+    if brotli is None:
+        test_brotliBrokenContent.skip = "brotli is not installed"
+
+
+    def test_zstandard(self):
+        """
+        L{client.ZstandardDecoder} wraps a response to deliver its body
+        decompressed with Zstandard.
+        """
+        compressor = zstandard.ZstdCompressor().compressobj()
+        data = (compressor.compress(b'x' * 6) + compressor.compress(b'y' * 4) +
+                compressor.flush())
+        protocol = self.deliver(client.ZstandardDecoder, data)
+        self.assertEqual(b''.join(protocol.received), b'x' * 6 + b'y' * 4)
+        self.successResultOf(protocol.finished)
+
+    if zstandard is None:
+        test_zstandard.skip = "zstandard is not installed"
+
+
+    def test_zstandardBrokenContent(self):
+        """
+        If the body isn't valid Zstandard-compressed data, delivering it fails
+        with a L{client.ResponseFailed} with the Zstandard error.
+        """
+        error = self.assertRaises(client.ResponseFailed, self.deliver,
+                                  client.ZstandardDecoder, b'not compressed')
+        error.reasons[0].trap(zstandard.ZstdError)
+
+    if zstandard is None:
+        test_zstandardBrokenContent.skip = "zstandard is not installed"
+
+
+    def test_gzipByDefault(self):
+        """
+        The base class of the decompressing protocol wrappers decompresses
+        gzip-compressed data.
+        """
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = compressor.compress(b'x' * 6) + compressor.flush()
+        protocol = SimpleAgentProtocol()
+        wrapper = client._DecompressingProtocol(protocol, None)
+        wrapper.dataReceived(data[:5])
+        wrapper.dataReceived(data[5:])
+        wrapper.connectionLost(Failure(ResponseDone()))
+        self.assertEqual(b''.join(protocol.received), b'x' * 6)
+        self.successResultOf(protocol.finished)
+
+
+
 class ProxyAgentTests(TestCase, FakeReactorAndConnectMixin, AgentTestsMixin):
     """
     Tests for L{client.ProxyAgent}.
@@ -20,13 +20,15 @@ from twisted.python.compat import _PY35PLUS
 from twisted.trial.unittest import TestCase
 from twisted.test.testutils import XMLAssertionMixin
 
-from twisted.internet.defer import passthru, succeed, gatherResults
+from twisted.internet.defer import Deferred, passthru, succeed, gatherResults
 
 from twisted.web.iweb import IRenderable
 from twisted.web.error import UnfilledSlot, UnsupportedType, FlattenerError
 
 from twisted.web.template import tags, Tag, Comment, CDATA, CharRef, slot
 from twisted.web.template import Element, renderer, TagLoader, flattenString
+from twisted.web.template import flatten
+from twisted.web._flatten import _PreFlattened, _preFlatten
 
 from twisted.web.test._util import FlattenTestCase
 
@@ -440,6 +442,167 @@ class SerializationTests(FlattenTestCase, XMLAssertionMixin):
         return self.assertFlatteningRaises(None, UnsupportedType)
 
 
+class BufferedFlattenTests(TestCase):
+    """
+    Tests for L{flatten} with a C{bufferSize}.
+    """
+
+    def test_coalesced(self):
+        """
+        L{flatten} given a C{bufferSize} writes the output of a document
+        without L{Deferred}s in one piece when it is shorter than
+        C{bufferSize}.
+        """
+        written = []
+        d = flatten(None, tags.p(*["x"] * 10), written.append, 1024)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(written, [b"<p>xxxxxxxxxx</p>"])
+
+
+    def test_chunks(self):
+        """
+        L{flatten} given a C{bufferSize} writes chunks of at least
+        C{bufferSize} bytes, except for the last one.
+        """
+        written = []
+        d = flatten(None, tags.p(*["x"] * 10), written.append, 4)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(b"".join(written), b"<p>xxxxxxxxxx</p>")
+        self.assertEqual(len(written), 4)
+        for chunk in written[:-1]:
+            self.assertTrue(len(chunk) >= 4, chunk)
+
+
+    def test_flushedBeforeDeferred(self):
+        """
+        L{flatten} given a C{bufferSize} writes what it has flattened before
+        waiting on a L{Deferred} which has not fired yet.
+        """
+        written = []
+        waiting = Deferred()
+        d = flatten(None, [tags.p("a"), waiting, tags.p("b")],
+                    written.append, 1024)
+        self.assertEqual(written, [b"<p>a</p>"])
+        waiting.callback("c")
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(written, [b"<p>a</p>", b"c<p>b</p>"])
+
+
+    def test_notFlushedBeforeFiredDeferred(self):
+        """
+        L{flatten} given a C{bufferSize} keeps coalescing its output across
+        a L{Deferred} which has already fired.
+        """
+        written = []
+        d = flatten(None, [tags.p("a"), succeed("c"), tags.p("b")],
+                    written.append, 1024)
+        self.assertIsNone(self.successResultOf(d))
+        self.assertEqual(written, [b"<p>a</p>c<p>b</p>"])
+
+
+    def test_flushedOnError(self):
+        """
+        L{flatten} given a C{bufferSize} writes what it has flattened before
+        failing.
+        """
+        written = []
+        d = flatten(None, [tags.p("a"), object()], written.append, 1024)
+        self.failureResultOf(d, FlattenerError)
+        self.assertEqual(written, [b"<p>a</p>"])
+
+
+
+class PreFlattenTests(TestCase):
+    """
+    Tests for L{_preFlatten}.
+    """
+
+    def flattened(self, root):
+        """
+        Flatten something which has no L{Deferred}s in it.
+
+        @rtype: L{bytes}
+        """
+        return self.successResultOf(flattenString(None, root))
+
+
+    def assertPreFlattens(self, document):
+        """
+        Assert that the pre-flattened form of a document flattens as the
+        document does, both at the top level and within an attribute.
+
+        @return: The pre-flattened document.
+        """
+        preFlattened = _preFlatten(document)
+        self.assertEqual(self.flattened(preFlattened),
+                         self.flattened(document))
+        self.assertEqual(self.flattened(tags.a(href=preFlattened)),
+                         self.flattened(tags.a(href=document)))
+        return preFlattened
+
+
+    def test_static(self):
+        """
+        A document with no renderers or slots is flattened to one
+        L{_PreFlattened}.
+        """
+        preFlattened = self.assertPreFlattens([
+            tags.div(tags.p("a & b", class_="x"), tags.br(),
+                     Comment("c"), CDATA("d"), CharRef(160)),
+            tags.span("e"),
+        ])
+        self.assertEqual(len(preFlattened), 1)
+        self.assertIsInstance(preFlattened[0], _PreFlattened)
+
+
+    def test_topLevelStrings(self):
+        """
+        Strings at the top level of a document, which are escaped differently
+        within an attribute, are not pre-flattened.
+        """
+        preFlattened = self.assertPreFlattens(
+            [u"<&>", tags.transparent(u'"a"'), tags.p(u"<&>")])
+        self.assertEqual(preFlattened[0], u"<&>")
+        self.assertIsInstance(preFlattened[-1], _PreFlattened)
+
+
+    def test_slots(self):
+        """
+        Slots and tags with slot data are left in the pre-flattened form of
+        a document, with the static parts around them flattened.
+        """
+        filled = tags.p(slot("value"))
+        filled.fillSlots(value="v")
+        document = [tags.div(
+            tags.p("static"), tags.p(slot("value", default="default")),
+            filled, tags.i(title=slot("title", default="t")))]
+        [div] = self.assertPreFlattens(document)
+        self.assertEqual(div.tagName, "div")
+        self.assertIsInstance(div.children[0], _PreFlattened)
+        self.assertIs(div.children[2], filled)
+
+
+    def test_renderers(self):
+        """
+        Tags with renderers are left in the pre-flattened form of a document,
+        with their children, since renderers are given their tag.
+        """
+        class Renderable(Element):
+            @renderer
+            def name(self, request, tag):
+                return tag("name")
+
+        withRenderer = tags.span(tags.b("kept"), render="name")
+        document = [tags.div(tags.p("static"), withRenderer)]
+        [div] = _preFlatten(document)
+        self.assertIsInstance(div.children[0], _PreFlattened)
+        self.assertIs(div.children[1], withRenderer)
+        self.assertEqual(
+            self.flattened(Renderable(TagLoader(div))),
+            b"<div><p>static</p><span><b>kept</b>name</span></div>")
+
+
+
 # Use the co_filename mechanism (instead of the __file__ mechanism) because
 # it is the mechanism traceback formatting uses.  The two do not necessarily
 # agree with each other.  This requires a code object compiled in this file.
@@ -647,6 +647,155 @@ class PipeliningBodyTests(unittest.TestCase, ResponseTestMixin):
         self.assertEquals(b.producerState, 'paused')
 
 
+    def test_noPipeliningReceivedTogether(self):
+        """
+        Pipelined requests received all at once are processed one at a time
+        too.
+        """
+        b = StringTransport()
+        a = http.HTTPChannel()
+        a.requestFactory = DelayedHTTPHandlerProxy
+        a.makeConnection(b)
+        a.dataReceived(self.requests)
+
+        self.assertEqual(b.value(), b'')
+        self.assertEqual(1, len(a.requests))
+
+        while a.requests:
+            self.assertEqual(1, len(a.requests))
+            a.requests[0].original.delayedProcess()
+
+        self.assertResponseEquals(b.value(), self.expectedResponses)
+
+
+
+class PipelinedProcessingTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{http.HTTPChannel} processing pipelined requests at once when
+    its C{maxPipelinedRequests} allows it.
+    """
+
+    def setUp(self):
+        self.transport = StringTransport()
+        self.channel = http.HTTPChannel()
+        self.channel.requestFactory = DelayedHTTPHandler
+        self.channel.maxPipelinedRequests = 3
+        self.channel.makeConnection(self.transport)
+
+
+    def pipeline(self, *paths):
+        """
+        Deliver pipelined GET requests for the given paths all at once.
+        """
+        self.channel.dataReceived(b"".join(
+            b"GET " + path + b" HTTP/1.1\r\n\r\n" for path in paths))
+
+
+    def responses(self):
+        """
+        Get the paths of the requests whose responses have been written, in
+        the order they were written in.
+        """
+        return [line[len(b"Request: "):]
+                for line in self.transport.value().split(b"\r\n")
+                if line.startswith(b"Request: ")]
+
+
+    def test_concurrent(self):
+        """
+        Up to C{maxPipelinedRequests} requests are processed at once, and
+        their responses are written in the order the requests were received
+        in, however they are finished.
+        """
+        self.pipeline(b"/1", b"/2", b"/3")
+        first, second, third = self.channel.requests
+        self.assertEqual(
+            [request.uri for request in self.channel.requests],
+            [b"/1", b"/2", b"/3"])
+
+        third.delayedProcess()
+        second.delayedProcess()
+        self.assertEqual(self.responses(), [])
+
+        first.delayedProcess()
+        self.assertEqual(self.responses(), [b"/1", b"/2", b"/3"])
+        self.assertEqual(self.channel.requests, [])
+        self.assertEqual(self.channel._pipelineBuffered, 0)
+
+
+    def test_writesOnceFirst(self):
+        """
+        Once the requests ahead of it have been answered, the response to a
+        pipelined request is written straight to the transport.
+        """
+        self.pipeline(b"/1", b"/2")
+        first, second = self.channel.requests
+        first.delayedProcess()
+        self.assertEqual(self.responses(), [b"/1"])
+
+        second.delayedProcess()
+        self.assertEqual(self.responses(), [b"/1", b"/2"])
+
+
+    def test_maxPipelinedRequests(self):
+        """
+        No more than C{maxPipelinedRequests} requests are processed at once;
+        the next one is received once the first has been answered.
+        """
+        self.pipeline(b"/1", b"/2", b"/3", b"/4")
+        self.assertEqual(len(self.channel.requests), 3)
+
+        self.channel.requests[0].delayedProcess()
+        self.assertEqual(
+            [request.uri for request in self.channel.requests],
+            [b"/2", b"/3", b"/4"])
+
+
+    def test_pipelineBufferSize(self):
+        """
+        When more than C{pipelineBufferSize} bytes of responses are
+        buffered, the producers of buffered responses are paused and no more
+        requests are received, until the responses have been written.
+        """
+        self.channel.pipelineBufferSize = 10
+        self.pipeline(b"/1", b"/2")
+        first, second = self.channel.requests
+        producer = DummyProducer()
+        second.registerProducer(producer, True)
+        second.write(b"x" * 11)
+        self.assertEqual(producer.events, ["pause"])
+
+        self.pipeline(b"/3")
+        self.assertEqual(len(self.channel.requests), 2)
+
+        first.delayedProcess()
+        self.assertEqual(producer.events, ["pause", "resume"])
+        self.assertIs(self.channel._requestProducer, producer)
+        self.assertEqual(
+            [request.uri for request in self.channel.requests],
+            [b"/2", b"/3"])
+        self.assertIn(b"x" * 11, self.transport.value())
+
+
+    def test_notPersistent(self):
+        """
+        No requests are received after one which ends the connection, and
+        the connection is only closed once it has been answered.
+        """
+        self.channel.dataReceived(
+            b"GET /1 HTTP/1.1\r\n\r\n"
+            b"GET /2 HTTP/1.1\r\nConnection: close\r\n\r\n"
+            b"GET /3 HTTP/1.1\r\n\r\n")
+        first, second = self.channel.requests
+
+        first.delayedProcess()
+        self.assertFalse(self.transport.disconnecting)
+
+        second.delayedProcess()
+        self.assertEqual(self.responses(), [b"/1", b"/2"])
+        self.assertTrue(self.transport.disconnecting)
+
+
 
 class ShutdownTests(unittest.TestCase):
     """
@@ -861,6 +1010,20 @@ class GenericHTTPChannelTests(unittest.TestCase):
         self.assertEqual(protocol._channel.callLater, clock.callLater)
 
 
+    def test_genericHTTPChannelPropagatesMaxPipelinedRequests(self):
+        """
+        The C{maxPipelinedRequests} of an L{http.HTTPFactory} is propagated
+        through the L{http._GenericHTTPChannelProtocol} to the backing
+        channel.
+        """
+        factory = http.HTTPFactory(reactor=Clock())
+        factory.maxPipelinedRequests = 4
+        protocol = factory.buildProtocol(None)
+
+        self.assertEqual(protocol.maxPipelinedRequests, 4)
+        self.assertEqual(protocol._channel.maxPipelinedRequests, 4)
+
+
     def test_genericHTTPChannelCallLaterUpgrade(self):
         """
         If C{callLater} is patched onto the L{http._GenericHTTPChannelProtocol}
@@ -1359,7 +1522,12 @@ class ChunkingTests(unittest.TestCase, ResponseTestMixin):
 class ParsingTests(unittest.TestCase):
     """
     Tests for protocol parsing in L{HTTPChannel}.
+
+    @cvar chunkSize: The number of bytes of a request L{runRequest} delivers
+        to the channel at a time.
     """
+    chunkSize = 1
+
     def setUp(self):
         self.didRequest = False
 
@@ -1395,10 +1563,10 @@ class ParsingTests(unittest.TestCase):
 
         channel.makeConnection(transport)
         # one byte at a time, to stress it.
-        for byte in iterbytes(httpRequest):
+        for i in range(0, len(httpRequest), self.chunkSize):
             if channel.transport.disconnecting:
                 break
-            channel.dataReceived(byte)
+            channel.dataReceived(httpRequest[i:i + self.chunkSize])
         channel.connectionLost(IOError("all done"))
 
         if success:
@@ -2024,6 +2192,271 @@ Hello,
 
 
 
+class WholeRequestParsingTests(ParsingTests):
+    """
+    Tests for protocol parsing in L{HTTPChannel} when each request is
+    received all at once, so its head is parsed in one pass by
+    L{HTTPChannel.requestHeadParser}.
+    """
+    chunkSize = 2 ** 16
+
+
+
+class RequestHeadParserTestsMixin(object):
+    """
+    Tests for a request head parser which may be used as
+    L{HTTPChannel.requestHeadParser}.
+
+    @ivar parse: The parser.
+    """
+
+    def test_parse(self):
+        """
+        The parser returns the command, path and version from the request
+        line, and the names of the headers, lowercased, with their values,
+        stripped of surrounding whitespace, in the order they were received.
+        """
+        self.assertEqual(
+            self.parse(
+                b"GET /foo?bar=baz HTTP/1.1\r\n"
+                b"Host: example.com\r\n"
+                b"X-Multiple:  a \r\n"
+                b"X-MULTIPLE: b"),
+            (b"GET", b"/foo?bar=baz", b"HTTP/1.1",
+             [(b"host", b"example.com"),
+              (b"x-multiple", b"a"),
+              (b"x-multiple", b"b")]))
+
+
+    def test_noHeaders(self):
+        """
+        A request head may be just a request line.
+        """
+        self.assertEqual(
+            self.parse(b"GET / HTTP/1.0"), (b"GET", b"/", b"HTTP/1.0", []))
+
+
+    def test_malformedRequestLine(self):
+        """
+        The parser raises L{http._MalformedRequestHeadError} if the request
+        line does not have three parts.
+        """
+        self.assertRaises(
+            http._MalformedRequestHeadError, self.parse,
+            b"GET /\r\nHost: example.com")
+
+
+    def test_headerWithoutColon(self):
+        """
+        The parser raises L{http._MalformedRequestHeadError} if a header line
+        has no colon.
+        """
+        self.assertRaises(
+            http._MalformedRequestHeadError, self.parse,
+            b"GET / HTTP/1.1\r\nHost example.com")
+
+
+    def test_continuationLine(self):
+        """
+        The parser raises L{http._MalformedRequestHeadError} for a header
+        continued over several lines, which is left to L{HTTPChannel} to
+        process line by line.
+        """
+        self.assertRaises(
+            http._MalformedRequestHeadError, self.parse,
+            b"GET / HTTP/1.1\r\nX-Long: a\r\n b")
+
+
+    def test_emptyHead(self):
+        """
+        The parser raises L{http._MalformedRequestHeadError} if there is no
+        request line.
+        """
+        self.assertRaises(
+            http._MalformedRequestHeadError, self.parse, b"")
+
+
+
+class PythonRequestHeadParserTests(RequestHeadParserTestsMixin,
+                                   unittest.SynchronousTestCase):
+    """
+    Tests for L{http._parseRequestHead}.
+    """
+    parse = staticmethod(http._parseRequestHead)
+
+
+    def test_nonASCIICommand(self):
+        """
+        L{http._parseRequestHead} raises L{http._MalformedRequestHeadError}
+        if the request's command is not ASCII.
+        """
+        self.assertRaises(
+            http._MalformedRequestHeadError, self.parse,
+            b"GE\xc2\xa9 / HTTP/1.1")
+
+
+
+class HTTPToolsRequestHeadParserTests(RequestHeadParserTestsMixin,
+                                      unittest.SynchronousTestCase):
+    """
+    Tests for L{http._parseRequestHeadHTTPTools}.
+    """
+    if http.httptools is None:
+        skip = "httptools is not installed"
+
+    parse = staticmethod(http._parseRequestHeadHTTPTools)
+
+
+
+class RequestHeadParsingTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{HTTPChannel}'s use of L{HTTPChannel.requestHeadParser}.
+    """
+
+    request = (
+        b"GET /first HTTP/1.1\r\n"
+        b"Host: example.com\r\n"
+        b"\r\n"
+        b"POST /second HTTP/1.1\r\n"
+        b"Host: example.com\r\n"
+        b"Content-Length: 4\r\n"
+        b"\r\n"
+        b"body"
+    )
+
+    def setUp(self):
+        self.heads = []
+        self.requests = []
+
+
+    def parse(self, head):
+        """
+        Record a request head and parse it with L{http._parseRequestHead}.
+        """
+        self.heads.append(head)
+        return http._parseRequestHead(head)
+
+
+    def connect(self, channel):
+        """
+        Connect a channel whose requests are recorded in C{self.requests}.
+        """
+        requests = self.requests
+        class RecordingRequest(http.Request):
+            def process(self):
+                requests.append((self.method, self.uri,
+                                 self.requestHeaders.getRawHeaders(b"host"),
+                                 self.content.read()))
+                self.finish()
+        channel.requestFactory = RecordingRequest
+        channel.makeConnection(StringTransport())
+        return channel
+
+
+    def test_requestHeadParser(self):
+        """
+        Each request head received all at once is parsed by
+        C{requestHeadParser}, including those of pipelined requests received
+        along with it, and the requests are processed as usual.
+        """
+        channel = self.connect(http.HTTPChannel())
+        channel.requestHeadParser = self.parse
+        channel.dataReceived(self.request)
+
+        self.assertEqual(self.heads, [
+            b"GET /first HTTP/1.1\r\nHost: example.com",
+            b"POST /second HTTP/1.1\r\nHost: example.com\r\n"
+            b"Content-Length: 4",
+        ])
+        self.assertEqual(self.requests, [
+            (b"GET", b"/first", [b"example.com"], b""),
+            (b"POST", b"/second", [b"example.com"], b"body"),
+        ])
+
+
+    def test_malformedRequestHead(self):
+        """
+        A request head which C{requestHeadParser} rejects is processed line
+        by line.
+        """
+        def reject(head):
+            raise http._MalformedRequestHeadError(head)
+        channel = self.connect(http.HTTPChannel())
+        channel.requestHeadParser = reject
+        channel.dataReceived(self.request)
+
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[1][3], b"body")
+
+
+    def test_noRequestHeadParser(self):
+        """
+        If C{requestHeadParser} is L{None}, request heads are processed line
+        by line.
+        """
+        channel = self.connect(http.HTTPChannel())
+        channel.requestHeadParser = None
+        channel.dataReceived(self.request)
+
+        self.assertEqual(len(self.requests), 2)
+
+
+    def test_headerReceivedOverridden(self):
+        """
+        If a subclass of L{HTTPChannel} overrides C{headerReceived}, request
+        heads are processed line by line, so that it is called for each
+        header.
+        """
+        headers = []
+        class HeaderChannel(http.HTTPChannel):
+            def headerReceived(self, line):
+                headers.append(line)
+                return http.HTTPChannel.headerReceived(self, line)
+        channel = self.connect(HeaderChannel())
+        channel.requestHeadParser = self.parse
+        channel.dataReceived(self.request)
+
+        self.assertEqual(self.heads, [])
+        self.assertEqual(headers, [
+            b"Host: example.com", b"Host: example.com",
+            b"Content-Length: 4"])
+        self.assertEqual(len(self.requests), 2)
+
+
+    def test_requestHeadInPieces(self):
+        """
+        A request head which is received in pieces is processed line by line
+        as they arrive, and the head of the next request is parsed in one
+        pass again.
+        """
+        second = self.request.index(b"POST")
+        channel = self.connect(http.HTTPChannel())
+        channel.requestHeadParser = self.parse
+        channel.dataReceived(self.request[:25])
+        channel.dataReceived(self.request[25:second])
+        channel.dataReceived(self.request[second:])
+
+        self.assertEqual(self.heads, [
+            b"POST /second HTTP/1.1\r\nHost: example.com\r\n"
+            b"Content-Length: 4",
+        ])
+        self.assertEqual(len(self.requests), 2)
+
+
+    def test_emptyRequestHead(self):
+        """
+        Data which starts with an empty request head is rejected with a I{400
+        Bad Request} response, as it is when it is processed line by line.
+        """
+        channel = self.connect(http.HTTPChannel())
+        channel.dataReceived(b"\r\n\r\nGET / HTTP/1.1\r\n\r\n")
+
+        self.assertEqual(self.requests, [])
+        self.assertEqual(
+            channel.transport.value(), b"HTTP/1.1 400 Bad Request\r\n\r\n")
+
+
+
 class QueryArgumentsTests(unittest.TestCase):
     def testParseqs(self):
         self.assertEqual(
@@ -3867,3 +4300,91 @@ class HTTPClientSanitizationTests(unittest.SynchronousTestCase):
                 transport.value().splitlines(),
                 [b": ".join([sanitizedBytes, sanitizedBytes])]
             )
+
+
+
+class HTTPChannelWriteHeadersTests(unittest.SynchronousTestCase):
+    """
+    Tests for L{HTTPChannel.writeHeaders}.
+    """
+
+    def writeHeaders(self, version, code, reason, headers):
+        """
+        Write a status line and headers with a new L{HTTPChannel}.
+
+        @return: The bytes written to the channel's transport.
+        """
+        transport = StringTransport()
+        channel = http.HTTPChannel()
+        channel.makeConnection(transport)
+        channel.writeHeaders(version, code, reason, headers)
+        return transport.value()
+
+
+    def test_statusLine(self):
+        """
+        L{HTTPChannel.writeHeaders} writes a status line made of the version,
+        code, and reason it is given, whether or not the reason is the
+        standard one for the code.
+        """
+        self.assertEqual(
+            self.writeHeaders(b"HTTP/1.0", b"404", b"Not Found", []),
+            b"HTTP/1.0 404 Not Found\r\n\r\n")
+        self.assertEqual(
+            self.writeHeaders(b"HTTP/1.1", b"404", b"Gone Fishing", []),
+            b"HTTP/1.1 404 Gone Fishing\r\n\r\n")
+        self.assertEqual(
+            self.writeHeaders(b"HTTP/1.1", b"599", b"Odd", []),
+            b"HTTP/1.1 599 Odd\r\n\r\n")
+
+
+    def test_headerNamesCanonicalized(self):
+        """
+        L{HTTPChannel.writeHeaders} writes header names in their canonical
+        capitalization, and the values of headers with the same name one
+        after another, in the order each name first appears.
+        """
+        self.assertEqual(
+            self.writeHeaders(
+                b"HTTP/1.1", b"200", b"OK",
+                [(b"set-cookie", b"a=b"),
+                 (b"x-custom-header", b"first"),
+                 (b"content-md5", b"abc"),
+                 (b"Set-Cookie", b"c=d"),
+                 (u"X-Custom-Header", u"s\xe9cond")]),
+            b"HTTP/1.1 200 OK\r\n"
+            b"Set-Cookie: a=b\r\n"
+            b"Set-Cookie: c=d\r\n"
+            b"X-Custom-Header: first\r\n"
+            b"X-Custom-Header: s\xc3\xa9cond\r\n"
+            b"Content-MD5: abc\r\n"
+            b"\r\n")
+
+
+
+class HTTPFactoryDateHeaderTests(unittest.SynchronousTestCase):
+    """
+    Tests for the I{Date} header value cached by L{http.HTTPFactory}.
+    """
+
+    def test_startFactory(self):
+        """
+        L{http.HTTPFactory.startFactory} caches the I{Date} header value for
+        the current time, and updates it every second until
+        L{http.HTTPFactory.stopFactory} is called.
+        """
+        clock = Clock()
+        clock.advance(1234567890)
+        factory = http.HTTPFactory(reactor=clock)
+        self.assertIsNone(factory._dateHeader)
+
+        factory.startFactory()
+        self.assertEqual(factory._dateHeader,
+                         b"Fri, 13 Feb 2009 23:31:30 GMT")
+        clock.advance(1)
+        self.assertEqual(factory._dateHeader,
+                         b"Fri, 13 Feb 2009 23:31:31 GMT")
+
+        factory.stopFactory()
+        self.assertIsNone(factory._dateHeader)
+        self.assertEqual(clock.getDelayedCalls(), [])
@@ -0,0 +1,381 @@
+# Copyright (c) Twisted Matrix Laboratories.
+# See LICENSE for details.
+
+"""
+Tests for L{twisted.web._http2client}.
+"""
+
+from __future__ import absolute_import, division
+
+from zope.interface import implementer
+
+from twisted.internet.defer import CancelledError, succeed
+from twisted.internet.error import ConnectionDone
+from twisted.python.failure import Failure
+from twisted.test.proto_helpers import StringTransport
+from twisted.trial.unittest import SynchronousTestCase
+from twisted.web.client import readBody
+from twisted.web.http_headers import Headers
+from twisted.web.iweb import IBodyProducer, UNKNOWN_LENGTH
+from twisted.web._newclient import (
+    Request, RequestNotSent, ResponseFailed, ResponseNeverReceived)
+
+skipH2 = None
+
+try:
+    from twisted.web._http2client import H2ClientProtocol
+
+    # These third-party imports are guaranteed to be present if HTTP/2 support
+    # is compiled in.
+    import h2.config
+    import h2.connection
+    import h2.errors
+    import h2.events
+    from hyperframe.frame import GoAwayFrame
+except ImportError:
+    skipH2 = "HTTP/2 support not enabled"
+
+
+
+@implementer(IBodyProducer)
+class BytesProducer(object):
+    """
+    A body producer which writes all of its data at once when it is started,
+    and records being paused and resumed.
+
+    @ivar events: C{'pause'} and C{'resume'} for each time this is paused or
+        resumed.
+    """
+    def __init__(self, data, length=None):
+        self._data = data
+        self.length = len(data) if length is None else length
+        self.events = []
+
+
+    def startProducing(self, consumer):
+        consumer.write(self._data)
+        return succeed(None)
+
+
+    def pauseProducing(self):
+        self.events.append('pause')
+
+
+    def resumeProducing(self):
+        self.events.append('resume')
+
+
+    def stopProducing(self):
+        self.events.append('stop')
+
+
+
+class H2ClientProtocolTests(SynchronousTestCase):
+    """
+    Tests for L{H2ClientProtocol}, talking to an HTTP/2 server state machine.
+    """
+    skip = skipH2
+
+    def setUp(self):
+        self.connect()
+
+
+    def connect(self, maxConcurrentStreams=100):
+        """
+        Connect a new L{H2ClientProtocol}, as C{self.protocol}, to a new
+        server, as C{self.server}, and give it the server's preamble.
+        """
+        self.server = h2.connection.H2Connection(h2.config.H2Configuration(
+            client_side=False, header_encoding=None))
+        self.server.initiate_connection()
+        self.quiescent = []
+        self.transport = StringTransport()
+        self.protocol = H2ClientProtocol(self.quiescent.append,
+                                         maxConcurrentStreams)
+        self.protocol.makeConnection(self.transport)
+        self.protocol.dataReceived(self.server.data_to_send())
+
+
+    def pump(self):
+        """
+        Give the server what the client has written, and the client what the
+        server then has to send.
+
+        @return: The events the server received.
+        @rtype: L{list}
+        """
+        data = self.transport.value()
+        self.transport.clear()
+        events = self.server.receive_data(data)
+        self.respond()
+        return events
+
+
+    def respond(self):
+        """
+        Give the client what the server has to send.
+        """
+        data = self.server.data_to_send()
+        if data:
+            self.protocol.dataReceived(data)
+
+
+    def request(self, method=b'GET', uri=b'/', bodyProducer=None):
+        """
+        Issue a request for C{http://example.com} plus C{uri}.
+
+        @return: The L{Deferred} from L{H2ClientProtocol.request}.
+        """
+        headers = Headers({b'host': [b'example.com'],
+                           b'user-agent': [b'test']})
+        return self.protocol.request(
+            Request(method, uri, headers, bodyProducer))
+
+
+    def received(self, events, eventType):
+        """
+        Pick the events of a type out of a list of them.
+        """
+        return [event for event in events if isinstance(event, eventType)]
+
+
+    def test_request(self):
+        """
+        L{H2ClientProtocol.request} sends the request's method, URI and
+        headers on a new stream, with the I{Host} header as the
+        I{:authority}, and fires with a response made from what the server
+        sends back.
+        """
+        d = self.request(uri=b'/foo?bar')
+        events = self.received(self.pump(), h2.events.RequestReceived)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].headers, [
+            (b':method', b'GET'), (b':scheme', b'https'),
+            (b':authority', b'example.com'), (b':path', b'/foo?bar'),
+            (b'user-agent', b'test')])
+
+        streamID = events[0].stream_id
+        self.server.send_headers(streamID, [
+            (b':status', b'200'), (b'content-length', b'5'),
+            (b'x-foo', b'bar')])
+        self.server.send_data(streamID, b'hello', end_stream=True)
+        self.respond()
+
+        response = self.successResultOf(d)
+        self.assertEqual(response.version, (b'HTTP', 2, 0))
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.phrase, b'OK')
+        self.assertEqual(response.length, 5)
+        self.assertEqual(
+            response.headers.getRawHeaders(b'x-foo'), [b'bar'])
+        self.assertEqual(self.successResultOf(readBody(response)), b'hello')
+        self.assertEqual(self.quiescent, [self.protocol])
+
+
+    def test_concurrentStreams(self):
+        """
+        Requests made while others are outstanding are sent at once on their
+        own streams, and their responses may come in any order.
+        """
+        first = self.request(uri=b'/first')
+        second = self.request(uri=b'/second')
+        events = self.received(self.pump(), h2.events.RequestReceived)
+        self.assertEqual(len(events), 2)
+
+        for event in reversed(events):
+            self.server.send_headers(
+                event.stream_id, [(b':status', b'204')], end_stream=True)
+            self.respond()
+        self.assertEqual(self.successResultOf(first).code, 204)
+        self.assertEqual(self.successResultOf(second).code, 204)
+        self.assertEqual(self.quiescent, [self.protocol])
+
+
+    def test_maxConcurrentStreams(self):
+        """
+        Requests beyond the most streams which may be open at once are sent
+        when earlier ones are done.
+        """
+        self.connect(maxConcurrentStreams=1)
+        first = self.request(uri=b'/first')
+        second = self.request(uri=b'/second')
+        events = self.received(self.pump(), h2.events.RequestReceived)
+        self.assertEqual([event.headers[3][1] for event in events],
+                         [b'/first'])
+
+        self.server.send_headers(
+            events[0].stream_id, [(b':status', b'204')], end_stream=True)
+        self.respond()
+        self.successResultOf(first)
+        self.assertNoResult(second)
+        self.assertEqual(self.quiescent, [])
+
+        events = self.received(self.pump(), h2.events.RequestReceived)
+        self.assertEqual([event.headers[3][1] for event in events],
+                         [b'/second'])
+
+
+    def test_requestBodyFlowControl(self):
+        """
+        A request body larger than the server's flow-control window is sent
+        as the server opens the window, and its producer is paused until then.
+        """
+        data = b'x' * 100000
+        producer = BytesProducer(data)
+        d = self.request(b'POST', bodyProducer=producer)
+        events = self.pump()
+        request = self.received(events, h2.events.RequestReceived)[0]
+        self.assertIn((b'content-length', b'100000'), request.headers)
+        self.assertEqual(producer.events, ['pause'])
+
+        received = []
+        while not self.received(events, h2.events.StreamEnded):
+            for event in self.received(events, h2.events.DataReceived):
+                received.append(event.data)
+                self.server.acknowledge_received_data(
+                    event.flow_controlled_length, event.stream_id)
+            self.respond()
+            events = self.pump()
+        for event in self.received(events, h2.events.DataReceived):
+            received.append(event.data)
+        self.assertEqual(b''.join(received), data)
+        self.assertNoResult(d)
+
+
+    def test_requestBodyUnknownLength(self):
+        """
+        A request body of unknown length is sent without a
+        I{Content-Length} header.
+        """
+        producer = BytesProducer(b'hello', length=UNKNOWN_LENGTH)
+        self.request(b'POST', bodyProducer=producer)
+        events = self.pump()
+        request = self.received(events, h2.events.RequestReceived)[0]
+        self.assertNotIn(b'content-length', dict(request.headers))
+        self.assertEqual(
+            b''.join([event.data for event in
+                      self.received(events, h2.events.DataReceived)]),
+            b'hello')
+        self.assertTrue(self.received(events, h2.events.StreamEnded))
+
+
+    def test_responseBodyPaused(self):
+        """
+        Response data is not acknowledged while the response is paused, so
+        the server may send no more than its window, and is acknowledged when
+        the response is resumed.
+        """
+        d = self.request()
+        streamID = self.received(
+            self.pump(), h2.events.RequestReceived)[0].stream_id
+        self.server.send_headers(streamID, [(b':status', b'200')])
+        self.respond()
+        response = self.successResultOf(d)
+
+        window = self.server.local_flow_control_window(streamID)
+        for i in range(3):
+            self.server.send_data(streamID, b'x' * 16000)
+        self.respond()
+        self.pump()
+        self.assertEqual(
+            self.server.local_flow_control_window(streamID), window - 48000)
+
+        response._transport.resumeProducing()
+        self.pump()
+        self.assertEqual(
+            self.server.local_flow_control_window(streamID), window)
+
+
+    def test_streamReset(self):
+        """
+        If the server resets a stream before responding, the request fails
+        with L{ResponseNeverReceived}.
+        """
+        d = self.request()
+        streamID = self.received(
+            self.pump(), h2.events.RequestReceived)[0].stream_id
+        self.server.reset_stream(streamID, h2.errors.ErrorCodes.REFUSED_STREAM)
+        self.respond()
+        self.failureResultOf(d, ResponseNeverReceived)
+        self.assertEqual(self.quiescent, [self.protocol])
+
+
+    def test_goAway(self):
+        """
+        When the server sends I{GOAWAY}, requests on streams it did not
+        process fail with L{RequestNotSent}, as do later requests, and the
+        connection is closed.
+        """
+        first = self.request()
+        second = self.request()
+        events = self.received(self.pump(), h2.events.RequestReceived)
+        goAway = GoAwayFrame(0)
+        goAway.last_stream_id = events[0].stream_id
+        self.protocol.dataReceived(goAway.serialize())
+        self.failureResultOf(second, RequestNotSent)
+        self.failureResultOf(self.request(), RequestNotSent)
+        self.assertTrue(self.transport.disconnecting)
+
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.failureResultOf(first, ResponseNeverReceived)
+        self.assertEqual(self.quiescent, [])
+
+
+    def test_connectionLost(self):
+        """
+        When the connection is lost, requests waiting for their responses fail
+        with L{ResponseNeverReceived}, queued ones with L{RequestNotSent}, and
+        response bodies being received with L{ResponseFailed}.
+        """
+        self.connect(maxConcurrentStreams=2)
+        first = self.request()
+        second = self.request()
+        third = self.request()
+        events = self.received(self.pump(), h2.events.RequestReceived)
+        self.server.send_headers(events[0].stream_id, [(b':status', b'200')])
+        self.respond()
+        body = readBody(self.successResultOf(first))
+
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.failureResultOf(body, ResponseFailed)
+        self.failureResultOf(second, ResponseNeverReceived)
+        self.failureResultOf(third, RequestNotSent)
+        self.failureResultOf(self.request(), RequestNotSent)
+
+
+    def test_cancel(self):
+        """
+        Cancelling the L{Deferred} for a request which has been sent resets its
+        stream.
+        """
+        d = self.request()
+        streamID = self.received(
+            self.pump(), h2.events.RequestReceived)[0].stream_id
+        d.cancel()
+        self.failureResultOf(d, CancelledError)
+        events = self.received(self.pump(), h2.events.StreamReset)
+        self.assertEqual([event.stream_id for event in events], [streamID])
+        self.assertEqual(self.quiescent, [self.protocol])
+
+
+    def test_abort(self):
+        """
+        L{H2ClientProtocol.abort} aborts the connection, and returns a
+        L{Deferred} which fires when it is lost.
+        """
+        d = self.protocol.abort()
+        self.assertNoResult(d)
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertIsNone(self.successResultOf(d))
+
+
+    def test_whenLost(self):
+        """
+        L{H2ClientProtocol._whenLost} returns a L{Deferred} which fires when
+        the connection is lost, or at once if it has been lost already.
+        """
+        d = self.protocol._whenLost()
+        self.assertNoResult(d)
+        self.protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertIsNone(self.successResultOf(d))
+        self.assertIsNone(self.successResultOf(self.protocol._whenLost()))
@@ -9,6 +9,7 @@ from __future__ import division, absolute_import
 
 from twisted.trial.unittest import TestCase
 from twisted.python.compat import _PY3, unicode
+from twisted.web import http_headers
 from twisted.web.http_headers import Headers
 from twisted.web.test.requesthelper import (
     bytesLinearWhitespaceComponents,
@@ -213,6 +214,63 @@ class BytesHeadersTests(TestCase):
                           b"X-XSS-Protection")
 
 
+    def test_canonicalNameCapsCaseMappings(self):
+        """
+        L{Headers._canonicalNameCaps} uses the C{_caseMappings} of the
+        L{Headers} subclass, even for header names it has already
+        capitalized.
+        """
+        class FunnyHeaders(Headers):
+            _caseMappings = {b"content-type": b"CONTENT-type"}
+
+        self.assertEqual(
+            Headers()._canonicalNameCaps(b"content-type"), b"Content-Type")
+        self.assertEqual(
+            FunnyHeaders()._canonicalNameCaps(b"content-type"),
+            b"CONTENT-type")
+
+
+    def test_nameCacheBounded(self):
+        """
+        Once C{_maxCachedNames} header names have been cached, further names
+        are lowercased and capitalized without being cached.
+        """
+        self.patch(http_headers, "_encodedNames", {})
+        self.patch(http_headers, "_canonicalNames", {})
+        self.patch(http_headers, "_maxCachedNames", 1)
+        h = Headers()
+        h.setRawHeaders(b"X-First", [b"1"])
+        h.setRawHeaders(b"X-Second", [b"2"])
+        self.assertEqual(h._canonicalNameCaps(b"x-first"), b"X-First")
+        self.assertEqual(h._canonicalNameCaps(b"x-second"), b"X-Second")
+
+        self.assertEqual(
+            sorted(h.getAllRawHeaders()),
+            [(b"X-First", [b"1"]), (b"X-Second", [b"2"])])
+        self.assertEqual(http_headers._encodedNames, {b"X-First": b"x-first"})
+        self.assertEqual(
+            http_headers._canonicalNames, {b"x-first": b"X-First"})
+
+
+    def test_fromParsed(self):
+        """
+        L{Headers._fromParsed} makes a L{Headers} from lowercase header names
+        and values, keeping the values of each repeated header in order and
+        sanitizing linear whitespace.
+        """
+        h = Headers._fromParsed([
+            (b"host", b"example.com"),
+            (b"x-repeated", b"1"),
+            (b"x-bad\n", b"a\rb"),
+            (b"x-repeated", b"2"),
+        ])
+        self.assertEqual(
+            sorted(h.getAllRawHeaders()),
+            [(b"Host", [b"example.com"]),
+             (b"X-Bad", [b"a b"]),
+             (b"X-Repeated", [b"1", b"2"])])
+
+
     def test_getAllRawHeaders(self):
         """
         L{Headers.getAllRawHeaders} returns an iterable of (k, v) pairs, where
@@ -318,6 +376,23 @@ class BytesHeadersTests(TestCase):
         self.assertEqual(h.getRawHeaders(b'test'), [b'foo', b'bar'])
 
 
+    def test_copySubclass(self):
+        """
+        L{Headers.copy} returns an instance of the same class, with the same
+        headers.
+        """
+        class FunnyHeaders(Headers):
+            pass
+
+        h = FunnyHeaders()
+        h.setRawHeaders(b'b', [b'1'])
+        h.setRawHeaders(b'a', [b'2'])
+        i = h.copy()
+        self.assertIsInstance(i, FunnyHeaders)
+        self.assertEqual(
+            sorted(i.getAllRawHeaders()), [(b'A', [b'2']), (b'B', [b'1'])])
+
+
 
 class UnicodeHeadersTests(TestCase):
     """
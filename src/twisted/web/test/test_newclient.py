@@ -1536,6 +1536,26 @@ class HTTP11ClientProtocolTests(TestCase):
         self.assertEqual(protocol._state, u"CONNECTION_LOST")
 
 
+    def test_whenLost(self):
+        """
+        L{HTTP11ClientProtocol._whenLost} returns a C{Deferred} that fires
+        when the connection is lost, in whatever state it was in, or at once
+        if it has been lost already.
+        """
+        protocol = HTTP11ClientProtocol()
+        protocol.makeConnection(StringTransport())
+        d = protocol.request(Request(b'GET', b'/', _boringHeaders, None))
+        lost = []
+        protocol._whenLost().addCallback(lost.append)
+        self.assertEqual(lost, [])
+
+        protocol.connectionLost(Failure(ConnectionDone()))
+        self.assertEqual(lost, [None])
+        self.failureResultOf(d, ResponseNeverReceived)
+        protocol._whenLost().addCallback(lost.append)
+        self.assertEqual(lost, [None, None])
+
+
     def test_abortBeforeResponseBody(self):
         """
         The Deferred returned by L{HTTP11ClientProtocol.request} will fire
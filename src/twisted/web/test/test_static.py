@@ -15,13 +15,18 @@ import warnings
 
 from io import BytesIO as StringIO
 
+from zope.interface import implementer
 from zope.interface.verify import verifyObject
 
 from twisted.internet import abstract, interfaces
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionLost
 from twisted.python.runtime import platform
 from twisted.python.filepath import FilePath
 from twisted.python import compat, log
 from twisted.python.compat import intToBytes, networkString
+from twisted.protocols import policies
+from twisted.test.proto_helpers import StringTransport
 from twisted.trial.unittest import TestCase
 from twisted.web import static, http, script, resource
 from twisted.web.server import UnsupportedMethod
@@ -565,6 +570,120 @@ class StaticFileTests(TestCase):
         self.assertTrue(fakeFile.closed)
 
 
+    def _makePrecompressed(self):
+        """
+        Create a file with copies of it compressed with gzip and brotli
+        beside it, and a L{File} for it which serves them.
+
+        @return: The L{File}.
+        """
+        base = FilePath(self.mktemp())
+        base.makedirs()
+        base.child("app.js").setContent(b"plain")
+        base.child("app.js.gz").setContent(b"gzipped")
+        base.child("app.js.br").setContent(b"brotli")
+        file = static.File(base.path).getChild(b"app.js", DummyRequest([]))
+        file.precompressedEncodings = [(".br", "br"), (".gz", "gzip")]
+        return file
+
+
+    def _renderAccepting(self, file, acceptEncoding):
+        """
+        Render a L{File} for a request with an I{Accept-Encoding} header.
+
+        @return: The request.
+        """
+        request = DummyRequest([b''])
+        request.requestHeaders.setRawHeaders(
+            b'accept-encoding', [acceptEncoding])
+        self.successResultOf(self._render(file, request))
+        return request
+
+
+    def test_precompressed(self):
+        """
+        A L{File} with C{precompressedEncodings} serves the file compressed
+        with the encoding the client accepts, with the original file's type,
+        and says the response varies with the I{Accept-Encoding} header.
+        """
+        file = self._makePrecompressed()
+        request = self._renderAccepting(file, b"gzip")
+        self.assertEqual(b''.join(request.written), b"gzipped")
+        headers = request.responseHeaders
+        self.assertEqual(headers.getRawHeaders(b'content-encoding'),
+                         [b'gzip'])
+        self.assertEqual(headers.getRawHeaders(b'content-type'),
+                         [networkString(file.type)])
+        self.assertEqual(headers.getRawHeaders(b'content-length'), [b'7'])
+        self.assertEqual(headers.getRawHeaders(b'vary'),
+                         [b'accept-encoding'])
+
+
+    def test_precompressedPreference(self):
+        """
+        A L{File} prefers the encodings earlier in C{precompressedEncodings}
+        among those the client accepts.
+        """
+        file = self._makePrecompressed()
+        request = self._renderAccepting(file, b"gzip, br")
+        self.assertEqual(b''.join(request.written), b"brotli")
+        self.assertEqual(
+            request.responseHeaders.getRawHeaders(b'content-encoding'),
+            [b'br'])
+
+
+    def test_precompressedNotAccepted(self):
+        """
+        A L{File} serves the uncompressed file to clients which accept none
+        of its C{precompressedEncodings}, and says the response varies with
+        the I{Accept-Encoding} header.
+        """
+        file = self._makePrecompressed()
+        request = self._renderAccepting(file, b"gzip;q=0, deflate")
+        self.assertEqual(b''.join(request.written), b"plain")
+        headers = request.responseHeaders
+        self.assertFalse(headers.hasHeader(b'content-encoding'))
+        self.assertEqual(headers.getRawHeaders(b'vary'),
+                         [b'accept-encoding'])
+
+
+    def test_precompressedStale(self):
+        """
+        A L{File} does not serve a compressed file older than the file
+        itself.
+        """
+        file = self._makePrecompressed()
+        modified = file.getModificationTime()
+        for name in "app.js.gz", "app.js.br":
+            os.utime(file.sibling(name).path, (modified - 10, modified - 10))
+        request = self._renderAccepting(file, b"gzip, br")
+        self.assertEqual(b''.join(request.written), b"plain")
+
+
+    def test_precompressedDisabled(self):
+        """
+        By default, a L{File} serves the file itself, whatever compressed
+        files are beside it.
+        """
+        file = self._makePrecompressed()
+        del file.precompressedEncodings
+        request = self._renderAccepting(file, b"gzip, br")
+        self.assertEqual(b''.join(request.written), b"plain")
+        self.assertFalse(request.responseHeaders.hasHeader(b'vary'))
+
+
+    def test_precompressedChild(self):
+        """
+        The children of a L{File} have its C{precompressedEncodings}.
+        """
+        file = self._makePrecompressed()
+        directory = static.File(file.dirname())
+        directory.precompressedEncodings = file.precompressedEncodings
+        child = directory.getChild(b"app.js", DummyRequest([]))
+        request = self._renderAccepting(child, b"gzip")
+        self.assertEqual(b''.join(request.written), b"gzipped")
+
+
 
 class StaticMakeProducerTests(TestCase):
     """
@@ -1046,6 +1165,147 @@ class SingleRangeStaticProducerTests(TestCase):
 
 
 
+@implementer(interfaces.ISendfileTransport)
+class SendfileTransport(StringTransport):
+    """
+    A L{StringTransport} which records calls to C{sendFile}.
+
+    @ivar files: A L{list} of the arguments of each C{sendFile} call and the
+        L{Deferred} it returned.
+    """
+
+    def __init__(self):
+        StringTransport.__init__(self)
+        self.files = []
+
+
+    def sendFile(self, fileObject, offset=0, count=None):
+        d = Deferred()
+        self.files.append((fileObject, offset, count, d))
+        return d
+
+
+
+class SendfileStaticProducerTests(TestCase):
+    """
+    Tests for L{StaticProducer}s sending files over transports which provide
+    L{interfaces.ISendfileTransport}.
+    """
+
+    def setUp(self):
+        self.transport = SendfileTransport()
+        channel = http.HTTPChannel()
+        channel.timeOut = None
+        channel.makeConnection(self.transport)
+        self.request = http.Request(channel, False)
+        channel.requests.append(self.request)
+        self.request.method = b"GET"
+        self.request.clientproto = b"HTTP/1.1"
+        self.request.setHeader(b"content-length", b"6")
+        self.fileObject = StringIO(b"abcdef")
+
+
+    def test_noRangeSendsFile(self):
+        """
+        L{NoRangeStaticProducer.start} writes the response headers and sends
+        the whole file with C{sendFile}, then finishes the request and closes
+        the file once it has been sent.
+        """
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        producer.start()
+        self.assertTrue(self.transport.value().startswith(b"HTTP/1.1 200 "))
+        [(fileObject, offset, count, d)] = self.transport.files
+        self.assertEqual((fileObject, offset, count),
+                         (self.fileObject, 0, None))
+        self.assertFalse(self.request.finished)
+
+        d.callback(6)
+        self.assertTrue(self.request.finished)
+        self.assertEqual(self.request.sentLength, 6)
+        self.assertTrue(self.fileObject.closed)
+
+
+    def test_singleRangeSendsFile(self):
+        """
+        L{SingleRangeStaticProducer.start} sends the range of the file with
+        C{sendFile}.
+        """
+        producer = static.SingleRangeStaticProducer(
+            self.request, self.fileObject, 1, 3)
+        producer.start()
+        [(fileObject, offset, count, d)] = self.transport.files
+        self.assertEqual((offset, count), (1, 3))
+        d.callback(3)
+        self.assertTrue(self.request.finished)
+
+
+    def test_connectionLostClosesFile(self):
+        """
+        If the connection is lost before the file has been sent, the file is
+        closed and the request is not finished.
+        """
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        producer.start()
+        [(fileObject, offset, count, d)] = self.transport.files
+        d.errback(ConnectionLost())
+        self.assertTrue(self.fileObject.closed)
+        self.assertFalse(self.request.finished)
+
+
+    def test_encodedResponse(self):
+        """
+        The file is written to the request rather than sent with C{sendFile}
+        if the response is being encoded.
+        """
+        self.request._encoder = object()
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        self.patch(self.request, "registerProducer",
+                   lambda producer, streaming: None)
+        producer.start()
+        self.assertEqual(self.transport.files, [])
+
+
+    def test_chunkedResponse(self):
+        """
+        The file is written to the request rather than sent with C{sendFile}
+        if the response has no I{Content-Length} and so would be chunked.
+        """
+        self.request.responseHeaders.removeHeader(b"content-length")
+        producer = static.NoRangeStaticProducer(self.request, self.fileObject)
+        self.patch(self.request, "registerProducer",
+                   lambda producer, streaming: None)
+        producer.start()
+        self.assertEqual(self.transport.files, [])
+
+
+    def test_wrappedTransport(self):
+        """
+        The file is written to the request rather than sent with C{sendFile}
+        if the channel's transport is a L{policies.ProtocolWrapper}, so that
+        the wrapper sees the whole response.
+        """
+        transport = SendfileTransport()
+        factory = policies.ThrottlingFactory(None, writeLimit=100000)
+        channel = http.HTTPChannel()
+        channel.timeOut = None
+        wrapper = factory.protocol(factory, channel)
+        wrapper.makeConnection(transport)
+        request = http.Request(channel, False)
+        channel.requests.append(request)
+        request.method = b"GET"
+        request.clientproto = b"HTTP/1.1"
+        request.setHeader(b"content-length", b"6")
+
+        producer = static.NoRangeStaticProducer(request, self.fileObject)
+        producer.start()
+        while not request.finished:
+            producer.resumeProducing()
+        self.assertEqual(transport.files, [])
+        self.assertTrue(transport.value().endswith(b"\r\n\r\nabcdef"))
+        self.assertEqual(factory.writtenThisSecond, len(transport.value()))
+
+
+
 class MultipleRangeStaticProducerTests(TestCase):
     """
     Tests for L{MultipleRangeStaticProducer}.
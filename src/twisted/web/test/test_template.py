@@ -7,14 +7,20 @@ Tests for L{twisted.web.template}
 
 from __future__ import division, absolute_import
 
+import os
+
+from collections import OrderedDict
+
 from zope.interface.verify import verifyObject
 
 from twisted.internet.defer import succeed, gatherResults
 from twisted.python.filepath import FilePath
 from twisted.trial.unittest import TestCase
 from twisted.trial.util import suppress as SUPPRESS
+from twisted.web import template
 from twisted.web.template import (
-    Element, TagLoader, renderer, tags, XMLFile, XMLString)
+    Element, TagLoader, renderer, tags, XMLFile, XMLString, flattenString,
+    TEMPLATE_NAMESPACE)
 from twisted.web.iweb import ITemplateLoader
 
 from twisted.web.error import (FlattenerError, MissingTemplateLoader,
@@ -163,6 +169,32 @@ class ElementTests(TestCase):
         self.assertEqual(element.render(None), "result")
 
 
+    def test_renderPreFlattened(self):
+        """
+        L{Element.render} returns the pre-flattened template of a loader
+        whose C{preFlatten} is set.
+        """
+        loader = TagLoader(tags.div(tags.p("static")), preFlatten=True)
+        self.assertIs(Element(loader).render(None),
+                      loader._loadPreFlattened())
+
+
+    def test_renderNotPreFlattened(self):
+        """
+        By default, L{Element.render} returns the template as loaded, so
+        changes made in place to a tag within it after it has been rendered
+        are rendered too.
+        """
+        tag = tags.div(tags.p("first"))
+        element = Element(TagLoader(tag))
+        self.assertEqual(self.successResultOf(flattenString(None, element)),
+                         b"<div><p>first</p></div>")
+        tag.children[0].children[0] = "second"
+        self.assertEqual(element.render(None), [tag])
+        self.assertEqual(self.successResultOf(flattenString(None, element)),
+                         b"<div><p>second</p></div>")
+
+
     def test_misuseRenderer(self):
         """
         If the L{renderer} decorator  is called without any arguments, it will
@@ -258,6 +290,20 @@ class XMLLoaderTestsMixin(object):
     test_loadTwice.suppress = [_xmlFileSuppress]
 
 
+    def test_loadPreFlattened(self):
+        """
+        The loader pre-flattens its template once, into something which
+        flattens as the template does.
+        """
+        loader = self.loaderFactory()
+        preFlattened = loader._loadPreFlattened()
+        self.assertIs(loader._loadPreFlattened(), preFlattened)
+        self.assertEqual(
+            self.successResultOf(flattenString(None, preFlattened)),
+            self.successResultOf(flattenString(None, loader.load())))
+    test_loadPreFlattened.suppress = [_xmlFileSuppress]
+
+
 
 class XMLStringLoaderTests(TestCase, XMLLoaderTestsMixin):
     """
@@ -318,6 +364,133 @@ class XMLFileWithFilenameTests(TestCase, XMLLoaderTestsMixin):
 
 
 
+class ParsedTemplateCacheTests(TestCase):
+    """
+    Tests for the parsed templates L{XMLString} and L{XMLFile} share.
+    """
+
+    def setUp(self):
+        self.patch(template, "_parsedTemplates", OrderedDict())
+        self.parses = []
+        parse = template._flatsaxParse
+        def countingParse(fl):
+            self.parses.append(fl)
+            return parse(fl)
+        self.patch(template, "_flatsaxParse", countingParse)
+
+
+    def flattened(self, root):
+        """
+        Flatten something which has no L{Deferred}s in it.
+
+        @rtype: L{bytes}
+        """
+        return self.successResultOf(flattenString(None, root))
+
+
+    def test_stringParsedOnce(self):
+        """
+        L{XMLString}s of the same XML share one parse, but each loads its own
+        copy of it.
+        """
+        first = XMLString('<p>Hello, <b>world</b>.</p>')
+        second = XMLString(b'<p>Hello, <b>world</b>.</p>')
+        self.assertEqual(len(self.parses), 1)
+        self.assertEqual(self.flattened(first.load()),
+                         self.flattened(second.load()))
+
+        first.load()[0].children[1].children.append(u"!")
+        self.assertEqual(second.load()[0].children[1].children, [u"world"])
+
+
+    def test_fileParsedOnce(self):
+        """
+        L{XMLFile}s of a file which has not changed share one parse, but each
+        loads its own copy of it.
+        """
+        path = FilePath(self.mktemp())
+        path.setContent(b'<p>Hello, world.</p>')
+        first = XMLFile(path).load()
+        second = XMLFile(FilePath(path.path)).load()
+        self.assertEqual(len(self.parses), 1)
+        self.assertEqual(self.flattened(first), self.flattened(second))
+        self.assertIsNot(first[0], second[0])
+
+
+    def test_fileChanged(self):
+        """
+        L{XMLFile} parses a file again once its modification time or size has
+        changed.
+        """
+        path = FilePath(self.mktemp())
+        path.setContent(b'<p>Hello, world.</p>')
+        XMLFile(path).load()
+        path.setContent(b'<p>Goodbye, world.</p>')
+        os.utime(path.path, (1, 1))
+        tag, = XMLFile(path).load()
+        self.assertEqual(len(self.parses), 2)
+        self.assertEqual(tag.children, [u'Goodbye, world.'])
+
+
+    def test_bounded(self):
+        """
+        Once it is full, the least recently used template is dropped from the
+        cache of parsed templates.
+        """
+        self.patch(template, "_MAX_PARSED_TEMPLATES", 2)
+        XMLString('<p>1</p>')
+        XMLString('<p>2</p>')
+        XMLString('<p>1</p>')
+        XMLString('<p>3</p>')
+        self.assertEqual(list(template._parsedTemplates),
+                         ['<p>1</p>', '<p>3</p>'])
+        XMLString('<p>2</p>')
+        self.assertEqual(len(self.parses), 4)
+
+
+    def test_preFlattenedShared(self):
+        """
+        L{Element}s with loaders of the same XML share its pre-flattened form,
+        and render as they would without it.
+        """
+        xml = '<div><p>static</p><p><t:slot name="x" /></p></div>'.replace(
+            '<div>', '<div xmlns:t="%s">' % (TEMPLATE_NAMESPACE,))
+        first = XMLString(xml)._loadPreFlattened()
+        second = XMLString(xml)._loadPreFlattened()
+        self.assertIs(first[0].children[0], second[0].children[0])
+        self.assertIsNot(first, second)
+        tag = tags.transparent(
+            Element(XMLString(xml, preFlatten=True))).fillSlots(x="dynamic")
+        self.assertEqual(self.flattened(tag),
+                         b'<div><p>static</p><p>dynamic</p></div>')
+
+
+    def test_preFlattenedRenderersIsolated(self):
+        """
+        Changes made by a renderer to the tags within its tag only affect the
+        L{Element} it belongs to, not other L{Element}s with loaders of the
+        same XML.
+        """
+        xml = ('<p xmlns:t="%s" t:render="append"><span>x</span></p>'
+               % (TEMPLATE_NAMESPACE,))
+
+        class AppendingElement(Element):
+            def __init__(self, suffix):
+                Element.__init__(self, XMLString(xml, preFlatten=True))
+                self.suffix = suffix
+
+            @renderer
+            def append(self, request, tag):
+                tag.children[0].children.append(self.suffix)
+                return tag
+
+        self.assertEqual(self.flattened(AppendingElement("A")),
+                         b"<p><span>xA</span></p>")
+        self.assertEqual(self.flattened(AppendingElement("B")),
+                         b"<p><span>xB</span></p>")
+
+
+
 class FlattenIntegrationTests(FlattenTestCase):
     """
     Tests for integration between L{Element} and
@@ -634,6 +807,17 @@ class TagLoaderTests(FlattenTestCase):
         self.assertFlattensImmediately(e, b'<i>test</i>')
 
 
+    def test_newTag(self):
+        """
+        An L{Element} using a L{TagLoader} renders the loader's current
+        C{tag}, even after rendering an earlier one.
+        """
+        e = Element(self.loader)
+        self.assertFlattensImmediately(e, b'<i>test</i>')
+        self.loader.tag = tags.b('other')
+        self.assertFlattensImmediately(e, b'<b>other</b>')
+
+
 
 class TestElement(Element):
     """
@@ -806,6 +990,28 @@ class RenderElementTests(TestCase):
         return d
 
 
+    def test_writesCoalesced(self):
+        """
+        L{renderElement} writes the doctype and the rendered element to the
+        request in one piece each, rather than one piece for each tag and
+        string in the element.
+        """
+        element = Element(TagLoader(tags.div(tags.p("a"), tags.p("b"))))
+
+        d = self.request.notifyFinish()
+
+        def check(_):
+            self.assertEqual(
+                self.request.written,
+                [b'<!DOCTYPE html>\n', b'<div><p>a</p><p>b</p></div>'])
+
+        d.addCallback(check)
+
+        renderElement(self.request, element)
+
+        return d
+
+
     def test_noneDoctype(self):
         """
         L{renderElement} will not write out a doctype if the doctype keyword
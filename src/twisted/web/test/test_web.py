@@ -26,6 +26,16 @@ from twisted.web.static import Data
 from twisted.logger import globalLogPublisher, LogLevel
 from twisted.test.proto_helpers import EventLoggingObserver
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
 
 class ResourceTests(unittest.TestCase):
     def testListEntities(self):
@@ -597,6 +607,36 @@ class RequestTests(unittest.TestCase):
         self.assertEqual(request.prePathURL(), b'http://example.com/foo%2Fbar')
 
 
+    def test_processDateFromSite(self):
+        """
+        L{server.Request.process} sets the I{Date} header to the value cached
+        by its site.
+        """
+        d = DummyChannel()
+        d.site = server.Site(resource.Resource())
+        d.site._dateHeader = b"Fri, 13 Feb 2009 23:31:30 GMT"
+        request = server.Request(d, 1)
+        request.gotLength(0)
+        request.requestReceived(b'GET', b'/', b'HTTP/1.0')
+        self.assertEqual(request.responseHeaders.getRawHeaders(b'date'),
+                         [b"Fri, 13 Feb 2009 23:31:30 GMT"])
+
+
+    def test_processDateWithoutCache(self):
+        """
+        L{server.Request.process} formats the I{Date} header itself when its
+        site has no cached value for it, because the site is not started.
+        """
+        self.patch(http, "datetimeToString", lambda: b"right now")
+        d = DummyChannel()
+        d.site = server.Site(resource.Resource())
+        request = server.Request(d, 1)
+        request.gotLength(0)
+        request.requestReceived(b'GET', b'/', b'HTTP/1.0')
+        self.assertEqual(request.responseHeaders.getRawHeaders(b'date'),
+                         [b"right now"])
+
+
     def test_processingFailedNoTraceback(self):
         """
         L{Request.processingFailed} when the site has C{displayTracebacks} set
@@ -924,7 +964,7 @@ class GzipEncoderTests(unittest.TestCase):
         """
         L{server.GzipEncoderFactory} implements the
         L{iweb._IRequestEncoderFactory} and its C{encoderForRequest} returns an
-        instance of L{server._GzipEncoder} which implements
+        instance of L{server._CompressingEncoder} which implements
         L{iweb._IRequestEncoder}.
         """
         request = server.Request(self.channel, False)
@@ -941,7 +981,7 @@ class GzipEncoderTests(unittest.TestCase):
     def test_encoding(self):
         """
         If the client request passes a I{Accept-Encoding} header which mentions
-        gzip, L{server._GzipEncoder} automatically compresses the data.
+        gzip, L{server._CompressingEncoder} automatically compresses the data.
         """
         request = server.Request(self.channel, False)
         request.gotLength(0)
@@ -960,7 +1000,7 @@ class GzipEncoderTests(unittest.TestCase):
         """
         If the client request passes a I{Accept-Encoding} header which mentions
         gzip, with whitespace inbetween the encoding name and the commas,
-        L{server._GzipEncoder} automatically compresses the data.
+        L{server._CompressingEncoder} automatically compresses the data.
         """
         request = server.Request(self.channel, False)
         request.gotLength(0)
@@ -977,8 +1017,9 @@ class GzipEncoderTests(unittest.TestCase):
 
     def test_nonEncoding(self):
         """
-        L{server.GzipEncoderFactory} doesn't return a L{server._GzipEncoder} if
-        the I{Accept-Encoding} header doesn't mention gzip support.
+        L{server.GzipEncoderFactory} doesn't return a
+        L{server._CompressingEncoder} if the I{Accept-Encoding} header doesn't
+        mention gzip support.
         """
         request = server.Request(self.channel, False)
         request.gotLength(0)
@@ -1052,6 +1093,168 @@ class GzipEncoderTests(unittest.TestCase):
                          zlib.decompress(body, 16 + zlib.MAX_WBITS))
 
 
+    def respond(self, acceptEncoding, factory, type="text/plain"):
+        """
+        Respond to a request with some data, compressing it with an encoder
+        from C{factory}.
+
+        @param acceptEncoding: The I{Accept-Encoding} header of the request.
+        @param factory: The encoder factory.
+        @param type: The I{Content-Type} of the data.
+
+        @return: The response's headers and body.
+        @rtype: L{tuple} of two L{bytes}
+        """
+        wrapped = resource.EncodingResourceWrapper(
+            Data(b"Some data" * 10, type), [factory])
+        self.channel.site.resource.putChild(b"bar", wrapped)
+        request = server.Request(self.channel, False)
+        request.gotLength(0)
+        request.requestHeaders.setRawHeaders(b"Accept-Encoding",
+                                             [acceptEncoding])
+        request.requestReceived(b'GET', b'/bar', b'HTTP/1.0')
+        data = self.channel.transport.written.getvalue()
+        headers, body = data.split(b"\r\n\r\n", 1)
+        return headers + b"\r\n", body
+
+
+    def test_quality(self):
+        """
+        L{server.GzipEncoderFactory} compresses the response if the client
+        gives gzip a quality value above 0, or accepts any encoding, and not
+        if it gives gzip a quality value of 0.
+        """
+        for acceptEncoding, encoded in [(b"gzip;q=0.5", True),
+                                        (b"deflate, GZIP ; q=1", True),
+                                        (b"*", True),
+                                        (b"gzip;q=0", False),
+                                        (b"gzip;q=0.0, *", False),
+                                        (b"*;q=0", False)]:
+            headers, body = self.respond(
+                acceptEncoding, server.GzipEncoderFactory())
+            self.channel.transport.written.truncate(0)
+            self.channel.transport.written.seek(0)
+            self.assertEqual(
+                b"Content-Encoding: gzip\r\n" in headers, encoded,
+                acceptEncoding)
+
+
+    def test_minimumLength(self):
+        """
+        L{server.GzipEncoderFactory} does not compress responses whose
+        I{Content-Length} is less than C{minimumLength}.
+        """
+        factory = server.GzipEncoderFactory()
+        factory.minimumLength = 91
+        headers, body = self.respond(b"gzip", factory)
+        self.assertIn(b"Content-Length: 90\r\n", headers)
+        self.assertNotIn(b"Content-Encoding", headers)
+        self.assertEqual(body, b"Some data" * 10)
+
+
+    def test_contentTypes(self):
+        """
+        If L{server.GzipEncoderFactory} has C{contentTypes}, it compresses
+        only responses with those media types, and all the subtypes of types
+        ending with C{/*}.
+        """
+        factory = server.GzipEncoderFactory()
+        factory.contentTypes = [b"application/json", b"text/*"]
+        for type, encoded in [("text/plain", True),
+                              ("Application/JSON; charset=utf-8", True),
+                              ("image/png", False)]:
+            headers, body = self.respond(b"gzip", factory, type)
+            self.channel.transport.written.truncate(0)
+            self.channel.transport.written.seek(0)
+            self.assertEqual(
+                b"Content-Encoding: gzip\r\n" in headers, encoded, type)
+
+
+    def test_loadCompressLevel(self):
+        """
+        If L{server.GzipEncoderFactory} has a C{loadCompressLevel}, it uses it
+        once compressing has taken more than C{maximumLoad} of the time over
+        a second, and goes back to C{compressLevel} when that is no longer
+        so.
+        """
+        clock = Clock()
+        self.patch(server, "_clock", clock.seconds)
+        factory = server.GzipEncoderFactory()
+        factory.loadCompressLevel = 1
+        self.assertEqual(factory._currentCompressLevel(), 9)
+
+        clock.advance(1)
+        factory._compressed(0.8)
+        self.assertEqual(factory._currentCompressLevel(), 1)
+        levels = []
+        compressor = factory._compressor
+        factory._compressor = lambda level: (
+            levels.append(level) or compressor(level))
+        self.respond(b"gzip", factory)
+        self.assertEqual(levels, [1])
+
+        clock.advance(2)
+        self.assertEqual(factory._currentCompressLevel(), 9)
+
+
+    def test_gzipByDefault(self):
+        """
+        The base class of the compressing encoder factories compresses
+        responses with gzip.
+        """
+        headers, body = self.respond(b"gzip",
+                                     server._CompressingEncoderFactory())
+        self.assertIn(b"Content-Encoding: gzip\r\n", headers)
+        self.assertEqual(zlib.decompress(body, 16 + zlib.MAX_WBITS),
+                         b"Some data" * 10)
+
+
+    def test_brotli(self):
+        """
+        L{server.BrotliEncoderFactory} compresses the response with brotli if
+        the client accepts it.
+        """
+        headers, body = self.respond(b"gzip, br",
+                                     server.BrotliEncoderFactory())
+        self.assertIn(b"Content-Encoding: br\r\n", headers)
+        self.assertEqual(brotli.decompress(body), b"Some data" * 10)
+
+    if brotli is None:
+        test_brotli.skip = "brotli is not installed"
+
+
+    def test_zstandard(self):
+        """
+        L{server.ZstandardEncoderFactory} compresses the response with
+        Zstandard if the client accepts it.
+        """
+        headers, body = self.respond(b"zstd",
+                                     server.ZstandardEncoderFactory())
+        self.assertIn(b"Content-Encoding: zstd\r\n", headers)
+        self.assertEqual(
+            zstandard.ZstdDecompressor().decompressobj().decompress(body),
+            b"Some data" * 10)
+
+    if zstandard is None:
+        test_zstandard.skip = "zstandard is not installed"
+
+
+    def test_moduleUnavailable(self):
+        """
+        L{server.BrotliEncoderFactory} and L{server.ZstandardEncoderFactory}
+        do not compress responses if the modules they need are missing.
+        """
+        self.patch(server, "brotli", None)
+        self.patch(server, "zstandard", None)
+        for encoding, factory in [(b"br", server.BrotliEncoderFactory()),
+                                  (b"zstd", server.ZstandardEncoderFactory())]:
+            headers, body = self.respond(encoding, factory)
+            self.channel.transport.written.truncate(0)
+            self.channel.transport.written.seek(0)
+            self.assertNotIn(b"Content-Encoding", headers)
+            self.assertEqual(body, b"Some data" * 10)
+
+
 
 class RootResource(resource.Resource):
     isLeaf = 0
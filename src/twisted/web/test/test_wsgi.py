@@ -8,6 +8,7 @@ Tests for L{twisted.web.wsgi}.
 __metaclass__ = type
 
 from sys import exc_info
+from threading import Event
 import tempfile
 import traceback
 import warnings
@@ -2212,3 +2213,267 @@ class ApplicationTests(WSGITestsMixin, TestCase):
                 raise RuntimeError("This application had some error.")
 
         return self._connectionClosedTest(Application, responseContent)
+
+
+
+class QueueingReactorThreads:
+    """
+    A single-threaded implementation of part of the L{IReactorThreads}
+    interface which keeps the functions it is given to call until
+    L{QueueingReactorThreads.runCalls} is called.
+
+    @ivar calls: The functions, with their arguments, not yet called.
+    """
+    def __init__(self):
+        self.calls = []
+
+
+    def callFromThread(self, f, *a, **kw):
+        """
+        Keep C{f(*a, **kw)} to be called later.
+        """
+        self.calls.append((f, a, kw))
+
+
+    def runCalls(self):
+        """
+        Call everything kept so far, in order.
+        """
+        calls, self.calls = self.calls, []
+        for f, a, kw in calls:
+            f(*a, **kw)
+
+
+
+class QueueingThreadPool:
+    """
+    A single-threaded implementation of part of the L{ThreadPool} interface
+    which keeps the functions it is given to call, as if all of its threads
+    were busy, until L{QueueingThreadPool.runCalls} is called.
+    """
+    def __init__(self):
+        self.calls = []
+
+
+    def callInThread(self, f, *a, **kw):
+        """
+        Keep C{f(*a, **kw)} to be called later.
+        """
+        self.calls.append((f, a, kw))
+
+
+    def runCalls(self):
+        """
+        Call everything kept so far, in order.
+        """
+        calls, self.calls = self.calls, []
+        for f, a, kw in calls:
+            f(*a, **kw)
+
+
+
+class WSGIResourceOptionsTests(TestCase):
+    """
+    Tests for the C{maxQueuedRequests} and C{writeBufferSize} options of
+    L{WSGIResource}, and for L{WSGIResource.statistics}.
+    """
+    def render(self, resource, requestClass=Request):
+        """
+        Have C{resource} render a I{GET} request.
+
+        @return: A two-tuple of the request and its channel.
+        """
+        channel = DummyChannel()
+        channel.site = Site(resource)
+        request = requestClass(channel, False)
+        request.gotLength(0)
+        request.requestReceived(b'GET', b'/', b'HTTP/1.0')
+        return request, channel
+
+
+    def getContent(self, channel):
+        """
+        Get the response body written to C{channel}.
+        """
+        return channel.transport.written.getvalue().split(
+            b'\r\n\r\n', 1)[1]
+
+
+    def test_statistics(self):
+        """
+        L{WSGIResource.statistics} counts requests waiting for a thread, then
+        running, and the most which have been waiting at once.
+        """
+        running = []
+
+        def application(environ, startResponse):
+            running.append(resource.statistics())
+            startResponse('200 OK', [])
+            return iter(())
+
+        threadpool = QueueingThreadPool()
+        resource = WSGIResource(
+            SynchronousReactorThreads(), threadpool, application)
+        self.render(resource)
+        self.render(resource)
+
+        queued = resource.statistics()
+        self.assertEqual(
+            (queued.queued, queued.maxQueued, queued.running,
+             queued.rejected),
+            (2, 2, 0, 0))
+
+        threadpool.runCalls()
+        self.assertEqual([(s.queued, s.running) for s in running],
+                         [(1, 1), (0, 1)])
+        done = resource.statistics()
+        self.assertEqual(
+            (done.queued, done.maxQueued, done.running, done.rejected),
+            (0, 2, 0, 0))
+
+
+    def test_maxQueuedRequests(self):
+        """
+        Once C{maxQueuedRequests} requests are waiting for a thread, further
+        requests are answered with I{503 Service Unavailable} without
+        running the application, and counted as rejected.
+        """
+        called = []
+
+        def application(environ, startResponse):
+            called.append(environ['PATH_INFO'])
+            startResponse('200 OK', [])
+            return iter(())
+
+        threadpool = QueueingThreadPool()
+        resource = WSGIResource(
+            SynchronousReactorThreads(), threadpool, application,
+            maxQueuedRequests=1)
+        first, _ = self.render(resource)
+        second, _ = self.render(resource)
+
+        self.assertEqual(second.code, http.SERVICE_UNAVAILABLE)
+        self.assertTrue(second.finished)
+        self.assertFalse(first.finished)
+        self.assertEqual(resource.statistics().rejected, 1)
+
+        threadpool.runCalls()
+        self.assertEqual(called, ['/'])
+        self.assertEqual(first.code, http.OK)
+        self.assertTrue(first.finished)
+
+        third, _ = self.render(resource)
+        self.assertFalse(third.finished)
+        self.assertEqual(resource.statistics().rejected, 1)
+
+
+    def test_bufferedWritesCoalesced(self):
+        """
+        With a C{writeBufferSize}, data written by the application before the
+        I/O thread gets to it is written to the request at once.
+        """
+        writes = []
+
+        class RecordingRequest(Request):
+            def write(self, data):
+                writes.append(data)
+                return Request.write(self, data)
+
+        def application(environ, startResponse):
+            write = startResponse('200 OK', [])
+            write(b'foo')
+            write(b'bar')
+            return iter([b'baz', b'quux'])
+
+        reactor = QueueingReactorThreads()
+        resource = WSGIResource(
+            reactor, SynchronousThreadPool(), application,
+            writeBufferSize=1024)
+        request, channel = self.render(resource, RecordingRequest)
+        self.assertEqual(len(reactor.calls), 2)
+        reactor.runCalls()
+
+        self.assertEqual(writes, [b'foobarbazquux'])
+        self.assertTrue(request.finished)
+        self.assertIsNone(request.producer)
+        self.assertEqual(self.getContent(channel), b'foobarbazquux')
+
+
+    def test_bufferedWriteFailure(self):
+        """
+        With a C{writeBufferSize}, an exception from writing buffered data to
+        the request is raised in the application the next time it writes.
+        """
+        class ArbitraryError(Exception):
+            pass
+
+        class FailingRequest(Request):
+            def write(self, data):
+                if data:
+                    raise ArbitraryError()
+                return Request.write(self, data)
+
+        errors = []
+
+        def application(environ, startResponse):
+            write = startResponse('200 OK', [])
+            write(b'foo')
+            try:
+                write(b'bar')
+            except ArbitraryError:
+                errors.append(True)
+            return iter(())
+
+        resource = WSGIResource(
+            SynchronousReactorThreads(), SynchronousThreadPool(),
+            application, writeBufferSize=1024)
+        self.render(resource, FailingRequest)
+        self.assertEqual(errors, [True])
+
+
+    def test_bufferedWritesWaitWhilePaused(self):
+        """
+        With a C{writeBufferSize}, the application is registered as the
+        request's producer, and waits to write while it is paused.
+        """
+        threadpool = ThreadPool()
+        threadpool.start()
+        self.addCleanup(threadpool.stop)
+        events = []
+        paused = Event()
+
+        class PausingRequest(Request):
+            def write(self, data):
+                Request.write(self, data)
+                if data == b'foo':
+                    self.producer.pauseProducing()
+                    paused.set()
+                    reactor.callLater(0, self.resume)
+
+            def resume(self):
+                events.append('resumed')
+                self.producer.resumeProducing()
+
+        def application(environ, startResponse):
+            write = startResponse('200 OK', [])
+            write(b'foo')
+            paused.wait()
+            write(b'bar')
+            events.append('wrote')
+            return iter(())
+
+        finished = Deferred()
+
+        class NotifyingRequest(PausingRequest):
+            def __init__(self, *a, **kw):
+                PausingRequest.__init__(self, *a, **kw)
+                self.notifyFinish().chainDeferred(finished)
+
+        resource = WSGIResource(
+            reactor, threadpool, application, writeBufferSize=1024)
+        request, channel = self.render(resource, NotifyingRequest)
+
+        def cbFinished(ignored):
+            self.assertEqual(events, ['resumed', 'wrote'])
+            self.assertEqual(self.getContent(channel), b'foobar')
+        return finished.addCallback(cbFinished)
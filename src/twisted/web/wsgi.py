@@ -9,16 +9,18 @@ U{Python Web Server Gateway Interface v1.0.1<http://www.python.org/dev/peps/pep-
 __metaclass__ = type
 
 from sys import exc_info
+from threading import Condition, Lock
 from warnings import warn
 
 from zope.interface import implementer
 
+from twisted.internet.interfaces import IPushProducer
 from twisted.internet.threads import blockingCallFromThread
 from twisted.python.compat import reraise, Sequence
 from twisted.python.failure import Failure
 from twisted.web.resource import IResource
 from twisted.web.server import NOT_DONE_YET
-from twisted.web.http import INTERNAL_SERVER_ERROR
+from twisted.web.http import INTERNAL_SERVER_ERROR, SERVICE_UNAVAILABLE
 from twisted.logger import Logger
 
 
@@ -234,6 +236,97 @@ class _InputStream:
 
 
 
+class _WSGIStatistics:
+    """
+    Counts of the requests a L{WSGIResource} is handling.  These are updated
+    in both the I/O thread and WSGI application threads.
+
+    @ivar queued: The number of requests waiting for a thread to run the
+        application in.
+    @type queued: L{int}
+
+    @ivar maxQueued: The most requests which have been waiting for a thread
+        at once.
+    @type maxQueued: L{int}
+
+    @ivar running: The number of requests the application is running for.
+    @type running: L{int}
+
+    @ivar rejected: The number of requests answered with I{503 Service
+        Unavailable}, rather than queued, because too many requests were
+        queued already.
+    @type rejected: L{int}
+    """
+
+    def __init__(self):
+        self.queued = 0
+        self.maxQueued = 0
+        self.running = 0
+        self.rejected = 0
+        self._lock = Lock()
+
+
+    def copy(self):
+        """
+        Take a snapshot of these counts.
+
+        @rtype: L{_WSGIStatistics}
+        """
+        with self._lock:
+            copy = _WSGIStatistics()
+            copy.queued = self.queued
+            copy.maxQueued = self.maxQueued
+            copy.running = self.running
+            copy.rejected = self.rejected
+        return copy
+
+
+    def requestQueued(self, maxQueued):
+        """
+        Count a request as waiting for a thread, unless too many are already.
+
+        This is called in the I/O thread.
+
+        @param maxQueued: The most requests which may wait for a thread, or
+            L{None} for no limit.
+        @type maxQueued: L{int} or L{None}
+
+        @return: L{True} if the request was counted, or L{False} if it was
+            counted as rejected instead.
+        @rtype: L{bool}
+        """
+        with self._lock:
+            if maxQueued is not None and self.queued >= maxQueued:
+                self.rejected += 1
+                return False
+            self.queued += 1
+            self.maxQueued = max(self.maxQueued, self.queued)
+            return True
+
+
+    def requestStarted(self):
+        """
+        Count a request which was waiting for a thread as running.
+
+        This is called in a WSGI application thread.
+        """
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+
+
+    def requestDone(self):
+        """
+        Count a request as no longer running.
+
+        This is called in a WSGI application thread.
+        """
+        with self._lock:
+            self.running -= 1
+
+
+
+@implementer(IPushProducer)
 class _WSGIResponse:
     """
     Helper for L{WSGIResource} which drives the WSGI application using a
@@ -266,17 +359,65 @@ class _WSGIResponse:
         generate more response data or not.  This is L{False} until
         L{http.Request.notifyFinish} tells us the request is done,
         then L{True}.
+
+    @ivar _statistics: The counts to update as the application is run for
+        the request, or L{None}.
+    @type _statistics: L{_WSGIStatistics} or L{None}
+
+    @ivar _writeBufferSize: If not L{None}, the number of bytes the
+        application may write before it waits for them to be written to the
+        request.  Writes are then collected and written to the request in the
+        I/O thread together, rather than each waiting for its own round trip
+        to the I/O thread.
+    @type _writeBufferSize: L{int} or L{None}
+
+    @ivar _writeCondition: A L{Condition} which guards the attributes used
+        to buffer writes, and which is notified when the application may be
+        able to write more.
+
+    @ivar _pending: Data written by the application which has not yet been
+        written to the request.
+    @type _pending: L{list} of L{bytes}
+
+    @ivar _pendingLength: The total length of C{_pending}.
+
+    @ivar _flushScheduled: Whether a call to L{_WSGIResponse._flush} is
+        scheduled in the I/O thread.  There always is one while C{_pending}
+        is not empty.
+
+    @ivar _paused: Whether the request's transport has asked for no more
+        data for now, in which case the application waits before it writes
+        more.
+
+    @ivar _producing: Whether this is registered as the request's producer,
+        which it is once the response headers have been written, while
+        writes are buffered.
+
+    @ivar _writeFailure: A L{Failure} from writing buffered data to the
+        request, raised in the application the next time it writes, or
+        L{None}.
     """
 
     _requestFinished = False
+    _paused = False
+    _producing = False
+    _writeFailure = None
     _log = Logger()
 
-    def __init__(self, reactor, threadpool, application, request):
+    def __init__(self, reactor, threadpool, application, request,
+                 statistics=None, writeBufferSize=None):
         self.started = False
         self.reactor = reactor
         self.threadpool = threadpool
         self.application = application
         self.request = request
+        self._statistics = statistics
+        self._writeBufferSize = writeBufferSize
+        if writeBufferSize is not None:
+            self._writeCondition = Condition()
+            self._pending = []
+            self._pendingLength = 0
+            self._flushScheduled = False
         self.request.notifyFinish().addBoth(self._finished)
 
         if request.prepath:
@@ -352,7 +493,44 @@ class _WSGIResponse:
         Record the end of the response generation for the request being
         serviced.
         """
-        self._requestFinished = True
+        if self._writeBufferSize is None:
+            self._requestFinished = True
+            return
+        with self._writeCondition:
+            self._requestFinished = True
+            self._writeCondition.notify_all()
+
+
+    def pauseProducing(self):
+        """
+        Make the application wait before writing more, because the request's
+        transport has as much data as it wants for now.
+
+        This is called in the I/O thread.
+        """
+        with self._writeCondition:
+            self._paused = True
+
+
+    def resumeProducing(self):
+        """
+        Let the application write more.
+
+        This is called in the I/O thread.
+        """
+        with self._writeCondition:
+            self._paused = False
+            self._writeCondition.notify_all()
+
+
+    def stopProducing(self):
+        """
+        Stop the application writing, because the request's connection was
+        lost.
+
+        This is called in the I/O thread.
+        """
+        self._finished(None)
 
 
     def startResponse(self, status, headers, excInfo=None):
@@ -450,8 +628,12 @@ class _WSGIResponse:
         # Which suggests that this is actually compliant with PEP-3333,
         # because writes are done in the reactor thread.
         #
-        # However, providing some back-pressure may nevertheless be a Good
-        # Thing at some point in the future.
+        # With a write buffer size, writes are instead collected and written
+        # by the reactor thread together, and back-pressure comes from the
+        # request's transport pausing this as its producer.
+        if self._writeBufferSize is not None:
+            self._bufferedWrite(data)
+            return
 
         def wsgiWrite(started):
             if not started:
@@ -465,6 +647,79 @@ class _WSGIResponse:
             self.started = True
 
 
+    def _bufferedWrite(self, data):
+        """
+        Collect some data to be written to the request in the I/O thread,
+        then wait while too much data has been collected or the request's
+        transport is paused.
+
+        This will be called in a non-I/O thread.
+
+        @param data: The data to write.
+        @type data: L{bytes}
+        """
+        with self._writeCondition:
+            if self._writeFailure is not None:
+                self._writeFailure.raiseException()
+            self._pending.append(data)
+            self._pendingLength += len(data)
+            scheduleFlush = not self._flushScheduled
+            self._flushScheduled = True
+        self.started = True
+        if scheduleFlush:
+            self.reactor.callFromThread(self._flush)
+        with self._writeCondition:
+            while ((self._paused or
+                    self._pendingLength > self._writeBufferSize) and
+                   not self._requestFinished):
+                self._writeCondition.wait()
+
+
+    def _flush(self):
+        """
+        Write the data collected by L{_WSGIResponse._bufferedWrite} to the
+        request, first writing the response headers and registering as the
+        request's producer if this is the first write.
+
+        This must be called in the I/O thread.
+        """
+        with self._writeCondition:
+            data = b''.join(self._pending)
+            self._pending = []
+            self._pendingLength = 0
+            self._flushScheduled = False
+            self._writeCondition.notify_all()
+        if self._requestFinished:
+            return
+        try:
+            if not self._producing:
+                self._sendResponseHeaders()
+                self.request.registerProducer(self, True)
+                self._producing = True
+            self.request.write(data)
+        except:
+            with self._writeCondition:
+                self._writeFailure = Failure()
+                self._writeCondition.notify_all()
+
+
+    def _finishWrites(self):
+        """
+        Write anything still buffered to the request, and unregister as its
+        producer.
+
+        This must be called in the I/O thread, after the application is done
+        writing.
+        """
+        if self._writeBufferSize is None:
+            return
+        if self._pending:
+            self._flush()
+        if self._producing:
+            self._producing = False
+            self.request.unregisterProducer()
+
+
     def _sendResponseHeaders(self):
         """
         Set the response code and response headers on the request object, but
@@ -501,6 +756,8 @@ class _WSGIResponse:
         This must be called in a non-I/O thread (ie, a WSGI application
         thread).
         """
+        if self._statistics is not None:
+            self._statistics.requestStarted()
         try:
             appIterator = self.application(self.environ, self.startResponse)
             for elem in appIterator:
@@ -517,6 +774,7 @@ class _WSGIResponse:
                     "WSGI application error",
                     failure=Failure(value, type, traceback)
                 )
+                self._finishWrites()
                 if started:
                     self.request.loseConnection()
                 else:
@@ -526,11 +784,14 @@ class _WSGIResponse:
         else:
             def wsgiFinish(started):
                 if not self._requestFinished:
+                    self._finishWrites()
                     if not started:
                         self._sendResponseHeaders()
                     self.request.finish()
             self.reactor.callFromThread(wsgiFinish, self.started)
         self.started = True
+        if self._statistics is not None:
+            self._statistics.requestDone()
 
 
 
@@ -547,16 +808,61 @@ class WSGIResource:
         L{_WSGIResponse} to run the WSGI application object.
 
     @ivar _application: The WSGI application object.
+
+    @ivar _maxQueuedRequests: The most requests which may wait for a thread
+        in C{_threadpool}, beyond which requests are answered with I{503
+        Service Unavailable}, or L{None} for no limit.
+    @type _maxQueuedRequests: L{int} or L{None}
+
+    @ivar _writeBufferSize: See L{_WSGIResponse._writeBufferSize}.
+
+    @ivar _statistics: Counts of the requests this resource is handling.
+    @type _statistics: L{_WSGIStatistics}
     """
 
     # Further resource segments are left up to the WSGI application object to
     # handle.
     isLeaf = True
 
-    def __init__(self, reactor, threadpool, application):
+    def __init__(self, reactor, threadpool, application,
+                 maxQueuedRequests=None, writeBufferSize=None):
+        """
+        @param reactor: See C{_reactor}.
+
+        @param threadpool: See C{_threadpool}.  A pool used only for this
+            resource, with a bound on its threads, works best with
+            C{maxQueuedRequests}.
+
+        @param application: See C{_application}.
+
+        @param maxQueuedRequests: The most requests which may wait for a
+            thread before further requests are refused, or L{None} for no
+            limit.
+        @type maxQueuedRequests: L{int} or L{None}
+
+        @param writeBufferSize: If not L{None}, the number of bytes the
+            application may write before it waits for them to be written to
+            the request, with its writes collected in between.  Otherwise,
+            each write waits until the request has been given its data.
+        @type writeBufferSize: L{int} or L{None}
+        """
         self._reactor = reactor
         self._threadpool = threadpool
         self._application = application
+        self._maxQueuedRequests = maxQueuedRequests
+        self._writeBufferSize = writeBufferSize
+        self._statistics = _WSGIStatistics()
+
+
+    def statistics(self):
+        """
+        Get the number of requests this resource has queued for a thread, is
+        running the application for, and has refused.
+
+        @return: A snapshot of the counts.
+        @rtype: L{_WSGIStatistics}
+        """
+        return self._statistics.copy()
 
 
     def render(self, request):
@@ -569,8 +875,12 @@ class WSGIResource:
         and response completion will be dictated by the application object, as
         will the status, headers, and the response body.
         """
+        if not self._statistics.requestQueued(self._maxQueuedRequests):
+            request.setResponseCode(SERVICE_UNAVAILABLE)
+            return b''
         response = _WSGIResponse(
-            self._reactor, self._threadpool, self._application, request)
+            self._reactor, self._threadpool, self._application, request,
+            self._statistics, self._writeBufferSize)
         response.start()
         return NOT_DONE_YET
 